@@ -0,0 +1,31 @@
+"""Add composite (date DESC, fid DESC) index for keyset pagination of flights
+
+Revision ID: a3f1c9d2e7b4
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-17
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "a3f1c9d2e7b4"
+down_revision: str | None = "e1f2a3b4c5d6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_flights_table_date_fid",
+        "flights_table",
+        [sa.text("date DESC"), sa.text("fid DESC")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_flights_table_date_fid", table_name="flights_table")
@@ -0,0 +1,69 @@
+"""Add pg_trgm GIN indexes for substring (ILIKE '%...%') filters
+
+Revision ID: b7c2d9e4f1a6
+Revises: a3f1c9d2e7b4
+Create Date: 2026-10-17
+
+Covers the flight list filters (airtask, flight_action, departure_time) and the
+crew name search. Only PostgreSQL is affected; when pg_trgm cannot be enabled
+(not installed, or no privilege to CREATE EXTENSION) the indexes are skipped and
+the filters keep working as sequential scans.
+"""
+
+import logging
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "b7c2d9e4f1a6"
+down_revision: str | None = "a3f1c9d2e7b4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+TRIGRAM_INDEXES = (
+    ("ix_flights_table_airtask_trgm", "flights_table", "airtask"),
+    ("ix_flights_table_flight_action_trgm", "flights_table", "flight_action"),
+    ("ix_flights_table_departure_time_trgm", "flights_table", "departure_time"),
+    ("ix_tripulantes_name_trgm", "tripulantes", "name"),
+)
+
+
+def _enable_pg_trgm() -> bool:
+    """Try to enable pg_trgm; return False (leaving the migration transaction usable) if it can't be."""
+    if op.get_context().as_sql:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        return True
+    bind = op.get_bind()
+    try:
+        with bind.begin_nested():
+            bind.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except sa.exc.DBAPIError as e:
+        logger.warning("pg_trgm unavailable, skipping trigram indexes: %s", e.orig)
+        return False
+    return True
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != "postgresql" or not _enable_pg_trgm():
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        op.create_index(
+            name,
+            table,
+            [column],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        return
+    for name, table, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
+    # The pg_trgm extension itself is left installed; other objects may use it.
@@ -0,0 +1,87 @@
+"""Add flight_qualification_events (qualifications validated per pilot and flight)
+
+Revision ID: c4e8f2a9d1b7
+Revises: b7c2d9e4f1a6
+Create Date: 2026-10-17
+
+Derived from flight_pilots (qual1-qual6 ids and the landing counters) so that
+"last validation of qualification Q by pilot P, excluding flight X" is one
+index lookup. The table is backfilled here; afterwards the flight write paths
+keep it in sync (scripts/backfill_flight_qualification_events.py rebuilds it).
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "c4e8f2a9d1b7"
+down_revision: str | None = "b7c2d9e4f1a6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Same derivation as FlightRepository.replace_qualification_events
+BACKFILL_SQL = """
+INSERT INTO flight_qualification_events (pilot_id, qualificacao_id, flight_id, date)
+SELECT fp.pilot_id, q.id, f.fid, f.date
+FROM flight_pilots fp
+JOIN flights_table f ON f.fid = fp.flight_id
+JOIN qualificacoes q ON CAST(q.id AS VARCHAR) IN (fp.qual1, fp.qual2, fp.qual3, fp.qual4, fp.qual5, fp.qual6)
+UNION
+SELECT fp.pilot_id, lq.id, f.fid, f.date
+FROM flight_pilots fp
+JOIN flights_table f ON f.fid = fp.flight_id
+JOIN tripulantes t ON t.nip = fp.pilot_id
+JOIN (
+    SELECT payload_key, tipo_aplicavel, MIN(id) AS id
+    FROM qualificacoes
+    WHERE payload_key IN ('ATR', 'ATN', 'precapp', 'nprecapp')
+    GROUP BY payload_key, tipo_aplicavel
+) lq ON lq.tipo_aplicavel = t.tipo
+WHERE (lq.payload_key = 'ATR' AND fp.day_landings > 0)
+   OR (lq.payload_key = 'ATN' AND fp.night_landings > 0)
+   OR (lq.payload_key = 'precapp' AND fp.prec_app > 0)
+   OR (lq.payload_key = 'nprecapp' AND fp.nprec_app > 0)
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "flight_qualification_events",
+        sa.Column("pilot_id", sa.Integer(), nullable=False),
+        sa.Column("qualificacao_id", sa.Integer(), nullable=False),
+        sa.Column("flight_id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.ForeignKeyConstraint(["pilot_id"], ["tripulantes.nip"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["qualificacao_id"], ["qualificacoes.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["flight_id"], ["flights_table.fid"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("pilot_id", "qualificacao_id", "flight_id"),
+    )
+    op.execute(sa.text(BACKFILL_SQL))
+    # Indexes after the bulk insert: cheaper than maintaining them row by row
+    op.create_index(
+        "ix_flight_qualification_events_pilot_qual_date",
+        "flight_qualification_events",
+        ["pilot_id", "qualificacao_id", sa.text("date DESC")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_flight_qualification_events_qualificacao_id",
+        "flight_qualification_events",
+        ["qualificacao_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_flight_qualification_events_flight_id",
+        "flight_qualification_events",
+        ["flight_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_flight_qualification_events_flight_id", table_name="flight_qualification_events")
+    op.drop_index("ix_flight_qualification_events_qualificacao_id", table_name="flight_qualification_events")
+    op.drop_index("ix_flight_qualification_events_pilot_qual_date", table_name="flight_qualification_events")
+    op.drop_table("flight_qualification_events")
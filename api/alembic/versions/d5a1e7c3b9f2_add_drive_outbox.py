@@ -0,0 +1,43 @@
+"""Add drive_outbox (pending Google Drive uploads of flight files)
+
+Revision ID: d5a1e7c3b9f2
+Revises: c4e8f2a9d1b7
+Create Date: 2026-10-17
+
+Written in the flight's transaction and drained by the DriveOutboxWorker
+(app.features.flights.drive_outbox); one row per flight, so repeated edits
+coalesce into one upload.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "d5a1e7c3b9f2"
+down_revision: str | None = "c4e8f2a9d1b7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "drive_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("flight_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), server_default=sa.text("1"), nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.String(length=500), nullable=True),
+        sa.ForeignKeyConstraint(["flight_id"], ["flights_table.fid"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("flight_id"),
+    )
+    op.create_index("ix_drive_outbox_next_attempt_at", "drive_outbox", ["next_attempt_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_drive_outbox_next_attempt_at", table_name="drive_outbox")
+    op.drop_table("drive_outbox")
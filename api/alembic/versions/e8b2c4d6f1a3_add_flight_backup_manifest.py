@@ -0,0 +1,40 @@
+"""Add flight_backup_manifest (content hashes of backed up flights)
+
+Revision ID: e8b2c4d6f1a3
+Revises: d5a1e7c3b9f2
+Create Date: 2026-10-17
+
+Written by the rebackup pipeline after each upload
+(app.features.db_management.backup_manifest); lets a rebackup skip flights
+whose .1m and PDF inputs are unchanged and update the others by Drive file ID.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "e8b2c4d6f1a3"
+down_revision: str | None = "d5a1e7c3b9f2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "flight_backup_manifest",
+        sa.Column("flight_id", sa.Integer(), nullable=False),
+        sa.Column("file_name", sa.String(length=100), nullable=False),
+        sa.Column("sha256_1m", sa.String(length=64), nullable=False),
+        sa.Column("sha256_pdf", sa.String(length=64), nullable=True),
+        sa.Column("drive_file_id", sa.String(length=100), nullable=True),
+        sa.Column("pdf_drive_file_id", sa.String(length=100), nullable=True),
+        sa.Column("uploaded_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["flight_id"], ["flights_table.fid"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("flight_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("flight_backup_manifest")
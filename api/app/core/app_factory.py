@@ -10,7 +10,9 @@ from flask_cors import CORS  # type: ignore
 from app.api.openapi import OPENAPI_CONFIG
 from app.api.routes import api
 from app.core.database import setup_database
+from app.core.json_provider import setup_json_provider
 from app.core.jwt import setup_jwt
+from app.features.flights.drive_outbox import setup_drive_outbox
 from app.utils.email import mail
 
 load_dotenv(dotenv_path="./.env")
@@ -26,6 +28,9 @@ def create_app() -> Flask:
 
     app.config["MAX_CONTENT_LENGTH"] = 10 * 1024 * 1024  # 10 MB upload limit
 
+    # orjson-backed jsonify unless JSON_PROVIDER=default
+    setup_json_provider(app)
+
     # Setup JWT
     setup_jwt(app)
 
@@ -84,4 +89,7 @@ def create_app() -> Flask:
     # Setup database
     setup_database()
 
+    # Upload queued flight files to Google Drive (production only)
+    setup_drive_outbox(app)
+
     return app
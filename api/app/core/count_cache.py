@@ -0,0 +1,101 @@
+"""Cached and estimated totals for paginated list endpoints.
+
+Offset-paginated listings report ``total``/``pages``, which costs a
+``SELECT count(*)`` with the page's filters on every request. Totals are cached
+per process under a key built from the listing name and its normalized
+filters. Each entry remembers the data versions (see data_version) of the
+domains the count depends on and is only reused while they are unchanged, so a
+write that bumps "flights" or "tripulantes" invalidates the totals in every
+worker without any messaging.
+
+For unfiltered listings the caller may instead ask for the planner's row
+estimate (pg_class.reltuples), which is free but only as fresh as the last
+ANALYZE/autovacuum.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core import data_version
+
+MAX_ENTRIES = 1024
+
+COUNT_EXACT = "exact"
+COUNT_ESTIMATE = "estimate"
+
+_entries: "OrderedDict[Hashable, tuple[tuple[int, ...], int]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def cached_count(key: Hashable, domains: tuple[str, ...], count: Callable[[], int]) -> int:
+    """Return the cached total for key, running count() only if a domain changed since it was cached.
+
+    Args:
+        key: Listing name plus normalized filter values
+        domains: Data version domains whose writes can change this total
+        count: Callable running the actual count query
+
+    Returns:
+        Total number of matching rows
+    """
+    # Versions are read before counting: if a write lands meanwhile, the entry is
+    # stored under the old versions and simply misses on the next request.
+    versions = tuple(data_version.current(d) for d in domains)
+    with _lock:
+        hit = _entries.get(key)
+        if hit is not None and hit[0] == versions:
+            _entries.move_to_end(key)
+            return hit[1]
+    total = count()
+    with _lock:
+        _entries[key] = (versions, total)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return total
+
+
+def parse_count_mode(value: str | None) -> str:
+    """Validate the ``count`` query parameter of a paginated listing ("exact" when omitted).
+
+    Raises:
+        ValueError: If the value is not "exact" or "estimate"
+    """
+    mode = (value or COUNT_EXACT).strip().lower()
+    if mode not in (COUNT_EXACT, COUNT_ESTIMATE):
+        raise ValueError("count must be 'exact' or 'estimate'")
+    return mode
+
+
+def clear_count_cache() -> None:
+    """Drop every cached total (tests and maintenance scripts)."""
+    with _lock:
+        _entries.clear()
+
+
+def estimated_row_count(session: Session, table_name: str) -> int | None:
+    """Return the planner's row estimate for a table, or None if unavailable.
+
+    None is returned on non-PostgreSQL databases and for tables that were never
+    analyzed (reltuples = -1), so callers can fall back to an exact count.
+
+    Args:
+        session: Database session
+        table_name: Unqualified table name
+
+    Returns:
+        Estimated number of rows or None
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = session.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": table_name},
+    ).scalar_one_or_none()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
@@ -0,0 +1,92 @@
+"""Cross-process data version stamps.
+
+Each domain (e.g. "qualificacoes") has a monotonically increasing version
+stored in a small file under DATA_VERSION_DIR. Write paths call bump() after
+committing; readers compare current() with the version their in-memory copy
+was built from. Reading a stamp is a single small file read, so every gunicorn
+worker on the host notices a change without querying the database.
+"""
+
+import os
+import tempfile
+import time
+
+DATA_VERSION_DIR = os.environ.get("DATA_VERSION_DIR", os.path.join(tempfile.gettempdir(), "siq-data-versions"))
+
+# Domains bumped by the write paths of the corresponding features
+FLIGHTS = "flights"
+TRIPULANTES = "tripulantes"
+QUALIFICACOES = "qualificacoes"
+
+
+def _path(domain: str) -> str:
+    return os.path.join(DATA_VERSION_DIR, f"{domain}.version")
+
+
+def current(domain: str) -> int:
+    """Return the current version of a domain.
+
+    A domain without a stamp (never bumped, or the directory was wiped) starts at
+    the current wall clock in nanoseconds, so a fresh stamp never repeats a
+    version that clients may still hold (e.g. in an ETag).
+
+    Args:
+        domain: Data domain name
+
+    Returns:
+        Version number
+    """
+    try:
+        with open(_path(domain)) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return _initialize(domain)
+    except ValueError:
+        return 0
+
+
+def _write_stamp(domain: str, version: int, replace: bool) -> None:
+    os.makedirs(DATA_VERSION_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=DATA_VERSION_DIR, prefix=f".{domain}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(str(version))
+        if replace:
+            os.replace(tmp_path, _path(domain))
+        else:
+            # link() fails if the stamp exists, so the first worker to initialize wins
+            os.link(tmp_path, _path(domain))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _initialize(domain: str) -> int:
+    version = time.time_ns()
+    try:
+        _write_stamp(domain, version, replace=False)
+    except FileExistsError:
+        return current(domain)
+    except OSError:
+        # Read-only or unavailable directory: still answer, just without persisting
+        return 0
+    return version
+
+
+def bump(domain: str) -> int:
+    """Advance the version of a domain and return the new value.
+
+    The new value is never lower than the wall clock in nanoseconds, so versions
+    stay unique even if the stamp directory is wiped between deploys. The file is
+    replaced atomically; concurrent bumps may collapse into one, which is fine
+    because readers only need to see that the version changed.
+
+    Args:
+        domain: Data domain name
+
+    Returns:
+        New version number
+    """
+    new_version = max(current(domain) + 1, time.time_ns())
+    _write_stamp(domain, new_version, replace=True)
+    return new_version
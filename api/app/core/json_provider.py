@@ -0,0 +1,88 @@
+"""orjson-backed JSON provider for the Flask app.
+
+Flight pages and qualification matrices are multi-megabyte JSON documents;
+encoding them with the standard library json module is a noticeable part of
+the request time. OrjsonProvider encodes straight to bytes with orjson and
+handles date/datetime (ISO 8601), Enum (its value), UUID and dataclasses
+natively. Key order, indentation in debug mode and the trailing newline follow
+Flask's DefaultJSONProvider, which stays the fallback for anything orjson
+can't encode (e.g. integers wider than 64 bits) and for callers passing
+json.dumps keyword arguments.
+
+The provider is selected with the JSON_PROVIDER setting ("orjson", the
+default, or "default" for Flask's own provider).
+"""
+
+import decimal
+import os
+from typing import Any, cast
+
+import orjson
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+JSON_PROVIDER_ORJSON = "orjson"
+JSON_PROVIDER_DEFAULT = "default"
+
+
+def _default(o: Any) -> Any:
+    """Encode the remaining types Flask's provider supports (Decimal, __html__)."""
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding with orjson."""
+
+    def _options(self, indent: bool = False) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        """Serialize obj to UTF-8 JSON bytes (falls back to the stdlib encoder on orjson errors)."""
+        try:
+            return orjson.dumps(obj, default=_default, option=self._options(indent))
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, indent=2 if indent else None).encode()
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize obj to a JSON string; json.dumps keyword arguments use the stdlib encoder."""
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        """Deserialize JSON; orjson.JSONDecodeError is a ValueError, as Flask expects."""
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """Same as DefaultJSONProvider.response, without the str round trip."""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = self.dumps_bytes(obj, indent=indent) + b"\n"
+        return cast(Response, self._app.response_class(body, mimetype=self.mimetype))  # type: ignore[arg-type]
+
+
+def setup_json_provider(app: Flask) -> None:
+    """Install the JSON provider selected by JSON_PROVIDER.
+
+    Args:
+        app: Flask application instance
+
+    Raises:
+        ValueError: If JSON_PROVIDER is not a known provider
+    """
+    provider = app.config.setdefault("JSON_PROVIDER", os.environ.get("JSON_PROVIDER", JSON_PROVIDER_ORJSON)).lower()
+    if provider == JSON_PROVIDER_ORJSON:
+        app.json = OrjsonProvider(app)
+    elif provider != JSON_PROVIDER_DEFAULT:
+        raise ValueError(f"JSON_PROVIDER must be '{JSON_PROVIDER_ORJSON}' or '{JSON_PROVIDER_DEFAULT}'")
@@ -6,8 +6,10 @@ from flask import Blueprint, Response, jsonify, request
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app.core import data_version
 from app.core.config import engine
 from app.features.dashboard.service import DashboardService
+from app.shared.http_cache import conditional_get
 from app.shared.permissions import require_permission
 
 dashboard_bp = Blueprint("dashboard", __name__)
@@ -16,6 +18,7 @@ dashboard_service = DashboardService()
 
 @dashboard_bp.route("/statistics", methods=["GET"], strict_slashes=False)
 @require_permission("dashboard.read")
+@conditional_get(data_version.FLIGHTS, data_version.TRIPULANTES)
 def get_flight_statistics() -> tuple[Response, int]:
     """Get flight statistics for dashboard.
 
@@ -103,6 +106,7 @@ def get_flight_statistics() -> tuple[Response, int]:
 
 @dashboard_bp.route("/available-years", methods=["GET"], strict_slashes=False)
 @require_permission("dashboard.read")
+@conditional_get(data_version.FLIGHTS)
 def get_available_years() -> tuple[Response, int]:
     """Get list of years that have flights in the database.
 
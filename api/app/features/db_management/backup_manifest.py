@@ -0,0 +1,180 @@
+"""Incremental flight backups: content hashes and the flight_backup_manifest table.
+
+Every uploaded flight gets a manifest entry with the SHA-256 of its .1m payload,
+the SHA-256 of its PDF inputs (the PDF data plus PDF_LAYOUT_VERSION) and the
+Drive IDs of both files. A rebackup then:
+
+- skips flights whose hashes are unchanged and whose files still exist in
+  Drive (checked against one listing of the app's files);
+- uploads the rest, updating existing files through their stored IDs, so
+  folders are not resolved and no duplicate check (files().list) is made;
+- uploads only the part that changed (.1m, PDF or both).
+
+A flight whose file name changed (airtask, date, time or aircraft edited) is
+uploaded as a new file, as before.
+"""
+
+import hashlib
+import json
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping
+from contextlib import AbstractContextManager
+from dataclasses import dataclass, replace
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.features.db_management.backup_pipeline import FlightBackupItem, RenderedFlight, UploadedFlight
+from app.features.db_management.repository import DatabaseManagementRepository
+from app.features.flights.models import FlightBackupManifest
+from app.utils.pdf import PDF_LAYOUT_VERSION
+
+# Manifest rows written per statement while a backup runs
+MANIFEST_FLUSH_EVERY = 100
+
+NEW = "new"
+CHANGED = "changed"
+MISSING = "missing"
+
+
+def payload_sha256(dados: Mapping[str, Any]) -> str:
+    """SHA-256 of a flight payload in canonical JSON (sorted keys, no whitespace)."""
+    canonical = json.dumps(dados, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def pdf_inputs_sha256(dados_pdf: Mapping[str, Any]) -> str:
+    """SHA-256 of everything a flight's PDF is rendered from."""
+    return payload_sha256({"layout": PDF_LAYOUT_VERSION, "dados": dados_pdf})
+
+
+@dataclass(frozen=True)
+class BackupPlan:
+    """Flights to upload and how many were skipped, by reason."""
+
+    items: list[FlightBackupItem]
+    skipped: int
+    reasons: Counter[str]
+
+    def summary(self) -> dict[str, int]:
+        """Counts for API responses."""
+        return {
+            "queued": len(self.items),
+            "skipped": self.skipped,
+            "changed": self.reasons[CHANGED],
+            "new": self.reasons[NEW],
+            "missing_remote": self.reasons[MISSING],
+        }
+
+
+def plan_backup(
+    items: Iterable[FlightBackupItem],
+    manifest: Mapping[int, FlightBackupManifest],
+    remote_file_ids: set[str] | None,
+    force: bool = False,
+) -> BackupPlan:
+    """Decide which parts of which flights need uploading.
+
+    Args:
+        items: Every flight in scope, with sha256_1m/sha256_pdf set
+        manifest: Manifest entries by flight ID
+        remote_file_ids: IDs of the files that exist in Drive, or None to trust the manifest
+        force: Upload everything (stored file IDs are still reused)
+
+    Returns:
+        BackupPlan with the items to upload
+    """
+    to_upload = []
+    reasons: Counter[str] = Counter()
+    skipped = 0
+    for item in items:
+        entry = manifest.get(item.flight_id) if item.flight_id is not None else None
+        if entry is None or entry.file_name != item.nome_arquivo:
+            reasons[NEW] += 1
+            to_upload.append(item)
+            continue
+
+        drive_file_id = _existing(entry.drive_file_id, remote_file_ids)
+        pdf_drive_file_id = _existing(entry.pdf_drive_file_id, remote_file_ids)
+        upload_1m = force or drive_file_id is None or entry.sha256_1m != item.sha256_1m
+        upload_pdf = item.dados_pdf is not None and (
+            force or pdf_drive_file_id is None or entry.sha256_pdf != item.sha256_pdf
+        )
+        if not upload_1m and not upload_pdf:
+            skipped += 1
+            continue
+
+        missing = (entry.drive_file_id and drive_file_id is None) or (
+            entry.pdf_drive_file_id and pdf_drive_file_id is None
+        )
+        reasons[MISSING if missing else CHANGED] += 1
+        to_upload.append(
+            replace(
+                item,
+                upload_1m=upload_1m,
+                dados_pdf=item.dados_pdf if upload_pdf else None,
+                drive_file_id=drive_file_id,
+                pdf_drive_file_id=pdf_drive_file_id,
+            )
+        )
+    return BackupPlan(to_upload, skipped, reasons)
+
+
+def _existing(file_id: str | None, remote_file_ids: set[str] | None) -> str | None:
+    if file_id is None or (remote_file_ids is not None and file_id not in remote_file_ids):
+        return None
+    return file_id
+
+
+class BackupManifestRecorder:
+    """Collects uploaded flights from the upload threads and writes their manifest entries in batches."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AbstractContextManager[Session]],
+        flush_every: int = MANIFEST_FLUSH_EVERY,
+        clock: Callable[[], datetime] = lambda: datetime.now(UTC),
+    ) -> None:
+        self.session_factory = session_factory
+        self.flush_every = flush_every
+        self.clock = clock
+        self.repository = DatabaseManagementRepository()
+        self._rows: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, rendered: RenderedFlight, uploaded: UploadedFlight) -> None:
+        """Pipeline on_uploaded callback."""
+        item = rendered.item
+        if item.flight_id is None:
+            return
+        row = {
+            "flight_id": item.flight_id,
+            "file_name": item.nome_arquivo,
+            "sha256_1m": item.sha256_1m,
+            # A failed render keeps no PDF hash, so the next rebackup retries it
+            "sha256_pdf": item.sha256_pdf if rendered.pdf is not None or item.dados_pdf is None else None,
+            "drive_file_id": uploaded.drive_file_id,
+            "pdf_drive_file_id": uploaded.pdf_drive_file_id,
+            "uploaded_at": self.clock(),
+        }
+        with self._lock:
+            self._rows.append(row)
+            if len(self._rows) < self.flush_every:
+                return
+            rows, self._rows = self._rows, []
+        self._write(rows)
+
+    def flush(self) -> None:
+        """Write the entries recorded since the last write."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        self._write(rows)
+
+    def _write(self, rows: list[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        with self.session_factory() as session:
+            self.repository.upsert_backup_manifest(session, rows)
+            session.commit()
@@ -0,0 +1,324 @@
+"""Two-stage pipeline for flight backups to Google Drive: render, then upload.
+
+Rendering a flight PDF (ReportLab + PyPDF2) is CPU-bound and holds the GIL,
+while uploading is network I/O. Running both in the same threads made a large
+rebackup no faster than one core. The pipeline splits them:
+
+- Render stage: a ProcessPoolExecutor, sized to the CPU count by default,
+  turns each flight into PDF bytes (app.utils.pdf.render_flight_pdf; every
+  process keeps its own FlightPdfRenderer).
+- Upload stage: a few I/O threads upload the .1m and the PDF of each
+  rendered flight to a backup storage backend (app.utils.storage; Google
+  Drive by default).
+
+Before the pipeline runs, reserve_drive_files can give every file its Drive ID
+with batched metadata calls, so the upload stage only sends file contents.
+
+The stages are connected by a bounded queue. When uploads fall behind, the
+queue fills, the feeder blocks and no new renders are submitted
+(backpressure), so memory stays bounded by the number of renders in flight
+plus the queue size, whatever the number of flights.
+
+Each stage keeps throughput counters (processed, failed, busy time, items per
+second) that can be read while the pipeline runs (see stats()).
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+from app.utils.pdf import render_flight_pdf
+from app.utils.storage import (
+    AREA_1M,
+    AREA_PDF,
+    MIMETYPE_1M,
+    MIMETYPE_PDF,
+    BackupStorage,
+    DriveStorage,
+    encode_1m,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_WORKERS = 8
+
+
+@dataclass(frozen=True)
+class FlightBackupItem:
+    """One flight to back up: .1m data (qualifications by ID) and PDF data (by name, None for no PDF).
+
+    The remaining fields come from the backup manifest (see backup_manifest):
+    the content hashes and the Drive IDs of files uploaded before, which are
+    updated in place. upload_1m is False when only the PDF needs uploading.
+    """
+
+    nome_arquivo: str
+    dados_1m: dict[str, Any]
+    dados_pdf: dict[str, Any] | None = None
+    flight_id: int | None = None
+    sha256_1m: str | None = None
+    sha256_pdf: str | None = None
+    upload_1m: bool = True
+    drive_file_id: str | None = None
+    pdf_drive_file_id: str | None = None
+
+
+@dataclass(frozen=True)
+class RenderedFlight:
+    """Output of the render stage (pdf is None when there is no PDF or rendering failed)."""
+
+    item: FlightBackupItem
+    pdf: bytes | None = None
+
+
+@dataclass(frozen=True)
+class UploadedFlight:
+    """Drive IDs of a flight's files after the upload stage."""
+
+    drive_file_id: str | None
+    pdf_drive_file_id: str | None
+
+
+@dataclass
+class StageCounters:
+    """Throughput counters of one pipeline stage (thread-safe).
+
+    busy_seconds sums the time each item spent in the stage; for the render
+    stage that is from submission to result, so it includes waiting for a
+    free process.
+    """
+
+    name: str
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, seconds: float, ok: bool) -> None:
+        """Count one item that took the given seconds."""
+        with self._lock:
+            self.processed += 1
+            self.failed += 0 if ok else 1
+            self.busy_seconds += seconds
+
+    def snapshot(self, elapsed: float) -> dict[str, Any]:
+        """Return the counters and the stage's items per second over elapsed seconds."""
+        with self._lock:
+            return {
+                "processed": self.processed,
+                "failed": self.failed,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "per_second": round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+            }
+
+
+def _process_pool(workers: int) -> Executor:
+    # spawn: the web process has threads and open database connections that a
+    # forked child must not inherit
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class FlightBackupPipeline:
+    """Renders flight PDFs in worker processes and uploads the results from I/O threads."""
+
+    _DONE = object()
+
+    def __init__(
+        self,
+        upload: Callable[[RenderedFlight], Any],
+        render: Callable[[dict[str, Any]], bytes] = render_flight_pdf,
+        render_workers: int | None = None,
+        upload_workers: int = DEFAULT_UPLOAD_WORKERS,
+        queue_size: int | None = None,
+        executor_factory: Callable[[int], Executor] = _process_pool,
+        on_uploaded: Callable[[RenderedFlight, Any], None] | None = None,
+    ) -> None:
+        """Configure the pipeline.
+
+        Args:
+            upload: Uploads one rendered flight and returns its result; raises on failure
+            render: Picklable function turning PDF data into PDF bytes
+            render_workers: Render processes (defaults to the CPU count)
+            upload_workers: Upload threads
+            queue_size: Rendered flights waiting for upload (defaults to twice the upload workers)
+            executor_factory: Builds the render executor (a process pool by default)
+            on_uploaded: Called from the upload threads with each uploaded flight and its result
+        """
+        self.upload = upload
+        self.render = render
+        self.render_workers = max(1, render_workers or os.cpu_count() or 1)
+        self.upload_workers = max(1, upload_workers)
+        self.queue_size = queue_size or 2 * self.upload_workers
+        self.executor_factory = executor_factory
+        self.on_uploaded = on_uploaded
+        self.render_counters = StageCounters("render")
+        self.upload_counters = StageCounters("upload")
+        self.total = 0
+        self.max_queue_depth = 0
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=self.queue_size)
+        self._started_at: float | None = None
+        self._finished_at: float | None = None
+
+    def stats(self) -> dict[str, Any]:
+        """Return per-stage counters (safe to call while run() is in progress)."""
+        if self._started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished_at or time.perf_counter()) - self._started_at
+        return {
+            "total": self.total,
+            "running": self._started_at is not None and self._finished_at is None,
+            "elapsed_seconds": round(elapsed, 3),
+            "render_workers": self.render_workers,
+            "upload_workers": self.upload_workers,
+            "queue_size": self.queue_size,
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "render": self.render_counters.snapshot(elapsed),
+            "upload": self.upload_counters.snapshot(elapsed),
+        }
+
+    def run(self, items: Iterable[FlightBackupItem]) -> dict[str, Any]:
+        """Back up every item, blocking until the last upload finished.
+
+        Args:
+            items: Flights to back up
+
+        Returns:
+            Final stats()
+        """
+        items = list(items)
+        self.total = len(items)
+        self._started_at = time.perf_counter()
+        uploaders = [
+            threading.Thread(target=self._upload_loop, name=f"backup-upload-{n}", daemon=True)
+            for n in range(self.upload_workers)
+        ]
+        for thread in uploaders:
+            thread.start()
+        try:
+            self._feed(items)
+        finally:
+            for _ in uploaders:
+                self._queue.put(self._DONE)
+            for thread in uploaders:
+                thread.join()
+            self._finished_at = time.perf_counter()
+        return self.stats()
+
+    def _put(self, rendered: RenderedFlight) -> None:
+        # Blocks while the upload stage is behind: this is the backpressure
+        self._queue.put(rendered)
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+    def _feed(self, items: list[FlightBackupItem]) -> None:
+        """Submit renders (at most two per render worker in flight) and queue their results."""
+        pending: dict[Future[bytes], tuple[FlightBackupItem, float]] = {}
+        max_in_flight = 2 * self.render_workers
+        with self.executor_factory(self.render_workers) as executor:
+            for item in items:
+                if item.dados_pdf is None:
+                    self._put(RenderedFlight(item))
+                    continue
+                while len(pending) >= max_in_flight:
+                    self._drain(pending)
+                pending[executor.submit(self.render, item.dados_pdf)] = (item, time.perf_counter())
+            while pending:
+                self._drain(pending)
+
+    def _drain(self, pending: dict[Future[bytes], tuple[FlightBackupItem, float]]) -> None:
+        """Wait for at least one render and queue everything that finished."""
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            item, submitted_at = pending.pop(future)
+            try:
+                pdf = future.result()
+            except Exception as e:
+                # The .1m is still backed up without its PDF
+                logger.warning("Rendering the PDF of %s failed: %s", item.nome_arquivo, e)
+                self.render_counters.record(time.perf_counter() - submitted_at, ok=False)
+                pdf = None
+            else:
+                self.render_counters.record(time.perf_counter() - submitted_at, ok=True)
+            self._put(RenderedFlight(item, pdf))
+
+    def _upload_loop(self) -> None:
+        while True:
+            rendered = self._queue.get()
+            if rendered is self._DONE:
+                return
+            started = time.perf_counter()
+            try:
+                result = self.upload(rendered)
+                if self.on_uploaded is not None:
+                    self.on_uploaded(rendered, result)
+            except Exception as e:
+                logger.warning("Backup upload of %s failed: %s", rendered.item.nome_arquivo, e)
+                self.upload_counters.record(time.perf_counter() - started, ok=False)
+            else:
+                self.upload_counters.record(time.perf_counter() - started, ok=True)
+            done = self.upload_counters.processed
+            if done % 100 == 0 or done == self.total:
+                logger.info("Backup progress: %d/%d uploaded", done, self.total)
+
+
+def upload_flight_to_storage(storage: BackupStorage, rendered: RenderedFlight) -> UploadedFlight:
+    """Store a rendered flight's .1m (unless unchanged) and PDF (if rendered) in a backup storage backend."""
+    item = rendered.item
+    drive_file_id = item.drive_file_id
+    if item.upload_1m:
+        drive_file_id = storage.save_flight_file(
+            AREA_1M, item.nome_arquivo, encode_1m(item.dados_1m), MIMETYPE_1M, file_id=drive_file_id
+        )
+    pdf_drive_file_id = item.pdf_drive_file_id
+    if rendered.pdf is not None:
+        pdf_drive_file_id = storage.save_flight_file(
+            AREA_PDF, item.nome_arquivo.replace(".1m", ".pdf"), rendered.pdf, MIMETYPE_PDF, file_id=pdf_drive_file_id
+        )
+    return UploadedFlight(drive_file_id, pdf_drive_file_id)
+
+
+def upload_flight_to_drive(rendered: RenderedFlight) -> UploadedFlight:
+    """Upload a rendered flight's .1m (unless unchanged) and PDF (if rendered) to the Google Drive backup folders."""
+    return upload_flight_to_storage(DriveStorage(), rendered)
+
+
+def reserve_drive_files(items: list[FlightBackupItem]) -> list[FlightBackupItem]:
+    """Give every file the items will upload a Drive ID before the upload stage.
+
+    Files without a stored ID are looked up by name in their day folders (and
+    created empty when missing) through Drive batch requests, instead of one
+    list/create round trip per upload. The upload stage then only sends
+    contents, by ID.
+
+    Args:
+        items: Flights to back up
+
+    Returns:
+        The items, with drive_file_id/pdf_drive_file_id set for every file to upload
+    """
+    from app.utils.gdrive import ID_PASTA_PDF, ID_PASTA_VOO, reserve_flight_files
+
+    files: list[tuple[str, str, str]] = []
+    targets: list[tuple[int, str]] = []
+    for n, item in enumerate(items):
+        if item.upload_1m and item.drive_file_id is None:
+            files.append((item.nome_arquivo, ID_PASTA_VOO, MIMETYPE_1M))
+            targets.append((n, "drive_file_id"))
+        if item.dados_pdf is not None and item.pdf_drive_file_id is None:
+            files.append((item.nome_arquivo.replace(".1m", ".pdf"), ID_PASTA_PDF, MIMETYPE_PDF))
+            targets.append((n, "pdf_drive_file_id"))
+    if not files:
+        return items
+
+    file_ids: dict[int, dict[str, Any]] = {}
+    for (n, attribute), file_id in zip(targets, reserve_flight_files(files), strict=True):
+        file_ids.setdefault(n, {})[attribute] = file_id
+    return [replace(item, **file_ids[n]) if n in file_ids else item for n, item in enumerate(items)]
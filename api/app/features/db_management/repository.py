@@ -1,11 +1,13 @@
 """Database management repository - database access only."""
 
+from collections.abc import Iterable, Sequence
 from typing import Any
 
 from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session, joinedload
 
-from app.features.flights.models import Flight, FlightPilots  # type: ignore
+from app.features.flights.models import Flight, FlightBackupManifest, FlightPilots  # type: ignore
 from app.features.qualifications.models import Qualificacao  # type: ignore
 from app.features.users.models import Tripulante  # type: ignore
 
@@ -122,3 +124,47 @@ class DatabaseManagementRepository:
         """
         stmt = select(Tripulante).order_by(Tripulante.nip)
         return list(session.execute(stmt).scalars().all())
+
+    @staticmethod
+    def get_backup_manifest(session: Session, flight_ids: Iterable[int]) -> dict[int, FlightBackupManifest]:
+        """Get the backup manifest entries of the given flights.
+
+        Args:
+            session: Database session
+            flight_ids: Flight IDs
+
+        Returns:
+            Dictionary flight_id -> manifest entry (flights never backed up are absent)
+        """
+        flight_ids = list(flight_ids)
+        if not flight_ids:
+            return {}
+        stmt = select(FlightBackupManifest).where(FlightBackupManifest.flight_id.in_(flight_ids))
+        return {entry.flight_id: entry for entry in session.execute(stmt).scalars()}
+
+    @staticmethod
+    def upsert_backup_manifest(session: Session, rows: Sequence[dict[str, Any]]) -> None:
+        """Insert or replace backup manifest entries (one statement).
+
+        Args:
+            session: Database session (not committed here)
+            rows: Column values of FlightBackupManifest, one dict per flight
+        """
+        if not rows:
+            return
+        stmt = pg_insert(FlightBackupManifest).values(list(rows))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FlightBackupManifest.flight_id],
+            set_={
+                column: stmt.excluded[column]
+                for column in (
+                    "file_name",
+                    "sha256_1m",
+                    "sha256_pdf",
+                    "drive_file_id",
+                    "pdf_drive_file_id",
+                    "uploaded_at",
+                )
+            },
+        )
+        session.execute(stmt)
@@ -16,6 +16,11 @@ db_management_bp = Blueprint("db_management", __name__)
 db_management_service = DatabaseManagementService()
 
 
+def _force_arg() -> bool:
+    """Whether the request asks for a full (non-incremental) backup."""
+    return request.args.get("force", "false").lower() in ("1", "true", "yes")
+
+
 @db_management_bp.route("/flights-by-year", methods=["GET"], strict_slashes=False)
 @require_role(Role.SUPER_ADMIN.level)
 def get_flights_by_year() -> tuple[Response, int]:
@@ -141,8 +146,23 @@ def rebackup_flights() -> tuple[Response, int]:
     description: |
       Process all flights in the database and upload them to Google Drive.
       This operation runs in the background and may take some time.
+      Only flights changed since their last backup, never backed up or missing
+      in Google Drive are uploaded, unless force=true; local and s3 storage
+      always get a full copy. Drive backups only run in production.
     security:
       - Bearer: []
+    parameters:
+      - in: query
+        name: force
+        type: boolean
+        required: false
+        description: Upload every flight, even if unchanged since the last backup
+      - in: query
+        name: storage
+        type: string
+        enum: [drive, local, s3]
+        required: false
+        description: Backup storage backend (defaults to BACKUP_STORAGE, usually drive)
     responses:
       200:
         description: Backup process started
@@ -157,7 +177,32 @@ def rebackup_flights() -> tuple[Response, int]:
               example: 150
             queued:
               type: integer
-              example: 150
+              example: 10
+            skipped:
+              type: integer
+              description: Flights unchanged since their last backup
+              example: 140
+            changed:
+              type: integer
+              description: Flights changed since their last backup
+              example: 8
+            new:
+              type: integer
+              example: 2
+            missing_remote:
+              type: integer
+              description: Flights whose backed up files no longer exist in Google Drive
+              example: 0
+            storage:
+              type: string
+              example: drive
+      400:
+        description: Unknown or unconfigured backup storage
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
       403:
         description: Forbidden - Super Admin access required
         schema:
@@ -168,8 +213,12 @@ def rebackup_flights() -> tuple[Response, int]:
     """
     try:
         with Session(engine) as session:
-            result = db_management_service.rebackup_flights(session)
+            result = db_management_service.rebackup_flights(
+                session, force=_force_arg(), storage=request.args.get("storage")
+            )
             return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error in POST /db-management/rebackup-flights: {e}")
         traceback.print_exc()
@@ -188,6 +237,9 @@ def rebackup_flights_by_year(year: int) -> tuple[Response, int]:
     description: |
       Process all flights for a specific year and upload them to Google Drive.
       This operation runs in the background and may take some time.
+      Only flights changed since their last backup, never backed up or missing
+      in Google Drive are uploaded, unless force=true; local and s3 storage
+      always get a full copy. Drive backups only run in production.
     security:
       - Bearer: []
     parameters:
@@ -197,6 +249,17 @@ def rebackup_flights_by_year(year: int) -> tuple[Response, int]:
         required: true
         description: Year to backup flights for
         example: 2024
+      - in: query
+        name: force
+        type: boolean
+        required: false
+        description: Upload every flight, even if unchanged since the last backup
+      - in: query
+        name: storage
+        type: string
+        enum: [drive, local, s3]
+        required: false
+        description: Backup storage backend (defaults to BACKUP_STORAGE, usually drive)
     responses:
       200:
         description: Backup process started
@@ -214,7 +277,32 @@ def rebackup_flights_by_year(year: int) -> tuple[Response, int]:
               example: 150
             queued:
               type: integer
-              example: 150
+              example: 10
+            skipped:
+              type: integer
+              description: Flights unchanged since their last backup
+              example: 140
+            changed:
+              type: integer
+              description: Flights changed since their last backup
+              example: 8
+            new:
+              type: integer
+              example: 2
+            missing_remote:
+              type: integer
+              description: Flights whose backed up files no longer exist in Google Drive
+              example: 0
+            storage:
+              type: string
+              example: drive
+      400:
+        description: Unknown or unconfigured backup storage
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
       403:
         description: Forbidden - Super Admin access required
         schema:
@@ -232,12 +320,16 @@ def rebackup_flights_by_year(year: int) -> tuple[Response, int]:
     """
     try:
         with Session(engine) as session:
-            result = db_management_service.rebackup_flights_by_year(session, year)
+            result = db_management_service.rebackup_flights_by_year(
+                session, year, force=_force_arg(), storage=request.args.get("storage")
+            )
 
             if result.get("total_flights", 0) == 0:
                 return jsonify({"error": f"No flights found for year {year}"}), 404
 
             return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error in POST /db-management/rebackup-flights/{year}: {e}")
         traceback.print_exc()
@@ -5,6 +5,7 @@ import time
 import traceback
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import partial
 from threading import Thread
 from typing import Any
 
@@ -12,11 +13,26 @@ from dotenv import load_dotenv
 from sqlalchemy import select
 from sqlalchemy.orm import Session, sessionmaker
 
+from app.core import data_version
 from app.core.config import engine
+from app.features.db_management.backup_manifest import (
+    BackupManifestRecorder,
+    BackupPlan,
+    payload_sha256,
+    pdf_inputs_sha256,
+    plan_backup,
+)
+from app.features.db_management.backup_pipeline import (
+    FlightBackupItem,
+    FlightBackupPipeline,
+    reserve_drive_files,
+    upload_flight_to_storage,
+)
 from app.features.db_management.repository import DatabaseManagementRepository
 from app.features.flights.models import Flight  # type: ignore
 from app.features.flights.service import FlightService
-from app.utils.gdrive import ID_PASTA_VOO, upload_with_service_account  # type: ignore
+from app.features.qualifications.catalog import get_qualification_catalog
+from app.utils.storage import STORAGE_DRIVE, BackupStorage, get_backup_storage
 
 # Load environment variables
 load_dotenv(dotenv_path="./.env")
@@ -29,6 +45,10 @@ MAX_MONTH_WORKERS = int(os.environ.get("DELETE_YEAR_MAX_MONTH_WORKERS", "4"))  #
 MAX_QUALIFICATION_WORKERS = int(
     os.environ.get("DELETE_YEAR_MAX_QUAL_WORKERS", "8")
 )  # Max qualification workers per month
+# Upload threads of the flight backup pipeline (render processes follow the CPU count)
+BACKUP_UPLOAD_WORKERS = int(os.environ.get("BACKUP_UPLOAD_WORKERS", "8"))
+# Look up/create the Drive files of a backup in batch requests before uploading
+BACKUP_DRIVE_BATCH = os.environ.get("BACKUP_DRIVE_BATCH", "true").lower() in ("1", "true", "yes")
 
 
 class DatabaseManagementService:
@@ -286,6 +306,9 @@ class DatabaseManagementService:
                         }
                     )
 
+        # Months commit batch by batch, so even failed months may have removed flights
+        data_version.bump(data_version.FLIGHTS)
+
         # Sort month results by month number for consistent output
         month_results.sort(key=lambda x: x["month"])
 
@@ -304,18 +327,28 @@ class DatabaseManagementService:
             "month_results": month_results,
         }
 
-    def rebackup_flights(self, session: Session) -> dict[str, Any]:
-        """Rebackup all flights to Google Drive.
+    def rebackup_flights(self, session: Session, force: bool = False, storage: str | None = None) -> dict[str, Any]:
+        """Rebackup all flights to Google Drive (or another backup storage).
 
-        This will process all flights and upload them to Google Drive
-        in the background.
+        Only flights whose content changed since their last backup, that were
+        never backed up or whose files are missing in Drive are uploaded, in
+        the background (see backup_manifest). Other storage backends get a full
+        copy: the manifest only tracks the Drive copy. Drive backups run in
+        production only (FLASK_ENV=production); local and S3 backups run in any
+        environment.
 
         Args:
             session: Database session
+            force: Upload every flight, even if unchanged
+            storage: Backup storage backend (defaults to BACKUP_STORAGE, see app.utils.storage)
 
         Returns:
-            dict with processing results
+            dict with processing results (queued/skipped/changed counts)
+
+        Raises:
+            ValueError: If the storage backend is unknown or not configured
         """
+        backend = get_backup_storage(storage)
         flights = self.repository.get_all_flights(session)
 
         if not flights:
@@ -325,106 +358,37 @@ class DatabaseManagementService:
                 "queued": 0,
             }
 
-        if not IS_PRODUCTION:
+        if not IS_PRODUCTION and backend.name == STORAGE_DRIVE:
             return {
-                "message": f"Found {len(flights)} flights but backup is disabled. Set FLASK_ENV=production to enable backups.",
+                "message": f"Found {len(flights)} flights but Google Drive backup is disabled. Set FLASK_ENV=production to enable it, or use another storage backend.",
                 "total_flights": len(flights),
                 "queued": 0,
                 "flask_env": FLASK_ENV,
             }
 
-        # Serialize flights to JSON (qualifications by ID for .1m) before session closes
-        flight_data_list = []
-        for flight in flights:
-            try:
-                flight_json = flight.to_json(None)
-                nome_arquivo_voo = flight.get_file_name()
-                flight_data_list.append((flight_json, nome_arquivo_voo))
-            except Exception as e:
-                print(f"Error serializing flight {flight.get_file_name()}: {e}")
-                traceback.print_exc()
-
-        max_workers = 16  # Use 16 concurrent threads
-
-        def process_flights_with_pool() -> None:
-            """Process flights using a thread pool with limited concurrency."""
-            processed_count = 0
-            error_count = 0
-
-            print(f"Starting backup of {len(flight_data_list)} flights using {max_workers} worker threads...")
-
-            def backup_single_flight(flight_with_index: tuple[int, tuple[dict, str]]) -> tuple[bool, str]:
-                """Backup a single flight. Returns (success, flight_name)."""
-                idx, (flight_data, nome_arquivo_voo) = flight_with_index
-                try:
-                    upload_with_service_account(
-                        dados=flight_data,
-                        nome_arquivo_drive=nome_arquivo_voo,
-                        id_pasta=ID_PASTA_VOO,
-                    )
-                    return (True, nome_arquivo_voo)
-                except Exception as e:
-                    print(f"Error backing up flight {nome_arquivo_voo}: {e}")
-                    traceback.print_exc()
-                    return (False, nome_arquivo_voo)
-
-            # Process flights with thread pool
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit all flights to the thread pool
-                future_to_flight = {
-                    executor.submit(backup_single_flight, (idx, flight_data)): (idx, flight_data)
-                    for idx, flight_data in enumerate(flight_data_list, 1)
-                }
-
-                # Process completed tasks as they finish
-                for future in as_completed(future_to_flight):
-                    idx, flight_data = future_to_flight[future]
-                    try:
-                        success, flight_name = future.result()
-                        if success:
-                            processed_count += 1
-                        else:
-                            error_count += 1
-
-                        # Print progress every 10 flights
-                        total_processed = processed_count + error_count
-                        if total_processed % 10 == 0:
-                            print(
-                                f"Progress: {total_processed}/{len(flight_data_list)} flights processed "
-                                f"({processed_count} successful, {error_count} errors)"
-                            )
-                    except Exception as e:
-                        error_count += 1
-                        _, nome_arquivo_voo = flight_data
-                        print(f"Unexpected error processing flight {nome_arquivo_voo}: {e}")
-                        traceback.print_exc()
-
-            print(
-                f"Backup completed: {processed_count} successful, {error_count} errors out of {len(flight_data_list)} total flights"
-            )
-
-        # Run backup in background thread
-        Thread(target=process_flights_with_pool).start()
-
-        return {
-            "message": f"Started backup of {len(flights)} flights to Google Drive. Processing with 4 concurrent threads in background.",
-            "total_flights": len(flights),
-            "queued": len(flights),
-        }
+        return self._rebackup(session, flights, "all flights", force, backend)
 
-    def rebackup_flights_by_year(self, session: Session, year: int) -> dict[str, Any]:
-        """Rebackup all flights for a specific year to Google Drive.
+    def rebackup_flights_by_year(
+        self, session: Session, year: int, force: bool = False, storage: str | None = None
+    ) -> dict[str, Any]:
+        """Rebackup all flights for a specific year to Google Drive (or another backup storage).
 
-        This will process all flights for the given year and upload them to Google Drive
-        in the background.
+        Like rebackup_flights, only changed or missing flights are uploaded to
+        Drive; other storage backends get a full copy.
 
         Args:
             session: Database session
             year: Year to backup flights for
+            force: Upload every flight of the year, even if unchanged
+            storage: Backup storage backend (defaults to BACKUP_STORAGE, see app.utils.storage)
 
         Returns:
-            dict with processing results
+            dict with processing results (queued/skipped/changed counts)
+
+        Raises:
+            ValueError: If the storage backend is unknown or not configured
         """
+        backend = get_backup_storage(storage)
         flights = self.repository.get_flights_for_year(session, year)
 
         if not flights:
@@ -435,96 +399,120 @@ class DatabaseManagementService:
                 "queued": 0,
             }
 
-        if not IS_PRODUCTION:
+        if not IS_PRODUCTION and backend.name == STORAGE_DRIVE:
             return {
-                "message": f"Found {len(flights)} flights for year {year} but backup is disabled. Set FLASK_ENV=production to enable backups.",
+                "message": f"Found {len(flights)} flights for year {year} but Google Drive backup is disabled. Set FLASK_ENV=production to enable it, or use another storage backend.",
                 "year": year,
                 "total_flights": len(flights),
                 "queued": 0,
                 "flask_env": FLASK_ENV,
             }
 
-        # Serialize flights to JSON (qualifications by ID for .1m) before session closes
-        flight_data_list = []
+        return {"year": year, **self._rebackup(session, flights, f"year {year}", force, backend)}
+
+    def _rebackup(
+        self, session: Session, flights: list[Flight], description: str, force: bool, storage: BackupStorage
+    ) -> dict[str, Any]:
+        """Plan a backup of flights and start uploading what changed (everything, outside Drive)."""
+        items = self._flight_backup_items(session, flights)
+        if storage.name == STORAGE_DRIVE:
+            plan = self._plan_flight_backup(session, items, force, storage)
+        else:
+            # The backup manifest tracks the Drive copy only
+            plan = plan_backup(items, {}, None)
+        result = {"total_flights": len(items), "storage": storage.name, **plan.summary()}
+        if not plan.items:
+            return {"message": f"All {len(items)} flights ({description}) are already backed up.", **result}
+
+        pipeline = self._start_flight_backup(plan.items, description, storage)
+        return {
+            "message": f"Started backup of {len(plan.items)} of {len(items)} flights ({description}) to {storage.name}, {plan.skipped} unchanged. Rendering with {pipeline.render_workers} processes and uploading with {pipeline.upload_workers} threads in background.",
+            **result,
+        }
+
+    @staticmethod
+    def _flight_backup_items(session: Session, flights: list[Flight]) -> list[FlightBackupItem]:
+        """Serialize and hash flights for backup while the session is open (.1m by qualification ID, PDF by name)."""
+        names_by_id = get_qualification_catalog(session).names_by_id
+        items = []
         for flight in flights:
             try:
-                flight_json = flight.to_json(None)
-                nome_arquivo_voo = flight.get_file_name()
-                flight_data_list.append((flight_json, nome_arquivo_voo))
+                dados_1m = flight.to_json(None)
+                dados_pdf = flight.to_json(names_by_id)
+                items.append(
+                    FlightBackupItem(
+                        flight.get_file_name(),
+                        dados_1m,
+                        dados_pdf,
+                        flight_id=flight.fid,
+                        sha256_1m=payload_sha256(dados_1m),
+                        sha256_pdf=pdf_inputs_sha256(dados_pdf),
+                    )
+                )
             except Exception as e:
                 print(f"Error serializing flight {flight.get_file_name()}: {e}")
                 traceback.print_exc()
+        return items
+
+    def _plan_flight_backup(
+        self, session: Session, items: list[FlightBackupItem], force: bool, storage: BackupStorage
+    ) -> BackupPlan:
+        """Compare items with the backup manifest and the storage backend's file listing."""
+        manifest = self.repository.get_backup_manifest(
+            session, [item.flight_id for item in items if item.flight_id is not None]
+        )
+        remote_file_ids = None
+        if manifest:
+            try:
+                remote_file_ids = storage.list_file_ids()
+            except Exception as e:
+                print(f"Could not list the {storage.name} backup files, trusting the backup manifest: {e}")
+        return plan_backup(items, manifest, remote_file_ids, force=force)
 
-        max_workers = 16  # Use 16 concurrent threads
+    @staticmethod
+    def _start_flight_backup(
+        items: list[FlightBackupItem], description: str, storage: BackupStorage
+    ) -> FlightBackupPipeline:
+        """Run the render/upload backup pipeline for items in a background thread.
 
-        def process_flights_with_pool() -> None:
-            """Process flights using a thread pool with limited concurrency."""
-            processed_count = 0
-            error_count = 0
+        Drive backups also record the backup manifest and reserve their file IDs in batches first.
+        """
+        drive = storage.name == STORAGE_DRIVE
+        recorder = BackupManifestRecorder(lambda: Session(engine)) if drive else None
+        pipeline = FlightBackupPipeline(
+            partial(upload_flight_to_storage, storage),
+            upload_workers=BACKUP_UPLOAD_WORKERS,
+            on_uploaded=recorder.record if recorder is not None else None,
+        )
 
+        def run() -> None:
             print(
-                f"Starting backup of {len(flight_data_list)} flights for year {year} using {max_workers} worker threads..."
+                f"Starting backup of {len(items)} flights ({description}): "
+                f"{pipeline.render_workers} render processes, {pipeline.upload_workers} upload threads"
             )
-
-            def backup_single_flight(flight_with_index: tuple[int, tuple[dict, str]]) -> tuple[bool, str]:
-                """Backup a single flight. Returns (success, flight_name)."""
-                idx, (flight_data, nome_arquivo_voo) = flight_with_index
+            to_upload = items
+            if drive and BACKUP_DRIVE_BATCH:
                 try:
-                    upload_with_service_account(
-                        dados=flight_data,
-                        nome_arquivo_drive=nome_arquivo_voo,
-                        id_pasta=ID_PASTA_VOO,
-                    )
-                    return (True, nome_arquivo_voo)
+                    to_upload = reserve_drive_files(items)
                 except Exception as e:
-                    print(f"Error backing up flight {nome_arquivo_voo}: {e}")
-                    traceback.print_exc()
-                    return (False, nome_arquivo_voo)
-
-            # Process flights with thread pool
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit all flights to the thread pool
-                future_to_flight = {
-                    executor.submit(backup_single_flight, (idx, flight_data)): (idx, flight_data)
-                    for idx, flight_data in enumerate(flight_data_list, 1)
-                }
-
-                # Process completed tasks as they finish
-                for future in as_completed(future_to_flight):
-                    idx, flight_data = future_to_flight[future]
-                    try:
-                        success, flight_name = future.result()
-                        if success:
-                            processed_count += 1
-                        else:
-                            error_count += 1
-
-                        # Print progress every 10 flights
-                        total_processed = processed_count + error_count
-                        if total_processed % 10 == 0:
-                            print(
-                                f"Progress: {total_processed}/{len(flight_data_list)} flights processed "
-                                f"({processed_count} successful, {error_count} errors)"
-                            )
-                    except Exception as e:
-                        error_count += 1
-                        _, nome_arquivo_voo = flight_data
-                        print(f"Unexpected error processing flight {nome_arquivo_voo}: {e}")
-                        traceback.print_exc()
-
+                    # Files created before the failure are found by name by the per-file uploads
+                    print(f"Batched Google Drive lookups failed, uploading file by file: {e}")
+            try:
+                stats = pipeline.run(to_upload)
+            except Exception as e:
+                print(f"Backup of {description} failed: {e}")
+                traceback.print_exc()
+                return
+            finally:
+                if recorder is not None:
+                    recorder.flush()
             print(
-                f"Backup completed for year {year}: {processed_count} successful, {error_count} errors out of {len(flight_data_list)} total flights"
+                f"Backup completed ({description}) in {stats['elapsed_seconds']}s: "
+                f"render {stats['render']}, upload {stats['upload']}, max queue depth {stats['max_queue_depth']}"
             )
 
-        # Run backup in background thread
-        Thread(target=process_flights_with_pool).start()
-
-        return {
-            "message": f"Started backup of {len(flight_data_list)} flights for year {year} to Google Drive. Processing with {max_workers} concurrent threads in background.",
-            "year": year,
-            "total_flights": len(flight_data_list),
-            "queued": len(flight_data_list),
-        }
+        Thread(target=run).start()
+        return pipeline
 
     def export_qualifications(self, session: Session) -> list[dict[str, Any]]:
         """Export all qualifications to JSON format.
@@ -541,6 +529,7 @@ class DatabaseManagementService:
             {
                 "id": q.id,
                 "nome": q.nome,
+                "payload_key": q.payload_key,
                 "grupo": q.grupo.value,
                 "validade": q.validade,
                 "tipo_aplicavel": q.tipo_aplicavel.value,
@@ -571,14 +560,19 @@ class DatabaseManagementService:
         Returns:
             dict with import results
         """
+        from app.features.flights.repository import LANDING_QUAL_COLUMNS
+        from app.features.qualifications.catalog import refresh_qualification_catalog
         from app.features.qualifications.models import Qualificacao
         from app.features.qualifications.repository import QualificationRepository
+        from app.features.qualifications.service import refresh_landing_qualification_events
         from app.shared.enums import GrupoQualificacoes, TipoTripulante
 
         qual_repository = QualificationRepository()
         created_count = 0
         updated_count = 0
         validation_errors: list[str] = []
+        # Qualifications whose landing (payload_key, tipo) mapping may have changed
+        landing_ids: list[int] = []
 
         # Validate all records first — before touching the DB.
         records_to_process = []
@@ -615,16 +609,24 @@ class DatabaseManagementService:
                     qualification = next((q for q in all_quals if q.nome == qual_data["nome"]), None)
 
                 if qualification is not None:
+                    old_landing_key = (qualification.payload_key, qualification.tipo_aplicavel)
                     qualification.nome = qual_data["nome"]
                     qualification.grupo = grupo_enum
                     qualification.validade = qual_data["validade"]
                     qualification.tipo_aplicavel = tipo_enum
+                    if "payload_key" in qual_data:
+                        qualification.payload_key = qual_data["payload_key"]
                     session.flush()
                     updated_count += 1
+                    if (qualification.payload_key, qualification.tipo_aplicavel) != old_landing_key and (
+                        old_landing_key[0] in LANDING_QUAL_COLUMNS or qualification.payload_key in LANDING_QUAL_COLUMNS
+                    ):
+                        landing_ids.append(qualification.id)
                 else:
                     new_qual = Qualificacao(
                         **({"id": backup_id} if backup_id is not None else {}),
                         nome=qual_data["nome"],
+                        payload_key=qual_data.get("payload_key"),
                         grupo=grupo_enum,
                         validade=qual_data["validade"],
                         tipo_aplicavel=tipo_enum,
@@ -632,8 +634,14 @@ class DatabaseManagementService:
                     session.add(new_qual)
                     session.flush()
                     created_count += 1
+                    if new_qual.payload_key in LANDING_QUAL_COLUMNS:
+                        landing_ids.append(new_qual.id)
 
             session.commit()
+            refresh_qualification_catalog(session)
+            if landing_ids:
+                # Same rebuild as QualificationService.create/update_qualification
+                refresh_landing_qualification_events(session, landing_ids)
         except Exception as e:
             session.rollback()
             print(f"[db_management] import_qualifications rolled back: {e}")
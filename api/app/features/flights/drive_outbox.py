@@ -0,0 +1,361 @@
+"""Transactional outbox for the Google Drive copies of flights (.1m and PDF).
+
+Flight writes don't talk to Drive. They enqueue the flight in the drive_outbox
+table inside their own transaction, so an upload is requested if and only if
+the flight change is committed, and pending uploads survive restarts. A
+DriveOutboxWorker per process drains the table with a bounded thread pool:
+
+- Coalescing: there is one row per flight. Enqueueing a pending flight bumps
+  its version, so five edits before the worker gets to it are one upload of
+  the latest data. A row is only deleted if its version is still the one that
+  was uploaded; an edit landing during the upload keeps it queued.
+- Retries: a failed upload is retried after base_delay * 2**attempts (capped
+  at max_delay). After max_attempts the row is parked (next_attempt_at NULL)
+  with its last error, until the flight is enqueued again.
+- Several processes (gunicorn workers) can drain the same table: rows are
+  claimed with FOR UPDATE SKIP LOCKED and leased for a while, so a flight is
+  never uploaded by two workers at once and a crashed worker's jobs are
+  picked up again when the lease expires.
+
+The Drive side is a DriveClient, so the worker can run against a fake one.
+The worker of the app stores the files in the backup storage backend chosen
+with BACKUP_STORAGE (Google Drive by default, see app.utils.storage).
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any, Protocol
+
+from flask import Flask
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.features.flights.models import DriveOutboxJob
+from app.features.flights.repository import FlightRepository
+from app.features.qualifications.catalog import get_qualification_catalog
+from app.utils.storage import BackupStorage, get_backup_storage, save_flight
+
+logger = logging.getLogger(__name__)
+
+FLASK_ENV = os.environ.get("FLASK_ENV", "development").lower()
+
+DEFAULT_WORKERS = 2
+MAX_ERROR_LENGTH = 500
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC)
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    """Outbox row claimed by a worker (the version it must match to complete)."""
+
+    id: int
+    flight_id: int
+    version: int
+    attempts: int
+
+
+class DriveClient(Protocol):
+    """Destination of the flight files; raises on failure so the job is retried."""
+
+    def upload_flight(self, nome_arquivo: str, dados_1m: dict[str, Any], dados_pdf: dict[str, Any]) -> None: ...
+
+
+class StorageDriveClient:
+    """DriveClient storing the files in a backup storage backend (Google Drive by default, see app.utils.storage)."""
+
+    def __init__(self, storage: BackupStorage) -> None:
+        self.storage = storage
+
+    def upload_flight(self, nome_arquivo: str, dados_1m: dict[str, Any], dados_pdf: dict[str, Any]) -> None:
+        save_flight(self.storage, nome_arquivo, dados_1m, dados_pdf)
+
+
+class DriveOutboxRepository:
+    """Data access for the drive_outbox table."""
+
+    @staticmethod
+    def enqueue(session: Session, flight_ids: Iterable[int], now: datetime) -> None:
+        """Request an upload of the given flights in the caller's transaction.
+
+        A flight that is already pending keeps its row: the version is bumped
+        and the retry state reset, so the worker uploads it once, with the data
+        committed last.
+
+        Args:
+            session: Database session (not committed here)
+            flight_ids: Flights whose files changed
+            now: Current time (first attempt is due immediately)
+        """
+        rows = [{"flight_id": fid, "version": 1, "attempts": 0, "next_attempt_at": now} for fid in set(flight_ids)]
+        if not rows:
+            return
+        stmt = pg_insert(DriveOutboxJob).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DriveOutboxJob.flight_id],
+            set_={
+                "version": DriveOutboxJob.version + 1,
+                "attempts": 0,
+                "next_attempt_at": stmt.excluded.next_attempt_at,
+                "last_error": None,
+            },
+        )
+        session.execute(stmt)
+
+    @staticmethod
+    def claim(session: Session, now: datetime, limit: int, lease: timedelta) -> list[ClaimedJob]:
+        """Lease up to limit due jobs that no other worker holds.
+
+        Args:
+            session: Database session (the caller commits to publish the lease)
+            now: Current time
+            limit: Maximum number of jobs
+            lease: How long the jobs are reserved for this worker
+
+        Returns:
+            Claimed jobs, oldest due first
+        """
+        rows = session.execute(
+            select(DriveOutboxJob.id, DriveOutboxJob.flight_id, DriveOutboxJob.version, DriveOutboxJob.attempts)
+            .where(
+                DriveOutboxJob.next_attempt_at <= now,
+                (DriveOutboxJob.locked_until.is_(None)) | (DriveOutboxJob.locked_until < now),
+            )
+            .order_by(DriveOutboxJob.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            return []
+        session.execute(
+            update(DriveOutboxJob)
+            .where(DriveOutboxJob.id.in_([row.id for row in rows]))
+            .values(locked_until=now + lease)
+            .execution_options(synchronize_session=False)
+        )
+        return [ClaimedJob(*row) for row in rows]
+
+    @staticmethod
+    def complete(session: Session, job: ClaimedJob) -> bool:
+        """Delete an uploaded job unless the flight was enqueued again meanwhile.
+
+        Returns:
+            True if the row was deleted, False if a newer version stays queued
+        """
+        deleted = session.execute(
+            delete(DriveOutboxJob)
+            .where(DriveOutboxJob.id == job.id, DriveOutboxJob.version == job.version)
+            .execution_options(synchronize_session=False)
+        ).rowcount  # type: ignore[attr-defined]
+        if not deleted:
+            DriveOutboxRepository.release(session, job)
+        return bool(deleted)
+
+    @staticmethod
+    def fail(session: Session, job: ClaimedJob, error: str, next_attempt_at: datetime | None) -> None:
+        """Record a failed attempt and schedule the next one (None parks the job).
+
+        If the flight was enqueued again meanwhile the new version keeps its
+        fresh retry state and only the lease is released.
+        """
+        updated = session.execute(
+            update(DriveOutboxJob)
+            .where(DriveOutboxJob.id == job.id, DriveOutboxJob.version == job.version)
+            .values(
+                attempts=DriveOutboxJob.attempts + 1,
+                next_attempt_at=next_attempt_at,
+                last_error=error[:MAX_ERROR_LENGTH],
+                locked_until=None,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount  # type: ignore[attr-defined]
+        if not updated:
+            DriveOutboxRepository.release(session, job)
+
+    @staticmethod
+    def release(session: Session, job: ClaimedJob) -> None:
+        """Drop a job's lease so it can be claimed again right away."""
+        session.execute(
+            update(DriveOutboxJob)
+            .where(DriveOutboxJob.id == job.id)
+            .values(locked_until=None)
+            .execution_options(synchronize_session=False)
+        )
+
+
+class DriveOutboxWorker:
+    """Drains the drive_outbox table with a bounded pool of upload threads."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AbstractContextManager[Session]],
+        client: DriveClient,
+        workers: int = DEFAULT_WORKERS,
+        batch_size: int | None = None,
+        poll_interval: float = 5.0,
+        lease: timedelta = timedelta(minutes=5),
+        base_delay: timedelta = timedelta(seconds=30),
+        max_delay: timedelta = timedelta(hours=1),
+        max_attempts: int = 10,
+        clock: Callable[[], datetime] = _utcnow,
+    ) -> None:
+        """Configure the worker (nothing runs until start() or drain_once()).
+
+        Args:
+            session_factory: Returns a context-managed session (one per job)
+            client: Drive destination
+            workers: Maximum number of concurrent uploads
+            batch_size: Jobs claimed per round (defaults to twice the workers)
+            poll_interval: Seconds between rounds when the queue is idle
+            lease: How long a claimed job is reserved for this worker
+            base_delay: Delay before the first retry, doubled on each failure
+            max_delay: Upper bound of the retry delay
+            max_attempts: Failed attempts after which a job is parked
+            clock: Current time (tests)
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.session_factory = session_factory
+        self.client = client
+        self.workers = workers
+        self.batch_size = batch_size or 2 * workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.repository = DriveOutboxRepository()
+        self._pool: ThreadPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        """Delay before the next attempt after attempts + 1 failures."""
+        delay: timedelta = min(self.base_delay * (2**attempts), self.max_delay)
+        return delay
+
+    def drain_once(self) -> int:
+        """Claim one batch of due jobs and upload them.
+
+        Returns:
+            Number of jobs processed
+        """
+        with self.session_factory() as session:
+            jobs = self.repository.claim(session, self.clock(), self.batch_size, self.lease)
+            session.commit()
+        if not jobs:
+            return 0
+        if self.workers == 1:
+            for job in jobs:
+                self._process(job)
+        else:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="drive-outbox")
+            list(self._pool.map(self._process, jobs))
+        return len(jobs)
+
+    def _process(self, job: ClaimedJob) -> None:
+        """Upload one flight and complete or reschedule its job."""
+        with self.session_factory() as session:
+            flight = FlightRepository.find_by_id_with_pilots(session, job.flight_id)
+            if flight is None:
+                # Deleted after the claim; the row went with it (ON DELETE CASCADE)
+                session.commit()
+                return
+            nome_arquivo = flight.get_file_name()
+            dados_1m = flight.to_json(None)
+            dados_pdf = flight.to_json(get_qualification_catalog(session).names_by_id)
+            # Give the connection back while talking to Drive
+            session.commit()
+
+            try:
+                self.client.upload_flight(nome_arquivo, dados_1m, dados_pdf)
+            except Exception as e:
+                failures = job.attempts + 1
+                next_attempt_at = (
+                    None if failures >= self.max_attempts else self.clock() + self.retry_delay(job.attempts)
+                )
+                logger.warning("Drive upload of %s failed (attempt %d): %s", nome_arquivo, failures, e)
+                self.repository.fail(session, job, str(e) or type(e).__name__, next_attempt_at)
+            else:
+                self.repository.complete(session, job)
+            session.commit()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                processed = self.drain_once()
+            except Exception:
+                logger.exception("Drive outbox round failed")
+                processed = 0
+            if not processed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def wake(self) -> None:
+        """Start the next round now instead of after the poll interval."""
+        self._wake.set()
+
+    def start(self) -> None:
+        """Drain the outbox in a background daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="drive-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the background thread after its current round."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+_worker: DriveOutboxWorker | None = None
+
+
+def wake_drive_outbox_worker() -> None:
+    """Tell this process's worker (if any) that new jobs were committed."""
+    if _worker is not None:
+        _worker.wake()
+
+
+def setup_drive_outbox(app: Flask) -> None:
+    """Start the Drive outbox worker of this process (production only).
+
+    DRIVE_OUTBOX_WORKERS bounds the concurrent uploads per process (0 disables
+    the worker, e.g. when a separate process drains the outbox). Files go to
+    the BACKUP_STORAGE backend.
+
+    Args:
+        app: Flask application instance
+    """
+    global _worker
+    workers = int(
+        app.config.setdefault("DRIVE_OUTBOX_WORKERS", os.environ.get("DRIVE_OUTBOX_WORKERS", DEFAULT_WORKERS))
+    )
+    if FLASK_ENV != "production" or workers <= 0 or _worker is not None:
+        return
+    from app.core.config import engine
+
+    client = StorageDriveClient(get_backup_storage())
+    _worker = DriveOutboxWorker(lambda: Session(engine, autoflush=False), client, workers=workers)
+    _worker.start()
+    atexit.register(_worker.stop, 5.0)
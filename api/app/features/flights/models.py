@@ -2,10 +2,11 @@
 
 from __future__ import annotations  # noqa: D100, INP001
 
-from datetime import date  # noqa: TC003
+from collections.abc import Mapping  # noqa: TC003
+from datetime import date, datetime  # noqa: TC003
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, String, UniqueConstraint
+from sqlalchemy import DateTime, ForeignKey, Index, String, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.shared.models import Base  # type: ignore
@@ -14,6 +15,10 @@ if TYPE_CHECKING:
     from app.features.users.models import Tripulante  # type: ignore
 
 
+# Unique (airtask, date, departure_time, tailnumber); duplicate flights are detected by its violation
+FLIGHT_NATURAL_KEY_CONSTRAINT = "uq_flight_airtask_date_atd_tail"
+
+
 class Flight(Base):
     """Flight Model.
 
@@ -29,8 +34,10 @@ class Flight(Base):
             "date",
             "departure_time",
             "tailnumber",
-            name="uq_flight_airtask_date_atd_tail",
+            name=FLIGHT_NATURAL_KEY_CONSTRAINT,
         ),
+        # Matches the (date DESC, fid DESC) ordering used by keyset pagination
+        Index("ix_flights_table_date_fid", text("date DESC"), text("fid DESC")),
     )
 
     fid: Mapped[int] = mapped_column(primary_key=True)
@@ -67,7 +74,7 @@ class Flight(Base):
         passive_deletes=True,
     )
 
-    def to_json(self, qual_cache: dict[int, str] | None = None) -> dict:
+    def to_json(self, qual_cache: Mapping[int, str] | None = None) -> dict:
         """Return all model data in JSON format.
 
         Args:
@@ -143,7 +150,7 @@ class FlightPilots(Base):
     tripulante: Mapped[Tripulante] = relationship(back_populates="flight_pilots")
     flight: Mapped[Flight] = relationship(back_populates="flight_pilots")
 
-    def to_json(self, qual_cache: dict[int, str] | None = None) -> dict:
+    def to_json(self, qual_cache: Mapping[int, str] | None = None) -> dict:
         """Return all model data in JSON format.
 
         Args:
@@ -197,3 +204,76 @@ class FlightAnomaly(Base):
     description: Mapped[str] = mapped_column(String(50), nullable=False)
 
     flight: Mapped[Flight] = relationship(back_populates="flight_anomalies")
+
+
+class FlightQualificationEvent(Base):
+    """Qualification validated by a crew member on a flight (derived from FlightPilots).
+
+    One row per (pilot, qualification, flight): qual1-qual6 ids plus the landing
+    qualifications implied by the landing counters. Maintained by the flight write
+    paths (FlightRepository.replace_qualification_events); rebuild it with
+    scripts/backfill_flight_qualification_events.py after writing flight_pilots
+    directly.
+    """
+
+    __tablename__ = "flight_qualification_events"
+    __table_args__ = (
+        # "Last validation of qualification Q by pilot P (excluding flight X)" is one index lookup
+        Index(
+            "ix_flight_qualification_events_pilot_qual_date",
+            "pilot_id",
+            "qualificacao_id",
+            text("date DESC"),
+        ),
+    )
+
+    pilot_id: Mapped[int] = mapped_column(ForeignKey("tripulantes.nip", ondelete="CASCADE"), primary_key=True)
+    qualificacao_id: Mapped[int] = mapped_column(
+        ForeignKey("qualificacoes.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    flight_id: Mapped[int] = mapped_column(
+        ForeignKey("flights_table.fid", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    date: Mapped[date]
+
+
+class DriveOutboxJob(Base):
+    """Pending Google Drive upload of a flight's .1m and PDF files (transactional outbox).
+
+    Written in the same transaction as the flight (see app.features.flights.drive_outbox).
+    There is at most one row per flight: enqueueing an already pending flight
+    bumps its version instead, so several edits collapse into one upload of the
+    latest data. Rows are deleted once uploaded.
+    """
+
+    __tablename__ = "drive_outbox"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    flight_id: Mapped[int] = mapped_column(ForeignKey("flights_table.fid", ondelete="CASCADE"), unique=True)
+    # Bumped on every enqueue; a worker only deletes the row if no newer enqueue happened meanwhile
+    version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
+    attempts: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    # NULL once max attempts are exhausted (parked until the flight is enqueued again)
+    next_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), index=True)
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    last_error: Mapped[str | None] = mapped_column(String(500))
+
+
+class FlightBackupManifest(Base):
+    """What the last backup uploaded for a flight (see DatabaseManagementService.rebackup_flights).
+
+    The hashes identify the uploaded content: a rebackup skips flights whose
+    .1m payload and PDF inputs hash the same as recorded here (and whose files
+    still exist in Drive), and updates the others through the stored file IDs
+    instead of looking them up by name.
+    """
+
+    __tablename__ = "flight_backup_manifest"
+
+    flight_id: Mapped[int] = mapped_column(ForeignKey("flights_table.fid", ondelete="CASCADE"), primary_key=True)
+    file_name: Mapped[str] = mapped_column(String(100))
+    sha256_1m: Mapped[str] = mapped_column(String(64))
+    sha256_pdf: Mapped[str | None] = mapped_column(String(64))
+    drive_file_id: Mapped[str | None] = mapped_column(String(100))
+    pdf_drive_file_id: Mapped[str | None] = mapped_column(String(100))
+    uploaded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
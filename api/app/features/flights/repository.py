@@ -1,22 +1,188 @@
 """Flights repository - database access only."""
 
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 from datetime import date
 from typing import Any
 
-from sqlalchemy import delete, func, or_, select, union_all
-from sqlalchemy.orm import Session, joinedload
-
-from app.features.flights.models import Flight, FlightAnomaly, FlightPilots  # type: ignore
-from app.features.qualifications.models import Qualificacao  # type: ignore
-from app.features.users.models import Tripulante, TripulanteQualificacao  # type: ignore
-from app.shared.models import year_init  # type: ignore
+from sqlalchemy import (
+    ColumnElement,
+    CompoundSelect,
+    Row,
+    String,
+    and_,
+    case,
+    cast,
+    delete,
+    exc,
+    func,
+    insert,
+    select,
+    tuple_,
+    union,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.features.flights.models import (
+    FLIGHT_NATURAL_KEY_CONSTRAINT,
+    Flight,
+    FlightAnomaly,
+    FlightPilots,
+    FlightQualificationEvent,
+)
+from app.features.flights.serializers import ANOMALY_ROW_COLUMNS, CREW_ROW_COLUMNS, FLIGHT_ROW_COLUMNS
+from app.features.qualifications.models import Qualificacao
+from app.features.users.models import Tripulante, TripulanteQualificacao
+from app.shared.enums import TipoTripulante
+from app.shared.models import year_init
+
+# Column list SQLite puts in the message of a natural-key violation
+_NATURAL_KEY_COLUMNS = ", ".join(
+    f"{Flight.__tablename__}.{name}" for name in ("airtask", "date", "departure_time", "tailnumber")
+)
+
+
+def _ilike_contains(column: Any, term: str) -> Any:
+    """Case-insensitive substring match on a column.
+
+    On PostgreSQL a plain ``column ILIKE '%term%'`` (no lower()/cast around the
+    column) is what the pg_trgm GIN indexes from b7c2d9e4f1a6 can serve. LIKE
+    wildcards typed by the user are escaped so they match literally. Without
+    pg_trgm, or on SQLite (lower(col) LIKE lower(pattern)), this is a scan.
+    """
+    escaped = term.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.ilike(f"%{escaped}%", escape="\\")
+
+
+QUAL_COLUMNS = (
+    FlightPilots.qual1,
+    FlightPilots.qual2,
+    FlightPilots.qual3,
+    FlightPilots.qual4,
+    FlightPilots.qual5,
+    FlightPilots.qual6,
+)
+
+# Landing qualifications are implied by a positive counter on FlightPilots
+LANDING_QUAL_COLUMNS: dict[str, Any] = {
+    "ATR": FlightPilots.day_landings,
+    "ATN": FlightPilots.night_landings,
+    "precapp": FlightPilots.prec_app,
+    "nprecapp": FlightPilots.nprec_app,
+}
+
+
+def _qualification_event_source(
+    flight_ids: Sequence[int] | None = None,
+    pilot_ids: Sequence[int] | None = None,
+    qualificacao_ids: Sequence[int] | None = None,
+    since: date | None = None,
+) -> CompoundSelect[int, int, int, date]:
+    """Select the (pilot_id, qualificacao_id, flight_id, date) events implied by flight_pilots.
+
+    qual1-qual6 match a qualification by its id as a string; each positive landing
+    counter of a pilot maps to the qualification with that payload_key for the
+    PILOTO tipo (lowest id first, like the catalog's by_payload_key), as in
+    FlightService._validated_qualification_ids.
+    """
+    conditions: list[ColumnElement[bool]] = []
+    if flight_ids is not None:
+        conditions.append(FlightPilots.flight_id.in_(flight_ids))
+    if pilot_ids is not None:
+        conditions.append(FlightPilots.pilot_id.in_(pilot_ids))
+    if since is not None:
+        conditions.append(Flight.date >= since)
+
+    parts = []
+    for qual_column in QUAL_COLUMNS:
+        stmt = (
+            select(
+                FlightPilots.pilot_id,
+                Qualificacao.id.label("qualificacao_id"),
+                Flight.fid.label("flight_id"),
+                Flight.date,
+            )
+            .join(Flight, Flight.fid == FlightPilots.flight_id)
+            .join(Qualificacao, cast(Qualificacao.id, String) == qual_column)
+            .where(*conditions)
+        )
+        if qualificacao_ids is not None:
+            stmt = stmt.where(Qualificacao.id.in_(qualificacao_ids))
+        parts.append(stmt)
+
+    landing_quals = (
+        select(
+            Qualificacao.payload_key,
+            Qualificacao.tipo_aplicavel,
+            func.min(Qualificacao.id).label("id"),
+        )
+        .where(Qualificacao.payload_key.in_(LANDING_QUAL_COLUMNS))
+        .group_by(Qualificacao.payload_key, Qualificacao.tipo_aplicavel)
+        .subquery()
+    )
+    for payload_key, landing_column in LANDING_QUAL_COLUMNS.items():
+        stmt = (
+            select(
+                FlightPilots.pilot_id,
+                landing_quals.c.id.label("qualificacao_id"),
+                Flight.fid.label("flight_id"),
+                Flight.date,
+            )
+            .join(Flight, Flight.fid == FlightPilots.flight_id)
+            .join(Tripulante, Tripulante.nip == FlightPilots.pilot_id)
+            .join(
+                landing_quals,
+                and_(landing_quals.c.payload_key == payload_key, landing_quals.c.tipo_aplicavel == Tripulante.tipo),
+            )
+            .where(landing_column > 0, Tripulante.tipo == TipoTripulante.PILOTO, *conditions)
+        )
+        if qualificacao_ids is not None:
+            stmt = stmt.where(landing_quals.c.id.in_(qualificacao_ids))
+        parts.append(stmt)
+    # UNION (not ALL): the same qualification in two slots is still one event
+    return union(*parts)
 
 
 def _crew_search_condition(search: str):
     """Build crew match condition: NIP if search is numeric, else name ilike."""
     if search.strip().isdigit():
         return Tripulante.nip == int(search.strip())
-    return Tripulante.name.ilike(f"%{search.strip()}%")
+    return _ilike_contains(Tripulante.name, search)
+
+
+def _flight_filter_conditions(
+    airtask: str | None = None,
+    tail_number: int | None = None,
+    action: str | None = None,
+    atd: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list[ColumnElement[bool]]:
+    """Build the per-field WHERE conditions shared by the flight listings."""
+    conditions = []
+    if airtask:
+        conditions.append(_ilike_contains(Flight.airtask, airtask))
+    if tail_number is not None:
+        conditions.append(Flight.tailnumber == tail_number)
+    if action:
+        conditions.append(_ilike_contains(Flight.flight_action, action))
+    if atd:
+        conditions.append(_ilike_contains(Flight.departure_time, atd))
+    if date_from is not None:
+        conditions.append(Flight.date >= date_from)
+    if date_to is not None:
+        conditions.append(Flight.date <= date_to)
+    return conditions
+
+
+# Page loaders select only the flight rows (LIMIT applies to flights, not to a
+# flights x crew x anomalies join) and then fetch crew, tripulantes and anomalies
+# for exactly those fids with one IN query each.
+_PAGE_LOAD_OPTIONS = (
+    selectinload(Flight.flight_pilots).selectinload(FlightPilots.tripulante),
+    selectinload(Flight.flight_anomalies),
+)
 
 
 class FlightRepository:
@@ -42,17 +208,59 @@ class FlightRepository:
         stmt = (
             select(Flight)
             .order_by(Flight.date.desc())
-            .options(
-                joinedload(Flight.flight_pilots).joinedload(FlightPilots.tripulante),
-                joinedload(Flight.flight_anomalies),
-            )
+            .options(*_PAGE_LOAD_OPTIONS)
             .limit(per_page)
             .offset((page - 1) * per_page)
         )
-        return list(session.execute(stmt).unique().scalars().all()), total
+        return list(session.execute(stmt).scalars().all()), total
+
+    @staticmethod
+    def count_filtered(
+        session: Session,
+        airtask: str | None = None,
+        tail_number: int | None = None,
+        action: str | None = None,
+        atd: str | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> int:
+        """Count flights matching the per-field filters of the flight listing.
+
+        Args:
+            session: Database session
+            airtask, tail_number, action, atd, date_from, date_to: Optional per-field filters
+
+        Returns:
+            Number of matching flights
+        """
+        conditions = _flight_filter_conditions(airtask, tail_number, action, atd, date_from, date_to)
+        return session.execute(select(func.count(Flight.fid)).where(*conditions)).scalar_one()
 
     @staticmethod
-    def find_all_with_pilots_paginated_filtered(
+    def count_flights_for_crew(
+        session: Session, pilot_ids: Sequence[int] | None = None, since: date | None = None
+    ) -> int:
+        """Count flights crewed by any of pilot_ids (all flights if None), optionally since a date.
+
+        Args:
+            session: Database session
+            pilot_ids: Crew member NIPs
+            since: Only flights dated on or after this day
+
+        Returns:
+            Number of matching flights
+        """
+        stmt = select(func.count(Flight.fid))
+        if pilot_ids is not None:
+            stmt = stmt.where(
+                Flight.fid.in_(select(FlightPilots.flight_id).where(FlightPilots.pilot_id.in_(pilot_ids)))
+            )
+        if since is not None:
+            stmt = stmt.where(Flight.date >= since)
+        return session.execute(stmt).scalar_one()
+
+    @staticmethod
+    def find_flight_rows_paginated_filtered(
         session: Session,
         page: int,
         per_page: int,
@@ -62,71 +270,171 @@ class FlightRepository:
         atd: str | None = None,
         date_from: date | None = None,
         date_to: date | None = None,
-    ) -> tuple[list[Flight], int]:
-        """Get paginated flights with optional per-field filters."""
-        count_stmt = select(func.count(Flight.fid))
-        list_stmt = (
-            select(Flight)
-            .order_by(Flight.date.desc())
-            .options(
-                joinedload(Flight.flight_pilots).joinedload(FlightPilots.tripulante),
-                joinedload(Flight.flight_anomalies),
-            )
+    ) -> list[Row[*tuple[Any, ...]]]:
+        """Get one offset page of flight column rows with optional per-field filters.
+
+        Args:
+            session: Database session
+            page: 1-based page number
+            per_page: Page size
+            airtask, tail_number, action, atd, date_from, date_to: Optional per-field filters
+
+        Returns:
+            FLIGHT_ROW_COLUMNS rows ordered by date and fid descending
+        """
+        stmt = (
+            select(*FLIGHT_ROW_COLUMNS)
+            .where(*_flight_filter_conditions(airtask, tail_number, action, atd, date_from, date_to))
+            .order_by(Flight.date.desc(), Flight.fid.desc())
+            .limit(per_page)
+            .offset((page - 1) * per_page)
         )
-        conditions = []
-        if airtask:
-            conditions.append(Flight.airtask.ilike(f"%{airtask.strip()}%"))
-        if tail_number is not None:
-            conditions.append(Flight.tailnumber == tail_number)
-        if action:
-            conditions.append(Flight.flight_action.ilike(f"%{action.strip()}%"))
-        if atd:
-            conditions.append(Flight.departure_time.ilike(f"%{atd.strip()}%"))
-        if date_from is not None:
-            conditions.append(Flight.date >= date_from)
-        if date_to is not None:
-            conditions.append(Flight.date <= date_to)
-        for cond in conditions:
-            count_stmt = count_stmt.where(cond)
-            list_stmt = list_stmt.where(cond)
-        total = session.execute(count_stmt).scalar_one()
-        list_stmt = list_stmt.limit(per_page).offset((page - 1) * per_page)
-        return list(session.execute(list_stmt).unique().scalars().all()), total
+        return list(session.execute(stmt).all())
+
+    @staticmethod
+    def find_flight_rows_keyset_filtered(
+        session: Session,
+        per_page: int,
+        after: tuple[date, int] | None = None,
+        airtask: str | None = None,
+        tail_number: int | None = None,
+        action: str | None = None,
+        atd: str | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> list[Row[*tuple[Any, ...]]]:
+        """Get one keyset page of flight column rows ordered by (date DESC, fid DESC).
+
+        Rows before the cursor are never scanned: the seek predicate
+        ``(date, fid) < after`` walks ix_flights_table_date_fid directly.
+
+        Args:
+            session: Database session
+            per_page: Maximum number of flights to return
+            after: (date, fid) of the last flight of the previous page, or None for the first page
+            airtask, tail_number, action, atd, date_from, date_to: Same filters as the offset listing
+
+        Returns:
+            Up to per_page + 1 FLIGHT_ROW_COLUMNS rows; the extra row only signals that another page exists
+        """
+        stmt = select(*FLIGHT_ROW_COLUMNS).where(
+            *_flight_filter_conditions(airtask, tail_number, action, atd, date_from, date_to)
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(Flight.date, Flight.fid) < tuple_(*after))
+        stmt = stmt.order_by(Flight.date.desc(), Flight.fid.desc()).limit(per_page + 1)
+        return list(session.execute(stmt).all())
+
+    @staticmethod
+    def iter_flight_row_batches(
+        session: Session,
+        batch_size: int,
+        tail_number: int | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> Iterator[Sequence[Row[*tuple[Any, ...]]]]:
+        """Stream flight column rows in (date, fid) order, batch_size rows at a time.
+
+        Uses yield_per, i.e. a server-side cursor on PostgreSQL, so only one batch
+        is held in memory and the first batch is available before the scan ends.
+
+        Args:
+            session: Database session (must stay open while the iterator is consumed)
+            batch_size: Rows fetched per round-trip
+            tail_number, date_from, date_to: Optional filters
+
+        Yields:
+            Lists of FLIGHT_ROW_COLUMNS rows
+        """
+        stmt = (
+            select(*FLIGHT_ROW_COLUMNS)
+            .where(*_flight_filter_conditions(tail_number=tail_number, date_from=date_from, date_to=date_to))
+            .order_by(Flight.date.asc(), Flight.fid.asc())
+        )
+        result = session.execute(stmt, execution_options={"yield_per": batch_size})
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
+
+    @staticmethod
+    def find_crew_rows_by_flight_ids(session: Session, flight_ids: list[int]) -> list[Row[*tuple[Any, ...]]]:
+        """Get the crew of several flights as plain rows with one IN query.
+
+        Args:
+            session: Database session
+            flight_ids: Flight IDs
+
+        Returns:
+            CREW_ROW_COLUMNS rows (FlightPilots columns plus the tripulante's name, nip and rank)
+        """
+        if not flight_ids:
+            return []
+        stmt = (
+            select(*CREW_ROW_COLUMNS)
+            .join(Tripulante, Tripulante.nip == FlightPilots.pilot_id)
+            .where(FlightPilots.flight_id.in_(flight_ids))
+        )
+        return list(session.execute(stmt).all())
 
     @staticmethod
-    def find_flights_by_crew_search(
+    def find_anomaly_rows_by_flight_ids(session: Session, flight_ids: list[int]) -> list[Row[*tuple[Any, ...]]]:
+        """Get (flight_id, description) rows for several flights with one IN query.
+
+        Args:
+            session: Database session
+            flight_ids: Flight IDs
+
+        Returns:
+            Anomaly rows ordered by id
+        """
+        if not flight_ids:
+            return []
+        stmt = select(*ANOMALY_ROW_COLUMNS).where(FlightAnomaly.flight_id.in_(flight_ids)).order_by(FlightAnomaly.id)
+        return list(session.execute(stmt).all())
+
+    @staticmethod
+    def find_crew_rows_by_crew_search(
         session: Session,
         search: str,
         date_from: date | None = None,
         date_to: date | None = None,
-    ) -> list[Flight]:
-        """Get flights where a crew member matches the search term (NIP or name), optionally within a date range.
+        limit: int | None = None,
+        after: tuple[date, int, int] | None = None,
+    ) -> list[Row[*tuple[Any, ...]]]:
+        """Get the crew rows matching the search term (NIP or name), with their flight's fid, airtask and date.
+
+        Only the matching crew members are selected (not the rest of each crew),
+        ordered by (date DESC, fid DESC, nip DESC) so the result can be paged with
+        a keyset cursor. A NIP search walks ix_flight_pilots_pilot_id.
 
         Args:
             session: Database session
             search: Crew search term (numeric NIP or partial name)
             date_from: Optional start date (inclusive)
             date_to: Optional end date (inclusive)
+            limit: Optional maximum number of rows
+            after: (date, fid, nip) of the last row of the previous page, or None to start at the newest
 
         Returns:
-            List of Flight instances with pilots loaded, ordered by date descending
+            CREW_ROW_COLUMNS rows plus the flight's fid, airtask and date
         """
         stmt = (
-            select(Flight)
-            .join(Flight.flight_pilots)
-            .join(FlightPilots.tripulante)
+            select(*CREW_ROW_COLUMNS, Flight.fid, Flight.airtask, Flight.date)
+            .join(Tripulante, Tripulante.nip == FlightPilots.pilot_id)
+            .join(Flight, Flight.fid == FlightPilots.flight_id)
             .where(_crew_search_condition(search))
-            .distinct()
-            .order_by(Flight.date.desc())
-            .options(
-                joinedload(Flight.flight_pilots).joinedload(FlightPilots.tripulante),
-            )
         )
         if date_from is not None:
             stmt = stmt.where(Flight.date >= date_from)
         if date_to is not None:
             stmt = stmt.where(Flight.date <= date_to)
-        return list(session.execute(stmt).unique().scalars().all())
+        if after is not None:
+            stmt = stmt.where(tuple_(Flight.date, Flight.fid, FlightPilots.pilot_id) < tuple_(*after))
+        stmt = stmt.order_by(Flight.date.desc(), Flight.fid.desc(), FlightPilots.pilot_id.desc())
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return list(session.execute(stmt).all())
 
     @staticmethod
     def find_all_ordered_by_date_asc(session: Session) -> list[Flight]:
@@ -162,44 +470,47 @@ class FlightRepository:
         return session.execute(stmt).scalar_one_or_none()
 
     @staticmethod
-    def find_by_natural_key(
-        session: Session,
-        airtask: str,
-        flight_date: date,
-        departure_time: str,
-        tailnumber: int,
-        exclude_fid: int | None = None,
-    ) -> Flight | None:
-        """Find a flight by natural key (airtask, date, departure_time, tailnumber).
-
-        Used for duplicate checks: create must find none; update must find none
-        when excluding the current flight id.
+    def find_existing_natural_keys(
+        session: Session, keys: Iterable[tuple[str, date, str, int]]
+    ) -> set[tuple[str, date, str, int]]:
+        """Return which (airtask, date, departure_time, tailnumber) keys already exist, in one query.
 
         Args:
             session: Database session
-            airtask: Flight airtask
-            flight_date: Flight date
-            departure_time: Departure time (ATD)
-            tailnumber: Aircraft tail number
-            exclude_fid: If set, ignore the flight with this fid (for update case)
+            keys: Natural keys to look up
 
         Returns:
-            Flight instance or None if not found (or only the excluded one exists)
+            The subset of keys that belong to an existing flight
         """
-        stmt = (
-            select(Flight)
-            .where(
-                Flight.airtask == airtask,
-                Flight.date == flight_date,
-                Flight.departure_time == departure_time,
-                Flight.tailnumber == tailnumber,
-            )
-            .order_by(Flight.fid)
-            .limit(1)
-        )
-        if exclude_fid is not None:
-            stmt = stmt.where(Flight.fid != exclude_fid)
-        return session.execute(stmt).scalar_one_or_none()
+        keys = set(keys)
+        if not keys:
+            return set()
+        natural_key = tuple_(Flight.airtask, Flight.date, Flight.departure_time, Flight.tailnumber)
+        rows = session.execute(
+            select(Flight.airtask, Flight.date, Flight.departure_time, Flight.tailnumber).where(natural_key.in_(keys))
+        ).all()
+        return {tuple(row) for row in rows}  # type: ignore[misc]
+
+    @staticmethod
+    def is_natural_key_violation(error: exc.IntegrityError) -> bool:
+        """Return whether an IntegrityError comes from the flights natural-key unique constraint.
+
+        Args:
+            error: Error raised by a flush/INSERT/UPDATE on flights_table
+
+        psycopg2 reports the constraint name in ``diag``; other drivers only in
+        the message, by name (PostgreSQL, MySQL) or by columns (SQLite:
+        "UNIQUE constraint failed: flights_table.airtask, ...").
+
+        Returns:
+            True for a duplicate (airtask, date, departure_time, tailnumber)
+        """
+        diag = getattr(error.orig, "diag", None)
+        constraint_name: str | None = getattr(diag, "constraint_name", None)
+        if constraint_name is not None:
+            return constraint_name == FLIGHT_NATURAL_KEY_CONSTRAINT
+        message = str(error.orig)
+        return FLIGHT_NATURAL_KEY_CONSTRAINT in message or _NATURAL_KEY_COLUMNS in message
 
     @staticmethod
     def find_by_id_with_pilots(session: Session, flight_id: int) -> Flight | None:
@@ -236,6 +547,38 @@ class FlightRepository:
         session.add(flight)
         return flight
 
+    @staticmethod
+    def insert_flights(session: Session, rows: Sequence[Mapping[str, Any]]) -> list[int]:
+        """Insert many flights with one bulk INSERT ... RETURNING fid.
+
+        Args:
+            session: Database session
+            rows: Flight column values, one mapping per flight
+
+        Returns:
+            The new fids, in the order of rows
+        """
+        if not rows:
+            return []
+        stmt = insert(Flight).returning(Flight.fid, sort_by_parameter_order=True)
+        return list(session.scalars(stmt, list(rows)))
+
+    @staticmethod
+    def insert_flight_children(
+        session: Session, crew_rows: Sequence[Mapping[str, Any]], anomaly_rows: Sequence[Mapping[str, Any]]
+    ) -> None:
+        """Insert crew (flight_pilots) and anomaly rows of new flights with one bulk INSERT each.
+
+        Args:
+            session: Database session
+            crew_rows: FlightPilots column values (flight_id and pilot_id included)
+            anomaly_rows: FlightAnomaly column values (flight_id and description)
+        """
+        if crew_rows:
+            session.execute(insert(FlightPilots), list(crew_rows))
+        if anomaly_rows:
+            session.execute(insert(FlightAnomaly), list(anomaly_rows))
+
     @staticmethod
     def flush(session: Session) -> None:
         """Flush pending changes to database.
@@ -340,7 +683,7 @@ class FlightRepository:
         Returns:
             Tripulante instance or None if not found
         """
-        return session.get(Tripulante, nip)  # type: ignore
+        return session.get(Tripulante, nip)
 
     @staticmethod
     def find_qualifications_by_tipo(session: Session, tipo: Any) -> list[Qualificacao]:
@@ -414,6 +757,23 @@ class FlightRepository:
         stmt = select(TripulanteQualificacao).where(TripulanteQualificacao.tripulante_id == pilot_id)
         return list(session.execute(stmt).scalars().all())
 
+    @staticmethod
+    def find_tripulantes_by_nips(session: Session, nips: Iterable[int]) -> dict[int, Tripulante]:
+        """Find tripulantes by NIP with one IN query.
+
+        Args:
+            session: Database session
+            nips: Tripulante NIPs
+
+        Returns:
+            {nip: Tripulante} for the NIPs that exist
+        """
+        nips = set(nips)
+        if not nips:
+            return {}
+        tripulantes = session.execute(select(Tripulante).where(Tripulante.nip.in_(nips))).scalars()
+        return {t.nip: t for t in tripulantes}
+
     @staticmethod
     def find_tripulante_qualificacoes_by_pilot_ids(
         session: Session, pilot_ids: list[int]
@@ -478,6 +838,134 @@ class FlightRepository:
         session.add(tripulante_qualificacao)
         session.flush()
 
+    @staticmethod
+    def replace_qualification_events(
+        session: Session,
+        flight_ids: Sequence[int] | None = None,
+        pilot_ids: Sequence[int] | None = None,
+        qualificacao_ids: Sequence[int] | None = None,
+        since: date | None = None,
+    ) -> int:
+        """Rebuild flight_qualification_events from flight_pilots for the given scope.
+
+        Existing events in scope are deleted and re-derived in two statements;
+        with no filters the whole table is rebuilt (backfill). Call after the
+        FlightPilots changes are flushed.
+
+        Args:
+            session: Database session
+            flight_ids: Only these flights
+            pilot_ids: Only these crew members
+            qualificacao_ids: Only these qualifications
+            since: Only flights dated on or after this day
+
+        Returns:
+            Number of events inserted
+        """
+        stale = delete(FlightQualificationEvent)
+        if flight_ids is not None:
+            stale = stale.where(FlightQualificationEvent.flight_id.in_(flight_ids))
+        if pilot_ids is not None:
+            stale = stale.where(FlightQualificationEvent.pilot_id.in_(pilot_ids))
+        if qualificacao_ids is not None:
+            stale = stale.where(FlightQualificationEvent.qualificacao_id.in_(qualificacao_ids))
+        if since is not None:
+            # Scoped by the flight's date, not the event's, in case a flight was moved
+            stale = stale.where(FlightQualificationEvent.flight_id.in_(select(Flight.fid).where(Flight.date >= since)))
+        session.execute(stale)
+        result = session.execute(
+            insert(FlightQualificationEvent).from_select(
+                ["pilot_id", "qualificacao_id", "flight_id", "date"],
+                _qualification_event_source(flight_ids, pilot_ids, qualificacao_ids, since),
+            )
+        )
+        return int(result.rowcount)  # type: ignore[attr-defined]
+
+    @staticmethod
+    def upsert_last_validation_dates(
+        session: Session,
+        flight_ids: Sequence[int] | None = None,
+        pilot_ids: Sequence[int] | None = None,
+        qualificacao_ids: Sequence[int] | None = None,
+        since: date | None = None,
+    ) -> int:
+        """Move every tripulante_qualificacoes date forward to the crew member's latest flight validating it.
+
+        One grouped query computes max(date) per (tripulante, qualificacao) from
+        flight_pilots (same derivation as replace_qualification_events) and a
+        single INSERT ... ON CONFLICT (tripulante_id, qualificacao_id) DO UPDATE
+        writes it. Missing rows are created; existing rows only change when the
+        computed date is later, so manual dates ahead of the flight log are kept.
+        PostgreSQL only.
+
+        Restricting to some flights (or flights since a date) gives the same
+        result as a full run for every pair those flights validate: dates only
+        move forward, so flights outside the scope can never win.
+
+        Args:
+            session: Database session
+            flight_ids: Only these flights
+            pilot_ids: Only these crew members
+            qualificacao_ids: Only these qualifications
+            since: Only flights dated on or after this day
+
+        Returns:
+            Number of rows inserted or moved forward
+        """
+        source = _qualification_event_source(flight_ids, pilot_ids, qualificacao_ids, since).subquery()
+        latest = select(source.c.pilot_id, source.c.qualificacao_id, func.max(source.c.date)).group_by(
+            source.c.pilot_id, source.c.qualificacao_id
+        )
+        stmt = pg_insert(TripulanteQualificacao).from_select(
+            ["tripulante_id", "qualificacao_id", "data_ultima_validacao"], latest
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TripulanteQualificacao.tripulante_id, TripulanteQualificacao.qualificacao_id],
+            set_={"data_ultima_validacao": stmt.excluded.data_ultima_validacao},
+            where=TripulanteQualificacao.data_ultima_validacao < stmt.excluded.data_ultima_validacao,
+        )
+        return int(session.execute(stmt).rowcount)  # type: ignore[attr-defined]
+
+    @staticmethod
+    def set_last_validation_dates(session: Session, dates: Mapping[tuple[int, int], date]) -> int:
+        """Write data_ultima_validacao for many (tripulante, qualificacao) pairs in one UPDATE ... SET = CASE.
+
+        Plain UPDATE/CASE and row-value IN, so it runs on every supported
+        dialect (PostgreSQL and the SQLite dev database). Only existing
+        tripulante_qualificacoes rows are updated; loaded instances are not
+        synchronized (expire or commit afterwards).
+
+        Args:
+            session: Database session
+            dates: {(tripulante_id, qualificacao_id): new date}
+
+        Returns:
+            Number of rows updated
+        """
+        if not dates:
+            return 0
+        pair = tuple_(TripulanteQualificacao.tripulante_id, TripulanteQualificacao.qualificacao_id)
+        new_date = case(
+            *[
+                (
+                    and_(
+                        TripulanteQualificacao.tripulante_id == pilot_id,
+                        TripulanteQualificacao.qualificacao_id == qual_id,
+                    ),
+                    value,
+                )
+                for (pilot_id, qual_id), value in dates.items()
+            ],
+            else_=TripulanteQualificacao.data_ultima_validacao,
+        )
+        stmt = (
+            update(TripulanteQualificacao)
+            .where(pair.in_(list(dates)))
+            .values(data_ultima_validacao=new_date)
+            .execution_options(synchronize_session=False)
+        )
+        return int(session.execute(stmt).rowcount)  # type: ignore[attr-defined]
+
     @staticmethod
     def find_max_flight_date_for_qualification(
         session: Session, pilot_id: int, qualificacao_id: int, exclude_flight_id: int
@@ -493,44 +981,37 @@ class FlightRepository:
         Returns:
             Maximum date or None if not found
         """
-        # First, load the qualification to understand how it is tracked
-        qual = session.get(Qualificacao, qualificacao_id)  # type: ignore[arg-type]
-
-        # For landing-based qualifications (ATR, ATN, precapp, nprecapp),
-        # the presence of the qualification on a flight is encoded via
-        # the corresponding landing counters on FlightPilots rather than
-        # qual1-qual6. We need to look at those counters instead.
-        landing_qual_map: dict[str, Any] = {
-            "ATR": FlightPilots.day_landings,
-            "ATN": FlightPilots.night_landings,
-            "precapp": FlightPilots.prec_app,
-            "nprecapp": FlightPilots.nprec_app,
-        }
-
-        if qual is not None and qual.payload_key is not None and qual.payload_key in landing_qual_map:
-            landing_field = landing_qual_map[qual.payload_key]
-            stmt = (
-                select(func.max(Flight.date))
-                .join(FlightPilots, Flight.fid == FlightPilots.flight_id)
-                .where(FlightPilots.pilot_id == pilot_id)
-                .where(Flight.fid != exclude_flight_id)
-                .where(landing_field.isnot(None))
-                .where(landing_field > 0)
-            )
-        else:
-            # For all other qualifications, they are tracked by ID in qual1-qual6.
-            qual_fields = ["qual1", "qual2", "qual3", "qual4", "qual5", "qual6"]
-            qual_conditions = [getattr(FlightPilots, field) == str(qualificacao_id) for field in qual_fields]
-            stmt = (
-                select(func.max(Flight.date))
-                .join(FlightPilots, Flight.fid == FlightPilots.flight_id)
-                .where(FlightPilots.pilot_id == pilot_id)
-                .where(Flight.fid != exclude_flight_id)
-                .where(or_(*qual_conditions))
-            )
+        return FlightRepository.find_max_flight_dates_batch(session, pilot_id, {qualificacao_id}, exclude_flight_id)[
+            qualificacao_id
+        ]
+
+    @staticmethod
+    def find_max_flight_dates_for_pairs(
+        session: Session,
+        pairs: Iterable[tuple[int, int]],
+        exclude_flight_id: int,
+    ) -> dict[tuple[int, int], date]:
+        """Return {(pilot_id, qualificacao_id): max_date} over all flights but exclude_flight_id, in one round-trip.
+
+        Like find_max_flight_dates_batch, for several crew members at once;
+        pairs never validated elsewhere get date(year_init, 1, 1).
+        """
+        pairs = set(pairs)
+        if not pairs:
+            return {}
 
-        result = session.execute(stmt).scalar_one_or_none()
-        return result if result else date(year_init, 1, 1)
+        event = FlightQualificationEvent
+        rows = session.execute(
+            select(event.pilot_id, event.qualificacao_id, func.max(event.date))
+            .where(
+                tuple_(event.pilot_id, event.qualificacao_id).in_(pairs),
+                event.flight_id != exclude_flight_id,
+            )
+            .group_by(event.pilot_id, event.qualificacao_id)
+        ).all()
+        max_by_pair = {(pilot_id, qid): max_date for pilot_id, qid, max_date in rows}
+        default_date = date(year_init, 1, 1)
+        return {pair: max_by_pair.get(pair) or default_date for pair in pairs}
 
     @staticmethod
     def find_max_flight_dates_batch(
@@ -539,69 +1020,26 @@ class FlightRepository:
         qual_ids: set[int],
         exclude_flight_id: int,
     ) -> dict[int, date]:
-        """Return {qualificacao_id: max_date} for all qual_ids in one or two round-trips.
+        """Return {qualificacao_id: max_date} for all qual_ids in one round-trip.
 
-        Replaces N individual calls to find_max_flight_date_for_qualification.
-        Landing-type quals (ATR/ATN/precapp/nprecapp) are resolved per landing field;
-        standard quals (qual1-qual6) are resolved with a single UNION ALL query.
+        Reads flight_qualification_events, so each qualification is a backward scan
+        of ix_flight_qualification_events_pilot_qual_date that stops at the first
+        event not on exclude_flight_id. Qualifications never validated get
+        date(year_init, 1, 1).
         """
         if not qual_ids:
             return {}
 
-        quals = list(session.execute(select(Qualificacao).where(Qualificacao.id.in_(qual_ids))).scalars())
-
-        landing_field_map: dict[str, Any] = {
-            "ATR": FlightPilots.day_landings,
-            "ATN": FlightPilots.night_landings,
-            "precapp": FlightPilots.prec_app,
-            "nprecapp": FlightPilots.nprec_app,
-        }
-
-        landing_quals = [q for q in quals if q.payload_key in landing_field_map]
-        standard_quals = [q for q in quals if q.payload_key not in landing_field_map]
-
-        result: dict[int, date] = {}
-        default_date = date(year_init, 1, 1)
-
-        # Landing quals: one query per distinct landing field present in the set (max 4)
-        for payload_key, field in landing_field_map.items():
-            matched = [q for q in landing_quals if q.payload_key == payload_key]
-            if not matched:
-                continue
-            stmt = (
-                select(func.max(Flight.date))
-                .join(FlightPilots, Flight.fid == FlightPilots.flight_id)
-                .where(FlightPilots.pilot_id == pilot_id, Flight.fid != exclude_flight_id)
-                .where(field.isnot(None), field > 0)
+        event = FlightQualificationEvent
+        rows = session.execute(
+            select(event.qualificacao_id, func.max(event.date))
+            .where(
+                event.pilot_id == pilot_id,
+                event.qualificacao_id.in_(qual_ids),
+                event.flight_id != exclude_flight_id,
             )
-            max_date = session.execute(stmt).scalar_one_or_none()
-            for q in matched:
-                result[q.id] = max_date or default_date
-
-        # Standard quals: UNION ALL across qual1-qual6, one round-trip total
-        if standard_quals:
-            standard_ids_str = {str(q.id) for q in standard_quals}
-            col_names = ["qual1", "qual2", "qual3", "qual4", "qual5", "qual6"]
-            parts = [
-                select(
-                    getattr(FlightPilots, col).label("qid"),
-                    func.max(Flight.date).label("max_date"),
-                )
-                .join(FlightPilots, Flight.fid == FlightPilots.flight_id)
-                .where(FlightPilots.pilot_id == pilot_id, Flight.fid != exclude_flight_id)
-                .where(getattr(FlightPilots, col).in_(standard_ids_str))
-                .group_by(getattr(FlightPilots, col))
-                for col in col_names
-            ]
-            rows = session.execute(union_all(*parts)).all()
-            max_by_qid: dict[str, date | None] = {}
-            for qid_str, max_date in rows:
-                if qid_str is None:
-                    continue
-                existing = max_by_qid.get(qid_str)
-                if existing is None or (max_date and max_date > existing):
-                    max_by_qid[qid_str] = max_date
-            for q in standard_quals:
-                result[q.id] = max_by_qid.get(str(q.id)) or default_date
-
-        return result
+            .group_by(event.qualificacao_id)
+        ).all()
+        max_by_qid = dict(rows)
+        default_date = date(year_init, 1, 1)
+        return {qid: max_by_qid.get(qid) or default_date for qid in qual_ids}
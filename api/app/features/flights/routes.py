@@ -1,10 +1,13 @@
 """Flights routes - thin request/response handlers."""
 
 import logging
+from collections.abc import Iterator
+from typing import Any, cast
 
-from flask import Blueprint, Response, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from sqlalchemy.orm import Session
 
+from app.core import data_version
 from app.core.config import engine
 from app.features.flights.schemas import (
     FlightCreateSchema,
@@ -12,7 +15,8 @@ from app.features.flights.schemas import (
     format_validation_errors,
     validate_request,
 )
-from app.features.flights.service import FlightService
+from app.features.flights.service import MAX_BATCH_FLIGHTS, FlightService
+from app.shared.http_cache import conditional_get
 from app.shared.permissions import require_permission
 
 logger = logging.getLogger(__name__)
@@ -22,10 +26,12 @@ flight_service = FlightService()
 # Schema instances
 flight_create_schema = FlightCreateSchema()
 flight_update_schema = FlightUpdateSchema()
+flight_batch_schema = FlightCreateSchema(many=True)
 
 
 @flights_bp.route("/", methods=["GET"], strict_slashes=False)
 @require_permission("flights.read")
+@conditional_get(data_version.FLIGHTS, data_version.TRIPULANTES, data_version.QUALIFICACOES)
 def list_flights() -> tuple[Response, int]:
     """List all flights.
 
@@ -33,8 +39,26 @@ def list_flights() -> tuple[Response, int]:
     tags:
       - Flights
     summary: List all flights
+    description: |
+      Offset mode (default): page/per_page, response pagination has total and pages
+      (totals are cached until flights are written).
+      Cursor mode: pass `after` (empty for the first page, then the previous
+      response's pagination.next_cursor); no total is computed and next_cursor
+      is null on the last page.
     security:
       - Bearer: []
+    parameters:
+      - in: query
+        name: after
+        type: string
+        required: false
+        description: Opaque keyset cursor (enables cursor mode)
+      - in: query
+        name: count
+        type: string
+        enum: [exact, estimate]
+        required: false
+        description: Offset mode only. "estimate" uses planner statistics for unfiltered listings
     responses:
       200:
         description: List of all flights
@@ -55,6 +79,20 @@ def list_flights() -> tuple[Response, int]:
         date_from = request.args.get("date_from") or None
         date_to = request.args.get("date_to") or None
         with Session(engine) as session:
+            if "after" in request.args:
+                return jsonify(
+                    flight_service.get_flights_page_after(
+                        session,
+                        per_page,
+                        after=request.args.get("after") or None,
+                        airtask=airtask,
+                        tail_number=tail_number,
+                        action=action,
+                        atd=atd,
+                        date_from=date_from,
+                        date_to=date_to,
+                    )
+                ), 200
             return jsonify(
                 flight_service.get_all_flights_paginated(
                     session,
@@ -66,6 +104,7 @@ def list_flights() -> tuple[Response, int]:
                     atd=atd,
                     date_from=date_from,
                     date_to=date_to,
+                    count=request.args.get("count"),
                 )
             ), 200
     except ValueError as e:
@@ -75,6 +114,74 @@ def list_flights() -> tuple[Response, int]:
         return jsonify({"message": f"Internal server error: {str(e)}"}), 500
 
 
+@flights_bp.route("/export.ndjson", methods=["GET"], strict_slashes=False)
+@require_permission("flights.read")
+@conditional_get(data_version.FLIGHTS, data_version.TRIPULANTES, data_version.QUALIFICACOES)
+def export_flights_ndjson() -> tuple[Response, int]:
+    """Stream the flight log as newline-delimited JSON.
+
+    ---
+    tags:
+      - Flights
+    summary: Export flights as NDJSON
+    description: |
+      One flight object per line (same shape as the list endpoint), oldest first.
+      The response is streamed while the database is read, so memory use does not
+      grow with the size of the history.
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: date_from
+        type: string
+        required: false
+        description: Start date (YYYY-MM-DD, inclusive)
+      - in: query
+        name: date_to
+        type: string
+        required: false
+        description: End date (YYYY-MM-DD, inclusive)
+      - in: query
+        name: tail_number
+        type: integer
+        required: false
+        description: Aircraft tail number
+    produces:
+      - application/x-ndjson
+    responses:
+      200:
+        description: Stream of flight objects, one per line
+      400:
+        description: Invalid filter
+    """
+    session = Session(engine)
+    try:
+        batches = flight_service.export_flights(
+            session,
+            tail_number=request.args.get("tail_number") or None,
+            date_from=request.args.get("date_from") or None,
+            date_to=request.args.get("date_to") or None,
+        )
+    except ValueError as e:
+        session.close()
+        return jsonify({"message": str(e)}), 400
+
+    dumps = current_app.json.dumps  # the configured JSON provider (see app.core.json_provider)
+
+    def generate() -> Iterator[str]:
+        try:
+            for batch in batches:
+                yield "".join(dumps(flight) + "\n" for flight in batch)
+        except Exception as e:
+            # Headers are already sent: log and re-raise so the client sees a broken stream, not a short one.
+            logger.exception("[flights] GET /export.ndjson error: %s", e)
+            raise
+        finally:
+            session.close()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson"), 200
+
+
 @flights_bp.route("/", methods=["POST"], strict_slashes=False)
 @require_permission("flights.write")
 def create_flight_route() -> tuple[Response, int]:
@@ -119,8 +226,81 @@ def create_flight_route() -> tuple[Response, int]:
         return jsonify(result), 400
 
 
+@flights_bp.route("/batch", methods=["POST"], strict_slashes=False)
+@require_permission("flights.write")
+def create_flights_batch_route() -> tuple[Response, int]:
+    """Create several flights in one request.
+
+    ---
+    tags:
+      - Flights
+    summary: Create flights in bulk
+    description: |
+      Body is a JSON list of flight payloads (same fields as POST /api/flights),
+      at most 200 items. Valid items are inserted in one
+      transaction; each item gets its own result, so invalid or duplicate
+      flights do not block the rest.
+    security:
+      - Bearer: []
+    responses:
+      201:
+        description: All flights created
+        schema:
+          type: object
+          properties:
+            created:
+              type: integer
+            errors:
+              type: integer
+            results:
+              type: array
+              items:
+                type: object
+                properties:
+                  index:
+                    type: integer
+                    description: Position in the request list
+                  id:
+                    type: integer
+                    description: Created flight ID
+                  message:
+                    type: string
+                    description: Why the item was not created
+      207:
+        description: Some flights created (see results)
+      400:
+        description: Body is not a list, is too large, or no flight was created
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, list) or not payload:
+        return jsonify({"message": "Request body must be a non-empty JSON list"}), 400
+    if len(payload) > MAX_BATCH_FLIGHTS:
+        return jsonify({"message": f"At most {MAX_BATCH_FLIGHTS} flights per batch"}), 400
+
+    # many=True: errors are keyed by item index
+    errors = cast(dict[int, Any], flight_batch_schema.validate(payload))
+    valid_indexes = [index for index in range(len(payload)) if index not in errors]
+    results: list[dict[str, Any]] = [
+        {"index": index, "message": format_validation_errors(errors[index])} for index in errors
+    ]
+    if valid_indexes:
+        validated = flight_batch_schema.load([payload[index] for index in valid_indexes])
+        with Session(engine, autoflush=False) as session:
+            created = flight_service.create_flights_batch(validated, session)
+        results.extend({"index": index, **result} for index, result in zip(valid_indexes, created, strict=True))
+    results.sort(key=lambda result: result["index"])
+
+    created_count = sum("id" in result for result in results)
+    error_count = len(results) - created_count
+    if error_count:
+        logger.warning("[flights] POST /batch: %d of %d flights rejected", error_count, len(results))
+    status = 201 if not error_count else 207 if created_count else 400
+    return jsonify({"created": created_count, "errors": error_count, "results": results}), status
+
+
 @flights_bp.route("/anomaly-descriptions", methods=["GET"], strict_slashes=False)
 @require_permission("flights.read")
+@conditional_get(data_version.FLIGHTS)
 def get_anomaly_descriptions() -> tuple[Response, int]:
     """Return distinct anomaly descriptions for an aircraft (tail number).
 
@@ -141,10 +321,14 @@ def get_anomaly_descriptions() -> tuple[Response, int]:
 
 @flights_bp.route("/by-crew", methods=["GET"], strict_slashes=False)
 @require_permission("flights.read")
+@conditional_get(data_version.FLIGHTS, data_version.TRIPULANTES, data_version.QUALIFICACOES)
 def search_flights_by_crew() -> tuple[Response, int]:
     """Search flights by crew member name or NIP, with optional date range.
 
     Query params: search (required), date_from (optional YYYY-MM-DD), date_to (optional YYYY-MM-DD).
+    Cursor mode: pass `after` (empty for the first page, then the previous response's
+    pagination.next_cursor) and optionally per_page (default 100, max 500); the response
+    is then {"data", "pagination"} instead of a plain list.
     """
     search = request.args.get("search", "")
     date_from = request.args.get("date_from") or None
@@ -152,6 +336,18 @@ def search_flights_by_crew() -> tuple[Response, int]:
 
     try:
         with Session(engine) as session:
+            if "after" in request.args:
+                per_page = min(500, max(1, int(request.args.get("per_page") or 100)))
+                return jsonify(
+                    flight_service.get_flights_by_crew_search_page_after(
+                        session,
+                        search,
+                        per_page,
+                        after=request.args.get("after") or None,
+                        date_from=date_from,
+                        date_to=date_to,
+                    )
+                ), 200
             flights = flight_service.get_flights_by_crew_search(session, search, date_from=date_from, date_to=date_to)
             return jsonify(flights), 200
     except ValueError as e:
@@ -315,15 +511,39 @@ def handle_flights(flight_id: int) -> tuple[Response, int]:
 @flights_bp.route("/reprocess-all-qualifications", methods=["POST"], strict_slashes=False)
 @require_permission("flights.write")
 def reprocess_all_qualifications() -> tuple[Response, int]:
-    """Reprocess all flights and update crew qualifications.
+    """Reprocess flights and update crew qualifications.
+
+    An optional JSON body narrows the work to some crew members, qualifications
+    and/or flights since a date; without it every flight is reprocessed.
 
     ---
     tags:
       - Flights
-    summary: Reprocess all flight qualifications
-    description: Reprocess all flights in the database and update crew member qualifications based on flight data
+    summary: Reprocess flight qualifications
+    description: Reprocess flights in the database and update crew member qualifications based on flight data
     security:
       - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            nips:
+              type: array
+              items:
+                type: integer
+              description: Only these crew members
+            qualificacao_ids:
+              type: array
+              items:
+                type: integer
+              description: Only these qualifications
+            since:
+              type: string
+              format: date
+              description: Only flights on or after this date (YYYY-MM-DD)
     responses:
       200:
         description: Qualification reprocessing completed
@@ -343,7 +563,20 @@ def reprocess_all_qualifications() -> tuple[Response, int]:
               type: array
               items:
                 type: object
+      400:
+        description: Invalid scope
     """
-    with Session(engine, autoflush=False) as session:
-        result = flight_service.reprocess_all_qualifications(session)
-        return jsonify(result), 200
+    scope = request.get_json(silent=True) or {}
+    if not isinstance(scope, dict):
+        return jsonify({"message": "Request body must be a JSON object"}), 400
+    try:
+        with Session(engine, autoflush=False) as session:
+            result = flight_service.reprocess_all_qualifications(
+                session,
+                nips=scope.get("nips"),
+                qualificacao_ids=scope.get("qualificacao_ids"),
+                since=scope.get("since"),
+            )
+            return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
@@ -0,0 +1,200 @@
+"""Fast JSON builders for flight list responses.
+
+These functions turn plain Core rows into exactly the same dicts as
+Flight.to_json / FlightPilots.to_json, without hydrating ORM objects or going
+through the identity map. Rows are unpacked positionally (named Row attribute
+access costs about as much as building the dict entry itself), so the
+repository must select FLIGHT_ROW_COLUMNS / CREW_ROW_COLUMNS in this order.
+"""
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from sqlalchemy import Row
+
+from app.features.flights.models import Flight, FlightAnomaly, FlightPilots
+from app.features.users.models import Tripulante
+
+FLIGHT_ROW_COLUMNS = (
+    Flight.fid,
+    Flight.airtask,
+    Flight.date,
+    Flight.origin,
+    Flight.destination,
+    Flight.departure_time,
+    Flight.arrival_time,
+    Flight.total_time,
+    Flight.flight_type,
+    Flight.flight_action,
+    Flight.tailnumber,
+    Flight.atr,
+    Flight.passengers,
+    Flight.doe,
+    Flight.cargo,
+    Flight.number_of_crew,
+    Flight.orm,
+    Flight.fuel,
+    Flight.activation_first,
+    Flight.activation_last,
+    Flight.ready_ac,
+    Flight.med_arrival,
+)
+
+CREW_ROW_COLUMNS = (
+    FlightPilots.flight_id,
+    Tripulante.name,
+    Tripulante.nip,
+    Tripulante.rank,
+    FlightPilots.position,
+    FlightPilots.vir,
+    FlightPilots.vn,
+    FlightPilots.con,
+    FlightPilots.day_landings,
+    FlightPilots.night_landings,
+    FlightPilots.prec_app,
+    FlightPilots.nprec_app,
+    FlightPilots.qual1,
+    FlightPilots.qual2,
+    FlightPilots.qual3,
+    FlightPilots.qual4,
+    FlightPilots.qual5,
+    FlightPilots.qual6,
+)
+
+ANOMALY_ROW_COLUMNS = (FlightAnomaly.flight_id, FlightAnomaly.description)
+
+_CREW_WIDTH = len(CREW_ROW_COLUMNS)
+
+
+class QualNameLookup:
+    """Resolve a stored QUAL1..QUAL6 value to a qualification name.
+
+    Same result as FlightPilots.to_json's get_qual_name, but the common case
+    (a plain digit string) is a single dict lookup instead of int() + lookup.
+    """
+
+    __slots__ = ("_by_id", "_by_str")
+
+    def __init__(self, qual_cache: Mapping[int, str] | None) -> None:
+        self._by_id = qual_cache
+        self._by_str = {str(qid): nome for qid, nome in qual_cache.items()} if qual_cache is not None else None
+
+    def __call__(self, value: str | None) -> str | None:
+        if self._by_str is None or value is None or value == "":
+            return value
+        name = self._by_str.get(value)
+        if name is not None:
+            return name
+        try:
+            return self._by_id.get(int(value), value)  # type: ignore[union-attr]
+        except (ValueError, TypeError):
+            return value
+
+
+def crew_row_to_json(row: Row[*tuple[Any, ...]] | tuple[Any, ...], qual_name: QualNameLookup) -> dict[str, Any]:
+    """Build the FlightPilots.to_json dict from a row starting with CREW_ROW_COLUMNS.
+
+    Extra trailing columns (e.g. the flight's fid/airtask/date) are ignored.
+    """
+    crew = row[:_CREW_WIDTH]
+    _, name, nip, rank, position, vir, vn, con, atr, atn, precapp, nprecapp, q1, q2, q3, q4, q5, q6 = crew
+    return {
+        "name": name,
+        "nip": nip,
+        "rank": rank,
+        "position": position,
+        "VIR": vir or "",
+        "VN": vn or "",
+        "CON": con or "",
+        "ATR": atr,
+        "ATN": atn,
+        "precapp": precapp,
+        "nprecapp": nprecapp,
+        "QUAL1": qual_name(q1),
+        "QUAL2": qual_name(q2),
+        "QUAL3": qual_name(q3),
+        "QUAL4": qual_name(q4),
+        "QUAL5": qual_name(q5),
+        "QUAL6": qual_name(q6),
+    }
+
+
+def flight_rows_to_json(
+    flight_rows: Iterable[Row[*tuple[Any, ...]]],
+    crew_rows: Iterable[Row[*tuple[Any, ...]]],
+    anomaly_rows: Iterable[Row[*tuple[Any, ...]]],
+    qual_cache: Mapping[int, str] | None = None,
+) -> list[dict[str, Any]]:
+    """Build the Flight.to_json dicts for a page of flights in one pass.
+
+    Args:
+        flight_rows: FLIGHT_ROW_COLUMNS rows, in response order
+        crew_rows: CREW_ROW_COLUMNS rows for those flights
+        anomaly_rows: ANOMALY_ROW_COLUMNS rows for those flights, in display order
+        qual_cache: Optional qualification id -> name mapping (as for to_json)
+
+    Returns:
+        List of flight dicts in the order of flight_rows
+    """
+    qual_name = QualNameLookup(qual_cache)
+    crew_by_flight: dict[int, list[dict[str, Any]]] = {}
+    for crew in crew_rows:
+        crew_by_flight.setdefault(crew[0], []).append(crew_row_to_json(crew, qual_name))
+    anomalies_by_flight: dict[int, list[str]] = {}
+    for flight_id, description in anomaly_rows:
+        anomalies_by_flight.setdefault(flight_id, []).append(description)
+
+    result = []
+    for (
+        fid,
+        airtask,
+        flight_date,
+        origin,
+        destination,
+        atd,
+        ata,
+        ate,
+        flight_type,
+        flight_action,
+        tailnumber,
+        total_landings,
+        passengers,
+        doe,
+        cargo,
+        number_of_crew,
+        orm,
+        fuel,
+        activation_first,
+        activation_last,
+        ready_ac,
+        med_arrival,
+    ) in flight_rows:
+        result.append(
+            {
+                "id": fid,
+                "airtask": airtask,
+                "date": flight_date.isoformat(),
+                "origin": origin,
+                "destination": destination,
+                "ATD": atd,
+                "ATA": ata,
+                "ATE": ate,
+                "flightType": flight_type,
+                "flightAction": flight_action,
+                "tailNumber": tailnumber,
+                "totalLandings": total_landings,
+                "passengers": passengers,
+                "doe": doe,
+                "cargo": cargo,
+                "numberOfCrew": number_of_crew,
+                "orm": orm,
+                "fuel": fuel,
+                "activationFirst": activation_first,
+                "activationLast": activation_last,
+                "readyAC": ready_ac,
+                "medArrival": med_arrival,
+                "flight_pilots": crew_by_flight.get(fid, []),
+                "anomalies": anomalies_by_flight.get(fid, []),
+            }
+        )
+    return result
@@ -2,25 +2,39 @@
 
 import os
 import time
+from collections.abc import Iterator, Mapping
 from datetime import UTC, date, datetime
-from threading import Thread
 from typing import Any
 
 from dotenv import load_dotenv
-from sqlalchemy import exc, select
+from sqlalchemy import Row, exc
 from sqlalchemy.orm import Session
 
-from app.features.flights.models import Flight, FlightAnomaly, FlightPilots  # type: ignore
+from app.core import data_version
+from app.core.count_cache import COUNT_ESTIMATE, cached_count, estimated_row_count, parse_count_mode
+from app.features.flights.drive_outbox import DriveOutboxRepository, wake_drive_outbox_worker
+from app.features.flights.models import Flight, FlightAnomaly, FlightPilots
 from app.features.flights.repository import FlightRepository
-from app.features.qualifications.models import Qualificacao  # type: ignore
-from app.features.users.models import Tripulante, TripulanteQualificacao  # type: ignore
-from app.shared.enums import TipoTripulante  # type: ignore
-from app.utils.gdrive import tarefa_enviar_para_drive  # type: ignore
+from app.features.flights.serializers import QualNameLookup, crew_row_to_json, flight_rows_to_json
+from app.features.qualifications.catalog import QualificationCatalog, QualificationEntry, get_qualification_catalog
+from app.features.users.models import Tripulante, TripulanteQualificacao
+from app.shared.enums import TipoTripulante
+from app.shared.keyset_cursor import decode_keyset_cursor, encode_keyset_cursor
 
 # Load environment variables
 load_dotenv(dotenv_path="./.env")
 FLASK_ENV = os.environ.get("FLASK_ENV", "development").lower()
 
+DUPLICATE_FLIGHT_MESSAGE = "A flight with this airtask, date, departure time and aircraft already exists"
+DUPLICATE_FLIGHT_UPDATE_MESSAGE = "Another flight already exists with this airtask, date, departure time and aircraft"
+BATCH_RETRY_MESSAGE = "Batch aborted by a concurrent change to the same flights; please retry"
+
+# Largest list accepted by POST /api/flights/batch
+MAX_BATCH_FLIGHTS = 200
+
+# Flights per batch (and per server-side cursor fetch) in the NDJSON export
+EXPORT_BATCH_SIZE = 500
+
 
 def safe_int_or_none(value: Any) -> int | None:
     """Convert value to integer or return None if not a valid integer."""
@@ -32,6 +46,68 @@ def safe_int_or_none(value: Any) -> int | None:
         return None
 
 
+def _flight_pilot_values(pilot: dict[str, Any]) -> dict[str, Any]:
+    """Map a crew payload entry to FlightPilots column values."""
+    return {
+        "position": pilot.get("position") or "",
+        "day_landings": safe_int_or_none(pilot.get("ATR")),
+        "night_landings": safe_int_or_none(pilot.get("ATN")),
+        "prec_app": safe_int_or_none(pilot.get("precapp")),
+        "nprec_app": safe_int_or_none(pilot.get("nprecapp")),
+        "qual1": pilot.get("QUAL1"),
+        "qual2": pilot.get("QUAL2"),
+        "qual3": pilot.get("QUAL3"),
+        "qual4": pilot.get("QUAL4"),
+        "qual5": pilot.get("QUAL5"),
+        "qual6": pilot.get("QUAL6"),
+        "vir": _normalize_time(pilot.get("VIR")),
+        "vn": _normalize_time(pilot.get("VN")),
+        "con": _normalize_time(pilot.get("CON")),
+    }
+
+
+def _flight_values(flight_data: dict[str, Any], flight_date: date) -> dict[str, Any]:
+    """Map a create payload to Flight column values (without crew or anomalies)."""
+    return {
+        "airtask": flight_data["airtask"],
+        "date": flight_date,
+        "origin": flight_data.get("origin", ""),
+        "destination": flight_data.get("destination", ""),
+        "departure_time": flight_data.get("ATD", ""),
+        "arrival_time": flight_data.get("ATA", ""),
+        "flight_type": flight_data.get("flightType", ""),
+        "flight_action": flight_data.get("flightAction", ""),
+        "tailnumber": flight_data.get("tailNumber", ""),
+        "total_time": flight_data.get("ATE", ""),
+        "atr": flight_data.get("totalLandings", 0),
+        "passengers": flight_data.get("passengers", 0),
+        "doe": flight_data.get("doe", 0),
+        "cargo": flight_data.get("cargo", 0),
+        "number_of_crew": flight_data.get("numberOfCrew", 0),
+        "orm": flight_data.get("orm", 0),
+        "fuel": flight_data.get("fuel", 0),
+        "activation_first": flight_data.get("activationFirst", "__:__"),
+        "activation_last": flight_data.get("activationLast", "__:__"),
+        "ready_ac": flight_data.get("readyAC", "__:__"),
+        "med_arrival": flight_data.get("medArrival", "__:__"),
+    }
+
+
+def _flight_from_payload(flight_data: dict[str, Any], flight_date: date) -> Flight:
+    """Build a new Flight (without crew or anomalies) from a create payload."""
+    return Flight(**_flight_values(flight_data, flight_date))
+
+
+def _anomaly_descriptions(flight_data: dict[str, Any]) -> list[str]:
+    """Return the non-empty anomaly descriptions of a payload, truncated to 50 chars."""
+    descriptions = []
+    for desc in flight_data.get("anomalies") or []:
+        text_desc = (str(desc).strip()[:50]).strip() if desc else ""
+        if text_desc:
+            descriptions.append(text_desc)
+    return descriptions
+
+
 def _normalize_time(value: Any) -> str | None:
     """Normalize time to String(5) for VIR/VN/CON: None if empty, else stripped up to 5 chars."""
     if value is None or value == "":
@@ -61,14 +137,13 @@ def coerce_qualification_id(value: Any) -> str | None:
 class FlightService:
     """Service class for flight business logic."""
 
-    def __init__(self):
+    def __init__(self) -> None:
         """Initialize flight service with repository."""
         self.repository = FlightRepository()
 
-    def get_all_flights(self, session: Session) -> list[dict]:
+    def get_all_flights(self, session: Session) -> list[dict[str, Any]]:
         """Get all flights from database with qualification cache."""
-        all_qualifications = self.repository.find_all_qualifications(session)
-        qual_cache: dict[int, str] = {q.id: q.nome for q in all_qualifications}
+        qual_cache = get_qualification_catalog(session).names_by_id
         flights_obj = self.repository.find_all_with_pilots(session)
         return [row.to_json(qual_cache) for row in flights_obj]
 
@@ -83,8 +158,160 @@ class FlightService:
         atd: str | None = None,
         date_from: str | None = None,
         date_to: str | None = None,
-    ) -> dict:
-        """Get paginated flights with qualification cache and optional per-field filters."""
+        count: str | None = None,
+    ) -> dict[str, Any]:
+        """Get paginated flights with qualification cache and optional per-field filters.
+
+        The total is served from the count cache while no flight has been written.
+        With count="estimate" and no filters, the planner's row estimate is used instead
+        and pagination carries "estimated": True (False if it had to fall back to counting).
+
+        Raises:
+            ValueError: If a filter or the count mode is invalid
+        """
+        count_mode = parse_count_mode(count)
+        parsed_tail, parsed_date_from, parsed_date_to = self._parse_list_filters(tail_number, date_from, date_to)
+        filters: dict[str, Any] = {
+            "airtask": airtask,
+            "tail_number": parsed_tail,
+            "action": action,
+            "atd": atd,
+            "date_from": parsed_date_from,
+            "date_to": parsed_date_to,
+        }
+        total: int | None = None
+        if count_mode == COUNT_ESTIMATE and all(v is None for v in filters.values()):
+            total = estimated_row_count(session, Flight.__tablename__)
+        estimated = total is not None
+        if total is None:
+            key = (
+                "flights",
+                *(v.strip().lower() if isinstance(v, str) else v for v in filters.values()),
+            )
+            total = cached_count(
+                key, (data_version.FLIGHTS,), lambda: self.repository.count_filtered(session, **filters)
+            )
+        flight_rows = self.repository.find_flight_rows_paginated_filtered(session, page, per_page, **filters)
+        pagination: dict[str, Any] = {
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "pages": -(-total // per_page),
+        }
+        if count_mode == COUNT_ESTIMATE:
+            pagination["estimated"] = estimated
+        return {"data": self._flight_rows_to_json(session, flight_rows), "pagination": pagination}
+
+    def get_flights_page_after(
+        self,
+        session: Session,
+        per_page: int,
+        after: str | None = None,
+        airtask: str | None = None,
+        tail_number: str | None = None,
+        action: str | None = None,
+        atd: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> dict[str, Any]:
+        """Get one keyset (cursor) page of flights ordered by date and id, newest first.
+
+        Unlike get_all_flights_paginated, no total is counted and pages stay stable
+        while new flights are logged.
+
+        Args:
+            session: Database session
+            per_page: Page size
+            after: Opaque cursor returned as next_cursor by the previous page; empty/None for the first page
+            airtask, tail_number, action, atd, date_from, date_to: Same filters as the offset listing
+
+        Returns:
+            dict with "data" and "pagination" ({"per_page", "next_cursor"}); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If a filter or the cursor is invalid
+        """
+        parsed_tail, parsed_date_from, parsed_date_to = self._parse_list_filters(tail_number, date_from, date_to)
+        parsed_after = decode_keyset_cursor(after, 1) if after else None
+        flight_rows = self.repository.find_flight_rows_keyset_filtered(
+            session,
+            per_page,
+            after=parsed_after,
+            airtask=airtask,
+            tail_number=parsed_tail,
+            action=action,
+            atd=atd,
+            date_from=parsed_date_from,
+            date_to=parsed_date_to,
+        )
+        has_more = len(flight_rows) > per_page
+        flight_rows = flight_rows[:per_page]
+        next_cursor = encode_keyset_cursor(flight_rows[-1].date, flight_rows[-1].fid) if has_more else None
+        return {
+            "data": self._flight_rows_to_json(session, flight_rows),
+            "pagination": {
+                "per_page": per_page,
+                "next_cursor": next_cursor,
+            },
+        }
+
+    def _flight_rows_to_json(self, session: Session, flight_rows: list[Row[*tuple[Any, ...]]]) -> list[dict[str, Any]]:
+        """Serialize a page of flight rows (same shape as Flight.to_json) without loading ORM objects."""
+        fids = [row.fid for row in flight_rows]
+        return flight_rows_to_json(
+            flight_rows,
+            self.repository.find_crew_rows_by_flight_ids(session, fids),
+            self.repository.find_anomaly_rows_by_flight_ids(session, fids),
+            get_qualification_catalog(session).names_by_id,
+        )
+
+    def export_flights(
+        self,
+        session: Session,
+        tail_number: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Stream every flight (same JSON as the listing) in date order, one batch at a time.
+
+        Filters are validated immediately; rows are only read as the returned
+        iterator is consumed, so the session must stay open until then.
+
+        Args:
+            session: Database session
+            tail_number: Optional tail number filter
+            date_from: Optional start date string (YYYY-MM-DD, inclusive)
+            date_to: Optional end date string (YYYY-MM-DD, inclusive)
+            batch_size: Flights per batch (and per database round-trip)
+
+        Returns:
+            Iterator of lists of flight dicts
+
+        Raises:
+            ValueError: If a filter is invalid
+        """
+        parsed_tail, parsed_date_from, parsed_date_to = self._parse_list_filters(tail_number, date_from, date_to)
+        return self._iter_export_batches(session, batch_size, parsed_tail, parsed_date_from, parsed_date_to)
+
+    def _iter_export_batches(
+        self,
+        session: Session,
+        batch_size: int,
+        tail_number: int | None,
+        date_from: date | None,
+        date_to: date | None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        for flight_rows in self.repository.iter_flight_row_batches(
+            session, batch_size, tail_number=tail_number, date_from=date_from, date_to=date_to
+        ):
+            yield self._flight_rows_to_json(session, list(flight_rows))
+
+    @staticmethod
+    def _parse_list_filters(
+        tail_number: str | None, date_from: str | None, date_to: str | None
+    ) -> tuple[int | None, date | None, date | None]:
+        """Parse the tail number and date range query strings of the flight listings."""
         parsed_tail: int | None = None
         if tail_number:
             try:
@@ -103,28 +330,7 @@ class FlightService:
                 parsed_date_to = datetime.strptime(date_to.strip(), "%Y-%m-%d").date()
             except ValueError:
                 raise ValueError("Invalid date_to format; use YYYY-MM-DD") from None
-        all_qualifications = self.repository.find_all_qualifications(session)
-        qual_cache: dict[int, str] = {q.id: q.nome for q in all_qualifications}
-        flights_obj, total = self.repository.find_all_with_pilots_paginated_filtered(
-            session,
-            page,
-            per_page,
-            airtask=airtask,
-            tail_number=parsed_tail,
-            action=action,
-            atd=atd,
-            date_from=parsed_date_from,
-            date_to=parsed_date_to,
-        )
-        return {
-            "data": [row.to_json(qual_cache) for row in flights_obj],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "pages": -(-total // per_page),
-            },
-        }
+        return parsed_tail, parsed_date_from, parsed_date_to
 
     def get_anomaly_descriptions_by_tailnumber(self, session: Session, tailnumber: int) -> list[str]:
         """Get distinct anomaly descriptions for an aircraft (tail number).
@@ -144,7 +350,7 @@ class FlightService:
         search: str,
         date_from: str | None = None,
         date_to: str | None = None,
-    ) -> list[dict]:
+    ) -> list[dict[str, Any]]:
         """Get crew-flight rows where a crew member matches the search term (NIP or name), optionally within a date range.
 
         Returns one row per matching (crew member, flight) with full FlightPilots data plus flight id, airtask, date.
@@ -159,6 +365,69 @@ class FlightService:
         Returns:
             List of dicts: each = FlightPilots.to_json() + flightId, airtask, date
 
+        Raises:
+            ValueError: If search is empty or dates are invalid
+        """
+        search, parsed_date_from, parsed_date_to = self._parse_crew_search(search, date_from, date_to)
+        crew_rows = self.repository.find_crew_rows_by_crew_search(
+            session, search, date_from=parsed_date_from, date_to=parsed_date_to
+        )
+        return self._crew_search_rows_to_json(session, crew_rows)
+
+    def get_flights_by_crew_search_page_after(
+        self,
+        session: Session,
+        search: str,
+        per_page: int,
+        after: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> dict[str, Any]:
+        """Get one keyset (cursor) page of the crew search, newest flight first.
+
+        Args:
+            session: Database session
+            search: Crew search term (numeric NIP or partial name)
+            per_page: Page size
+            after: Opaque cursor returned as next_cursor by the previous page; empty/None for the first page
+            date_from: Optional start date string (YYYY-MM-DD)
+            date_to: Optional end date string (YYYY-MM-DD)
+
+        Returns:
+            dict with "data" (same rows as get_flights_by_crew_search) and
+            "pagination" ({"per_page", "next_cursor"}); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If search is empty, dates are invalid or the cursor is malformed
+        """
+        search, parsed_date_from, parsed_date_to = self._parse_crew_search(search, date_from, date_to)
+        parsed_after = decode_keyset_cursor(after, 2) if after else None
+        crew_rows = self.repository.find_crew_rows_by_crew_search(
+            session,
+            search,
+            date_from=parsed_date_from,
+            date_to=parsed_date_to,
+            limit=per_page + 1,
+            after=parsed_after,
+        )
+        has_more = len(crew_rows) > per_page
+        crew_rows = crew_rows[:per_page]
+        next_cursor = (
+            encode_keyset_cursor(crew_rows[-1].date, crew_rows[-1].fid, crew_rows[-1].nip) if has_more else None
+        )
+        return {
+            "data": self._crew_search_rows_to_json(session, crew_rows),
+            "pagination": {
+                "per_page": per_page,
+                "next_cursor": next_cursor,
+            },
+        }
+
+    def _parse_crew_search(
+        self, search: str, date_from: str | None, date_to: str | None
+    ) -> tuple[str, date | None, date | None]:
+        """Validate the by-crew search term and date range.
+
         Raises:
             ValueError: If search is empty or dates are invalid
         """
@@ -180,34 +449,23 @@ class FlightService:
                 raise ValueError("Invalid date_to format; use YYYY-MM-DD") from None
         if parsed_date_from is not None and parsed_date_to is not None and parsed_date_from > parsed_date_to:
             raise ValueError("date_from must be before or equal to date_to")
-
-        flights_obj = self.repository.find_flights_by_crew_search(
-            session, search, date_from=parsed_date_from, date_to=parsed_date_to
-        )
-        all_qualifications = self.repository.find_all_qualifications(session)
-        qual_cache: dict[int, str] = {q.id: q.nome for q in all_qualifications}
-
-        is_nip_search = search.isdigit()
-        nip_match = int(search) if is_nip_search else None
-        search_lower = search.lower() if not is_nip_search else ""
-
-        result: list[dict] = []
-        for flight in flights_obj:
-            for fp in flight.flight_pilots:
-                if is_nip_search:
-                    if fp.tripulante.nip != nip_match:
-                        continue
-                else:
-                    if (fp.tripulante.name or "").lower().find(search_lower) < 0:
-                        continue
-                row = fp.to_json(qual_cache)
-                row["flightId"] = flight.fid
-                row["airtask"] = flight.airtask
-                row["date"] = flight.date.strftime("%Y-%m-%d")
-                result.append(row)
+        return search, parsed_date_from, parsed_date_to
+
+    def _crew_search_rows_to_json(
+        self, session: Session, crew_rows: list[Row[*tuple[Any, ...]]]
+    ) -> list[dict[str, Any]]:
+        """Build the by-crew response rows (FlightPilots.to_json + flightId, airtask, date)."""
+        qual_name = QualNameLookup(get_qualification_catalog(session).names_by_id)
+        result: list[dict[str, Any]] = []
+        for crew in crew_rows:
+            row = crew_row_to_json(crew, qual_name)
+            row["flightId"] = crew.fid
+            row["airtask"] = crew.airtask
+            row["date"] = crew.date.isoformat()
+            result.append(row)
         return result
 
-    def create_flight(self, flight_data: dict, session: Session) -> dict[str, Any]:
+    def create_flight(self, flight_data: dict[str, Any], session: Session) -> dict[str, Any]:
         """Create a new flight.
 
         Args:
@@ -218,84 +476,172 @@ class FlightService:
             dict with "message" key containing flight ID on success, or error message
         """
         flight_date = datetime.strptime(flight_data["date"], "%Y-%m-%d").replace(tzinfo=UTC).date()
-        departure_time = flight_data.get("ATD", "")
-        tailnumber = flight_data.get("tailNumber", "")
-
-        existing = self.repository.find_by_natural_key(
-            session,
-            airtask=flight_data["airtask"],
-            flight_date=flight_date,
-            departure_time=departure_time,
-            tailnumber=tailnumber,
-        )
-        if existing is not None:
-            return {"message": "A flight with this airtask, date, departure time and aircraft already exists"}
-
-        flight = Flight(
-            airtask=flight_data["airtask"],
-            date=flight_date,
-            origin=flight_data.get("origin", ""),
-            destination=flight_data.get("destination", ""),
-            departure_time=departure_time,
-            arrival_time=flight_data.get("ATA", ""),
-            flight_type=flight_data.get("flightType", ""),
-            flight_action=flight_data.get("flightAction", ""),
-            tailnumber=tailnumber,
-            total_time=flight_data.get("ATE", ""),
-            atr=flight_data.get("totalLandings", 0),
-            passengers=flight_data.get("passengers", 0),
-            doe=flight_data.get("doe", 0),
-            cargo=flight_data.get("cargo", 0),
-            number_of_crew=flight_data.get("numberOfCrew", 0),
-            orm=flight_data.get("orm", 0),
-            fuel=flight_data.get("fuel", 0),
-            activation_first=flight_data.get("activationFirst", "__:__"),
-            activation_last=flight_data.get("activationLast", "__:__"),
-            ready_ac=flight_data.get("readyAC", "__:__"),
-            med_arrival=flight_data.get("medArrival", "__:__"),
-        )
-
-        self.repository.create(session, flight)
-
-        if "flight_pilots" not in flight_data:
-            return {"message": "At least one pilot is required"}
-
-        print("\nCrewmembers:")
-        for pilot in flight_data["flight_pilots"]:
-            print(pilot)
-            result = self._add_crew_and_pilots(session, flight, pilot, edit=False)
-            if result is None:
-                continue
+        flight = _flight_from_payload(flight_data, flight_date)
 
+        # No duplicate pre-check: uq_flight_airtask_date_atd_tail rejects the INSERT,
+        # which also covers two users submitting the same flight at once
         try:
+            self.repository.create(session, flight)
             self.repository.flush(session)
+            if "flight_pilots" not in flight_data:
+                self.repository.rollback(session)
+                return {"message": "At least one pilot is required"}
+
+            print("\nCrewmembers:")
+            for pilot in flight_data["flight_pilots"]:
+                print(pilot)
+            self._add_crew(session, flight, flight_data["flight_pilots"], edit=False)
         except exc.IntegrityError as e:
             self.repository.rollback(session)
+            if self.repository.is_natural_key_violation(e):
+                return {"message": DUPLICATE_FLIGHT_MESSAGE}
             return {"message": str(e.orig)}
+        self.repository.replace_qualification_events(session, flight_ids=[flight.fid])
 
         # Add flight anomalies (after flush so flight.fid exists)
-        for desc in flight_data.get("anomalies") or []:
-            text_desc = (str(desc).strip()[:50]).strip() if desc else ""
-            if text_desc:
-                session.add(FlightAnomaly(flight_id=flight.fid, description=text_desc))
+        for text_desc in _anomaly_descriptions(flight_data):
+            session.add(FlightAnomaly(flight_id=flight.fid, description=text_desc))
+        self._enqueue_drive_uploads(session, [flight.fid])
 
         self.repository.commit(session)
-        nome_arquivo_voo = flight.get_file_name()
-        nome_pdf = nome_arquivo_voo.replace(".1m", ".pdf")
-
-        # Launch background task: .1m with qualifications by ID, PDF with names
-        if FLASK_ENV == "production":
-            flight_with_pilots = self.repository.find_by_id_with_pilots(session, flight.fid)
-            if flight_with_pilots:
-                all_qualifications = self.repository.find_all_qualifications(session)
-                qual_cache = {q.id: q.nome for q in all_qualifications}
-                dados_1m = flight_with_pilots.to_json(None)
-                dados_pdf = flight_with_pilots.to_json(qual_cache)
-                Thread(target=tarefa_enviar_para_drive, args=(dados_1m, dados_pdf, nome_arquivo_voo, nome_pdf)).start()
+        data_version.bump(data_version.FLIGHTS)
+        wake_drive_outbox_worker()
 
         return {"message": flight.fid}
 
-    def update_flight(self, flight_id: int, flight_data: dict, session: Session) -> dict[str, Any]:
+    def create_flights_batch(self, flights_data: list[dict[str, Any]], session: Session) -> list[dict[str, Any]]:
+        """Create many flights in one transaction with a single qualification pass.
+
+        Natural keys (against the database and within the batch) and crew
+        tripulantes are checked with one query each. Valid flights are inserted
+        with one bulk INSERT ... RETURNING, their crews and anomalies with one
+        bulk INSERT each, then flight_qualification_events and the crews'
+        tripulante_qualificacoes dates are derived once for the whole batch
+        (FlightRepository.upsert_last_validation_dates), with the same
+        move-forward rule as create_flight. Unknown NIPs are skipped, as in
+        create_flight.
+
+        If a concurrent request inserts one of the flights after the key check,
+        the keys are checked again, those flights are reported as duplicates and
+        the rest of the batch is inserted once more; a second conflict aborts
+        the batch with BATCH_RETRY_MESSAGE for every remaining flight.
+
+        Args:
+            flights_data: Validated flight payloads (FlightCreateSchema)
+            session: Database session
+
+        Returns:
+            One result per payload, in order: {"id": fid} on success or {"message": error}
+        """
+        results: list[dict[str, Any]] = [{} for _ in flights_data]
+        keys: dict[int, tuple[str, date, str, int]] = {}
+        for index, flight_data in enumerate(flights_data):
+            tailnumber = safe_int_or_none(flight_data.get("tailNumber"))
+            if tailnumber is None:
+                results[index] = {"message": "tailNumber must be an integer"}
+                continue
+            try:
+                flight_date = datetime.strptime(flight_data["date"], "%Y-%m-%d").replace(tzinfo=UTC).date()
+            except ValueError:
+                results[index] = {"message": "Invalid date; use a valid YYYY-MM-DD date"}
+                continue
+            keys[index] = (flight_data["airtask"], flight_date, flight_data.get("ATD", ""), tailnumber)
+
+        existing_keys = self.repository.find_existing_natural_keys(session, keys.values())
+        tripulantes = self.repository.find_tripulantes_by_nips(
+            session, (pilot["nip"] for index in keys for pilot in flights_data[index]["flight_pilots"])
+        )
+
+        batch_keys: set[tuple[str, date, str, int]] = set()
+        pending: list[int] = []
+        for index, key in keys.items():
+            if key in existing_keys or key in batch_keys:
+                results[index] = {"message": DUPLICATE_FLIGHT_MESSAGE}
+                continue
+            nips = [pilot["nip"] for pilot in flights_data[index]["flight_pilots"]]
+            if len(nips) != len(set(nips)):
+                results[index] = {"message": "The same crew member is listed more than once"}
+                continue
+            batch_keys.add(key)
+            pending.append(index)
+
+        flight_ids: list[int] = []
+        for attempt in range(2):
+            if not pending:
+                return results
+            try:
+                flight_ids = self._insert_batch_flights(session, flights_data, keys, pending, tripulantes)
+                break
+            except exc.IntegrityError as e:
+                # A concurrent request inserted one of these flights after the key check
+                self.repository.rollback(session)
+                if not self.repository.is_natural_key_violation(e):
+                    for index in pending:
+                        results[index] = {"message": str(e.orig)}
+                    return results
+                if attempt:
+                    for index in pending:
+                        results[index] = {"message": BATCH_RETRY_MESSAGE}
+                    return results
+                existing_keys = self.repository.find_existing_natural_keys(session, (keys[i] for i in pending))
+                for index in pending:
+                    if keys[index] in existing_keys:
+                        results[index] = {"message": DUPLICATE_FLIGHT_MESSAGE}
+                pending = [index for index in pending if keys[index] not in existing_keys]
+
+        self.repository.replace_qualification_events(session, flight_ids=flight_ids)
+        self.repository.upsert_last_validation_dates(session, flight_ids=flight_ids)
+        self._enqueue_drive_uploads(session, flight_ids)
+        self.repository.commit(session)
+        data_version.bump(data_version.FLIGHTS)
+        wake_drive_outbox_worker()
+
+        for index, flight_id in zip(pending, flight_ids, strict=True):
+            results[index] = {"id": flight_id}
+        return results
+
+    def _insert_batch_flights(
+        self,
+        session: Session,
+        flights_data: list[dict[str, Any]],
+        keys: dict[int, tuple[str, date, str, int]],
+        indexes: list[int],
+        tripulantes: dict[int, Tripulante],
+    ) -> list[int]:
+        """Bulk-insert the batch flights at indexes with their crews and anomalies; return the fids in order."""
+        flight_ids = self.repository.insert_flights(
+            session,
+            [
+                _flight_values({**flights_data[index], "tailNumber": keys[index][3]}, keys[index][1])
+                for index in indexes
+            ],
+        )
+        crew_rows: list[dict[str, Any]] = []
+        anomaly_rows: list[dict[str, Any]] = []
+        for index, flight_id in zip(indexes, flight_ids, strict=True):
+            flight_data = flights_data[index]
+            for pilot in flight_data["flight_pilots"]:
+                if pilot["nip"] not in tripulantes:
+                    print(
+                        f"⚠️  Warning: Pilot NIP {pilot['nip']} ({pilot.get('name', 'Unknown')}) not found in database "
+                        f"(Flight: {flight_data['airtask']} on {keys[index][1]}). Skipping pilot."
+                    )
+                    continue
+                crew_rows.append({"flight_id": flight_id, "pilot_id": pilot["nip"], **_flight_pilot_values(pilot)})
+            anomaly_rows.extend(
+                {"flight_id": flight_id, "description": text_desc} for text_desc in _anomaly_descriptions(flight_data)
+            )
+        self.repository.insert_flight_children(session, crew_rows, anomaly_rows)
+        return flight_ids
+
+    @staticmethod
+    def _enqueue_drive_uploads(session: Session, flight_ids: list[int]) -> None:
+        """In production, queue the flights' .1m and PDF for Drive in the current transaction (see drive_outbox)."""
+        if FLASK_ENV != "production":
+            return
+        DriveOutboxRepository.enqueue(session, flight_ids, datetime.now(UTC))
+
+    def update_flight(self, flight_id: int, flight_data: dict[str, Any], session: Session) -> dict[str, Any]:
         """Update an existing flight.
 
         Args:
@@ -306,35 +652,20 @@ class FlightService:
         Returns:
             dict with "message" key on success, or error message
         """
-        flight = self.repository.find_by_id(session, flight_id)
+        flight = self.repository.find_by_id_with_pilots(session, flight_id)
         if flight is None:
             return {"message": "Flight not found"}
+        old_date = flight.date
 
-        new_date = datetime.strptime(flight_data["date"], "%Y-%m-%d").replace(tzinfo=UTC).date()
-        new_airtask = flight_data.get("airtask", "")
-        new_atd = flight_data.get("ATD", "")
-        new_tail = flight_data.get("tailNumber", "")
-
-        other = self.repository.find_by_natural_key(
-            session,
-            airtask=new_airtask,
-            flight_date=new_date,
-            departure_time=new_atd,
-            tailnumber=new_tail,
-            exclude_fid=flight_id,
-        )
-        if other is not None:
-            return {"message": "Another flight already exists with this airtask, date, departure time and aircraft"}
-
-        flight.airtask = new_airtask
-        flight.date = new_date
+        flight.airtask = flight_data.get("airtask", "")
+        flight.date = datetime.strptime(flight_data["date"], "%Y-%m-%d").replace(tzinfo=UTC).date()
         flight.origin = flight_data.get("origin", "")
         flight.destination = flight_data.get("destination", "")
-        flight.departure_time = new_atd
+        flight.departure_time = flight_data.get("ATD", "")
         flight.arrival_time = flight_data.get("ATA", "")
         flight.flight_type = flight_data.get("flightType", "")
         flight.flight_action = flight_data.get("flightAction", "")
-        flight.tailnumber = new_tail
+        flight.tailnumber = flight_data.get("tailNumber", "")
         flight.total_time = flight_data.get("ATE", "")
         flight.atr = flight_data.get("totalLandings", 0)
         flight.passengers = flight_data.get("passengers", 0)
@@ -347,52 +678,42 @@ class FlightService:
         flight.activation_last = flight_data.get("activationLast", "__:__")
         flight.ready_ac = flight_data.get("readyAC", "__:__")
         flight.med_arrival = flight_data.get("medArrival", "__:__")
+        # Natural-key clashes are left to uq_flight_airtask_date_atd_tail
+        try:
+            self.repository.flush(session)
+        except exc.IntegrityError as e:
+            self.repository.rollback(session)
+            if self.repository.is_natural_key_violation(e):
+                return {"message": DUPLICATE_FLIGHT_UPDATE_MESSAGE}
+            return {"message": str(e.orig)}
 
         # Lista de NIPs no payload = tripulantes que devem ficar no voo
         payload_nips = {p["nip"] for p in flight_data["flight_pilots"]}
-        existing_flight_pilots = list(flight.flight_pilots)
+        qual_cache_by_payload_key = get_qualification_catalog(session).by_payload_key
+        old_pairs = self._crew_qualification_pairs(session, flight.flight_pilots, qual_cache_by_payload_key)
 
-        # Pre-fetch landing qual cache once to avoid N DB queries inside the pilot loop
-        all_quals = self.repository.find_all_qualifications(session)
-        qual_cache_by_payload_key: dict[tuple[str, TipoTripulante], Qualificacao] = {
-            (q.payload_key, q.tipo_aplicavel): q for q in all_quals if q.payload_key is not None
-        }
-
-        # Para cada tripulante que já estava no voo:
-        # - Recalcular qualificações como se o voo não contasse (revert)
-        # - Se não vier no payload, apagar o registo FlightPilots e manter as qualificações revertidas
-        for existing_pilot in existing_flight_pilots:
-            self._update_qualifications_on_delete(flight_id, session, existing_pilot, qual_cache_by_payload_key)
+        # Tripulantes que saíram do voo: apagar o registo FlightPilots
+        for existing_pilot in list(flight.flight_pilots):
             if existing_pilot.pilot_id not in payload_nips:
                 flight.flight_pilots.remove(existing_pilot)
                 session.delete(existing_pilot)
 
-        # Atualizar/criar registos e qualificações para os tripulantes do payload
-        for pilot in flight_data["flight_pilots"]:
-            result = self._add_crew_and_pilots(session, flight, pilot, edit=True)
-            if result is None:
-                continue
+        # Atualizar/criar registos; as qualificações só são tocadas se mudaram
+        self._add_crew(session, flight, flight_data["flight_pilots"], edit=True, apply_qualifications=False)
+        new_pairs = self._crew_qualification_pairs(session, flight.flight_pilots, qual_cache_by_payload_key)
+        if new_pairs != old_pairs or flight.date != old_date:
+            self._apply_qualification_diff(session, flight, old_pairs, new_pairs, date_changed=flight.date != old_date)
+            self.repository.replace_qualification_events(session, flight_ids=[flight_id])
 
         # Replace flight anomalies
         self.repository.delete_flight_anomalies_for_flight(session, flight_id)
-        for desc in flight_data.get("anomalies") or []:
-            text_desc = (str(desc).strip()[:50]).strip() if desc else ""
-            if text_desc:
-                session.add(FlightAnomaly(flight_id=flight_id, description=text_desc))
+        for text_desc in _anomaly_descriptions(flight_data):
+            session.add(FlightAnomaly(flight_id=flight_id, description=text_desc))
+        self._enqueue_drive_uploads(session, [flight_id])
 
         self.repository.commit(session)
-        session.refresh(flight)
-        nome_arquivo_voo = flight.get_file_name()
-        nome_pdf = nome_arquivo_voo.replace(".1m", ".pdf")
-
-        if FLASK_ENV == "production":
-            flight_with_pilots = self.repository.find_by_id_with_pilots(session, flight.fid)
-            if flight_with_pilots:
-                all_qualifications = self.repository.find_all_qualifications(session)
-                qual_cache = {q.id: q.nome for q in all_qualifications}
-                dados_1m = flight_with_pilots.to_json(None)
-                dados_pdf = flight_with_pilots.to_json(qual_cache)
-                Thread(target=tarefa_enviar_para_drive, args=(dados_1m, dados_pdf, nome_arquivo_voo, nome_pdf)).start()
+        data_version.bump(data_version.FLIGHTS)
+        wake_drive_outbox_worker()
 
         return {"message": "Flight changed"}
 
@@ -406,172 +727,125 @@ class FlightService:
         Returns:
             dict with "deleted_id" on success, or error message
         """
-        flight_to_delete: Flight | None = session.execute(
-            select(Flight).where(Flight.fid == flight_id)
-        ).scalar_one_or_none()
+        flight_to_delete = self.repository.find_by_id_with_pilots(session, flight_id)
 
         if flight_to_delete is None:
             return {"msg": "Flight not found"}
 
-        # Pre-fetch landing qual cache once to avoid N DB queries inside the pilot loop
-        all_quals = self.repository.find_all_qualifications(session)
-        qual_cache_by_payload_key: dict[tuple[str, TipoTripulante], Qualificacao] = {
-            (q.payload_key, q.tipo_aplicavel): q for q in all_quals if q.payload_key is not None
-        }
-
-        # Iterate over each pilot in the flight
-        for pilot in flight_to_delete.flight_pilots:
-            self._update_qualifications_on_delete(flight_id, session, pilot, qual_cache_by_payload_key)
+        self._rollback_crew_qualifications(session, flight_to_delete)
 
         # Commit the updates
         self.repository.commit(session)
         # Now delete the flight
         self.repository.delete(session, flight_to_delete)
+        data_version.bump(data_version.FLIGHTS)
         return {"deleted_id": f"Flight {flight_id}"}
 
-    def reprocess_all_qualifications(self, session: Session) -> dict[str, Any]:
-        """Reprocess all flights and update crew qualifications.
-
-        This method scans all flights in chronological order and updates
-        the qualification dates for all crew members based on their flight records.
+    def reprocess_all_qualifications(
+        self,
+        session: Session,
+        nips: Any = None,
+        qualificacao_ids: Any = None,
+        since: str | None = None,
+    ) -> dict[str, Any]:
+        """Reprocess flights and update crew qualifications, optionally for a subset only.
+
+        Set-based: rebuilds flight_qualification_events and moves every
+        tripulante_qualificacoes date forward to the latest flight validating it,
+        with one grouped INSERT ... ON CONFLICT DO UPDATE (see
+        FlightRepository.upsert_last_validation_dates), in a single transaction.
+        Produces the same rows as walking the flights one by one (see the
+        parity test and scripts/benchmark_reprocess_qualifications.py).
+
+        With nips, qualificacao_ids and/or since only the matching events and
+        tripulante_qualificacoes rows are touched, e.g. after importing one
+        month of flights or fixing one pilot's history.
 
         Args:
             session: Database session
+            nips: Only these crew members (list of NIPs)
+            qualificacao_ids: Only these qualifications (list of ids)
+            since: Only flights dated on or after this day (YYYY-MM-DD)
 
         Returns:
             dict with processing results
-        """
-        print("\nLoading flights and pre-caching data...")
-
-        # Pre-load all flights ordered by date with pilots
-        all_flights = self.repository.find_all_ordered_by_date_asc(session)
-
-        total_flights = len(all_flights)
-        processed = 0
-        errors = []
-
-        # Pre-load all Qualificacao records into cache
-        print("Pre-loading qualifications cache...")
-        all_qualifications = self.repository.find_all_qualifications(session)
-        qual_cache_by_id: dict[int, Qualificacao] = {}
-        qual_cache_by_payload_key: dict[tuple[str, TipoTripulante], Qualificacao] = {}
-        for qual in all_qualifications:
-            qual_cache_by_id[qual.id] = qual
-            if qual.payload_key is not None:
-                qual_cache_by_payload_key[(qual.payload_key, qual.tipo_aplicavel)] = qual
-
-        print(f"Loaded {len(qual_cache_by_id)} qualifications into cache")
-
-        # Pre-load all TripulanteQualificacao records
-        print("Pre-loading pilot qualifications cache...")
-        all_pilot_ids = set()
-        for flight in all_flights:
-            for flight_pilot in flight.flight_pilots:
-                if flight_pilot.tripulante:
-                    all_pilot_ids.add(flight_pilot.pilot_id)
-
-        pq_cache: dict[tuple[int, int], TripulanteQualificacao] = {}
-        if all_pilot_ids:
-            all_pq_records = self.repository.find_tripulante_qualificacoes_by_pilot_ids(session, list(all_pilot_ids))
-            for pq in all_pq_records:
-                pq_cache[(pq.tripulante_id, pq.qualificacao_id)] = pq
-
-        print(f"Loaded {len(pq_cache)} pilot qualifications into cache for {len(all_pilot_ids)} pilots")
-        print(f"\nStarting reprocess of {total_flights} flights...")
 
+        Raises:
+            ValueError: If a scope value is invalid
+        """
+        pilot_ids, qual_ids, since_date = self._parse_reprocess_scope(nips, qualificacao_ids, since)
         start_time = time.perf_counter()
-        updates_made = 0
-
-        for flight in all_flights:
-            try:
-                # Process each pilot in the flight
-                for flight_pilot in flight.flight_pilots:
-                    pilot_obj: Tripulante | None = flight_pilot.tripulante
-
-                    if pilot_obj is None:
-                        errors.append(f"Pilot {flight_pilot.pilot_id} not found in flight {flight.fid}")
-                        continue
-
-                    # Update qualification fields using cached lookups (QUAL1-6 by id only)
-                    for k in ["QUAL1", "QUAL2", "QUAL3", "QUAL4", "QUAL5", "QUAL6"]:
-                        qual_value = getattr(flight_pilot, k.lower())
-                        if qual_value not in (None, "", False):
-                            updates_made += self._update_tripulante_qualificacao_optimized(
-                                session,
-                                pilot_obj,
-                                qual_value,
-                                flight,
-                                qual_cache_by_id,
-                                qual_cache_by_payload_key,
-                                pq_cache,
-                            )
-
-                    # For pilots, update landing counts (resolve by payload_key)
-                    if pilot_obj.tipo.value == "PILOTO":
-                        landing_quals = [
-                            ("ATR", flight_pilot.day_landings),
-                            ("ATN", flight_pilot.night_landings),
-                            ("precapp", flight_pilot.prec_app),
-                            ("nprecapp", flight_pilot.nprec_app),
-                        ]
-                        for qual_name, landing_count in landing_quals:
-                            if landing_count is not None and landing_count > 0:
-                                updates_made += self._update_tripulante_qualificacao_optimized(
-                                    session,
-                                    pilot_obj,
-                                    qual_name,
-                                    flight,
-                                    qual_cache_by_id,
-                                    qual_cache_by_payload_key,
-                                    pq_cache,
-                                    True,
-                                )
-
-                processed += 1
-                if processed % 50 == 0:
-                    print(f"\rProcessed: {processed}/{total_flights}", end="", flush=True)
-                    self.repository.commit(session)
-
-            except Exception as e:
-                errors.append(f"Error processing flight {flight.fid}: {str(e)}")
-                self.repository.rollback(session)
-                continue
+        total_flights = self.repository.count_flights_for_crew(session, pilot_ids, since_date)
+        errors: list[str] = []
+        try:
+            self.repository.replace_qualification_events(
+                session, pilot_ids=pilot_ids, qualificacao_ids=qual_ids, since=since_date
+            )
+            updates_made = self.repository.upsert_last_validation_dates(
+                session, pilot_ids=pilot_ids, qualificacao_ids=qual_ids, since=since_date
+            )
+            self.repository.commit(session)
+        except exc.SQLAlchemyError as e:
+            self.repository.rollback(session)
+            errors.append(f"Error reprocessing qualifications: {e}")
+            updates_made = 0
+        processed = 0 if errors else total_flights
+        if not errors:
+            data_version.bump(data_version.TRIPULANTES)
 
-        # Final commit
-        self.repository.commit(session)
         print(f"\nReprocess completed: {processed}/{total_flights} flights processed successfully")
         print(f"Total qualification updates made: {updates_made}")
-        end_time = time.perf_counter()
-
-        print(f"Tempo medio: {(end_time - start_time) / total_flights:.4f} segundos")
-        print(f"Tempo total: {end_time - start_time:.4f} segundos")
-
-        if errors:
-            print(f"Errors encountered: {len(errors)}")
-            for error in errors[:10]:
-                print(f"  - {error}")
+        print(f"Tempo total: {time.perf_counter() - start_time:.4f} segundos")
 
         return {
             "message": f"Successfully reprocessed {processed}/{total_flights} flights",
             "total_flights": total_flights,
             "processed": processed,
             "errors": len(errors),
-            "error_details": errors[:10] if errors else [],
+            "error_details": errors,
         }
 
+    @staticmethod
+    def _parse_reprocess_scope(
+        nips: Any, qualificacao_ids: Any, since: str | None
+    ) -> tuple[list[int] | None, list[int] | None, date | None]:
+        """Validate the optional NIP list, qualification id list and since date of a reprocess.
+
+        Raises:
+            ValueError: If a list is not a non-empty list of integers or since is not YYYY-MM-DD
+        """
+
+        def _int_list(value: Any, name: str) -> list[int] | None:
+            if value is None:
+                return None
+            if not isinstance(value, list) or not value:
+                raise ValueError(f"{name} must be a non-empty list of integers")
+            parsed = [safe_int_or_none(item) for item in value]
+            if any(item is None for item in parsed):
+                raise ValueError(f"{name} must be a non-empty list of integers")
+            return sorted(set(parsed))  # type: ignore[arg-type]
+
+        since_date: date | None = None
+        if since:
+            try:
+                since_date = datetime.strptime(since.strip(), "%Y-%m-%d").date()
+            except (AttributeError, ValueError):
+                raise ValueError("Invalid since format; use YYYY-MM-DD") from None
+        return _int_list(nips, "nips"), _int_list(qualificacao_ids, "qualificacao_ids"), since_date
+
     def _qualification_ids_validated_by_flight_pilot(
         self,
         session: Session,
         flight_pilot: FlightPilots,
-        qual_cache_by_payload_key: "dict[tuple[str, TipoTripulante], Qualificacao] | None" = None,
+        qual_cache_by_payload_key: Mapping[tuple[str, TipoTripulante], QualificationEntry] | None = None,
     ) -> set[int]:
         """Return qualification IDs that this FlightPilots row actually validated (qual1–qual6 + landing quals).
 
         Args:
             session: Database session
             flight_pilot: FlightPilots row to inspect
-            qual_cache_by_payload_key: Optional pre-loaded {(payload_key, tipo) -> Qualificacao} cache.
-                When provided, avoids per-call DB queries for landing quals.
+            qual_cache_by_payload_key: Optional {(payload_key, tipo) -> QualificationEntry} lookup
+                (usually the qualification catalog). Defaults to the process-wide catalog.
         """
         ids: set[int] = set()
         for attr in ["qual1", "qual2", "qual3", "qual4", "qual5", "qual6"]:
@@ -593,253 +867,238 @@ class FlightService:
             ]
             for payload_key, count in landing_specs:
                 if count is not None and count > 0:
-                    if qual_cache_by_payload_key is not None:
-                        qual = qual_cache_by_payload_key.get((payload_key, tipo))
-                    else:
-                        qual = self.repository.find_qualification_by_payload_key_and_tipo(session, payload_key, tipo)
+                    if qual_cache_by_payload_key is None:
+                        qual_cache_by_payload_key = get_qualification_catalog(session).by_payload_key
+                    qual = qual_cache_by_payload_key.get((payload_key, tipo))
                     if qual is not None:
                         ids.add(qual.id)
         return ids
 
-    def _update_qualifications_on_delete(
+    def _crew_qualification_pairs(
+        self,
+        session: Session,
+        crew: list[FlightPilots],
+        qual_cache_by_payload_key: Mapping[tuple[str, TipoTripulante], QualificationEntry],
+    ) -> set[tuple[int, int]]:
+        """Return the (pilot_id, qualificacao_id) pairs a flight's crew rows validate."""
+        return {
+            (flight_pilot.pilot_id, qual_id)
+            for flight_pilot in crew
+            for qual_id in self._qualification_ids_validated_by_flight_pilot(
+                session, flight_pilot, qual_cache_by_payload_key
+            )
+        }
+
+    def _apply_qualification_diff(
         self,
-        flight_id: int,
         session: Session,
-        tripulante: FlightPilots,
-        qual_cache_by_payload_key: "dict[tuple[str, TipoTripulante], Qualificacao] | None" = None,
+        flight: Flight,
+        old_pairs: set[tuple[int, int]],
+        new_pairs: set[tuple[int, int]],
+        date_changed: bool,
     ) -> None:
-        """Update qualifications when a flight is deleted. Only touches qualifications that this flight actually validated."""
-        qual_ids_on_this_flight = self._qualification_ids_validated_by_flight_pilot(
-            session, tripulante, qual_cache_by_payload_key
-        )
-        tripulante_quals = self.repository.find_tripulante_qualificacoes_by_pilot_id(session, tripulante.pilot_id)
+        """Update the qualification dates affected by an edited flight.
+
+        Pairs the flight validated before and no longer does, or whose date moved,
+        are recomputed from the other flights (plus this one, if it still
+        validates them), as if the flight were deleted and re-added. Newly
+        validated pairs only move forward to the flight's date. Untouched pairs
+        are left alone.
 
-        relevant_quals = [pq for pq in tripulante_quals if pq.qualificacao_id in qual_ids_on_this_flight]
-        if not relevant_quals:
+        Args:
+            session: Database session
+            flight: Edited flight (new date, crew rows already updated)
+            old_pairs: (pilot_id, qualificacao_id) pairs validated before the edit
+            new_pairs: Pairs validated after the edit
+            date_changed: Whether the flight's date changed
+        """
+        recompute = old_pairs - new_pairs
+        if date_changed:
+            recompute |= old_pairs & new_pairs
+        forward = new_pairs - old_pairs
+        if not recompute and not forward:
             return
 
-        max_dates = self.repository.find_max_flight_dates_batch(
-            session,
-            tripulante.pilot_id,
-            {pq.qualificacao_id for pq in relevant_quals},
-            flight_id,
-        )
+        pilot_ids = sorted({pilot_id for pilot_id, _ in recompute | forward})
+        pq_by_pair = {
+            (pq.tripulante_id, pq.qualificacao_id): pq
+            for pq in self.repository.find_tripulante_qualificacoes_by_pilot_ids(session, pilot_ids)
+        }
+        max_dates = self.repository.find_max_flight_dates_for_pairs(session, recompute, flight.fid)
+
+        for pair in recompute | forward:
+            pq = pq_by_pair.get(pair)
+            if pair in recompute:
+                new_date = max(max_dates[pair], flight.date) if pair in new_pairs else max_dates[pair]
+            elif pq is None or pq.data_ultima_validacao is None or pq.data_ultima_validacao < flight.date:
+                new_date = flight.date
+            else:
+                continue
+            if pq is not None:
+                pq.data_ultima_validacao = new_date
+            elif pair in new_pairs:
+                session.add(
+                    TripulanteQualificacao(
+                        tripulante_id=pair[0], qualificacao_id=pair[1], data_ultima_validacao=new_date
+                    )
+                )
+        self.repository.flush(session)
+
+    def _rollback_crew_qualifications(self, session: Session, flight: Flight) -> None:
+        """Reset the qualifications a flight validated for its whole crew, as if the flight did not exist.
 
-        for pq in relevant_quals:
-            pq.data_ultima_validacao = max_dates.get(pq.qualificacao_id)
-            self.repository.update_tripulante_qualificacao(session, pq)
+        Every (pilot, qualification) pair the crew validated gets the latest
+        other flight's date (date(year_init, 1, 1) if none) from one grouped
+        query, written back with one UPDATE. Pairs without a
+        tripulante_qualificacoes row are left alone.
+        """
+        qual_cache_by_payload_key = get_qualification_catalog(session).by_payload_key
+        pairs = self._crew_qualification_pairs(session, flight.flight_pilots, qual_cache_by_payload_key)
+        if not pairs:
+            return
+        max_dates = self.repository.find_max_flight_dates_for_pairs(session, pairs, flight.fid)
+        self.repository.set_last_validation_dates(session, max_dates)
 
     def _add_crew_and_pilots(
         self,
         session: Session,
         flight: Flight,
-        pilot: dict,
+        pilot: dict[str, Any],
         edit: bool = False,
         auto_commit: bool = False,
     ) -> FlightPilots | None:
-        """Add crew/pilot to flight and update qualifications."""
-        pilot_obj = self.repository.find_tripulante_by_nip(session, pilot["nip"])
-
-        if pilot_obj is None:
-            pilot_name = pilot.get("name", "Unknown")
-            print(
-                f"⚠️  Warning: Pilot NIP {pilot['nip']} ({pilot_name}) not found in database "
-                f"(Flight: {flight.airtask} on {flight.date}). Skipping pilot."
-            )
-            return None
-
-        if edit:
-            flight_pilot = session.execute(
-                select(FlightPilots)
-                .where(FlightPilots.flight_id == flight.fid)
-                .where(FlightPilots.pilot_id == pilot["nip"]),
-            ).scalar_one_or_none()
-            if flight_pilot is not None:
-                flight_pilot.position = pilot.get("position") or ""
-                flight_pilot.day_landings = safe_int_or_none(pilot.get("ATR"))
-                flight_pilot.night_landings = safe_int_or_none(pilot.get("ATN"))
-                flight_pilot.prec_app = safe_int_or_none(pilot.get("precapp"))
-                flight_pilot.nprec_app = safe_int_or_none(pilot.get("nprecapp"))
-                flight_pilot.qual1 = pilot.get("QUAL1")
-                flight_pilot.qual2 = pilot.get("QUAL2")
-                flight_pilot.qual3 = pilot.get("QUAL3")
-                flight_pilot.qual4 = pilot.get("QUAL4")
-                flight_pilot.qual5 = pilot.get("QUAL5")
-                flight_pilot.qual6 = pilot.get("QUAL6")
-                flight_pilot.vir = _normalize_time(pilot.get("VIR"))
-                flight_pilot.vn = _normalize_time(pilot.get("VN"))
-                flight_pilot.con = _normalize_time(pilot.get("CON"))
-            else:
-                # Piloto novo na lista deste voo (adicionado na edição): criar registo
-                flight_pilot = FlightPilots(
-                    flight_id=flight.fid,
-                    pilot_id=pilot["nip"],
-                    position=pilot.get("position") or "",
-                    day_landings=safe_int_or_none(pilot.get("ATR")),
-                    night_landings=safe_int_or_none(pilot.get("ATN")),
-                    prec_app=safe_int_or_none(pilot.get("precapp")),
-                    nprec_app=safe_int_or_none(pilot.get("nprecapp")),
-                    qual1=pilot.get("QUAL1"),
-                    qual2=pilot.get("QUAL2"),
-                    qual3=pilot.get("QUAL3"),
-                    qual4=pilot.get("QUAL4"),
-                    qual5=pilot.get("QUAL5"),
-                    qual6=pilot.get("QUAL6"),
-                    vir=_normalize_time(pilot.get("VIR")),
-                    vn=_normalize_time(pilot.get("VN")),
-                    con=_normalize_time(pilot.get("CON")),
-                )
-        else:
-            if flight.fid is None:
-                self.repository.flush(session)
-
-            flight_pilot = FlightPilots(
-                flight_id=flight.fid,
-                pilot_id=pilot["nip"],
-                position=pilot["position"],
-                day_landings=safe_int_or_none(pilot.get("ATR")),
-                night_landings=safe_int_or_none(pilot.get("ATN")),
-                prec_app=safe_int_or_none(pilot.get("precapp")),
-                nprec_app=safe_int_or_none(pilot.get("nprecapp")),
-                qual1=pilot.get("QUAL1"),
-                qual2=pilot.get("QUAL2"),
-                qual3=pilot.get("QUAL3"),
-                qual4=pilot.get("QUAL4"),
-                qual5=pilot.get("QUAL5"),
-                qual6=pilot.get("QUAL6"),
-                vir=_normalize_time(pilot.get("VIR")),
-                vn=_normalize_time(pilot.get("VN")),
-                con=_normalize_time(pilot.get("CON")),
-            )
-
-        for k in ["QUAL1", "QUAL2", "QUAL3", "QUAL4", "QUAL5", "QUAL6"]:
-            self._update_tripulante_qualificacao(session, pilot_obj, k.lower(), flight, flight_pilot)
-
-        if pilot_obj.tipo.value == "PILOTO":
-            if flight_pilot.day_landings is not None and flight_pilot.day_landings > 0:
-                self._update_tripulante_qualificacao(session, pilot_obj, "ATR", flight, flight_pilot, True)
-            if flight_pilot.night_landings is not None and flight_pilot.night_landings > 0:
-                self._update_tripulante_qualificacao(session, pilot_obj, "ATN", flight, flight_pilot, True)
-            if flight_pilot.prec_app is not None and flight_pilot.prec_app > 0:
-                self._update_tripulante_qualificacao(session, pilot_obj, "precapp", flight, flight_pilot, True)
-            if flight_pilot.nprec_app is not None and flight_pilot.nprec_app > 0:
-                self._update_tripulante_qualificacao(session, pilot_obj, "nprecapp", flight, flight_pilot, True)
-
-        pilot_obj.flight_pilots.append(flight_pilot)
-        flight.flight_pilots.append(flight_pilot)
-        if auto_commit:
-            self.repository.commit(session)
-        else:
-            self.repository.flush(session)
-        return flight_pilot
+        """Add crew/pilot to flight and update qualifications (single-member _add_crew)."""
+        return self._add_crew(session, flight, [pilot], edit=edit, auto_commit=auto_commit)[0]
 
-    def _update_tripulante_qualificacao_optimized(
+    def _add_crew(
         self,
         session: Session,
-        pilot_obj: Tripulante,
-        qual_identifier: Any,
         flight: Flight,
-        qual_cache_by_id: dict[int, Qualificacao],
-        qual_cache_by_payload_key: dict[tuple[str, TipoTripulante], Qualificacao],
-        pq_cache: dict[tuple[int, int], TripulanteQualificacao],
-        convert: bool = False,
-    ) -> int:
-        """Optimized version using pre-loaded caches (id for QUAL1-6, payload_key for landing)."""
-        if qual_identifier in (None, "", False):
-            return 0
-
-        qual: Qualificacao | None
-
-        if convert:
-            # Landing quals: resolve by payload_key (ATR, ATN, precapp, nprecapp)
-            qual = qual_cache_by_payload_key.get((str(qual_identifier), pilot_obj.tipo))
-        else:
-            # QUAL1-6: resolve by id only
-            coerced_id = coerce_qualification_id(qual_identifier)
-            if coerced_id is not None:
-                qual = qual_cache_by_id.get(int(coerced_id))
-            else:
-                qual = None
+        pilots: list[dict[str, Any]],
+        edit: bool = False,
+        auto_commit: bool = False,
+        apply_qualifications: bool = True,
+    ) -> list[FlightPilots | None]:
+        """Add/update a flight's crew rows and move their qualification dates forward in one unit of work.
 
-        if qual is None:
-            return 0
+        Tripulantes and their TripulanteQualificacao rows are loaded for the whole
+        payload with one IN query each; in edit mode the existing FlightPilots rows
+        come from flight.flight_pilots. Changes are applied in memory and flushed
+        (or committed) once.
 
-        cache_key = (pilot_obj.nip, qual.id)
-        pq = pq_cache.get(cache_key)
+        Args:
+            session: Database session
+            flight: Flight being created or edited
+            pilots: Crew payload entries (nip, position, QUAL1-6, landings, ...)
+            edit: Update the flight's existing FlightPilots rows instead of always creating new ones
+            auto_commit: Commit instead of flushing at the end
+            apply_qualifications: Move qualification dates forward; False only syncs the crew rows
 
-        if not pq:
-            pq = TripulanteQualificacao(
-                tripulante_id=pilot_obj.nip,
-                qualificacao_id=qual.id,
-                data_ultima_validacao=flight.date,
+        Returns:
+            One FlightPilots per payload entry, None for unknown NIPs
+        """
+        # Touch the collection first: for a new flight it is empty and needs no query
+        crew = flight.flight_pilots
+        if flight.fid is None:
+            self.repository.flush(session)
+        tripulantes = self.repository.find_tripulantes_by_nips(session, (p["nip"] for p in pilots))
+        existing = {fp.pilot_id: fp for fp in crew} if edit else {}
+        catalog = get_qualification_catalog(session)
+
+        plans: list[tuple[dict[str, Any], Tripulante, list[int]] | None] = []
+        for pilot in pilots:
+            pilot_obj = tripulantes.get(pilot["nip"])
+            if pilot_obj is None:
+                pilot_name = pilot.get("name", "Unknown")
+                print(
+                    f"⚠️  Warning: Pilot NIP {pilot['nip']} ({pilot_name}) not found in database "
+                    f"(Flight: {flight.airtask} on {flight.date}). Skipping pilot."
+                )
+                plans.append(None)
+                continue
+            qual_ids = (
+                self._validated_qualification_ids(pilot_obj, pilot, flight, catalog) if apply_qualifications else []
             )
-            self.repository.create_tripulante_qualificacao(session, pq)
-            pq_cache[cache_key] = pq
-            return 1
-        else:
-            nova_data = flight.date
-            if pq.data_ultima_validacao is None or pq.data_ultima_validacao < nova_data:
-                pq.data_ultima_validacao = nova_data
-                self.repository.update_tripulante_qualificacao(session, pq)
-                return 1
-
-        return 0
+            plans.append((pilot, pilot_obj, qual_ids))
 
-    def _update_tripulante_qualificacao(
-        self,
-        session: Session,
-        pilot_obj: Tripulante,
-        qual_name: str,
-        flight: Flight,
-        flight_pilot: FlightPilots | None = None,
-        convert: bool = False,
-    ) -> None:
-        """Update tripulante qualification based on flight data."""
-        qual_id: str | int | None = None
+        pilot_ids = [plan[1].nip for plan in plans if plan is not None and plan[2]]
+        pq_cache: dict[tuple[int, int], TripulanteQualificacao] = {}
+        if pilot_ids:
+            for cached in self.repository.find_tripulante_qualificacoes_by_pilot_ids(session, pilot_ids):
+                pq_cache[(cached.tripulante_id, cached.qualificacao_id)] = cached
+
+        results: list[FlightPilots | None] = []
+        for plan in plans:
+            if plan is None:
+                results.append(None)
+                continue
+            pilot, pilot_obj, qual_ids = plan
+            values = _flight_pilot_values(pilot)
+            flight_pilot = existing.get(pilot_obj.nip)
+            if flight_pilot is not None:
+                for column, value in values.items():
+                    setattr(flight_pilot, column, value)
+            else:
+                # Novo registo (criação, ou tripulante adicionado na edição)
+                flight_pilot = FlightPilots(flight_id=flight.fid, pilot_id=pilot_obj.nip, **values)
+                crew.append(flight_pilot)
+                flight_pilot.tripulante = pilot_obj
+
+            for qual_id in qual_ids:
+                pq = pq_cache.get((pilot_obj.nip, qual_id))
+                if pq is None:
+                    pq = TripulanteQualificacao(
+                        tripulante_id=pilot_obj.nip, qualificacao_id=qual_id, data_ultima_validacao=flight.date
+                    )
+                    session.add(pq)
+                    pq_cache[(pilot_obj.nip, qual_id)] = pq
+                elif pq.data_ultima_validacao is None or pq.data_ultima_validacao < flight.date:
+                    pq.data_ultima_validacao = flight.date
+            results.append(flight_pilot)
 
-        if not convert:
-            qual_id = getattr(flight_pilot, qual_name.lower())
+        if auto_commit:
+            self.repository.commit(session)
+        else:
+            self.repository.flush(session)
+        return results
+
+    @staticmethod
+    def _validated_qualification_ids(
+        pilot_obj: Tripulante, pilot: dict[str, Any], flight: Flight, catalog: QualificationCatalog
+    ) -> list[int]:
+        """Return the qualification ids a crew payload entry validates (QUAL1-6, then landings for pilots)."""
+        qual_ids: list[int] = []
+        for slot in ("QUAL1", "QUAL2", "QUAL3", "QUAL4", "QUAL5", "QUAL6"):
+            qual_id = pilot.get(slot)
             # QUAL1-6: resolve by id only; non-digit values are invalid
             if isinstance(qual_id, str) and qual_id.strip() and not qual_id.isdigit():
                 print(
-                    f"⚠️  Warning: Invalid qualification value '{qual_id}' for {qual_name} "
+                    f"⚠️  Warning: Invalid qualification value '{qual_id}' for {slot.lower()} "
                     f"(Pilot: {pilot_obj.nip}, Flight: {flight.airtask} on {flight.date}). Expected qualification ID. Skipping."
                 )
-                return
-        else:
-            # Landing quals: resolve by payload_key (ATR, ATN, precapp, nprecapp)
-            qual = self.repository.find_qualification_by_payload_key_and_tipo(session, qual_name, pilot_obj.tipo)
-            if qual is None:
+                continue
+            if qual_id == "" or qual_id is None:
+                continue
+            try:
+                qual_ids.append(int(qual_id))
+            except (ValueError, TypeError):
                 print(
-                    f"⚠️  Warning: Qualification with payload_key '{qual_name}' not found for type {pilot_obj.tipo.value} "
+                    f"⚠️  Warning: Invalid qualification ID '{qual_id}' for qualification '{slot.lower()}' "
                     f"(Pilot: {pilot_obj.nip}, Flight: {flight.airtask} on {flight.date}). Skipping qualification update."
                 )
-                return
-            qual_id = qual.id
-
-        if qual_id == "" or qual_id is None:
-            return
 
-        try:
-            qual_id = int(qual_id)
-        except (ValueError, TypeError):
-            print(
-                f"⚠️  Warning: Invalid qualification ID '{qual_id}' for qualification '{qual_name}' "
-                f"(Pilot: {pilot_obj.nip}, Flight: {flight.airtask} on {flight.date}). Skipping qualification update."
-            )
-            return
-
-        pq = self.repository.find_tripulante_qualificacao(session, pilot_obj.nip, qual_id)
-        if not pq:
-            pq = TripulanteQualificacao(
-                tripulante_id=pilot_obj.nip,
-                qualificacao_id=qual_id,
-                data_ultima_validacao=flight.date,
-            )
-            self.repository.create_tripulante_qualificacao(session, pq)
-        else:
-            nova_data = flight.date
-
-            if pq.data_ultima_validacao is None or pq.data_ultima_validacao < nova_data:
-                pq.data_ultima_validacao = nova_data
-                self.repository.update_tripulante_qualificacao(session, pq)
+        if pilot_obj.tipo == TipoTripulante.PILOTO:
+            # Landing quals: resolve by payload_key (ATR, ATN, precapp, nprecapp)
+            for payload_key in ("ATR", "ATN", "precapp", "nprecapp"):
+                count = safe_int_or_none(pilot.get(payload_key))
+                if count is None or count <= 0:
+                    continue
+                qual = catalog.by_payload_key.get((payload_key, pilot_obj.tipo))
+                if qual is None:
+                    print(
+                        f"⚠️  Warning: Qualification with payload_key '{payload_key}' not found for type {pilot_obj.tipo.value} "
+                        f"(Pilot: {pilot_obj.nip}, Flight: {flight.airtask} on {flight.date}). Skipping qualification update."
+                    )
+                    continue
+                qual_ids.append(qual.id)
+        return list(dict.fromkeys(qual_ids))
@@ -0,0 +1,125 @@
+"""Process-wide, read-only catalog of qualifications.
+
+The qualificacoes table is tiny and changes rarely, but flight reads and writes
+need it on every request (id -> nome for serialization, (payload_key, tipo) for
+landing quals). The catalog is loaded once per process and replaced as a whole
+when the "qualificacoes" data version changes, so readers always see a
+consistent snapshot without locking.
+"""
+
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core import data_version
+from app.features.qualifications.models import Qualificacao
+from app.shared.enums import GrupoQualificacoes, TipoTripulante
+
+DOMAIN = data_version.QUALIFICACOES
+
+
+@dataclass(frozen=True, slots=True)
+class QualificationEntry:
+    """Immutable snapshot of one Qualificacao row."""
+
+    id: int
+    nome: str
+    payload_key: str | None
+    grupo: GrupoQualificacoes
+    validade: int
+    tipo_aplicavel: TipoTripulante
+
+
+@dataclass(frozen=True)
+class QualificationCatalog:
+    """Immutable lookup tables over every qualification."""
+
+    version: int
+    by_id: Mapping[int, QualificationEntry]
+    by_payload_key: Mapping[tuple[str, TipoTripulante], QualificationEntry]
+    by_tipo: Mapping[TipoTripulante, tuple[QualificationEntry, ...]]
+    names_by_id: Mapping[int, str]
+
+    @classmethod
+    def load(cls, session: Session, version: int) -> "QualificationCatalog":
+        """Build a catalog from the current contents of the qualificacoes table."""
+        entries = [
+            QualificationEntry(
+                id=q.id,
+                nome=q.nome,
+                payload_key=q.payload_key,
+                grupo=q.grupo,
+                validade=q.validade,
+                tipo_aplicavel=q.tipo_aplicavel,
+            )
+            for q in session.execute(select(Qualificacao).order_by(Qualificacao.id)).scalars()
+        ]
+        by_tipo: dict[TipoTripulante, list[QualificationEntry]] = {}
+        by_payload_key: dict[tuple[str, TipoTripulante], QualificationEntry] = {}
+        for e in entries:
+            by_tipo.setdefault(e.tipo_aplicavel, []).append(e)
+            # First match wins, like the .first() lookups this replaces
+            if e.payload_key is not None:
+                by_payload_key.setdefault((e.payload_key, e.tipo_aplicavel), e)
+        return cls(
+            version=version,
+            by_id=MappingProxyType({e.id: e for e in entries}),
+            by_payload_key=MappingProxyType(by_payload_key),
+            by_tipo=MappingProxyType({tipo: tuple(items) for tipo, items in by_tipo.items()}),
+            names_by_id=MappingProxyType({e.id: e.nome for e in entries}),
+        )
+
+
+_catalog: QualificationCatalog | None = None
+_load_lock = threading.Lock()
+
+
+def get_qualification_catalog(session: Session) -> QualificationCatalog:
+    """Return the current catalog, (re)loading it if another process changed qualifications.
+
+    Args:
+        session: Database session used only when a reload is needed
+
+    Returns:
+        QualificationCatalog snapshot
+    """
+    global _catalog
+    version = data_version.current(DOMAIN)
+    catalog = _catalog
+    if catalog is not None and catalog.version == version:
+        return catalog
+    with _load_lock:
+        catalog = _catalog
+        if catalog is None or catalog.version != version:
+            catalog = QualificationCatalog.load(session, version)
+            _catalog = catalog
+    return catalog
+
+
+def refresh_qualification_catalog(session: Session) -> QualificationCatalog:
+    """Bump the qualificacoes version and swap in a freshly loaded catalog.
+
+    Call after committing any change to the qualificacoes table.
+
+    Args:
+        session: Database session
+
+    Returns:
+        The new catalog
+    """
+    global _catalog
+    with _load_lock:
+        version = data_version.bump(DOMAIN)
+        _catalog = QualificationCatalog.load(session, version)
+        return _catalog
+
+
+def clear_qualification_catalog() -> None:
+    """Drop the in-process catalog so the next get_qualification_catalog() reloads it."""
+    global _catalog
+    with _load_lock:
+        _catalog = None
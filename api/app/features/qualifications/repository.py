@@ -140,19 +140,21 @@ class QualificationRepository:
         return list(session.execute(stmt).unique().scalars().all())
 
     @staticmethod
-    def find_tripulantes_by_type_paginated(
-        session: Session, tipo: str, page: int, per_page: int
-    ) -> tuple[list[Tripulante], int]:
-        """Find paginated tripulantes by type with PRESENTE status."""
-        total = session.execute(
+    def count_tripulantes_by_type(session: Session, tipo: str) -> int:
+        """Count tripulantes of a type with PRESENTE status."""
+        return session.execute(
             select(func.count(Tripulante.nip)).where(
                 Tripulante.tipo == tipo, Tripulante.status == StatusTripulante.PRESENTE.value
             )
         ).scalar_one()
+
+    @staticmethod
+    def find_tripulantes_by_type_paginated(session: Session, tipo: str, page: int, per_page: int) -> list[Tripulante]:
+        """Find one page of tripulantes by type with PRESENTE status (see count_tripulantes_by_type)."""
         stmt = (
             QualificationRepository._base_tripulantes_by_type_stmt(tipo).limit(per_page).offset((page - 1) * per_page)
         )
-        return list(session.execute(stmt).unique().scalars().all()), total
+        return list(session.execute(stmt).unique().scalars().all())
 
     @staticmethod
     def find_tripulante_by_nip(session: Session, nip: int) -> Tripulante | None:
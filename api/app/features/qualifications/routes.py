@@ -3,6 +3,7 @@
 from flask import Blueprint, Response, jsonify, request
 from sqlalchemy.orm import Session
 
+from app.core import data_version
 from app.core.config import engine
 from app.features.qualifications.schemas import (
     CheckApplicabilityRequestSchema,
@@ -11,6 +12,7 @@ from app.features.qualifications.schemas import (
     validate_request,
 )
 from app.features.qualifications.service import QualificationService
+from app.shared.http_cache import conditional_get
 from app.shared.permissions import require_permission
 
 qualifications_bp = Blueprint("qualifications", __name__)
@@ -24,6 +26,7 @@ check_applicability_schema = CheckApplicabilityRequestSchema()
 
 @qualifications_bp.route("/qualificacoes", methods=["GET"])
 @require_permission("qualifications.read")
+@conditional_get(data_version.QUALIFICACOES)
 def listar_qualificacoes() -> tuple[Response, int]:
     """List all qualifications.
 
@@ -232,6 +235,7 @@ def modify_qualification(qualification_id: int) -> tuple[Response, int]:
 
 @qualifications_bp.route("/tripulantes/qualificacoes/<tipo>", methods=["GET"])
 @require_permission("qualifications.read")
+@conditional_get(data_version.FLIGHTS, data_version.TRIPULANTES, data_version.QUALIFICACOES)
 def listar_qualificacoes_tipo(tipo: str) -> tuple[Response, int]:
     """List all tripulantes of a specific type with their qualifications.
 
@@ -281,6 +285,7 @@ def listar_qualificacoes_tipo(tipo: str) -> tuple[Response, int]:
 
 @qualifications_bp.route("/qualificacoeslist/<int:nip>", methods=["GET"])
 @require_permission("qualifications.read")
+@conditional_get(data_version.FLIGHTS, data_version.TRIPULANTES, data_version.QUALIFICACOES)
 def listar_qualificacoes_tripulante(nip: int) -> tuple[Response, int]:
     """Get available qualifications for a specific tripulante.
 
@@ -333,6 +338,7 @@ def listar_qualificacoes_tripulante(nip: int) -> tuple[Response, int]:
 
 @qualifications_bp.route("/listas", methods=["GET"])
 @require_permission("qualifications.read")
+@conditional_get()
 def listar_tipos_e_grupos() -> tuple[Response, int]:
     """Get lists of tipos and grupos.
 
@@ -362,6 +368,7 @@ def listar_tipos_e_grupos() -> tuple[Response, int]:
 
 @qualifications_bp.route("/qualification-groups", methods=["GET"])
 @require_permission("qualifications.read")
+@conditional_get()
 def get_qualification_groups() -> tuple[Response, int]:
     """Get all available qualification groups.
 
@@ -384,6 +391,7 @@ def get_qualification_groups() -> tuple[Response, int]:
 
 @qualifications_bp.route("/crew-types", methods=["GET"])
 @require_permission("qualifications.read")
+@conditional_get()
 def get_crew_types() -> tuple[Response, int]:
     """Get all available crew types.
 
@@ -406,6 +414,7 @@ def get_crew_types() -> tuple[Response, int]:
 
 @qualifications_bp.route("/qualification-groups/<crew_type>", methods=["GET"])
 @require_permission("qualifications.read")
+@conditional_get()
 def get_qualification_groups_for_crew(crew_type: str) -> tuple[Response, int]:
     """Get qualification groups applicable to a specific crew type.
 
@@ -449,6 +458,7 @@ def get_qualification_groups_for_crew(crew_type: str) -> tuple[Response, int]:
 
 @qualifications_bp.route("/crew-types-for-group/<group>", methods=["GET"])
 @require_permission("qualifications.read")
+@conditional_get()
 def get_crew_types_for_group(group: str) -> tuple[Response, int]:
     """Get crew types that can use a specific qualification group.
 
@@ -1,9 +1,14 @@
 """Qualifications service containing business logic for qualification operations."""
 
+from collections.abc import Iterable
 from typing import Any
 
 from sqlalchemy.orm import Session
 
+from app.core import data_version
+from app.core.count_cache import cached_count
+from app.features.flights.repository import LANDING_QUAL_COLUMNS, FlightRepository
+from app.features.qualifications.catalog import get_qualification_catalog, refresh_qualification_catalog
 from app.features.qualifications.models import Qualificacao  # type: ignore
 from app.features.qualifications.repository import QualificationRepository
 from app.shared.enums import (
@@ -17,6 +22,21 @@ from app.shared.enums import (
 )
 
 
+def refresh_landing_qualification_events(session: Session, qualification_ids: Iterable[int] = ()) -> None:
+    """Re-derive flight qualification events after landing qualifications' (payload_key, tipo) changed.
+
+    Landing counters map to the first qualification per (payload_key, tipo), so
+    a change can move events between qualifications: every landing
+    qualification is rebuilt, plus the given ones (which may have stopped being
+    landing qualifications). Call after refresh_qualification_catalog; commits.
+    """
+    landing_ids = [
+        e.id for e in get_qualification_catalog(session).by_id.values() if e.payload_key in LANDING_QUAL_COLUMNS
+    ]
+    FlightRepository.replace_qualification_events(session, qualificacao_ids=[*qualification_ids, *landing_ids])
+    session.commit()
+
+
 class QualificationService:
     """Service class for qualification business logic."""
 
@@ -78,6 +98,9 @@ class QualificationService:
         )
 
         created_qualification = self.repository.create(session, qualification)
+        refresh_qualification_catalog(session)
+        if created_qualification.payload_key in LANDING_QUAL_COLUMNS:
+            refresh_landing_qualification_events(session, [created_qualification.id])
         return {"id": created_qualification.id}
 
     def get_qualification(self, qualification_id: int, session: Session) -> dict[str, Any] | None:
@@ -119,6 +142,8 @@ class QualificationService:
         if not qualification:
             return {"error": "Qualificação não encontrada"}
 
+        old_landing_key = (qualification.payload_key, qualification.tipo_aplicavel)
+
         if "nome" in qualification_data:
             qualification.nome = qualification_data["nome"]
         if "payload_key" in qualification_data:
@@ -142,6 +167,12 @@ class QualificationService:
                 return {"error": f"Grupo de Qualificação inválido: {qualification_data['grupo']}"}
 
         self.repository.update(session, qualification)
+        refresh_qualification_catalog(session)
+        new_landing_key = (qualification.payload_key, qualification.tipo_aplicavel)
+        if new_landing_key != old_landing_key and (
+            old_landing_key[0] in LANDING_QUAL_COLUMNS or new_landing_key[0] in LANDING_QUAL_COLUMNS
+        ):
+            refresh_landing_qualification_events(session, [qualification.id])
         return {"id": qualification.id}
 
     def delete_qualification(self, qualification_id: int, session: Session) -> dict[str, Any]:
@@ -160,6 +191,7 @@ class QualificationService:
             return {"error": "Qualificação não encontrada"}
 
         self.repository.delete(session, qualification)
+        refresh_qualification_catalog(session)
         return {"mensagem": "Qualificação apagada com sucesso."}
 
     def get_qualifications_for_tripulante_type(self, tipo: str, session: Session) -> list[dict]:
@@ -170,8 +202,13 @@ class QualificationService:
     def get_qualifications_for_tripulante_type_paginated(
         self, tipo: str, session: Session, page: int, per_page: int
     ) -> dict:
-        """Get paginated tripulantes of a specific type with their qualifications."""
-        tripulantes, total = self.repository.find_tripulantes_by_type_paginated(session, tipo, page, per_page)
+        """Get paginated tripulantes of a specific type with their qualifications (total from the count cache)."""
+        total = cached_count(
+            ("tripulantes_by_type", tipo),
+            (data_version.TRIPULANTES,),
+            lambda: self.repository.count_tripulantes_by_type(session, tipo),
+        )
+        tripulantes = self.repository.find_tripulantes_by_type_paginated(session, tipo, page, per_page)
         return {
             "data": [t.to_json() for t in tripulantes],
             "pagination": {
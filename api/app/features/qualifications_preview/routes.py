@@ -3,10 +3,12 @@
 from flask import Blueprint, Response, jsonify, request
 from sqlalchemy.orm import Session
 
+from app.core import data_version
 from app.core.config import engine
 from app.features.qualifications_preview.constants import PREVIEW_DAYS
 from app.features.qualifications_preview.service import QualificationsPreviewService
 from app.shared.enums import Role
+from app.shared.http_cache import conditional_get
 from app.shared.permissions import require_role
 
 qualifications_preview_bp = Blueprint("qualifications_preview", __name__)
@@ -15,6 +17,7 @@ qualifications_preview_service = QualificationsPreviewService()
 
 @qualifications_preview_bp.route("/", methods=["GET"], strict_slashes=False)
 @require_role(Role.USER.level)
+@conditional_get(data_version.FLIGHTS, data_version.TRIPULANTES, data_version.QUALIFICACOES)
 def get_expiring_by_qualification() -> tuple[Response, int]:
     """Get MQP/MQOBP qualifications expiring within preview_days, grouped by qualification.
 
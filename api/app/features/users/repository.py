@@ -16,11 +16,15 @@ class UserRepository:
         return list(session.scalars(select(Tripulante)))
 
     @staticmethod
-    def find_all_paginated(session: Session, page: int, per_page: int) -> tuple[list[Tripulante], int]:
-        """Get paginated users/tripulantes."""
-        total = session.execute(select(func.count(Tripulante.nip))).scalar_one()
+    def count_all(session: Session) -> int:
+        """Count all users/tripulantes."""
+        return session.execute(select(func.count(Tripulante.nip))).scalar_one()
+
+    @staticmethod
+    def find_all_paginated(session: Session, page: int, per_page: int) -> list[Tripulante]:
+        """Get one page of users/tripulantes ordered by NIP (see count_all for the total)."""
         stmt = select(Tripulante).order_by(Tripulante.nip).limit(per_page).offset((page - 1) * per_page)
-        return list(session.scalars(stmt)), total
+        return list(session.scalars(stmt))
 
     @staticmethod
     def find_by_nip(session: Session, nip: int) -> Tripulante | None:
@@ -2,10 +2,12 @@
 
 import json
 import logging
+from typing import Any
 
 from flask import Blueprint, Response, jsonify, request
 from sqlalchemy.orm import Session
 
+from app.core import data_version
 from app.core.config import engine
 from app.features.users.policies import (
     can_modify_user,
@@ -20,6 +22,7 @@ from app.features.users.schemas import (
 )
 from app.features.users.service import UserService
 from app.shared.enums import Role
+from app.shared.http_cache import not_modified, tag_response, versioned_etag
 from app.shared.permissions import check_permission, require_permission
 
 logger = logging.getLogger(__name__)
@@ -40,9 +43,15 @@ def retrieve_user() -> tuple[Response, int]:
       - Users
     summary: List all users or create a new user
     description: |
-      GET: Retrieve all users from the database
+      GET: Retrieve all users from the database (paginated when page/per_page is given)
       POST: Create a new user
     parameters:
+      - in: query
+        name: count
+        type: string
+        enum: [exact, estimate]
+        required: false
+        description: GET with pagination only. "estimate" uses planner statistics for the total
       - in: body
         name: body
         description: User data (for POST)
@@ -85,7 +94,7 @@ def retrieve_user() -> tuple[Response, int]:
               default: "Presente"
     responses:
       200:
-        description: List of all users (GET)
+        description: List of all users (GET), with a weak ETag
         schema:
           type: array
           items:
@@ -113,6 +122,8 @@ def retrieve_user() -> tuple[Response, int]:
             id:
               type: integer
               description: Created user NIP
+      304:
+        description: Not modified (GET with a matching If-None-Match)
       400:
         description: Validation error or bad request
         schema:
@@ -128,14 +139,26 @@ def retrieve_user() -> tuple[Response, int]:
             if auth_error:
                 return auth_error
 
+            etag = versioned_etag((data_version.TRIPULANTES,))
+            cached = not_modified(etag)
+            if cached is not None:
+                return cached, 304
+
             page_str = request.args.get("page")
             per_page_str = request.args.get("per_page")
             with Session(engine) as session:
                 if page_str is not None or per_page_str is not None:
                     page = max(1, int(page_str or 1))
                     per_page = min(500, max(1, int(per_page_str or 50)))
-                    return jsonify(user_service.get_all_users_paginated(session, page, per_page)), 200
-                return jsonify(user_service.get_all_users(session)), 200
+                    count = request.args.get("count")
+                    result: dict[str, Any] | list[dict[str, Any]] = user_service.get_all_users_paginated(
+                        session, page, per_page, count
+                    )
+                else:
+                    result = user_service.get_all_users(session)
+            return tag_response(jsonify(result), etag), 200
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
         except Exception as e:
             logger.exception("[users] GET / error: %s", e)
             return jsonify({"message": f"Internal server error: {str(e)}"}), 500
@@ -390,7 +413,14 @@ def backup_users() -> tuple[Response, int]:
     tags:
       - Users
     summary: Create users backup
-    description: Export all users to JSON and upload to Google Drive
+    description: Export all users to JSON and upload to Google Drive (or another backup storage)
+    parameters:
+      - in: query
+        name: storage
+        type: string
+        enum: [drive, local, s3]
+        required: false
+        description: Backup storage backend (defaults to BACKUP_STORAGE, usually drive)
     responses:
       200:
         description: Backup created and uploaded successfully
@@ -400,10 +430,18 @@ def backup_users() -> tuple[Response, int]:
             message:
               type: string
               example: "Backup created and uploaded to Google Drive"
+            storage:
+              type: string
+              example: drive
             file_id:
               type: string
-              description: Google Drive file ID
+              description: File ID in the backup storage (Drive file ID, or path/key)
+      400:
+        description: Unknown or unconfigured backup storage
     """
     with Session(engine) as session:
-        result = user_service.backup_users(session)
+        try:
+            result = user_service.backup_users(session, storage=request.args.get("storage"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         return jsonify(result), 200
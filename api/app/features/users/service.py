@@ -1,17 +1,21 @@
 """Users service containing business logic for user operations."""
 
+import json
 import os
 from typing import Any
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core import data_version
+from app.core.count_cache import COUNT_ESTIMATE, cached_count, estimated_row_count, parse_count_mode
+from app.features.flights.repository import FlightRepository
 from app.features.users.models import Tripulante  # type: ignore
 from app.features.users.repository import UserRepository
 from app.shared.enums import StatusTripulante, TipoTripulante  # type: ignore
 from app.shared.rbac_models import Role as RoleModel  # type: ignore
 from app.utils.email import hash_code
-from app.utils.gdrive import ID_PASTA_VOO, enviar_json_para_pasta  # type: ignore
+from app.utils.storage import AREA_1M, MIMETYPE_JSON, STORAGE_DRIVE, get_backup_storage
 
 FLASK_ENV = os.environ.get("FLASK_ENV", "development").lower()
 
@@ -69,18 +73,30 @@ class UserService:
         """Get all users/tripulantes from database."""
         return [self._tripulante_to_dict(t) for t in self.repository.find_all(session)]
 
-    def get_all_users_paginated(self, session: Session, page: int, per_page: int) -> dict:
-        """Get paginated users/tripulantes."""
-        tripulantes_obj, total = self.repository.find_all_paginated(session, page, per_page)
-        return {
-            "data": [self._tripulante_to_dict(t) for t in tripulantes_obj],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "pages": -(-total // per_page),
-            },
+    def get_all_users_paginated(self, session: Session, page: int, per_page: int, count: str | None = None) -> dict:
+        """Get paginated users/tripulantes.
+
+        The total comes from the count cache, or from the planner's estimate with
+        count="estimate" (pagination then carries "estimated").
+
+        Raises:
+            ValueError: If the count mode is invalid
+        """
+        count_mode = parse_count_mode(count)
+        total = estimated_row_count(session, Tripulante.__tablename__) if count_mode == COUNT_ESTIMATE else None
+        estimated = total is not None
+        if total is None:
+            total = cached_count(("users",), (data_version.TRIPULANTES,), lambda: self.repository.count_all(session))
+        tripulantes_obj = self.repository.find_all_paginated(session, page, per_page)
+        pagination: dict[str, Any] = {
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "pages": -(-total // per_page),
         }
+        if count_mode == COUNT_ESTIMATE:
+            pagination["estimated"] = estimated
+        return {"data": [self._tripulante_to_dict(t) for t in tripulantes_obj], "pagination": pagination}
 
     def create_user(self, user_data: dict, session: Session) -> dict[str, Any]:
         """Create a new user/tripulante.
@@ -111,6 +127,7 @@ class UserService:
         created_user, error = self.repository.create(session, user)
         if error:
             return {"message": error}
+        data_version.bump(data_version.TRIPULANTES)
         return {"id": created_user.nip}
 
     def delete_user(self, nip: int, session: Session) -> dict[str, Any]:
@@ -126,6 +143,7 @@ class UserService:
         deleted = self.repository.delete_by_nip(session, nip)
 
         if deleted:
+            data_version.bump(data_version.TRIPULANTES)
             return {"deleted_id": str(nip)}
 
         return {"message": "Failed to delete"}
@@ -146,6 +164,7 @@ class UserService:
         if modified_user is None:
             return {"message": f"User with NIP {nip} not found"}
 
+        old_tipo = modified_user.tipo
         try:
             for key, value in user_data.items():
                 if key == "qualification":
@@ -170,6 +189,11 @@ class UserService:
                 setattr(modified_user, key, value)
 
             self.repository.update(session, modified_user)
+            if modified_user.tipo != old_tipo:
+                # Landing counters map to the qualifications of the crew member's tipo
+                FlightRepository.replace_qualification_events(session, pilot_ids=[nip])
+                session.commit()
+            data_version.bump(data_version.TRIPULANTES)
             # Refresh the user to reload relationships (especially role)
             session.refresh(modified_user)
             return modified_user.to_json()
@@ -223,20 +247,28 @@ class UserService:
             users.append(user)
 
         result = self.repository.bulk_create(session, users)
+        data_version.bump(data_version.TRIPULANTES)
         return {"message": "Users added successfully", **result}
 
-    def backup_users(self, session: Session) -> dict[str, Any]:
-        """Create backup of all users and upload to Google Drive.
+    def backup_users(self, session: Session, storage: str | None = None) -> dict[str, Any]:
+        """Create backup of all users and upload to Google Drive (or another backup storage).
+
+        Drive backups only run in production; local and S3 backups run in any environment.
 
         Args:
             session: Database session
+            storage: Backup storage backend (defaults to BACKUP_STORAGE, see app.utils.storage)
 
         Returns:
             dict with success message
+
+        Raises:
+            ValueError: If the storage backend is unknown or not configured
         """
-        if FLASK_ENV != "production":
+        backend = get_backup_storage(storage)
+        if FLASK_ENV != "production" and backend.name == STORAGE_DRIVE:
             return {
-                "message": "Backup is disabled. Set FLASK_ENV=production to enable Google Drive backups.",
+                "message": "Google Drive backup is disabled. Set FLASK_ENV=production to enable it, or use another storage backend.",
                 "flask_env": FLASK_ENV,
             }
 
@@ -246,5 +278,6 @@ class UserService:
         for user in users_list:
             user_base.append(user.to_backup_json())
 
-        enviar_json_para_pasta(dados=user_base, nome_arquivo="user_base.json", id_pasta=ID_PASTA_VOO)
-        return {"message": "Backup feito com sucesso!"}
+        dados = json.dumps(user_base, indent=4).encode("utf-8")
+        file_id = backend.save_file(AREA_1M, "user_base.json", dados, MIMETYPE_JSON)
+        return {"message": "Backup feito com sucesso!", "storage": backend.name, "file_id": file_id}
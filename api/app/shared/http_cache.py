@@ -0,0 +1,95 @@
+"""Conditional GET (ETag / If-None-Match) for read endpoints.
+
+Responses of data-backed endpoints are tagged from the data versions of the
+domains they read (see app.core.data_version) plus the request URL and today's
+date, since several responses count days relative to today. The tag is known
+before the view runs, so a client that already holds it gets a 304 without the
+database being queried. Any write bumping one of the domains changes the tag in
+every worker.
+
+Endpoints serving static lists have no domain; their tag is a hash of the body.
+"""
+
+import hashlib
+from collections.abc import Callable, Iterable
+from datetime import date
+from functools import wraps
+from typing import Any
+
+from flask import Response, current_app, make_response, request
+from flask.typing import ResponseReturnValue
+
+from app.core import data_version
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def versioned_etag(domains: Iterable[str]) -> str:
+    """Return the ETag value of the current request for the given data domains.
+
+    Args:
+        domains: Data version domains the response is built from
+
+    Returns:
+        Opaque ETag value (unquoted)
+    """
+    parts = [f"{domain}={data_version.current(domain)}" for domain in domains]
+    parts.append(date.today().isoformat())
+    parts.append(request.full_path)
+    return hashlib.sha1("|".join(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def not_modified(etag: str) -> Response | None:
+    """Return a 304 response if the request's If-None-Match matches etag, else None."""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return tag_response(current_app.response_class(status=304), etag)
+
+
+def tag_response(response: Response, etag: str) -> Response:
+    """Set the (weak) ETag and revalidation headers on a response."""
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def conditional_get(
+    *domains: str,
+) -> Callable[[Callable[..., ResponseReturnValue]], Callable[..., ResponseReturnValue]]:
+    """Decorate a GET view with ETag / If-None-Match handling.
+
+    Place it below the permission decorator so unauthenticated requests never
+    get a 304. Only 200 responses are tagged; other methods pass through.
+
+    Args:
+        *domains: Data version domains the view reads; none for static responses,
+            which are tagged with a hash of their body instead
+
+    Returns:
+        Decorator
+    """
+
+    def decorator(view: Callable[..., ResponseReturnValue]) -> Callable[..., ResponseReturnValue]:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> ResponseReturnValue:
+            if request.method != "GET":
+                return view(*args, **kwargs)
+            if not domains:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    response.add_etag(weak=True)
+                    response.headers["Cache-Control"] = CACHE_CONTROL
+                    response.make_conditional(request)
+                return response
+            etag = versioned_etag(domains)
+            cached = not_modified(etag)
+            if cached is not None:
+                return cached
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                tag_response(response, etag)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,40 @@
+"""Opaque cursors for keyset-paginated listings.
+
+A cursor holds the sort key of the last row of a page: a date followed by the
+integer ids that break ties (e.g. (date, fid) for flights, (date, fid, nip) for
+crew rows), encoded as URL-safe base64 so clients treat it as a token.
+"""
+
+import base64
+import binascii
+from datetime import date, datetime
+from typing import Any
+
+
+def encode_keyset_cursor(position_date: date, *ids: int) -> str:
+    """Encode a (date, *ids) keyset position as an opaque URL-safe token."""
+    raw = ":".join([position_date.isoformat(), *map(str, ids)]).encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_keyset_cursor(token: str, id_count: int) -> tuple[Any, ...]:
+    """Decode a token produced by encode_keyset_cursor.
+
+    Args:
+        token: Cursor from a previous page
+        id_count: Number of ids expected after the date
+
+    Returns:
+        (date, *ids)
+
+    Raises:
+        ValueError: If the token is malformed or holds a different number of ids
+    """
+    try:
+        padded = token.strip() + "=" * (-len(token.strip()) % 4)
+        date_part, *id_parts = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii").split(":")
+        if len(id_parts) != id_count:
+            raise ValueError(token)
+        return (datetime.strptime(date_part, "%Y-%m-%d").date(), *map(int, id_parts))
+    except (ValueError, UnicodeError, binascii.Error):
+        raise ValueError("Invalid after cursor") from None
@@ -1,22 +1,22 @@
-import base64
 import io
 import json
 import logging
 import os.path
 import threading
+from collections.abc import Iterable, Sequence
+from contextlib import ExitStack
+from typing import Any
 
 from dotenv import load_dotenv
 from google.auth.transport.requests import Request
-from google.oauth2 import service_account  # type:ignore
-from google.oauth2.credentials import Credentials  # type:ignore
-from google_auth_oauthlib.flow import InstalledAppFlow  # type:ignore
-from googleapiclient.discovery import build  # type:ignore
-from googleapiclient.http import MediaIoBaseUpload  # type:ignore
+from google.oauth2 import service_account
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseUpload
 
-from app.utils.pdf import combinar_template_e_conteudo, gerar_pdf_conteudo_em_memoria  # type: ignore
-
-# Lock for folder creation to prevent race conditions
-_folder_creation_lock = threading.Lock()
+from app.utils.storage import MIMETYPE_1M, MIMETYPE_JSON, MIMETYPE_PDF, day_path, encode_1m
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = ["https://www.googleapis.com/auth/drive.file"]
@@ -28,9 +28,62 @@ ID_PASTA_PDF = os.environ.get("ID_PASTA_PDF", "")
 
 logger = logging.getLogger(__name__)
 
+SERVICE_ACCOUNT_FILE = "credentials.json"
+
+FOLDER_MIMETYPE = "application/vnd.google-apps.folder"
+
+# The Drive API runs at most 100 calls per batch HTTP request, and only
+# metadata calls: media uploads can't be batched and are sent one by one.
+BATCH_LIMIT = 100
+# Smaller files are uploaded in one multipart request instead of opening a
+# resumable upload session first (two round trips)
+RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+
+# Service account credentials are loaded once per process and shared: they
+# refresh their own access token. The Drive client isn't thread-safe (its
+# httplib2 connection is not), so each thread builds and keeps its own.
+_credentials = None
+_credentials_lock = threading.Lock()
+_thread_local = threading.local()
+
+# (parent_id, folder_name) -> folder_id. Folders are never renamed or deleted
+# by the app, so resolved IDs stay valid; each key has its own lock so threads
+# only wait for one another when they resolve the same folder.
+_folder_ids: dict[tuple[str, str], str] = {}
+_folder_locks: dict[tuple[str, str], threading.Lock] = {}
+_folder_locks_guard = threading.Lock()
+
 # SCOPES = ["https://www.googleapis.com/auth/drive.metadata.readonly"]
 
 
+def get_credentials() -> Any:
+    """Return the service account credentials, reading credentials.json on first use."""
+    global _credentials
+    if _credentials is None:
+        with _credentials_lock:
+            if _credentials is None:
+                _credentials = service_account.Credentials.from_service_account_file(
+                    SERVICE_ACCOUNT_FILE, scopes=SCOPES
+                )
+    return _credentials
+
+
+def get_drive_service() -> Any:
+    """Return this thread's Drive client (built on first use, then reused)."""
+    service = getattr(_thread_local, "service", None)
+    if service is None:
+        service = build("drive", "v3", credentials=get_credentials(), cache_discovery=False)
+        _thread_local.service = service
+    return service
+
+
+def clear_folder_cache() -> None:
+    """Forget the resolved folder IDs (tests, or after folders were changed by hand in Drive)."""
+    with _folder_locks_guard:
+        _folder_ids.clear()
+        _folder_locks.clear()
+
+
 # Autenticar e conectar ao Google Drive
 def autenticar_drive():
     creds = None
@@ -52,8 +105,127 @@ def autenticar_drive():
     return build("drive", "v3", credentials=creds)
 
 
-def check_dublicates_and_sends(nome_ficheiro: str, service, pasta_dia_id, media):
-    query = f"name = '{nome_ficheiro}' and '{pasta_dia_id}' in parents and trashed = false"
+def _media(dados: bytes, mimetype: str) -> MediaIoBaseUpload:
+    return MediaIoBaseUpload(io.BytesIO(dados), mimetype=mimetype, resumable=len(dados) > RESUMABLE_THRESHOLD)
+
+
+def _quote(value: str) -> str:
+    # Escape single quotes for Drive queries
+    return value.replace("'", "\\'")
+
+
+def _file_query(nome_ficheiro: str, pasta_id: str) -> str:
+    return f"name = '{_quote(nome_ficheiro)}' and '{pasta_id}' in parents and trashed = false"
+
+
+def _folder_query(parent_id: str, folder_name: str) -> str:
+    return (
+        f"name = '{_quote(folder_name)}' "
+        f"and mimeType = '{FOLDER_MIMETYPE}' "
+        f"and '{parent_id}' in parents "
+        f"and trashed = false"
+    )
+
+
+def execute_batch(service: Any, pedidos: Sequence[Any]) -> list[Any]:
+    """Execute Drive API metadata calls grouped in batch HTTP requests (BATCH_LIMIT calls each).
+
+    Args:
+        service: Drive client
+        pedidos: Unexecuted requests (e.g. service.files().list(...)), without media
+
+    Returns:
+        The response of each call, in order, or the HttpError it failed with
+    """
+    resultados: list[Any] = [None] * len(pedidos)
+
+    def guardar(request_id: str, response: Any, exception: Exception | None) -> None:
+        resultados[int(request_id)] = exception if exception is not None else response
+
+    for inicio in range(0, len(pedidos), BATCH_LIMIT):
+        batch = service.new_batch_http_request(callback=guardar)
+        for n, pedido in enumerate(pedidos[inicio : inicio + BATCH_LIMIT], start=inicio):
+            batch.add(pedido, request_id=str(n))
+        batch.execute()
+    return resultados
+
+
+def _responses(resultados: list[Any]) -> list[dict[str, Any]]:
+    for resultado in resultados:
+        if isinstance(resultado, Exception):
+            raise resultado
+    return resultados
+
+
+def reserve_files(service: Any, ficheiros: Sequence[tuple[str, str, str]]) -> list[str]:
+    """Return the Drive ID of each file, creating the missing ones empty.
+
+    Files are looked up by name in their folder (the duplicate check of
+    check_dublicates_and_sends) and created metadata-only, both in batch
+    requests; the contents are then uploaded separately, by ID. Until then a
+    created file is empty, and list_app_file_ids does not count it.
+
+    Args:
+        service: Drive client
+        ficheiros: (file name, folder ID, mimetype) of each file
+
+    Returns:
+        File IDs, in the order of ficheiros
+    """
+    chaves = list(dict.fromkeys((nome, pasta) for nome, pasta, _ in ficheiros))
+    mimetypes = {(nome, pasta): mimetype for nome, pasta, mimetype in ficheiros}
+    encontrados = _responses(
+        execute_batch(
+            service,
+            [
+                service.files().list(q=_file_query(nome, pasta), spaces="drive", fields="files(id, name)")
+                for nome, pasta in chaves
+            ],
+        )
+    )
+    ids = {}
+    for chave, resposta in zip(chaves, encontrados, strict=True):
+        files = resposta.get("files", [])
+        if files:
+            ids[chave] = files[0]["id"]
+
+    novos = [chave for chave in chaves if chave not in ids]
+    criados = _responses(
+        execute_batch(
+            service,
+            [
+                service.files().create(
+                    body={"name": nome, "parents": [pasta], "mimeType": mimetypes[(nome, pasta)]}, fields="id"
+                )
+                for nome, pasta in novos
+            ],
+        )
+    )
+    ids.update((chave, r["id"]) for chave, r in zip(novos, criados, strict=True))
+    return [ids[(nome, pasta)] for nome, pasta, _ in ficheiros]
+
+
+def reserve_flight_files(ficheiros: Sequence[tuple[str, str, str]]) -> list[str]:
+    """reserve_files for flight files, each in the day folder of its name under the given root folder.
+
+    Args:
+        ficheiros: (file name, root folder ID, mimetype) of each file
+
+    Returns:
+        File IDs, in the order of ficheiros
+    """
+    service = get_drive_service()
+    pastas_dia: dict[str, dict[str, str]] = {}
+    for id_pasta in dict.fromkeys(pasta for _, pasta, _ in ficheiros):
+        nomes = [nome for nome, pasta, _ in ficheiros if pasta == id_pasta]
+        pastas_dia[id_pasta] = resolve_day_folders(service, id_pasta, nomes)
+    return reserve_files(
+        service, [(nome, pastas_dia[id_pasta][nome], mimetype) for nome, id_pasta, mimetype in ficheiros]
+    )
+
+
+def check_dublicates_and_sends(nome_ficheiro: str, service, pasta_dia_id, media) -> str:
+    query = _file_query(nome_ficheiro, pasta_dia_id)
     response = service.files().list(q=query, spaces="drive", fields="files(id, name)").execute()
     files = response.get("files", [])
 
@@ -74,198 +246,282 @@ def check_dublicates_and_sends(nome_ficheiro: str, service, pasta_dia_id, media)
             print(f"PDF novo criado! ID: {file.get('id')}")
         else:
             print(f"Ficheiro novo criado! ID: {file.get('id')}")
+    return file.get("id")
 
 
-# Função para enviar arquivo ao Google Drive
-def enviar_para_drive(mem_pdf: io.BytesIO, nome_ficheiro: str, id_pasta: str):
-    """Envia o ficheiro pdf para o google drive
+def enviar_ficheiro(dados: bytes, mimetype: str, nome_ficheiro: str, id_pasta: str, file_id: str | None = None) -> str:
+    """Create or update a flight file in its day folder and return its Drive ID.
 
-    Args:
-        mem_pdf (io.BytesIO): Dados a enviar
-        nome_ficheiro (str): Nome do ficheiro a guardar
-        id_pasta (str): ID da pasta no Google Drive
+    With a known file_id (see the backup manifest) the file is updated directly,
+    without resolving folders or listing duplicates. If that file no longer
+    exists in Drive it is uploaded again the usual way.
     """
+    service = get_drive_service()
+    if file_id:
+        try:
+            service.files().update(fileId=file_id, media_body=_media(dados, mimetype)).execute()
+            return file_id
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+            logger.info(f"Ficheiro {nome_ficheiro} ({file_id}) já não existe no Google Drive, a enviar de novo")
+
+    pasta_dia_id = get_day_folder(service, id_pasta, nome_ficheiro)
+    media = _media(dados, mimetype)
 
-    # Carrega credenciais do arquivo JSON
-    credentials = service_account.Credentials.from_service_account_file("credentials.json", scopes=SCOPES)
+    # Verifica se já existe um ficheiro com o mesmo nome na pasta
+    return check_dublicates_and_sends(nome_ficheiro, service, pasta_dia_id, media)
 
-    # Cria o cliente para a API do Drive
-    service = build("drive", "v3", credentials=credentials)
 
-    data: str = nome_ficheiro.split()[2]
-    nome_pasta_dia: str = data[:2]
-    nome_pasta_mes: str = data[2:5]
-    nome_pasta_ano: str = data[-4:]
-    # Retira o mês do nome do ficheiro
-    # Retira o dia do nome do ficheiro
+def list_app_file_ids() -> set[str]:
+    """Return the IDs of every (non-trashed) file the service account can see.
 
-    # 2) Garante que a pasta do ano exista dentro da pasta raiz
-    pasta_ano_id = get_or_create_folder(service, id_pasta, nome_pasta_ano)
+    With the drive.file scope these are the files the app created, so one paged
+    listing tells which backed-up files still exist remotely. Empty files are
+    left out: they are placeholders from reserve_files whose upload never
+    completed, so their contents are not backed up.
+    """
+    service = get_drive_service()
+    file_ids: set[str] = set()
+    page_token = None
+    while True:
+        response = (
+            service.files()
+            .list(
+                q=f"trashed = false and mimeType != '{FOLDER_MIMETYPE}'",
+                spaces="drive",
+                fields="nextPageToken, files(id, size)",
+                pageSize=1000,
+                pageToken=page_token,
+            )
+            .execute()
+        )
+        file_ids.update(file["id"] for file in response.get("files", []) if file.get("size") != "0")
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return file_ids
 
-    # 3) Garante que a pasta do mês exista dentro da pasta raiz
-    pasta_mes_id = get_or_create_folder(service, pasta_ano_id, nome_pasta_mes)
 
-    # 4) Garante que a pasta do dia exista dentro da pasta do mês
-    pasta_dia_id = get_or_create_folder(service, pasta_mes_id, nome_pasta_dia)
+# Função para enviar arquivo ao Google Drive
+def enviar_para_drive(mem_pdf: io.BytesIO, nome_ficheiro: str, id_pasta: str, file_id: str | None = None) -> str:
+    """Envia o ficheiro pdf para o google drive
 
-    media = MediaIoBaseUpload(mem_pdf, mimetype="application/pdf", resumable=True)
+    Args:
+        mem_pdf (io.BytesIO): Dados a enviar
+        nome_ficheiro (str): Nome do ficheiro a guardar
+        id_pasta (str): ID da pasta no Google Drive
+        file_id (str | None): ID do ficheiro no Drive, se já for conhecido
 
-    # Verifica se já existe um ficheiro com o mesmo nome na pasta
-    check_dublicates_and_sends(nome_ficheiro, service, pasta_dia_id, media)
+    Returns:
+        str: ID do ficheiro no Google Drive
+    """
+    return enviar_ficheiro(mem_pdf.getvalue(), MIMETYPE_PDF, nome_ficheiro, id_pasta, file_id)
 
 
 # Função para enviar dados diretamente para o Google Drive
-def enviar_json_para_pasta(dados, nome_arquivo, id_pasta):
-    # Carrega credenciais do arquivo JSON
-    credentials = service_account.Credentials.from_service_account_file("credentials.json", scopes=SCOPES)
-
-    # Cria o cliente para a API do Drive
-    service = build("drive", "v3", credentials=credentials)
+def enviar_json_para_pasta(dados, nome_arquivo, id_pasta) -> str:
+    """Envia dados JSON para um ficheiro numa pasta do Google Drive, substituindo o conteúdo se já existir.
 
+    Returns:
+        str: ID do ficheiro no Google Drive
+    """
     # Converte os dados JSON para um stream de bytes
-    json_bytes = io.BytesIO(json.dumps(dados, indent=4).encode("utf-8"))
+    json_bytes = json.dumps(dados, indent=4).encode("utf-8")
+    return enviar_bytes_para_pasta(json_bytes, nome_arquivo, id_pasta, MIMETYPE_JSON)
 
-    # Upload como JSON
-    media = MediaIoBaseUpload(json_bytes, mimetype="application/json", resumable=False)
 
-    query = f"name = '{nome_arquivo}' and '{id_pasta}' in parents and trashed = false"
-    response = service.files().list(q=query, spaces="drive", fields="files(id, name)").execute()
+def enviar_bytes_para_pasta(dados: bytes, nome_arquivo: str, id_pasta: str, mimetype: str) -> str:
+    """Envia um ficheiro para uma pasta do Google Drive, substituindo o conteúdo se já existir.
+
+    One lookup by name, then one upload that creates or updates the file with
+    its content (no empty placeholder is ever left behind).
+
+    Returns:
+        str: ID do ficheiro no Google Drive
+    """
+    service = get_drive_service()
+    response = (
+        service.files().list(q=_file_query(nome_arquivo, id_pasta), spaces="drive", fields="files(id, name)").execute()
+    )
     files = response.get("files", [])
+    media = _media(dados, mimetype)
 
     if files:
         # Ficheiro já existe — faz update
         file_id = files[0]["id"]
-        file = service.files().update(fileId=file_id, media_body=media).execute()
-        print(f"Ficheiro existente atualizado! ID: {file.get('id')}")
+        service.files().update(fileId=file_id, media_body=media).execute()
+        print(f"Ficheiro existente atualizado! ID: {file_id}")
     else:
-        # Define os metadados do ficheiro
-        file_metadata = {
-            "name": nome_arquivo,  # Ex: "meus_dados.json"
-            "parents": [id_pasta],  # ID da pasta de destino
-            "mimeType": "application/json",  # Tipo de ficheiro correto
-        }
-
         # Ficheiro não existe — cria novo
-        file = service.files().create(body=file_metadata, media_body=media, fields="id").execute()
-        print(f"Ficheiro novo criado! ID: {file.get('id')}")
-
-    # # Cria o ficheiro no Google Drive
-    # arquivo = service.files().create(body=file_metadata, media_body=media, fields="id").execute()
-    # print(f"Arquivo enviado com sucesso para a pasta. ID do arquivo: {arquivo.get('id')}")
+        file_metadata = {"name": nome_arquivo, "parents": [id_pasta], "mimeType": mimetype}
+        file_id = service.files().create(body=file_metadata, media_body=media, fields="id").execute()["id"]
+        print(f"Ficheiro novo criado! ID: {file_id}")
+    return file_id
 
 
-def upload_with_service_account(dados: dict, nome_arquivo_drive: str, id_pasta: str):
+def upload_with_service_account(
+    dados: dict[str, Any], nome_arquivo_drive: str, id_pasta: str, file_id: str | None = None
+) -> str:
     """Uploads Flight JSON encoded data to Google Drive.
 
     Args:
         dados (dict): Dados do voo a serem enviados.
         nome_arquivo_drive (str): Nome do arquivo a ser criado no Google Drive.
         id_pasta (str): Id da pasta do Google Drive base onde o arquivo será enviado.
+        file_id (str | None): ID do ficheiro no Drive, se já for conhecido.
+
+    Returns:
+        str: ID do ficheiro no Google Drive
     """
-    # Carrega credenciais do arquivo JSON
-    credentials = service_account.Credentials.from_service_account_file("credentials.json", scopes=SCOPES)
+    return enviar_ficheiro(encode_1m(dados), MIMETYPE_1M, nome_arquivo_drive, id_pasta, file_id)
+
 
-    # Cria o cliente para a API do Drive
-    service = build("drive", "v3", credentials=credentials)
+def get_day_folder(service: Any, id_pasta: str, nome_ficheiro: str) -> str:
+    """Return the ID of the year/month/day folder of a flight file, creating missing folders.
 
-    # Separa a nata do nome do ficheiro
-    data: str = nome_arquivo_drive.split()[2]
-    nome_pasta_dia: str = data[:2]
-    nome_pasta_mes: str = data[2:5]
-    nome_pasta_ano: str = data[-4:]
+    The date is taken from the file name ("1M <airtask> 07Apr2025 ..."); after
+    the first file of a day all three folders come from the cache.
 
-    # 2) Garante que a pasta do ano exista dentro da pasta raiz
-    pasta_ano_id = get_or_create_folder(service, id_pasta, nome_pasta_ano)
+    Args:
+        service: Drive client
+        id_pasta: Root folder ID
+        nome_ficheiro: Flight file name
 
-    # 3) Garante que a pasta do mês exista dentro da pasta raiz
-    pasta_mes_id = get_or_create_folder(service, pasta_ano_id, nome_pasta_mes)
+    Returns:
+        Day folder ID
+    """
+    ano, mes, dia = day_path(nome_ficheiro)
+    pasta_ano_id = get_or_create_folder(service, id_pasta, ano)
+    pasta_mes_id = get_or_create_folder(service, pasta_ano_id, mes)
+    return get_or_create_folder(service, pasta_mes_id, dia)
 
-    # 4) Garante que a pasta do dia exista dentro da pasta do mês
-    pasta_dia_id = get_or_create_folder(service, pasta_mes_id, nome_pasta_dia)
 
-    dados_binarios = base64.b64encode(json.dumps(dados).encode("utf-8"))
-    # dados_binarios = json.dumps(dados).encode("utf-8")
-    buffer = io.BytesIO(dados_binarios)
-    media = MediaIoBaseUpload(buffer, mimetype="application/octet-stream", resumable=True)
+def resolve_day_folders(service: Any, id_pasta: str, nomes_ficheiros: Iterable[str]) -> dict[str, str]:
+    """get_day_folder for many flight files, with batched Drive calls.
 
-    check_dublicates_and_sends(nome_arquivo_drive, service, pasta_dia_id, media)
+    Folders missing from the cache are looked up one level (year, month, day)
+    at a time, each level in batch requests, and the missing ones created in
+    batch requests too.
 
+    Args:
+        service: Drive client
+        id_pasta: Root folder ID
+        nomes_ficheiros: Flight file names
 
-def get_or_create_folder(service, parent_id: str, folder_name: str) -> str:
+    Returns:
+        Dictionary file name -> day folder ID
     """
-    Verifica se existe uma pasta com 'folder_name' dentro de 'parent_id'.
-    Se não existir, cria a pasta.
-    Retorna o ID da pasta encontrada ou criada.
+    caminhos = {nome: day_path(nome) for nome in nomes_ficheiros}
+    pastas = dict.fromkeys(caminhos, id_pasta)
+    for nivel in range(3):
+        chaves = {nome: (pastas[nome], caminho[nivel]) for nome, caminho in caminhos.items()}
+        _resolve_folders(service, chaves.values())
+        pastas = {nome: _folder_ids[chave] for nome, chave in chaves.items()}
+    return pastas
+
+
+def _resolve_folders(service: Any, chaves: Iterable[tuple[str, str]]) -> None:
+    """Cache the IDs of the given (parent_id, folder_name) folders, creating missing ones.
 
-    Uses thread lock to prevent race conditions when multiple threads try to create the same folder.
+    Holds the per-folder lock of get_or_create_folder for every missing folder
+    (taken in sorted order) while listing and creating them, so concurrent
+    batches and single uploads never create the same folder twice.
     """
-    # Use lock to prevent race conditions
-    with _folder_creation_lock:
-        # Escape single quotes in folder_name for the query
-        escaped_folder_name = folder_name.replace("'", "\\'")
-
-        # 1) Tenta achar a pasta por nome dentro de parent_id
-        query = (
-            f"name = '{escaped_folder_name}' "
-            f"and mimeType = 'application/vnd.google-apps.folder' "
-            f"and '{parent_id}' in parents "
-            f"and trashed = false"
+    em_falta = sorted({chave for chave in chaves if chave not in _folder_ids})
+    if not em_falta:
+        return
+    with ExitStack() as locks:
+        for chave in em_falta:
+            locks.enter_context(_folder_lock(chave))
+        # Another thread may have resolved some of them while we waited
+        em_falta = [chave for chave in em_falta if chave not in _folder_ids]
+        if not em_falta:
+            return
+        encontradas = _responses(
+            execute_batch(
+                service,
+                [
+                    service.files().list(q=_folder_query(parent, nome), fields="files(id, name)")
+                    for parent, nome in em_falta
+                ],
+            )
         )
-        response = service.files().list(q=query, fields="files(id, name)").execute()
-        files = response.get("files", [])
+        novas = []
+        for chave, resposta in zip(em_falta, encontradas, strict=True):
+            files = resposta.get("files", [])
+            if files:
+                _folder_ids[chave] = files[0]["id"]
+            else:
+                novas.append(chave)
+        criadas = _responses(
+            execute_batch(
+                service,
+                [
+                    service.files().create(
+                        body={"name": nome, "parents": [parent], "mimeType": FOLDER_MIMETYPE}, fields="id"
+                    )
+                    for parent, nome in novas
+                ],
+            )
+        )
+        for chave, resposta in zip(novas, criadas, strict=True):
+            _folder_ids[chave] = resposta["id"]
 
-        if files:
-            # Retorna o primeiro ID encontrado
-            return files[0]["id"]
-        else:
-            # 2) Se não encontrou, cria a pasta
-            try:
-                folder_metadata = {
-                    "name": folder_name,
-                    "parents": [parent_id],
-                    "mimeType": "application/vnd.google-apps.folder",
-                }
-                folder = service.files().create(body=folder_metadata, fields="id").execute()
-                return folder.get("id")
-            except Exception as e:
-                # If creation fails (e.g., duplicate created by another thread), check again
-                response = service.files().list(q=query, fields="files(id, name)").execute()
-                files = response.get("files", [])
-                if files:
-                    return files[0]["id"]
-                # If still not found, re-raise the exception
-                raise e
-
-
-def tarefa_enviar_para_drive(dados_1m: dict, dados_pdf: dict, nome_arquivo_drive: str, nome_pdf: str) -> None:
-    """Função geral de enviar os dados para os ficheiros no Google Drive.
-
-    Criada para usar multithread e enviar os ficheiros sem as respostas para o Frontend atrasarem.
-    .1m uses qualifications by ID; PDF uses qualifications by name for display.
 
-    Args:
-        dados_1m (dict): Flight data for .1m file (QUAL1..QUAL6 as IDs).
-        dados_pdf (dict): Flight data for PDF (QUAL1..QUAL6 as names).
-        nome_arquivo_drive (str): _description_
-        nome_pdf (str): _description_
+def _folder_lock(key: tuple[str, str]) -> threading.Lock:
+    with _folder_locks_guard:
+        lock = _folder_locks.get(key)
+        if lock is None:
+            lock = _folder_locks[key] = threading.Lock()
+        return lock
+
+
+def get_or_create_folder(service: Any, parent_id: str, folder_name: str) -> str:
+    """
+    Verifica se existe uma pasta com 'folder_name' dentro de 'parent_id'.
+    Se não existir, cria a pasta.
+    Retorna o ID da pasta encontrada ou criada.
+
+    IDs are cached per (parent_id, folder_name). Only threads resolving the same
+    folder wait for each other, so the folder is created at most once per process.
     """
+    key = (parent_id, folder_name)
+    folder_id = _folder_ids.get(key)
+    if folder_id is not None:
+        return folder_id
+    with _folder_lock(key):
+        folder_id = _folder_ids.get(key)
+        if folder_id is None:
+            folder_id = _folder_ids[key] = _find_or_create_folder(service, parent_id, folder_name)
+        return folder_id
+
+
+def _find_or_create_folder(service: Any, parent_id: str, folder_name: str) -> str:
+    # 1) Tenta achar a pasta por nome dentro de parent_id
+    query = _folder_query(parent_id, folder_name)
+    response = service.files().list(q=query, fields="files(id, name)").execute()
+    files = response.get("files", [])
+
+    if files:
+        # Retorna o primeiro ID encontrado
+        return str(files[0]["id"])
+    # 2) Se não encontrou, cria a pasta
     try:
-        upload_with_service_account(dados=dados_1m, nome_arquivo_drive=nome_arquivo_drive, id_pasta=ID_PASTA_VOO)
-
-        enviar_para_drive(
-            combinar_template_e_conteudo(
-                template_pdf_path=os.path.join(os.path.dirname(__file__), "img", "Mod1M.pdf"),
-                conteudo_pdf_io=gerar_pdf_conteudo_em_memoria(dados_voo=dados_pdf),
-            ),
-            nome_ficheiro=nome_pdf,
-            id_pasta=ID_PASTA_PDF,
-        )
-        logger.info(f"Upload para Google Drive concluído: {nome_arquivo_drive}")
+        folder_metadata = {
+            "name": folder_name,
+            "parents": [parent_id],
+            "mimeType": FOLDER_MIMETYPE,
+        }
+        folder = service.files().create(body=folder_metadata, fields="id").execute()
+        return str(folder["id"])
     except Exception as e:
-        logger.exception(f"Erro ao enviar voo {nome_arquivo_drive} para o Google Drive: {e}")
-
-        # Podes logar o erro aqui ou enviar para uma ferramenta de logging
-        print(f"Erro ao enviar para Google Drive: {e}")
+        # If creation fails (e.g., duplicate created by another process), check again
+        response = service.files().list(q=query, fields="files(id, name)").execute()
+        files = response.get("files", [])
+        if files:
+            return str(files[0]["id"])
+        # If still not found, re-raise the exception
+        raise e
 
 
 # Usar as funções
@@ -1,7 +1,20 @@
 import io
 import os
+import threading
+from collections.abc import Iterable
+from typing import Any, cast
 
-from PyPDF2 import PdfReader, PdfWriter
+import PyPDF2
+from PyPDF2 import PageObject, PdfReader, PdfWriter
+from PyPDF2.generic import (
+    ArrayObject,
+    ContentStream,
+    DecodedStreamObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    PdfObject,
+)
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.units import cm
 from reportlab.pdfgen import canvas
@@ -29,22 +42,48 @@ tradutor2 = {
 }
 
 
-def gerar_pdf_conteudo_em_memoria(dados_voo) -> io.BytesIO:
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=landscape(A4))
+TEMPLATE_PDF_PATH = os.path.join(os.path.dirname(__file__), "img", "Mod1M.pdf")
+LOGO_PATH = os.path.join(os.path.dirname(__file__), "img", "Esquadra_502.png")
 
-    # Adicionar logotipo
-    caminho_logotipo = os.path.join(os.path.dirname(__file__), "img", "Esquadra_502.png")
-    if os.path.isfile(caminho_logotipo):
-        c.drawImage(
-            caminho_logotipo,
-            x=2 * cm,
-            y=landscape(A4)[1] - 3 * cm,
-            width=3 * cm,
-            height=2 * cm,
-            preserveAspectRatio=True,
-            mask="auto",  # Permite transparência se PNG tiver canal alfa
-        )
+# Part of the backup hash of a flight's PDF inputs: bump it when the template or
+# the layout below changes so the next rebackup regenerates every PDF.
+PDF_LAYOUT_VERSION = 1
+
+# Qualification flags printed (when true) at the end of each crew row
+QUALIFICACOES = (
+    "QA1",
+    "QA2",
+    "BSP1",
+    "BSP2",
+    "TA",
+    "VRP1",
+    "VRP2",
+    "CTO",
+    "SID",
+    "MONO",
+    "NFP",
+    "BSKIT",
+    "BSOC",
+)
+
+# Name of the rendered flight data inside the template page's resources
+OVERLAY_XOBJECT = NameObject("/SiqVoo")
+
+
+def _desenhar_logotipo(c: canvas.Canvas, logotipo: str) -> None:
+    c.drawImage(
+        logotipo,
+        x=2 * cm,
+        y=landscape(A4)[1] - 3 * cm,
+        width=3 * cm,
+        height=2 * cm,
+        preserveAspectRatio=True,
+        mask="auto",  # Permite transparência se PNG tiver canal alfa
+    )
+
+
+def _desenhar_voo(c: canvas.Canvas, dados_voo: dict[str, Any]) -> None:
+    """Draw the flight fields and crew rows at their positions on the Mod1M template."""
     # Exemplo: colocar dados sobre o template em coordenadas específicas
     c.setFont("Helvetica", 12)
     c.drawString(285, 450, f"{dados_voo.get('tailNumber', '')}")
@@ -84,42 +123,28 @@ def gerar_pdf_conteudo_em_memoria(dados_voo) -> io.BytesIO:
 
     c.setFont("Helvetica", 12)
 
-    qualificacoes = [
-        "QA1",
-        "QA2",
-        "BSP1",
-        "BSP2",
-        "TA",
-        "VRP1",
-        "VRP2",
-        "CTO",
-        "SID",
-        "MONO",
-        "NFP",
-        "BSKIT",
-        "BSOC",
-    ]
-    for i in dados_voo.get("flight_pilots", []):
+    for row, i in enumerate(dados_voo.get("flight_pilots", [])):
+        row_y = 356 - row * 14
         c.setFont("Helvetica", 8)
-        c.drawString(130, 356 - (dados_voo["flight_pilots"].index(i) * 14), f"{i.get('nip', '')}")
-        c.drawString(180, 356 - (dados_voo["flight_pilots"].index(i) * 14), f"{i.get('rank', '')}")
-        c.drawString(270, 356 - (dados_voo["flight_pilots"].index(i) * 14), f"{i.get('name', '')}")
-        c.drawString(410, 356 - (dados_voo["flight_pilots"].index(i) * 14), f"{i.get('position', '')}")
-        c.drawString(630, 356 - (dados_voo["flight_pilots"].index(i) * 14), f"{i.get('ATR', '')}")
-        c.drawString(665, 356 - (dados_voo["flight_pilots"].index(i) * 14), f"{i.get('ATN', '')}")
-        c.drawString(520, 356 - (dados_voo["flight_pilots"].index(i) * 14), f"{i.get('precapp', '')}")
-        c.drawString(560, 356 - (dados_voo["flight_pilots"].index(i) * 14), f"{i.get('nprecapp', '')}")
+        c.drawString(130, row_y, f"{i.get('nip', '')}")
+        c.drawString(180, row_y, f"{i.get('rank', '')}")
+        c.drawString(270, row_y, f"{i.get('name', '')}")
+        c.drawString(410, row_y, f"{i.get('position', '')}")
+        c.drawString(630, row_y, f"{i.get('ATR', '')}")
+        c.drawString(665, row_y, f"{i.get('ATN', '')}")
+        c.drawString(520, row_y, f"{i.get('precapp', '')}")
+        c.drawString(560, row_y, f"{i.get('nprecapp', '')}")
 
         c.setFont("Helvetica", 7)
-        c.drawString(432, 356 - (dados_voo["flight_pilots"].index(i) * 14), f"{i.get('VIR', '')}")
-        c.drawString(456, 356 - (dados_voo["flight_pilots"].index(i) * 14), f"{i.get('VN', '')}")
-        c.drawString(480, 356 - (dados_voo["flight_pilots"].index(i) * 14), f"{i.get('CON', '')}")
+        c.drawString(432, row_y, f"{i.get('VIR', '')}")
+        c.drawString(456, row_y, f"{i.get('VN', '')}")
+        c.drawString(480, row_y, f"{i.get('CON', '')}")
 
         c.setFont("Helvetica", 5)
         index = 0
-        for f in qualificacoes:
+        for f in QUALIFICACOES:
             if i.get(f, False):
-                c.drawString(725 + index * 16, 356 - (dados_voo["flight_pilots"].index(i) * 14), f"{f}")
+                c.drawString(725 + index * 16, row_y, f"{f}")
                 index += 1
 
         # Qualification names (QUAL1..QUAL6) for display in PDF
@@ -134,9 +159,18 @@ def gerar_pdf_conteudo_em_memoria(dados_voo) -> io.BytesIO:
         qual_names_str = ", ".join(str(q).strip() for q in qual_names if q and str(q).strip())
         if qual_names_str:
             c.setFont("Helvetica", 5)
-            row_y = 356 - (dados_voo["flight_pilots"].index(i) * 14)
             c.drawString(130, row_y - 7, qual_names_str[:80] + ("..." if len(qual_names_str) > 80 else ""))
 
+
+def gerar_pdf_conteudo_em_memoria(dados_voo: dict[str, Any]) -> io.BytesIO:
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=landscape(A4))
+
+    # Adicionar logotipo
+    if os.path.isfile(LOGO_PATH):
+        _desenhar_logotipo(c, LOGO_PATH)
+    _desenhar_voo(c, dados_voo)
+
     # Finalizar página
     c.showPage()
     c.save()
@@ -144,7 +178,9 @@ def gerar_pdf_conteudo_em_memoria(dados_voo) -> io.BytesIO:
     return buffer
 
 
-def combinar_template_e_conteudo(template_pdf_path, conteudo_pdf_io, nome_arquivo_saida=None) -> io.BytesIO:
+def combinar_template_e_conteudo(
+    template_pdf_path: str, conteudo_pdf_io: io.BytesIO, nome_arquivo_saida: str | None = None
+) -> io.BytesIO:
     # Leitura do template
     template_reader = PdfReader(template_pdf_path)
     template_page = template_reader.pages[0]
@@ -172,6 +208,162 @@ def combinar_template_e_conteudo(template_pdf_path, conteudo_pdf_io, nome_arquiv
     return buffer
 
 
+class FlightPdfRenderer:
+    """Renders Mod1M flight PDFs, loading the template and the logo once.
+
+    gerar_pdf_conteudo_em_memoria + combinar_template_e_conteudo re-read the
+    template and the PNG logo for every flight, and merge_page re-parses the
+    whole template content stream to combine the pages. Here the logo is drawn
+    into the template once, and each flight's fields are drawn on a small
+    page that is placed over a copy of that base page as a form XObject, so the
+    template content is only copied, never parsed again.
+
+    Safe to share between threads; every process builds its own renderer (see
+    get_flight_pdf_renderer).
+    """
+
+    def __init__(self, template_pdf_path: str = TEMPLATE_PDF_PATH, logo_path: str | None = LOGO_PATH) -> None:
+        """Load the template's first page and bake the logo into it.
+
+        Args:
+            template_pdf_path: Mod1M template PDF
+            logo_path: Logo image, or None for no logo (missing files are skipped too)
+        """
+        template_page = PdfReader(template_pdf_path).pages[0]
+        if logo_path and os.path.isfile(logo_path):
+            buffer = io.BytesIO()
+            c = canvas.Canvas(buffer, pagesize=landscape(A4))
+            _desenhar_logotipo(c, logo_path)
+            c.showPage()
+            c.save()
+            template_page.merge_page(PdfReader(buffer).pages[0])
+            template_page.compress_content_streams()
+        # Serialize the base page once: copies of it then reuse the encoded
+        # content stream instead of re-serializing the merged operations.
+        writer = PdfWriter()
+        writer.add_page(template_page)
+        self._base = io.BytesIO()
+        writer.write(self._base)
+        self._base_page = PdfReader(self._base).pages[0]
+        # PdfReader loads objects lazily from self._base; copying the page reads it
+        self._base_lock = threading.Lock()
+
+    def _draw(self, dados_voo: dict[str, Any]) -> PageObject:
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=landscape(A4))
+        _desenhar_voo(c, dados_voo)
+        c.showPage()
+        c.save()
+        return PdfReader(buffer).pages[0]
+
+    def _add_flight_page(self, writer: PdfWriter, dados_voo: dict[str, Any]) -> None:
+        """Append a copy of the base page with the flight's data drawn over it."""
+        overlay = self._draw(dados_voo)
+        with self._base_lock:
+            page = writer.add_page(self._base_page)
+
+        form = _stream(cast(ContentStream, overlay.get_contents()).get_data())
+        form.update(
+            {
+                NameObject("/Type"): NameObject("/XObject"),
+                NameObject("/Subtype"): NameObject("/Form"),
+                NameObject("/BBox"): ArrayObject(overlay.mediabox),
+                NameObject("/Resources"): cast(DictionaryObject, overlay["/Resources"].get_object()).clone(writer),
+            }
+        )
+
+        # Resources and contents of the copy may be shared with other pages of
+        # the same writer: replace them instead of changing them in place.
+        resources = DictionaryObject(cast(DictionaryObject, page["/Resources"].get_object()))
+        xobjects = DictionaryObject(cast(DictionaryObject, resources.get("/XObject", DictionaryObject()).get_object()))
+        xobjects[OVERLAY_XOBJECT] = _add_object(writer, form)
+        resources[NameObject("/XObject")] = xobjects
+        page[NameObject("/Resources")] = resources
+
+        contents = page["/Contents"]
+        current = contents.get_object()
+        streams: list[PdfObject] = list(current) if isinstance(current, ArrayObject) else [contents]
+        page[NameObject("/Contents")] = ArrayObject(
+            [
+                _add_object(writer, _stream(b"q\n")),
+                *streams,
+                _add_object(writer, _stream(b"\nQ q " + OVERLAY_XOBJECT.encode() + b" Do Q\n")),
+            ]
+        )
+
+    @staticmethod
+    def _write(writer: PdfWriter) -> io.BytesIO:
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        buffer.seek(0)
+        return buffer
+
+    def render(self, dados_voo: dict[str, Any]) -> io.BytesIO:
+        """Render one flight (same layout as combinar_template_e_conteudo).
+
+        Args:
+            dados_voo: Flight JSON (Flight.to_json with qualification names)
+
+        Returns:
+            PDF in memory
+        """
+        writer = PdfWriter()
+        self._add_flight_page(writer, dados_voo)
+        return self._write(writer)
+
+    def render_many(self, voos: Iterable[dict[str, Any]]) -> list[io.BytesIO]:
+        """Render each flight into its own PDF."""
+        return [self.render(dados_voo) for dados_voo in voos]
+
+    def render_document(self, voos: Iterable[dict[str, Any]]) -> io.BytesIO:
+        """Render the flights as the pages of one PDF (the template is stored once)."""
+        writer = PdfWriter()
+        for dados_voo in voos:
+            self._add_flight_page(writer, dados_voo)
+        return self._write(writer)
+
+
+def _stream(data: bytes) -> DecodedStreamObject:
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    return stream
+
+
+def _add_object(writer: PdfWriter, obj: PdfObject) -> IndirectObject:
+    """Store a new object in the writer and return a reference to it.
+
+    PyPDF2 3.x (its last major version) has no public call for this, only
+    PdfWriter._add_object. This is the only place the renderer touches that
+    private API, and only on the 3.x line it is known to work with; a public
+    add_object is used instead when the installed library has one.
+    """
+    add = getattr(writer, "add_object", None)
+    if add is None:
+        if not PyPDF2.__version__.startswith("3."):
+            raise RuntimeError(f"Unsupported PyPDF2 version {PyPDF2.__version__}: the flight renderer needs 3.x")
+        add = writer._add_object
+    return cast(IndirectObject, add(obj))
+
+
+_renderer: FlightPdfRenderer | None = None
+_renderer_lock = threading.Lock()
+
+
+def get_flight_pdf_renderer() -> FlightPdfRenderer:
+    """Return this process's renderer for the default template and logo."""
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = FlightPdfRenderer()
+    return _renderer
+
+
+def render_flight_pdf(dados_voo: dict[str, Any]) -> bytes:
+    """Render one flight with this process's renderer (picklable entry point for process pools)."""
+    return get_flight_pdf_renderer().render(dados_voo).getvalue()
+
+
 if __name__ == "__main__":
     # === USO ===
     voo = {
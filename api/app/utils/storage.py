@@ -0,0 +1,370 @@
+"""Backup storage backends: Google Drive, local filesystem and S3-compatible object stores.
+
+Backups write two kinds of files: flight files (.1m and PDF), stored under a
+YEAR/Mon/DD folder taken from the file name ("1M 00A0001 07Apr2025 ..." goes
+to 2025/Apr/07), and plain files such as user_base.json, stored at the top of
+their area. Each area ("1m" or "pdf") is a root folder in Drive, a directory
+under the backup root on disk, or a key prefix in the bucket.
+
+Backends are called from the backup upload threads, so they are thread-safe:
+
+- DriveStorage uploads through app.utils.gdrive (folder cache, stored file IDs).
+- LocalStorage writes each file to a temporary file in the target directory
+  and renames it into place, so a backup interrupted halfway never leaves a
+  truncated file behind.
+- S3Storage PUTs objects (atomic by nature) with AWS Signature Version 4
+  requests, path-style, so it also works with MinIO and other S3-compatible
+  stores without an SDK.
+
+Every backend also lists the IDs of the files it holds (list_file_ids), which
+a rebackup uses to notice files deleted behind its back.
+
+The backend is chosen with BACKUP_STORAGE ("drive", the default, "local" or
+"s3"; see get_backup_storage), or per request.
+
+Flight backups are incremental for Drive only: the backup manifest records
+the Drive copy (content hashes and file IDs), so local and S3 backups always
+write every flight. Drive backups also only run with FLASK_ENV=production,
+the other backends in any environment.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import urllib.parse
+import urllib.request
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Protocol
+from xml.etree import ElementTree
+
+AREA_1M = "1m"
+AREA_PDF = "pdf"
+AREAS = (AREA_1M, AREA_PDF)
+
+MIMETYPE_1M = "application/octet-stream"
+MIMETYPE_PDF = "application/pdf"
+MIMETYPE_JSON = "application/json"
+
+STORAGE_DRIVE = "drive"
+STORAGE_LOCAL = "local"
+STORAGE_S3 = "s3"
+
+DEFAULT_LOCAL_DIR = "backups"
+S3_SERVICE = "s3"
+S3_XML_NAMESPACE = {"s3": "http://s3.amazonaws.com/doc/2006-03-01/"}
+
+
+def encode_1m(dados: dict[str, Any]) -> bytes:
+    """Encode flight data as the contents of a .1m file (base64 of the JSON)."""
+    return base64.b64encode(json.dumps(dados).encode("utf-8"))
+
+
+def day_path(nome_ficheiro: str) -> tuple[str, str, str]:
+    """Year, month and day folder names of a flight file ("1M <airtask> 07Apr2025 ..." -> 2025, Apr, 07)."""
+    data: str = nome_ficheiro.split()[2]
+    return data[-4:], data[2:5], data[:2]
+
+
+def _check_area(area: str) -> None:
+    if area not in AREAS:
+        raise ValueError(f"Unknown backup area: {area}")
+
+
+class BackupStorage(Protocol):
+    """Destination of backup files; raises on failure."""
+
+    name: str
+
+    def save_flight_file(
+        self, area: str, nome_ficheiro: str, dados: bytes, mimetype: str, file_id: str | None = None
+    ) -> str:
+        """Store a flight file in its YEAR/Mon/DD folder and return its ID in the backend.
+
+        file_id is the ID returned by a previous save, when known (only Drive uses it).
+        """
+        ...
+
+    def save_file(self, area: str, nome_ficheiro: str, dados: bytes, mimetype: str) -> str:
+        """Store a file at the top of an area and return its ID in the backend."""
+        ...
+
+    def list_file_ids(self) -> set[str]:
+        """Return the IDs (as returned by the saves) of every file the backend holds."""
+        ...
+
+
+def save_flight(storage: BackupStorage, nome_arquivo: str, dados_1m: dict[str, Any], dados_pdf: dict[str, Any]) -> None:
+    """Store a flight's .1m (qualifications by ID) and its PDF, rendered from dados_pdf, in a backup storage backend.
+
+    Existing files with the same names are replaced. Raises on failure.
+    """
+    from app.utils.pdf import render_flight_pdf
+
+    storage.save_flight_file(AREA_1M, nome_arquivo, encode_1m(dados_1m), MIMETYPE_1M)
+    storage.save_flight_file(AREA_PDF, nome_arquivo.replace(".1m", ".pdf"), render_flight_pdf(dados_pdf), MIMETYPE_PDF)
+
+
+class DriveStorage:
+    """Google Drive folders configured in app.utils.gdrive (ID_PASTA_VOO and ID_PASTA_PDF)."""
+
+    name = STORAGE_DRIVE
+
+    @staticmethod
+    def _pasta(area: str) -> str:
+        from app.utils.gdrive import ID_PASTA_PDF, ID_PASTA_VOO
+
+        _check_area(area)
+        return ID_PASTA_PDF if area == AREA_PDF else ID_PASTA_VOO
+
+    def save_flight_file(
+        self, area: str, nome_ficheiro: str, dados: bytes, mimetype: str, file_id: str | None = None
+    ) -> str:
+        from app.utils.gdrive import enviar_ficheiro
+
+        return enviar_ficheiro(dados, mimetype, nome_ficheiro, self._pasta(area), file_id)
+
+    def save_file(self, area: str, nome_ficheiro: str, dados: bytes, mimetype: str) -> str:
+        from app.utils.gdrive import enviar_bytes_para_pasta
+
+        return enviar_bytes_para_pasta(dados, nome_ficheiro, self._pasta(area), mimetype)
+
+    def list_file_ids(self) -> set[str]:
+        from app.utils.gdrive import list_app_file_ids
+
+        return list_app_file_ids()
+
+
+class LocalStorage:
+    """Directory tree on local disk: <root>/<area>/YEAR/Mon/DD/<file>."""
+
+    name = STORAGE_LOCAL
+
+    def __init__(self, root: str | os.PathLike[str]) -> None:
+        self.root = Path(root)
+
+    def save_flight_file(
+        self, area: str, nome_ficheiro: str, dados: bytes, mimetype: str, file_id: str | None = None
+    ) -> str:
+        _check_area(area)
+        return self._write(Path(area, *day_path(nome_ficheiro), nome_ficheiro), dados)
+
+    def save_file(self, area: str, nome_ficheiro: str, dados: bytes, mimetype: str) -> str:
+        _check_area(area)
+        return self._write(Path(area, nome_ficheiro), dados)
+
+    def list_file_ids(self) -> set[str]:
+        # Temporary files of writes in progress start with a dot
+        return {
+            path.relative_to(self.root).as_posix()
+            for area in AREAS
+            for path in (self.root / area).rglob("*")
+            if path.is_file() and not path.name.startswith(".")
+        }
+
+    def _write(self, relative: Path, dados: bytes) -> str:
+        """Write a file atomically (temporary file + rename) and return its path relative to the root."""
+        path = self.root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(dados)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return relative.as_posix()
+
+
+def sign_v4(
+    method: str,
+    path: str,
+    query: str,
+    headers: dict[str, str],
+    payload_sha256: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    now: datetime,
+    service: str = S3_SERVICE,
+) -> str:
+    """Authorization header of an AWS Signature Version 4 request.
+
+    Args:
+        method: HTTP method
+        path: URI-encoded request path
+        query: Canonical query string ("" for none)
+        headers: Headers to sign (must include host, x-amz-date and x-amz-content-sha256)
+        payload_sha256: Hex SHA-256 of the body
+        access_key: Access key ID
+        secret_key: Secret access key
+        region: Region (MinIO accepts us-east-1)
+        now: Request time (the x-amz-date header)
+        service: Service name
+
+    Returns:
+        Value of the Authorization header
+    """
+    signed = {name.lower(): " ".join(value.split()) for name, value in headers.items()}
+    signed_headers = ";".join(sorted(signed))
+    canonical_request = "\n".join(
+        [
+            method,
+            path,
+            query,
+            "".join(f"{name}:{signed[name]}\n" for name in sorted(signed)),
+            signed_headers,
+            payload_sha256,
+        ]
+    )
+    date = now.strftime("%Y%m%d")
+    scope = f"{date}/{region}/{service}/aws4_request"
+    string_to_sign = "\n".join(
+        [
+            "AWS4-HMAC-SHA256",
+            now.strftime("%Y%m%dT%H%M%SZ"),
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ]
+    )
+    key = f"AWS4{secret_key}".encode()
+    for part in (date, region, service, "aws4_request"):
+        key = hmac.new(key, part.encode("utf-8"), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, SignedHeaders={signed_headers}, Signature={signature}"
+
+
+class S3Storage:
+    """Bucket of an S3-compatible object store: <prefix>/<area>/YEAR/Mon/DD/<file>."""
+
+    name = STORAGE_S3
+    # Keys per ListObjectsV2 page (the S3 maximum)
+    list_page_size = 1000
+
+    def __init__(
+        self,
+        endpoint: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        prefix: str = "",
+        timeout: float = 60.0,
+    ) -> None:
+        """Configure the store.
+
+        Args:
+            endpoint: Base URL, e.g. https://s3.eu-west-1.amazonaws.com or http://minio:9000
+            bucket: Bucket name (addressed path-style)
+            access_key: Access key ID
+            secret_key: Secret access key
+            region: Signing region
+            prefix: Key prefix of every object
+            timeout: Seconds to wait for each request
+        """
+        self.endpoint = endpoint.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.prefix = prefix.strip("/")
+        self.timeout = timeout
+
+    def save_flight_file(
+        self, area: str, nome_ficheiro: str, dados: bytes, mimetype: str, file_id: str | None = None
+    ) -> str:
+        _check_area(area)
+        return self._put("/".join([area, *day_path(nome_ficheiro), nome_ficheiro]), dados, mimetype)
+
+    def save_file(self, area: str, nome_ficheiro: str, dados: bytes, mimetype: str) -> str:
+        _check_area(area)
+        return self._put(f"{area}/{nome_ficheiro}", dados, mimetype)
+
+    def list_file_ids(self) -> set[str]:
+        """Keys of every object under the prefix, with ListObjectsV2 (one request per page)."""
+        keys: set[str] = set()
+        params = {
+            "list-type": "2",
+            "max-keys": str(self.list_page_size),
+            "prefix": f"{self.prefix}/" if self.prefix else "",
+        }
+        while True:
+            result = ElementTree.fromstring(self._request("GET", f"/{self.bucket}", params))
+            keys.update(key.text or "" for key in result.iterfind("s3:Contents/s3:Key", S3_XML_NAMESPACE))
+            token = result.findtext("s3:NextContinuationToken", namespaces=S3_XML_NAMESPACE)
+            if result.findtext("s3:IsTruncated", namespaces=S3_XML_NAMESPACE) != "true" or not token:
+                return keys
+            params["continuation-token"] = token
+
+    def _put(self, key: str, dados: bytes, mimetype: str) -> str:
+        """PUT an object and return its key (raises urllib.error.HTTPError on failure)."""
+        if self.prefix:
+            key = f"{self.prefix}/{key}"
+        self._request("PUT", f"/{self.bucket}/{key}", {}, dados, {"content-type": mimetype})
+        return key
+
+    def _request(
+        self, method: str, path: str, params: dict[str, str], dados: bytes = b"", extra: dict[str, str] | None = None
+    ) -> bytes:
+        """Send a signed request and return the response body (raises urllib.error.HTTPError on failure)."""
+        path = urllib.parse.quote(path, safe="/-_.~")
+        query = "&".join(
+            f"{urllib.parse.quote(name, safe='-_.~')}={urllib.parse.quote(value, safe='-_.~')}"
+            for name, value in sorted(params.items())
+        )
+        now = datetime.now(UTC)
+        payload_sha256 = hashlib.sha256(dados).hexdigest()
+        headers = {
+            "host": urllib.parse.urlsplit(self.endpoint).netloc,
+            **(extra or {}),
+            "x-amz-content-sha256": payload_sha256,
+            "x-amz-date": now.strftime("%Y%m%dT%H%M%SZ"),
+        }
+        headers["authorization"] = sign_v4(
+            method, path, query, headers, payload_sha256, self.access_key, self.secret_key, self.region, now
+        )
+        url = self.endpoint + path + (f"?{query}" if query else "")
+        request = urllib.request.Request(url, data=dados if method == "PUT" else None, headers=headers, method=method)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body: bytes = response.read()
+        return body
+
+
+def get_backup_storage(name: str | None = None) -> BackupStorage:
+    """Build the backup storage backend with the given name (defaults to BACKUP_STORAGE).
+
+    local reads BACKUP_LOCAL_DIR (default "backups"); s3 reads
+    BACKUP_S3_ENDPOINT, BACKUP_S3_BUCKET, BACKUP_S3_ACCESS_KEY,
+    BACKUP_S3_SECRET_KEY and optionally BACKUP_S3_REGION and BACKUP_S3_PREFIX.
+
+    Args:
+        name: "drive", "local" or "s3"
+
+    Raises:
+        ValueError: If the backend is unknown or not configured
+    """
+    name = (name or os.environ.get("BACKUP_STORAGE", STORAGE_DRIVE)).lower()
+    if name == STORAGE_DRIVE:
+        return DriveStorage()
+    if name == STORAGE_LOCAL:
+        return LocalStorage(os.environ.get("BACKUP_LOCAL_DIR", DEFAULT_LOCAL_DIR))
+    if name == STORAGE_S3:
+        required = ("BACKUP_S3_ENDPOINT", "BACKUP_S3_BUCKET", "BACKUP_S3_ACCESS_KEY", "BACKUP_S3_SECRET_KEY")
+        missing = [var for var in required if not os.environ.get(var)]
+        if missing:
+            raise ValueError(f"S3 backup storage needs {', '.join(missing)}")
+        return S3Storage(
+            endpoint=os.environ["BACKUP_S3_ENDPOINT"],
+            bucket=os.environ["BACKUP_S3_BUCKET"],
+            access_key=os.environ["BACKUP_S3_ACCESS_KEY"],
+            secret_key=os.environ["BACKUP_S3_SECRET_KEY"],
+            region=os.environ.get("BACKUP_S3_REGION", "us-east-1"),
+            prefix=os.environ.get("BACKUP_S3_PREFIX", ""),
+        )
+    raise ValueError(f"Unknown backup storage '{name}' (expected drive, local or s3)")
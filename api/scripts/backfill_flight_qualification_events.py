@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Rebuild flight_qualification_events from flight_pilots.
+
+The flight write paths keep the table in sync; run this after loading flights
+or crew rows directly into the database (restores, manual SQL), or with
+--flight-id/--nip to resync a few flights or crew members.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy.orm import Session
+
+# Add the api/ directory to Python path to import local modules
+api_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(api_dir)
+
+# Load environment variables from api/.env
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=os.path.join(api_dir, ".env"))
+
+from app.features.flights.repository import FlightRepository
+from app.shared.rbac_models import Role  # noqa: F401 - Required for SQLAlchemy relationship resolution
+from config import engine
+
+
+def main():
+    """Main function to run the backfill."""
+    parser = argparse.ArgumentParser(description="Rebuild flight_qualification_events from flight_pilots")
+    parser.add_argument("--flight-id", type=int, action="append", help="Only this flight (repeatable)")
+    parser.add_argument("--nip", type=int, action="append", help="Only this crew member (repeatable)")
+    args = parser.parse_args()
+
+    scope = "all flights"
+    if args.flight_id or args.nip:
+        scope = ", ".join(
+            part
+            for part in (
+                f"flights {args.flight_id}" if args.flight_id else "",
+                f"NIPs {args.nip}" if args.nip else "",
+            )
+            if part
+        )
+    print(f"Rebuilding qualification events for {scope}...")
+
+    t0 = time.perf_counter()
+    with Session(engine) as session:
+        inserted = FlightRepository.replace_qualification_events(
+            session, flight_ids=args.flight_id, pilot_ids=args.nip
+        )
+        session.commit()
+    print(f"Inserted {inserted} events in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
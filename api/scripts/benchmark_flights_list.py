@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Benchmark the GET /api/flights page serializer.
+
+Seeds temporary flights (with crew and anomalies) inside a transaction that is
+always rolled back, then times building one page of JSON two ways:
+
+- ORM: load Flight objects (selectinload crew/tripulantes/anomalies) and call to_json()
+- Core rows: FlightService.get_all_flights_paginated (flights/serializers.py)
+
+Nothing is committed, so it is safe to point at a development database.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from sqlalchemy.orm import Session
+
+# Add the api/ directory to Python path to import local modules
+api_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(api_dir)
+
+# Load environment variables from api/.env
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=os.path.join(api_dir, ".env"))
+
+from app.features.flights.models import Flight, FlightAnomaly, FlightPilots
+from app.features.flights.repository import FlightRepository
+from app.features.flights.service import FlightService
+from app.features.qualifications.catalog import get_qualification_catalog
+from app.features.users.models import Tripulante
+from app.shared.enums import TipoTripulante
+from app.shared.rbac_models import Role  # noqa: F401 - Required for SQLAlchemy relationship resolution
+from config import engine
+
+BENCH_NIP_BASE = 9_900_000
+
+
+def seed(session: Session, n_flights: int, crew_per_flight: int) -> None:
+    """Insert n_flights flights with crew and two anomalies each."""
+    crew = [
+        Tripulante(
+            nip=BENCH_NIP_BASE + i,
+            name=f"Benchmark {i}",
+            rank="CAP",
+            position="PC",
+            tipo=TipoTripulante.PILOTO,
+            email=f"benchmark{i}@example.invalid",
+            password="x",
+        )
+        for i in range(crew_per_flight)
+    ]
+    session.add_all(crew)
+    session.flush()
+    qual_ids = [str(qid) for qid in get_qualification_catalog(session).names_by_id][:3]
+    start = date(2099, 1, 1)
+    for i in range(n_flights):
+        flight = Flight(
+            airtask=f"BM{i:05d}",
+            flight_type="SAR",
+            flight_action="OPER",
+            tailnumber=16701,
+            date=start + timedelta(days=i % 365),
+            origin="LPPT",
+            destination="LPFR",
+            departure_time="10:00",
+            arrival_time="11:30",
+            total_time="01:30",
+            atr=1,
+            passengers=0,
+            doe=0,
+            cargo=0,
+            number_of_crew=crew_per_flight,
+            orm=0,
+            fuel=0,
+        )
+        session.add(flight)
+        session.flush()
+        for t in crew:
+            session.add(
+                FlightPilots(
+                    flight_id=flight.fid,
+                    pilot_id=t.nip,
+                    position="PC",
+                    day_landings=1,
+                    qual1=qual_ids[0] if qual_ids else None,
+                    qual2=qual_ids[1] if len(qual_ids) > 1 else None,
+                )
+            )
+        session.add_all(
+            [
+                FlightAnomaly(flight_id=flight.fid, description="Avaria A"),
+                FlightAnomaly(flight_id=flight.fid, description="Avaria B"),
+            ]
+        )
+    session.flush()
+
+
+def time_it(fn, session: Session, repeat: int) -> list[float]:
+    """Run fn(session) repeat times with a cold identity map, returning elapsed seconds."""
+    timings = []
+    for _ in range(repeat):
+        session.expunge_all()
+        t0 = time.perf_counter()
+        fn(session)
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def main():
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the flight list serializer (nothing is committed)")
+    parser.add_argument("--per-page", type=int, default=500, help="Page size (default: 500)")
+    parser.add_argument("--crew", type=int, default=4, help="Crew members per flight (default: 4)")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per variant (default: 10)")
+    args = parser.parse_args()
+
+    service = FlightService()
+    per_page = args.per_page
+
+    def orm_page(session: Session) -> list[dict]:
+        names = get_qualification_catalog(session).names_by_id
+        flights, _ = FlightRepository.find_all_with_pilots_paginated(session, 1, per_page)
+        return [f.to_json(names) for f in flights]
+
+    def rows_page(session: Session) -> list[dict]:
+        return service.get_all_flights_paginated(session, 1, per_page)["data"]
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            with Session(bind=conn, join_transaction_mode="create_savepoint") as session:
+                print(f"Seeding {per_page} flights x {args.crew} crew...")
+                seed(session, per_page, args.crew)
+                orm_page(session)  # warm up (catalog, statement cache)
+                rows_page(session)
+
+                orm = time_it(orm_page, session, args.repeat)
+                rows = time_it(rows_page, session, args.repeat)
+        finally:
+            trans.rollback()
+
+    orm_med, rows_med = statistics.median(orm), statistics.median(rows)
+    print(f"ORM + to_json : median {orm_med * 1000:8.1f} ms  (best {min(orm) * 1000:.1f} ms)")
+    print(f"Core rows     : median {rows_med * 1000:8.1f} ms  (best {min(rows) * 1000:.1f} ms)")
+    print(f"Speedup       : {orm_med / rows_med:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark jsonify for a GET /api/flights page with each JSON provider.
+
+Seeds temporary flights (see benchmark_flights_list.seed) inside a transaction
+that is always rolled back, builds one page with FlightService and times
+turning it into a response with Flask's DefaultJSONProvider and with
+OrjsonProvider (app/core/json_provider.py).
+
+Nothing is committed, so it is safe to point at a development database.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from flask import Flask
+from sqlalchemy.orm import Session
+
+# Add the api/ directory to Python path to import local modules
+api_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(api_dir)
+
+# Load environment variables from api/.env
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=os.path.join(api_dir, ".env"))
+
+from benchmark_flights_list import seed
+
+from app.core.json_provider import setup_json_provider
+from app.features.flights.service import FlightService
+from config import engine
+
+
+def make_app(provider: str) -> Flask:
+    """Bare Flask app using the given JSON_PROVIDER."""
+    app = Flask(__name__)
+    app.config["JSON_PROVIDER"] = provider
+    setup_json_provider(app)
+    return app
+
+
+def time_jsonify(app: Flask, payload: dict, repeat: int) -> tuple[list[float], int]:
+    """Time app.json.response(payload) repeat times; return elapsed seconds and body size."""
+    timings = []
+    size = 0
+    with app.app_context():
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            response = app.json.response(payload)
+            timings.append(time.perf_counter() - t0)
+            size = len(response.get_data())
+    return timings, size
+
+
+def main():
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark jsonify per JSON provider (nothing is committed)")
+    parser.add_argument("--per-page", type=int, default=500, help="Flights in the page (default: 500)")
+    parser.add_argument("--crew", type=int, default=4, help="Crew members per flight (default: 4)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per provider (default: 20)")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            with Session(bind=conn, join_transaction_mode="create_savepoint") as session:
+                print(f"Seeding {args.per_page} flights x {args.crew} crew...")
+                seed(session, args.per_page, args.crew)
+                payload = FlightService().get_all_flights_paginated(session, 1, args.per_page)
+        finally:
+            trans.rollback()
+
+    results = {}
+    for provider in ("default", "orjson"):
+        app = make_app(provider)
+        time_jsonify(app, payload, 2)  # warm up
+        results[provider] = time_jsonify(app, payload, args.repeat)
+
+    for provider, (timings, size) in results.items():
+        print(
+            f"{provider:8}: median {statistics.median(timings) * 1000:8.2f} ms  "
+            f"(best {min(timings) * 1000:.2f} ms, {size / 1024:.0f} KiB)"
+        )
+    default_med = statistics.median(results["default"][0])
+    orjson_med = statistics.median(results["orjson"][0])
+    print(f"Speedup : {default_med / orjson_med:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
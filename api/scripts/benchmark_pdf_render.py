@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark rendering of the Mod1M flight PDFs (app/utils/pdf.py).
+
+Times, per flight, for the same synthetic flights:
+
+- Legacy: gerar_pdf_conteudo_em_memoria + combinar_template_e_conteudo, which
+  re-read the template and the logo and re-parse the template for every flight
+- Renderer: FlightPdfRenderer.render, one PDF per flight
+- Document: FlightPdfRenderer.render_document, all flights as pages of one PDF
+
+No database is needed.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add the api/ directory to Python path to import local modules
+api_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(api_dir)
+
+from app.utils.pdf import (
+    TEMPLATE_PDF_PATH,
+    FlightPdfRenderer,
+    combinar_template_e_conteudo,
+    gerar_pdf_conteudo_em_memoria,
+)
+
+
+def sample_flights(count: int, crew: int) -> list[dict]:
+    """Flights shaped like Flight.to_json with qualification names."""
+    return [
+        {
+            "airtask": f"00A{i:04d}",
+            "date": "2025-05-10",
+            "origin": "LPPT",
+            "destination": "LPFR",
+            "ATD": "10:00",
+            "ATA": "11:00",
+            "ATE": "01:00",
+            "flightType": "SAR",
+            "flightAction": "OPER",
+            "tailNumber": 16701,
+            "totalLandings": 1,
+            "passengers": 2,
+            "doe": 0,
+            "cargo": 0,
+            "numberOfCrew": crew,
+            "orm": 10,
+            "fuel": 4000,
+            "flight_pilots": [
+                {
+                    "name": f"Tripulante {j}",
+                    "nip": 100000 + j,
+                    "rank": "CAP",
+                    "position": "PC",
+                    "VIR": "01:00",
+                    "ATR": 1,
+                    "ATN": 0,
+                    "precapp": 1,
+                    "nprecapp": 0,
+                    "QUAL1": "QA1",
+                    "QUAL2": "BSP1",
+                }
+                for j in range(crew)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def per_flight_ms(render, flights: list[dict], repeat: int) -> list[float]:
+    """Run render(flights) repeat times; return the milliseconds per flight of each run."""
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        render(flights)
+        timings.append((time.perf_counter() - t0) * 1000 / len(flights))
+    return timings
+
+
+def main():
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark Mod1M flight PDF rendering")
+    parser.add_argument("--flights", type=int, default=50, help="Flights per run (default: 50)")
+    parser.add_argument("--crew", type=int, default=6, help="Crew members per flight (default: 6)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per strategy (default: 3)")
+    args = parser.parse_args()
+
+    flights = sample_flights(args.flights, args.crew)
+    t0 = time.perf_counter()
+    renderer = FlightPdfRenderer()
+    print(f"Renderer setup: {(time.perf_counter() - t0) * 1000:.1f} ms (once per process)")
+
+    strategies = {
+        "legacy": lambda voos: [
+            combinar_template_e_conteudo(TEMPLATE_PDF_PATH, gerar_pdf_conteudo_em_memoria(voo)) for voo in voos
+        ],
+        "renderer": renderer.render_many,
+        "document": renderer.render_document,
+    }
+    results = {}
+    for name, render in strategies.items():
+        render(flights[:1])  # warm up
+        results[name] = statistics.median(per_flight_ms(render, flights, args.repeat))
+        print(f"{name:9}: {results[name]:8.2f} ms per flight")
+    print(f"Speedup  : {results['legacy'] / results['renderer']:.1f}x (renderer vs legacy)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Benchmark POST /api/flights/reprocess-all-qualifications engines.
+
+Seeds temporary flights (see benchmark_flights_list.seed) inside a transaction
+that is always rolled back, then times:
+
+- Loop: the previous engine (reprocess_flight_by_flight), walking every flight
+  and crew member in Python
+- Set-based: FlightService.reprocess_all_qualifications (one grouped upsert)
+
+Both run against the seeded data plus whatever the database already holds.
+Nothing is committed, so it is safe to point at a development database.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Add the api/ directory to Python path to import local modules
+api_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(api_dir)
+
+# Load environment variables from api/.env
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=os.path.join(api_dir, ".env"))
+
+from benchmark_flights_list import seed
+
+from app.features.flights.repository import FlightRepository
+from app.features.flights.service import FlightService, coerce_qualification_id
+from app.features.qualifications.catalog import get_qualification_catalog, refresh_qualification_catalog
+from app.features.qualifications.models import Qualificacao
+from app.features.users.models import TripulanteQualificacao
+from app.shared.enums import GrupoQualificacoes, TipoTripulante
+from config import engine
+
+# Landing counters of a crew row and the payload_key of the qualification they validate
+LANDING_QUALS = {"ATR": "day_landings", "ATN": "night_landings", "precapp": "prec_app", "nprecapp": "nprec_app"}
+
+
+def seed_qualifications(session: Session) -> None:
+    """Add three id-tracked and two landing qualifications, so every seeded crew row validates something."""
+    session.add_all(
+        [
+            Qualificacao(
+                nome=f"BENCH{i}",
+                payload_key=payload_key,
+                grupo=GrupoQualificacoes.CURRENCY,
+                validade=180,
+                tipo_aplicavel=TipoTripulante.PILOTO,
+            )
+            for i, payload_key in enumerate([None, None, None, "ATR", "ATN"])
+        ]
+    )
+    session.flush()
+    # seed() takes qual1/qual2 from the catalog
+    refresh_qualification_catalog(session)
+
+
+def reprocess_flight_by_flight(session: Session) -> int:
+    """Previous reprocess engine: walk every flight by date and move each crew qualification date forward.
+
+    QUAL1-6 resolve by qualification id and, for pilots, landing counts by
+    payload_key, from one pre-loaded catalog and tripulante_qualificacoes cache;
+    commits every 50 flights.
+
+    Returns:
+        Number of rows created or moved forward
+    """
+    catalog = get_qualification_catalog(session)
+    flights = FlightRepository.find_all_ordered_by_date_asc(session)
+    pilot_ids = list({fp.pilot_id for flight in flights for fp in flight.flight_pilots if fp.tripulante})
+    pq_cache = {
+        (pq.tripulante_id, pq.qualificacao_id): pq
+        for pq in FlightRepository.find_tripulante_qualificacoes_by_pilot_ids(session, pilot_ids)
+    }
+    updates = 0
+    for processed, flight in enumerate(flights, start=1):
+        for flight_pilot in flight.flight_pilots:
+            pilot = flight_pilot.tripulante
+            if pilot is None:
+                continue
+            qual_ids = [coerce_qualification_id(getattr(flight_pilot, f"qual{n}")) for n in range(1, 7)]
+            quals = [catalog.by_id.get(int(qual_id)) for qual_id in qual_ids if qual_id is not None]
+            if pilot.tipo == TipoTripulante.PILOTO:
+                for payload_key, column in LANDING_QUALS.items():
+                    if (getattr(flight_pilot, column) or 0) > 0:
+                        quals.append(catalog.by_payload_key.get((payload_key, pilot.tipo)))
+            for qual in quals:
+                if qual is None:
+                    continue
+                pq = pq_cache.get((pilot.nip, qual.id))
+                if pq is None:
+                    pq = pq_cache[(pilot.nip, qual.id)] = TripulanteQualificacao(
+                        tripulante_id=pilot.nip, qualificacao_id=qual.id, data_ultima_validacao=flight.date
+                    )
+                    session.add(pq)
+                elif pq.data_ultima_validacao >= flight.date:
+                    continue
+                else:
+                    pq.data_ultima_validacao = flight.date
+                updates += 1
+        if processed % 50 == 0:
+            session.commit()
+    session.commit()
+    return updates
+
+
+def main():
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark qualification reprocessing (nothing is committed)")
+    parser.add_argument("--flights", type=int, default=5000, help="Flights to seed (default: 5000)")
+    parser.add_argument("--crew", type=int, default=4, help="Crew members per flight (default: 4)")
+    args = parser.parse_args()
+
+    service = FlightService()
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            with Session(bind=conn, join_transaction_mode="create_savepoint") as session:
+                print(f"Seeding {args.flights} flights x {args.crew} crew...")
+                seed_qualifications(session)
+                seed(session, args.flights, args.crew)
+                session.commit()  # releases the savepoint only; the outer transaction is rolled back
+                # Planner statistics as on a live database (freshly seeded tables look empty)
+                for table in ("flights_table", "flight_pilots", "tripulantes", "qualificacoes"):
+                    session.execute(text(f"ANALYZE {table}"))
+
+                t0 = time.perf_counter()
+                reprocess_flight_by_flight(session)
+                loop = time.perf_counter() - t0
+                session.expunge_all()
+
+                t0 = time.perf_counter()
+                service.reprocess_all_qualifications(session)
+                set_based = time.perf_counter() - t0
+        finally:
+            trans.rollback()
+
+    print(f"Loop      : {loop:8.2f} s")
+    print(f"Set-based : {set_based:8.2f} s")
+    print(f"Speedup   : {loop / set_based:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
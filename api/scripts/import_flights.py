@@ -36,9 +36,11 @@ from sqlalchemy import select, text
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session, sessionmaker
 
+from app.core import data_version
 from app.features.flights.models import Flight
+from app.features.flights.repository import FlightRepository
 from app.features.flights.service import FlightService
-from app.utils.gdrive import tarefa_enviar_para_drive  # type: ignore
+from app.utils.storage import BackupStorage, get_backup_storage, save_flight
 from config import engine
 
 # Old format boolean qualification fields (should not be present in new format)
@@ -117,6 +119,14 @@ def _log(worker_label: str, msg: str) -> None:
         print(f"[{worker_label}] " + msg)
 
 
+def _upload_flight(storage: BackupStorage, dados: dict, nome_arquivo_voo: str) -> None:
+    """Store a flight's .1m and PDF in the backup storage; errors are only logged."""
+    try:
+        save_flight(storage, nome_arquivo_voo, dados, dados)
+    except Exception as e:
+        _log("upload", f"❌ Error uploading {nome_arquivo_voo} to {storage.name} backup storage: {e}")
+
+
 def _sort_key_from_filename(filename: str) -> tuple[str, str]:
     """(date_str, time_str) from filename for sorting. e.g. '1M 50A0034 07Apr2025 13:09 16709.1m'."""
     parts = filename.split()
@@ -337,9 +347,9 @@ def process_one_file(
             if "nip" not in pilot:
                 _log(worker_label, f"⚠️  Skipping pilot/crew without NIP in flight {flight.airtask} on {flight.date}")
                 return 0, f"{filename}: Pilot/crew without NIP", None
-            result = flight_service._add_crew_and_pilots(session, existing_flight, pilot, edit=False, auto_commit=False)
-            if result is None:
-                continue
+        flight_service._add_crew(session, existing_flight, flight_data["flight_pilots"], edit=False)
+        # Deleting or editing other flights later rolls dates back from these events
+        FlightRepository.replace_qualification_events(session, flight_ids=[existing_flight.fid])
 
         _log(worker_label, f"Updated flight: {existing_flight.airtask} on {existing_flight.date}")
         upload_job = None
@@ -367,10 +377,8 @@ def process_one_file(
     session.add(flight)
     session.flush()
 
-    for pilot_data in flight_data["flight_pilots"]:
-        result = flight_service._add_crew_and_pilots(session, flight, pilot_data, edit=False, auto_commit=False)
-        if result is None:
-            continue
+    flight_service._add_crew(session, flight, flight_data["flight_pilots"], edit=False)
+    FlightRepository.replace_qualification_events(session, flight_ids=[flight.fid])
 
     _log(worker_label, f"Created new flight: {flight.airtask} on {flight.date}")
     upload_job = None
@@ -390,6 +398,7 @@ def process_chunk(
     session_factory: sessionmaker,
     upload_to_gdrive: bool,
     upload_executor: ThreadPoolExecutor | None,
+    storage: BackupStorage | None = None,
 ) -> tuple[int, list[str]]:
     """Process a chunk of files in a single worker. Uses its own DB session.
     Returns (flights_processed, errors).
@@ -440,12 +449,12 @@ def process_chunk(
                         file_success = True
 
                     # Schedule upload (even if DB was skipped) when we have a job
-                    if upload_job and upload_executor is not None:
+                    if upload_job and upload_executor is not None and storage is not None:
                         try:
-                            dados, nome_arquivo_voo, nome_pdf = upload_job
-                            upload_executor.submit(tarefa_enviar_para_drive, dados, dados, nome_arquivo_voo, nome_pdf)
+                            dados, nome_arquivo_voo, _ = upload_job
+                            upload_executor.submit(_upload_flight, storage, dados, nome_arquivo_voo)
                         except Exception as e:
-                            _log(worker_label, f"⚠️  Failed to schedule Google Drive upload for {filename}: {e}")
+                            _log(worker_label, f"⚠️  Failed to schedule backup upload for {filename}: {e}")
                     break
                 except Exception as e:
                     try:
@@ -509,7 +518,12 @@ first to convert them to the new format.
         "-gdrive",
         "--upload",
         action="store_true",
-        help="Also upload each imported/updated flight to Google Drive (.1m + PDF)",
+        help="Also upload each imported/updated flight to the backup storage (.1m + PDF)",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=["drive", "local", "s3"],
+        help="Backup storage backend for --upload (defaults to BACKUP_STORAGE, usually drive)",
     )
     parser.add_argument(
         "--skip-duplicates",
@@ -557,6 +571,7 @@ first to convert them to the new format.
     batch_size = 50
     skip_duplicates = args.skip_duplicates
     upload_to_gdrive = args.upload
+    storage = get_backup_storage(args.storage) if upload_to_gdrive else None
     upload_executor = ThreadPoolExecutor(max_workers=4) if upload_to_gdrive else None
     all_errors: list[str] = []
     total_processed = 0
@@ -573,6 +588,7 @@ first to convert them to the new format.
                     session_factory,
                     upload_to_gdrive,
                     upload_executor,
+                    storage,
                 ): i
                 for i, chunk in enumerate(chunks)
             }
@@ -602,6 +618,10 @@ first to convert them to the new format.
         print("\n❌ Import failed.")
         raise
     finally:
+        # Every file is committed on its own, so even a failed import may have
+        # written flights, crews and qualification dates: expire cached GETs
+        data_version.bump(data_version.FLIGHTS)
+        data_version.bump(data_version.TRIPULANTES)
         if upload_executor is not None:
             upload_executor.shutdown(wait=True)
 
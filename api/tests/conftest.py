@@ -40,6 +40,21 @@ def db_engine():
     engine.dispose()
 
 
+@pytest.fixture(autouse=True)
+def _isolated_data_versions(tmp_path, monkeypatch):
+    """Keep data version stamps, the qualification catalog and cached counts private to each test."""
+    from app.core import data_version
+    from app.core.count_cache import clear_count_cache
+    from app.features.qualifications.catalog import clear_qualification_catalog
+
+    monkeypatch.setattr(data_version, "DATA_VERSION_DIR", str(tmp_path / "data-versions"))
+    clear_qualification_catalog()
+    clear_count_cache()
+    yield
+    clear_qualification_catalog()
+    clear_count_cache()
+
+
 @pytest.fixture
 def session(db_engine):
     """Transaction-wrapped session per test — rolls back after each test."""
@@ -54,6 +69,19 @@ def session(db_engine):
         connection.close()
 
 
+@pytest.fixture
+def sqlite_session():
+    """Session on an in-memory SQLite database (the default dev database) with every table created."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    sess = Session(engine)
+    try:
+        yield sess
+    finally:
+        sess.close()
+        engine.dispose()
+
+
 @pytest.fixture(scope="session")
 def flask_app():
     """Minimal Flask app com JWT configurado — partilhado por todos os testes da sessão."""
@@ -125,3 +153,50 @@ def tripulante_factory(session):
         return t
 
     return _make
+
+
+@pytest.fixture
+def qualificacao_factory(session):
+    """Create test qualificacoes via direct model insertion."""
+    from app.features.qualifications.models import Qualificacao
+    from app.shared.enums import GrupoQualificacoes, TipoTripulante
+
+    def _make(**kwargs):
+        defaults = dict(
+            nome="QA1",
+            payload_key=None,
+            grupo=GrupoQualificacoes.CURRENCY,
+            validade=180,
+            tipo_aplicavel=TipoTripulante.PILOTO,
+        )
+        defaults.update(kwargs)
+        q = Qualificacao(**defaults)
+        session.add(q)
+        session.flush()
+        return q
+
+    return _make
+
+
+@pytest.fixture
+def query_counter(db_engine):
+    """Record the SQL statements sent to the database inside a ``with query_counter() as stmts:`` block."""
+    from contextlib import contextmanager
+
+    from sqlalchemy import event
+
+    @contextmanager
+    def _count():
+        statements: list[str] = []
+
+        def _before_execute(conn, cursor, statement, parameters, context, executemany):
+            if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")):
+                statements.append(statement)
+
+        event.listen(db_engine, "before_cursor_execute", _before_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db_engine, "before_cursor_execute", _before_execute)
+
+    return _count
@@ -0,0 +1,78 @@
+"""Testes do fornecedor JSON orjson (app/core/json_provider.py)."""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify
+
+from app.core.json_provider import OrjsonProvider, setup_json_provider
+from app.shared.enums import TipoTripulante
+
+
+@pytest.fixture
+def json_app():
+    app = Flask(__name__)
+    app.config["JSON_PROVIDER"] = "orjson"
+    setup_json_provider(app)
+    return app
+
+
+class TestSetupJsonProvider:
+    def test_instala_orjson_por_omissao(self, json_app):
+        assert isinstance(json_app.json, OrjsonProvider)
+
+    def test_default_mantem_fornecedor_do_flask(self):
+        app = Flask(__name__)
+        app.config["JSON_PROVIDER"] = "default"
+        setup_json_provider(app)
+        assert not isinstance(app.json, OrjsonProvider)
+
+    def test_valor_desconhecido_levanta_erro(self):
+        app = Flask(__name__)
+        app.config["JSON_PROVIDER"] = "ujson"
+        with pytest.raises(ValueError, match="JSON_PROVIDER"):
+            setup_json_provider(app)
+
+
+class TestOrjsonProvider:
+    def test_jsonify_igual_ao_fornecedor_do_flask_para_tipos_json(self, json_app):
+        payload = {"b": [1, 2.5, None, True], "a": {"nome": "João", "z": "x"}}
+        with json_app.app_context():
+            rapido = jsonify(payload)
+        padrao = Flask(__name__)
+        with padrao.app_context():
+            lento = jsonify(payload)
+        assert json.loads(rapido.get_data()) == json.loads(lento.get_data())
+        assert rapido.get_data().endswith(b"\n")
+        assert rapido.mimetype == "application/json"
+        assert list(json.loads(rapido.get_data())) == ["a", "b"]
+
+    def test_chaves_inteiras_passam_a_texto(self, json_app):
+        assert json.loads(json_app.json.dumps({2025: 10, 2024: 5})) == {"2024": 5, "2025": 10}
+
+    def test_datas_e_enums_nativos(self, json_app):
+        payload = {
+            "dia": date(2025, 1, 15),
+            "instante": datetime(2025, 1, 15, 10, 30),
+            "tipo": TipoTripulante.PILOTO,
+            "valor": Decimal("1.50"),
+        }
+        with json_app.app_context():
+            data = json.loads(jsonify(payload).get_data())
+        assert data == {
+            "dia": "2025-01-15",
+            "instante": "2025-01-15T10:30:00",
+            "tipo": TipoTripulante.PILOTO.value,
+            "valor": "1.50",
+        }
+
+    def test_inteiro_maior_que_64_bits_usa_codificador_padrao(self, json_app):
+        assert json.loads(json_app.json.dumps({"n": 2**70})) == {"n": 2**70}
+
+    def test_loads_aceita_bytes_e_str(self, json_app):
+        assert json_app.json.loads(b'{"a": 1}') == {"a": 1}
+        assert json_app.json.loads('{"a": 1}') == {"a": 1}
+        with pytest.raises(ValueError):
+            json_app.json.loads("{")
@@ -0,0 +1,225 @@
+"""Tests for incremental flight backups (content hashes and backup manifest)."""
+
+from contextlib import nullcontext
+from dataclasses import replace
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+
+import app.features.db_management.service as db_service_module
+from app.features.db_management.backup_manifest import (
+    BackupManifestRecorder,
+    payload_sha256,
+    pdf_inputs_sha256,
+    plan_backup,
+)
+from app.features.db_management.backup_pipeline import FlightBackupItem, RenderedFlight, UploadedFlight
+from app.features.db_management.repository import DatabaseManagementRepository
+from app.features.db_management.service import DatabaseManagementService
+from app.features.flights.models import FlightBackupManifest
+from app.utils.storage import DriveStorage
+
+T0 = datetime(2025, 3, 1, 12, 0, tzinfo=UTC)
+NOME = "1M 00A0001 07Apr2025 1000 16701.1m"
+
+
+def _item(dados_1m: dict | None = None, dados_pdf: dict | None = None, nome: str = NOME) -> FlightBackupItem:
+    dados_1m = dados_1m or {"airtask": "00A0001", "flight_pilots": []}
+    dados_pdf = dados_pdf or {"airtask": "00A0001", "flight_pilots": [], "qual": ["QA1"]}
+    return FlightBackupItem(
+        nome,
+        dados_1m,
+        dados_pdf,
+        flight_id=1,
+        sha256_1m=payload_sha256(dados_1m),
+        sha256_pdf=pdf_inputs_sha256(dados_pdf),
+    )
+
+
+def _entry(item: FlightBackupItem, **overrides) -> FlightBackupManifest:
+    values = {
+        "flight_id": item.flight_id,
+        "file_name": item.nome_arquivo,
+        "sha256_1m": item.sha256_1m,
+        "sha256_pdf": item.sha256_pdf,
+        "drive_file_id": "id-1m",
+        "pdf_drive_file_id": "id-pdf",
+        "uploaded_at": T0,
+        **overrides,
+    }
+    return FlightBackupManifest(**values)
+
+
+class TestHashes:
+    def test_hash_independente_da_ordem_das_chaves(self):
+        assert payload_sha256({"a": 1, "b": [1, 2]}) == payload_sha256({"b": [1, 2], "a": 1})
+        assert payload_sha256({"a": 1}) != payload_sha256({"a": 2})
+
+    def test_hash_do_pdf_inclui_versao_do_layout(self, monkeypatch):
+        import app.features.db_management.backup_manifest as manifest_module
+
+        antes = pdf_inputs_sha256({"a": 1})
+        monkeypatch.setattr(manifest_module, "PDF_LAYOUT_VERSION", 999)
+        assert pdf_inputs_sha256({"a": 1}) != antes
+
+
+class TestPlanBackup:
+    def test_voo_sem_manifesto_e_novo(self):
+        plan = plan_backup([_item()], {}, None)
+        assert [item.nome_arquivo for item in plan.items] == [NOME]
+        assert plan.items[0].upload_1m and plan.items[0].drive_file_id is None
+        assert plan.summary() == {"queued": 1, "skipped": 0, "changed": 0, "new": 1, "missing_remote": 0}
+
+    def test_voo_inalterado_e_ignorado(self):
+        item = _item()
+        plan = plan_backup([item], {1: _entry(item)}, {"id-1m", "id-pdf"})
+        assert plan.items == []
+        assert plan.summary()["skipped"] == 1
+
+    def test_so_o_1m_mudou_reutiliza_ids_e_nao_reenvia_pdf(self):
+        antigo = _item()
+        novo = _item(dados_1m={"airtask": "00A0001", "flight_pilots": [{"nip": 1}]})
+        plan = plan_backup([novo], {1: _entry(antigo)}, {"id-1m", "id-pdf"})
+        (item,) = plan.items
+        assert item.upload_1m
+        assert item.dados_pdf is None
+        assert item.drive_file_id == "id-1m"
+        assert plan.summary()["changed"] == 1
+
+    def test_so_o_pdf_mudou(self):
+        antigo = _item()
+        novo = _item(dados_pdf={"airtask": "00A0001", "flight_pilots": [], "qual": ["QA2"]})
+        (item,) = plan_backup([novo], {1: _entry(antigo)}, {"id-1m", "id-pdf"}).items
+        assert not item.upload_1m
+        assert item.dados_pdf == novo.dados_pdf
+        assert item.pdf_drive_file_id == "id-pdf"
+
+    def test_ficheiro_apagado_no_drive_e_reenviado_sem_id(self):
+        item = _item()
+        plan = plan_backup([item], {1: _entry(item)}, {"id-pdf"})
+        (planeado,) = plan.items
+        assert planeado.upload_1m and planeado.drive_file_id is None
+        assert planeado.dados_pdf is None
+        assert plan.summary()["missing_remote"] == 1
+
+    def test_sem_listagem_confia_no_manifesto(self):
+        item = _item()
+        assert plan_backup([item], {1: _entry(item)}, None).items == []
+
+    def test_nome_de_ficheiro_diferente_e_um_ficheiro_novo(self):
+        antigo = _item()
+        novo = _item(nome="1M 00A0001 08Apr2025 1000 16701.1m")
+        (item,) = plan_backup([novo], {1: _entry(antigo)}, {"id-1m", "id-pdf"}).items
+        assert item.drive_file_id is None and item.pdf_drive_file_id is None
+
+    def test_force_envia_tudo_com_os_ids_guardados(self):
+        item = _item()
+        (planeado,) = plan_backup([item], {1: _entry(item)}, {"id-1m", "id-pdf"}, force=True).items
+        assert planeado.upload_1m and planeado.dados_pdf is not None
+        assert (planeado.drive_file_id, planeado.pdf_drive_file_id) == ("id-1m", "id-pdf")
+
+
+class TestBackupManifestRecorder:
+    def test_regista_e_atualiza_entradas(self, session, flight_factory):
+        flight = flight_factory()
+        item = FlightBackupItem(
+            flight.get_file_name(), {}, {"x": 1}, flight_id=flight.fid, sha256_1m="a" * 64, sha256_pdf="b" * 64
+        )
+        recorder = BackupManifestRecorder(lambda: nullcontext(session), flush_every=1, clock=lambda: T0)
+
+        recorder.record(RenderedFlight(item, b"%PDF"), UploadedFlight("id-1m", "id-pdf"))
+        entry = DatabaseManagementRepository.get_backup_manifest(session, [flight.fid])[flight.fid]
+        assert (entry.sha256_pdf, entry.drive_file_id, entry.pdf_drive_file_id) == ("b" * 64, "id-1m", "id-pdf")
+
+        # Render falhou: fica sem hash do PDF para a próxima cópia o reenviar
+        recorder.record(RenderedFlight(item, None), UploadedFlight("id-1m", "id-pdf"))
+        session.expire_all()
+        entry = DatabaseManagementRepository.get_backup_manifest(session, [flight.fid])[flight.fid]
+        assert entry.sha256_pdf is None
+
+    def test_agrupa_escritas_ate_ao_flush(self, session, flight_factory):
+        flights = [flight_factory(), flight_factory(departure_time="12:00")]
+        recorder = BackupManifestRecorder(lambda: nullcontext(session), flush_every=10, clock=lambda: T0)
+        for flight in flights:
+            item = FlightBackupItem(flight.get_file_name(), {}, None, flight_id=flight.fid, sha256_1m="a" * 64)
+            recorder.record(RenderedFlight(item), UploadedFlight("id", None))
+
+        ids = [flight.fid for flight in flights]
+        assert DatabaseManagementRepository.get_backup_manifest(session, ids) == {}
+        recorder.flush()
+        assert set(DatabaseManagementRepository.get_backup_manifest(session, ids)) == set(ids)
+
+
+class TestRebackupIncremental:
+    @pytest.fixture
+    def started(self, monkeypatch):
+        started = []
+        monkeypatch.setattr(db_service_module, "IS_PRODUCTION", True)
+        monkeypatch.setattr(DriveStorage, "list_file_ids", lambda self: {"id-1m", "id-pdf"})
+        monkeypatch.setattr(
+            DatabaseManagementService,
+            "_start_flight_backup",
+            staticmethod(
+                lambda items, description, storage: (
+                    started.append(items) or SimpleNamespace(render_workers=1, upload_workers=1)
+                )
+            ),
+        )
+        return started
+
+    def test_segunda_copia_ignora_voos_inalterados(self, session, flight_factory, started):
+        flight = flight_factory()
+        service = DatabaseManagementService()
+
+        first = service.rebackup_flights(session)
+        assert (first["queued"], first["new"]) == (1, 1)
+        (item,) = started.pop()
+        DatabaseManagementRepository.upsert_backup_manifest(
+            session,
+            [
+                {
+                    "flight_id": flight.fid,
+                    "file_name": item.nome_arquivo,
+                    "sha256_1m": item.sha256_1m,
+                    "sha256_pdf": item.sha256_pdf,
+                    "drive_file_id": "id-1m",
+                    "pdf_drive_file_id": "id-pdf",
+                    "uploaded_at": T0,
+                }
+            ],
+        )
+
+        second = service.rebackup_flights(session)
+        assert (second["queued"], second["skipped"]) == (0, 1)
+        assert started == []
+
+        forced = service.rebackup_flights(session, force=True)
+        assert forced["queued"] == 1
+
+    def test_item_sem_voo_e_planeado_como_novo(self, session):
+        item = replace(_item(), flight_id=None)
+        plan = DatabaseManagementService()._plan_flight_backup(session, [item], False, DriveStorage())
+        assert plan.summary()["new"] == 1
+
+    def test_armazenamento_local_faz_copia_completa(self, session, flight_factory, started):
+        flight = flight_factory()
+        DatabaseManagementRepository.upsert_backup_manifest(
+            session,
+            [{"flight_id": flight.fid, "file_name": flight.get_file_name(), "sha256_1m": "x", "uploaded_at": T0}],
+        )
+
+        result = DatabaseManagementService().rebackup_flights(session, storage="local")
+
+        assert (result["storage"], result["queued"], result["skipped"]) == ("local", 1, 0)
+
+    def test_armazenamento_local_funciona_fora_de_producao(self, session, flight_factory, started, monkeypatch):
+        flight_factory()
+        monkeypatch.setattr(db_service_module, "IS_PRODUCTION", False)
+        service = DatabaseManagementService()
+
+        assert service.rebackup_flights(session)["queued"] == 0
+        assert "disabled" in service.rebackup_flights(session)["message"]
+        result = service.rebackup_flights_by_year(session, 2025, storage="local")
+        assert (result["storage"], result["queued"]) == ("local", 1)
+        assert len(started) == 1
@@ -0,0 +1,107 @@
+"""Tests for the render/upload flight backup pipeline."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.features.db_management.backup_pipeline import FlightBackupItem, FlightBackupPipeline
+from app.features.db_management.service import DatabaseManagementService
+
+
+def _item(n: int, pdf: bool = True) -> FlightBackupItem:
+    dados = {"airtask": f"00A{n:04d}", "flight_pilots": []}
+    return FlightBackupItem(f"1M 00A{n:04d} 07Apr2025 1000 16701.1m", dados, dados if pdf else None)
+
+
+def _fake_render(dados: dict) -> bytes:
+    if dados["airtask"] == "00A0666":
+        raise RuntimeError("render failed")
+    return dados["airtask"].encode()
+
+
+def _threads(workers: int) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+class TestFlightBackupPipeline:
+    def test_envia_todos_os_voos_e_conta_por_etapa(self):
+        uploads = []
+        lock = threading.Lock()
+
+        def upload(rendered):
+            with lock:
+                uploads.append((rendered.item.nome_arquivo, rendered.pdf))
+
+        items = [_item(n) for n in range(20)] + [_item(100, pdf=False)]
+        pipeline = FlightBackupPipeline(
+            upload, _fake_render, render_workers=2, upload_workers=3, executor_factory=_threads
+        )
+        stats = pipeline.run(items)
+
+        assert sorted(uploads) == sorted(
+            (item.nome_arquivo, item.dados_pdf["airtask"].encode() if item.dados_pdf else None) for item in items
+        )
+        assert stats["total"] == 21
+        assert stats["running"] is False
+        assert (stats["render"]["processed"], stats["render"]["failed"]) == (20, 0)
+        assert (stats["upload"]["processed"], stats["upload"]["failed"]) == (21, 0)
+        assert stats["upload"]["per_second"] > 0
+
+    def test_falha_de_render_ainda_envia_o_1m(self):
+        uploads = []
+        pipeline = FlightBackupPipeline(
+            lambda rendered: uploads.append(rendered), _fake_render, render_workers=1, executor_factory=_threads
+        )
+        stats = pipeline.run([_item(666), _item(1)])
+
+        assert stats["render"]["failed"] == 1
+        assert {r.item.dados_1m["airtask"]: r.pdf for r in uploads} == {"00A0666": None, "00A0001": b"00A0001"}
+
+    def test_falha_de_upload_e_contada_sem_parar_o_pipeline(self):
+        def upload(rendered):
+            if rendered.pdf == b"00A0003":
+                raise ConnectionError("drive unavailable")
+
+        pipeline = FlightBackupPipeline(upload, _fake_render, render_workers=1, executor_factory=_threads)
+        stats = pipeline.run([_item(n) for n in range(5)])
+        assert (stats["upload"]["processed"], stats["upload"]["failed"]) == (5, 1)
+
+    def test_backpressure_limita_renders_enquanto_uploads_estao_parados(self):
+        liberar = threading.Event()
+        pipeline = FlightBackupPipeline(
+            lambda rendered: liberar.wait(5),
+            _fake_render,
+            render_workers=1,
+            upload_workers=1,
+            queue_size=2,
+            executor_factory=_threads,
+        )
+        runner = threading.Thread(target=pipeline.run, args=([_item(n) for n in range(50)],))
+        runner.start()
+        try:
+            # Deixa o pipeline encher: 1 upload em curso + 2 na fila + 1 à espera de lugar + 2 renders em curso
+            time.sleep(0.5)
+            assert pipeline.render_counters.processed <= 1 + 2 + 1 + 2
+            assert pipeline.stats()["running"] is True
+            assert pipeline.max_queue_depth <= 2
+        finally:
+            liberar.set()
+            runner.join(10)
+        assert pipeline.upload_counters.processed == 50
+
+    def test_renderiza_pdfs_reais_num_process_pool(self):
+        uploads = []
+        pipeline = FlightBackupPipeline(lambda rendered: uploads.append(rendered), render_workers=2)
+        pipeline.run([_item(n) for n in range(3)])
+
+        assert len(uploads) == 3
+        for rendered in uploads:
+            assert rendered.pdf.startswith(b"%PDF")
+
+
+class TestFlightBackupItems:
+    def test_serializa_1m_por_id_e_pdf_por_nome(self, session, flight_factory):
+        flight = flight_factory()
+        (item,) = DatabaseManagementService._flight_backup_items(session, [flight])
+        assert item.nome_arquivo == flight.get_file_name()
+        assert item.dados_1m["airtask"] == item.dados_pdf["airtask"] == flight.airtask
@@ -0,0 +1,64 @@
+"""Tests for importing qualifications from a JSON backup."""
+
+from datetime import date
+
+from sqlalchemy import select
+
+from app.features.db_management.service import DatabaseManagementService
+from app.features.flights.models import FlightQualificationEvent
+from app.features.flights.service import FlightService
+from app.features.qualifications.models import Qualificacao
+
+VOO = {
+    "date": "2025-01-15",
+    "airtask": "00A0001",
+    "ATD": "10:00",
+    "tailNumber": 16701,
+    "flight_pilots": [{"nip": 99901, "position": "PC", "ATR": 2}],
+}
+
+
+def _qualificacao(**extra) -> dict:
+    return {"nome": "ATR", "grupo": "CURRENCY", "validade": 30, "tipo_aplicavel": "PILOTO", **extra}
+
+
+def _eventos(session) -> list[tuple[int, int, date]]:
+    return session.execute(
+        select(
+            FlightQualificationEvent.pilot_id, FlightQualificationEvent.qualificacao_id, FlightQualificationEvent.date
+        )
+    ).all()
+
+
+class TestImportQualifications:
+    def test_exporta_e_importa_payload_key(self, session, qualificacao_factory):
+        qualificacao_factory(nome="ATR", payload_key="ATR")
+        service = DatabaseManagementService()
+        exportadas = service.export_qualifications(session)
+        assert exportadas[0]["payload_key"] == "ATR"
+
+        result = service.import_qualifications([{**exportadas[0], "id": None, "nome": "ATR2"}], session)
+
+        assert result["created"] == 1
+        nova = session.execute(select(Qualificacao).where(Qualificacao.nome == "ATR2")).scalar_one()
+        assert nova.payload_key == "ATR"
+
+    def test_qualificacao_de_aterragem_importada_gera_eventos(self, session, tripulante_factory):
+        tripulante_factory()
+        FlightService().create_flight(VOO, session)
+        assert _eventos(session) == []
+
+        DatabaseManagementService().import_qualifications([_qualificacao(payload_key="ATR")], session)
+
+        qual_id = session.execute(select(Qualificacao.id).where(Qualificacao.nome == "ATR")).scalar_one()
+        assert _eventos(session) == [(99901, qual_id, date(2025, 1, 15))]
+
+    def test_perder_a_chave_de_aterragem_remove_eventos(self, session, tripulante_factory, qualificacao_factory):
+        tripulante_factory()
+        atr = qualificacao_factory(nome="ATR", payload_key="ATR")
+        FlightService().create_flight(VOO, session)
+        assert len(_eventos(session)) == 1
+
+        DatabaseManagementService().import_qualifications([_qualificacao(id=atr.id, payload_key=None)], session)
+
+        assert _eventos(session) == []
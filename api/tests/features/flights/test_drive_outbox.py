@@ -0,0 +1,195 @@
+"""Tests for the Drive upload outbox of flights."""
+
+from contextlib import nullcontext
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+import app.features.flights.service as flights_service_module
+from app.features.flights.drive_outbox import DriveOutboxRepository, DriveOutboxWorker, StorageDriveClient
+from app.features.flights.models import DriveOutboxJob
+from app.features.flights.service import FlightService
+from app.utils.storage import LocalStorage
+
+from .test_flights_service import FLIGHT_DATA_BASE, UPDATE_DATA_BASE
+
+T0 = datetime(2025, 3, 1, 12, 0, tzinfo=UTC)
+
+
+class FakeDriveClient:
+    """Records uploads; fails while ``failures`` is positive."""
+
+    def __init__(self, failures: int = 0, on_upload=None):
+        self.failures = failures
+        self.on_upload = on_upload
+        self.uploads: list[tuple[str, dict, dict]] = []
+
+    def upload_flight(self, nome_arquivo, dados_1m, dados_pdf):
+        if self.on_upload:
+            self.on_upload()
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("drive unavailable")
+        self.uploads.append((nome_arquivo, dados_1m, dados_pdf))
+
+
+class Clock:
+    def __init__(self, now: datetime = T0):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def _worker(session, client, clock, **kwargs) -> DriveOutboxWorker:
+    return DriveOutboxWorker(lambda: nullcontext(session), client, workers=1, clock=clock, **kwargs)
+
+
+def _jobs(session) -> list[DriveOutboxJob]:
+    session.expire_all()
+    return session.execute(select(DriveOutboxJob)).scalars().all()
+
+
+class TestDriveOutboxRepository:
+    def test_enfileirar_duas_vezes_coalesce_numa_linha(self, session, flight_factory):
+        flight = flight_factory()
+        DriveOutboxRepository.enqueue(session, [flight.fid], T0)
+        DriveOutboxRepository.enqueue(session, [flight.fid, flight.fid], T0 + timedelta(seconds=1))
+        (job,) = _jobs(session)
+        assert job.flight_id == flight.fid
+        assert job.version == 2
+        assert job.next_attempt_at == T0 + timedelta(seconds=1)
+
+    def test_claim_ignora_jobs_com_lease_ativo(self, session, flight_factory):
+        flight = flight_factory()
+        DriveOutboxRepository.enqueue(session, [flight.fid], T0)
+        lease = timedelta(minutes=5)
+        assert len(DriveOutboxRepository.claim(session, T0, 10, lease)) == 1
+        assert DriveOutboxRepository.claim(session, T0 + timedelta(minutes=1), 10, lease) == []
+        # Lease expirado (worker morreu) → volta a ser reclamado
+        assert len(DriveOutboxRepository.claim(session, T0 + timedelta(minutes=6), 10, lease)) == 1
+
+
+class TestDriveOutboxWorker:
+    def test_drain_envia_uma_vez_e_apaga_o_job(self, session, flight_factory):
+        flight = flight_factory()
+        DriveOutboxRepository.enqueue(session, [flight.fid], T0)
+        DriveOutboxRepository.enqueue(session, [flight.fid], T0)
+        client = FakeDriveClient()
+
+        assert _worker(session, client, Clock()).drain_once() == 1
+
+        assert [upload[0] for upload in client.uploads] == [flight.get_file_name()]
+        assert client.uploads[0][1]["airtask"] == flight.airtask
+        assert _jobs(session) == []
+
+    def test_cliente_de_armazenamento_guarda_no_backend_configurado(self, session, flight_factory, tmp_path):
+        flight = flight_factory()
+        DriveOutboxRepository.enqueue(session, [flight.fid], T0)
+        client = StorageDriveClient(LocalStorage(tmp_path / "backups"))
+
+        _worker(session, client, Clock()).drain_once()
+
+        guardados = sorted(p.name for p in (tmp_path / "backups").rglob("*") if p.is_file())
+        assert guardados == sorted([flight.get_file_name(), flight.get_file_name().replace(".1m", ".pdf")])
+        assert _jobs(session) == []
+
+    def test_falha_agenda_retry_com_backoff_exponencial(self, session, flight_factory):
+        flight = flight_factory()
+        DriveOutboxRepository.enqueue(session, [flight.fid], T0)
+        clock = Clock()
+        client = FakeDriveClient(failures=2)
+        worker = _worker(session, client, clock, base_delay=timedelta(seconds=30))
+
+        worker.drain_once()
+        (job,) = _jobs(session)
+        assert (job.attempts, job.next_attempt_at) == (1, T0 + timedelta(seconds=30))
+        assert job.last_error == "drive unavailable"
+        assert job.locked_until is None
+        # Ainda não está na hora
+        assert worker.drain_once() == 0
+
+        clock.now = T0 + timedelta(seconds=30)
+        worker.drain_once()
+        (job,) = _jobs(session)
+        assert (job.attempts, job.next_attempt_at) == (2, clock.now + timedelta(seconds=60))
+
+        clock.now += timedelta(seconds=60)
+        worker.drain_once()
+        assert len(client.uploads) == 1
+        assert _jobs(session) == []
+
+    def test_atraso_limitado_por_max_delay(self):
+        worker = DriveOutboxWorker(
+            nullcontext, FakeDriveClient(), base_delay=timedelta(seconds=30), max_delay=timedelta(minutes=10)
+        )
+        assert worker.retry_delay(0) == timedelta(seconds=30)
+        assert worker.retry_delay(3) == timedelta(seconds=240)
+        assert worker.retry_delay(10) == timedelta(minutes=10)
+
+    def test_job_estacionado_apos_max_tentativas(self, session, flight_factory):
+        flight = flight_factory()
+        DriveOutboxRepository.enqueue(session, [flight.fid], T0)
+        clock = Clock()
+        worker = _worker(session, FakeDriveClient(failures=5), clock, max_attempts=2)
+
+        worker.drain_once()
+        clock.now += timedelta(hours=2)
+        worker.drain_once()
+        (job,) = _jobs(session)
+        assert job.attempts == 2
+        assert job.next_attempt_at is None
+
+        clock.now += timedelta(days=1)
+        assert worker.drain_once() == 0
+        # Nova edição do voo volta a pôr o job na fila
+        DriveOutboxRepository.enqueue(session, [flight.fid], clock.now)
+        (job,) = _jobs(session)
+        assert (job.attempts, job.next_attempt_at, job.last_error) == (0, clock.now, None)
+
+    def test_edicao_durante_upload_mantem_o_job(self, session, flight_factory):
+        flight = flight_factory()
+        DriveOutboxRepository.enqueue(session, [flight.fid], T0)
+        client = FakeDriveClient(on_upload=lambda: DriveOutboxRepository.enqueue(session, [flight.fid], T0))
+        worker = _worker(session, client, Clock())
+
+        worker.drain_once()
+        (job,) = _jobs(session)
+        assert job.version == 2
+        assert job.locked_until is None
+
+        client.on_upload = None
+        worker.drain_once()
+        assert len(client.uploads) == 2
+        assert _jobs(session) == []
+
+    def test_workers_invalidos(self):
+        with pytest.raises(ValueError):
+            DriveOutboxWorker(nullcontext, FakeDriveClient(), workers=0)
+
+
+class TestFlightServiceEnqueue:
+    @pytest.fixture
+    def production(self, monkeypatch):
+        monkeypatch.setattr(flights_service_module, "FLASK_ENV", "production")
+
+    def test_fora_de_producao_nao_enfileira(self, session):
+        FlightService().create_flight({**FLIGHT_DATA_BASE, "flight_pilots": []}, session)
+        assert _jobs(session) == []
+
+    def test_criar_e_editar_coalescem_num_job(self, session, production):
+        service = FlightService()
+        fid = service.create_flight({**FLIGHT_DATA_BASE, "flight_pilots": []}, session)["message"]
+        service.update_flight(fid, {**UPDATE_DATA_BASE}, session)
+        service.update_flight(fid, {**UPDATE_DATA_BASE, "destination": "LPFR"}, session)
+
+        (job,) = _jobs(session)
+        assert (job.flight_id, job.version) == (fid, 3)
+
+    def test_lote_enfileira_cada_voo(self, session, production):
+        results = FlightService().create_flights_batch(
+            [{**FLIGHT_DATA_BASE, "flight_pilots": []}, {**FLIGHT_DATA_BASE, "ATD": "12:00", "flight_pilots": []}],
+            session,
+        )
+        assert {job.flight_id for job in _jobs(session)} == {r["id"] for r in results}
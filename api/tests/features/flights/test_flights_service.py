@@ -3,15 +3,20 @@
 from datetime import date
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import func, select
 
-from app.features.flights.models import Flight, FlightAnomaly, FlightPilots
+from app.features.flights.models import Flight, FlightAnomaly, FlightPilots, FlightQualificationEvent
+from app.features.flights.repository import FlightRepository
 from app.features.flights.service import (
+    BATCH_RETRY_MESSAGE,
+    DUPLICATE_FLIGHT_MESSAGE,
+    DUPLICATE_FLIGHT_UPDATE_MESSAGE,
     FlightService,
     _normalize_time,
     coerce_qualification_id,
     safe_int_or_none,
 )
+from app.shared.models import year_init
 
 # ---------------------------------------------------------------------------
 # Dados de teste reutilizáveis
@@ -59,6 +64,47 @@ UPDATE_DATA_BASE = {
 }
 
 
+def _reprocessar_voo_a_voo(session) -> None:
+    """Motor anterior do reprocessamento, referência para a paridade com o set-based.
+
+    Percorre os voos por data e, para cada tripulante, avança a data de cada
+    qualificação validada (QUAL1-6 por id; aterragens de pilotos por payload_key).
+    """
+    from app.features.qualifications.catalog import get_qualification_catalog
+    from app.features.users.models import TripulanteQualificacao
+    from app.shared.enums import TipoTripulante
+
+    catalog = get_qualification_catalog(session)
+    datas = {(pq.tripulante_id, pq.qualificacao_id): pq for pq in session.scalars(select(TripulanteQualificacao))}
+    for voo in FlightRepository.find_all_ordered_by_date_asc(session):
+        for flight_pilot in voo.flight_pilots:
+            piloto = flight_pilot.tripulante
+            if piloto is None:
+                continue
+            ids = [coerce_qualification_id(getattr(flight_pilot, f"qual{n}")) for n in range(1, 7)]
+            quals = [catalog.by_id.get(int(qual_id)) for qual_id in ids if qual_id is not None]
+            if piloto.tipo == TipoTripulante.PILOTO:
+                aterragens = {
+                    "ATR": flight_pilot.day_landings,
+                    "ATN": flight_pilot.night_landings,
+                    "precapp": flight_pilot.prec_app,
+                    "nprecapp": flight_pilot.nprec_app,
+                }
+                quals += [catalog.by_payload_key.get((k, piloto.tipo)) for k, n in aterragens.items() if n and n > 0]
+            for qual in quals:
+                if qual is None:
+                    continue
+                pq = datas.get((piloto.nip, qual.id))
+                if pq is None:
+                    pq = datas[(piloto.nip, qual.id)] = TripulanteQualificacao(
+                        tripulante_id=piloto.nip, qualificacao_id=qual.id, data_ultima_validacao=voo.date
+                    )
+                    session.add(pq)
+                elif pq.data_ultima_validacao < voo.date:
+                    pq.data_ultima_validacao = voo.date
+    session.flush()
+
+
 # ---------------------------------------------------------------------------
 # Funções puras — sem DB
 # ---------------------------------------------------------------------------
@@ -223,6 +269,255 @@ class TestGetAllFlightsPaginated:
         assert result["pagination"]["total"] == 1
         assert result["data"][0]["airtask"] == "00A0002"
 
+    def test_filtro_de_texto_ignora_maiusculas(self, session, flight_factory):
+        flight_factory(airtask="00A1111", flight_action="OPER")
+        result = FlightService().get_all_flights_paginated(session, page=1, per_page=10, airtask="00a", action="oper")
+        assert result["pagination"]["total"] == 1
+
+    def test_filtro_de_texto_trata_curingas_literalmente(self, session, flight_factory):
+        flight_factory(airtask="00A1111", departure_time="10:00")
+        for kwargs in ({"airtask": "%"}, {"airtask": "00_1"}, {"atd": "1_:"}):
+            result = FlightService().get_all_flights_paginated(session, page=1, per_page=10, **kwargs)
+            assert result["pagination"]["total"] == 0, kwargs
+
+
+class TestFlightPageLoading:
+    def _seed(self, session, flight_factory, tripulante_factory, n_flights=3):
+        crew = [tripulante_factory(nip=99900 + i, name=f"Tripulante {i}") for i in range(3)]
+        flights = []
+        for i in range(n_flights):
+            flight = flight_factory(airtask=f"00A{i:04d}", tailnumber=16700 + i, date=date(2025, 1, 1 + i))
+            for t in crew:
+                session.add(FlightPilots(flight_id=flight.fid, pilot_id=t.nip, position="PC"))
+            session.add(FlightAnomaly(flight_id=flight.fid, description="Avaria A"))
+            session.add(FlightAnomaly(flight_id=flight.fid, description="Avaria B"))
+            flights.append(flight)
+        session.flush()
+        session.expire_all()
+        return flights
+
+    def test_limite_aplica_se_a_voos_e_nao_a_linhas_de_tripulacao(self, session, flight_factory, tripulante_factory):
+        self._seed(session, flight_factory, tripulante_factory)
+        result = FlightService().get_all_flights_paginated(session, page=1, per_page=2)
+        assert len(result["data"]) == 2
+        for voo in result["data"]:
+            assert len(voo["flight_pilots"]) == 3
+            assert sorted(voo["anomalies"]) == ["Avaria A", "Avaria B"]
+
+    def test_pagina_usa_consultas_por_conjunto(self, session, flight_factory, tripulante_factory, query_counter):
+        self._seed(session, flight_factory, tripulante_factory)
+        FlightService().get_all_flights_paginated(session, page=1, per_page=10)  # aquece catálogo e contagem
+        session.expire_all()
+        with query_counter() as stmts:
+            FlightService().get_all_flights_paginated(session, page=1, per_page=10)
+        # voos + tripulação (com tripulantes) + anomalias; o total vem da cache de contagens
+        assert len(stmts) == 3
+        assert not any("JOIN flight_pilots" in s or "LEFT OUTER JOIN" in s for s in stmts)
+
+    def test_pagina_por_cursor_tambem_carrega_tripulacao(self, session, flight_factory, tripulante_factory):
+        self._seed(session, flight_factory, tripulante_factory)
+        result = FlightService().get_flights_page_after(session, per_page=2)
+        assert [len(v["flight_pilots"]) for v in result["data"]] == [3, 3]
+
+
+class TestFlightListCount:
+    def test_total_e_reutilizado_enquanto_nao_ha_escritas(self, session, flight_factory, query_counter):
+        flight_factory()
+        FlightService().get_all_flights_paginated(session, page=1, per_page=10)
+        flight_factory(airtask="00A0002", tailnumber=16702)  # inserção direta, sem passar pelo serviço
+        with query_counter() as stmts:
+            result = FlightService().get_all_flights_paginated(session, page=1, per_page=10)
+        assert result["pagination"]["total"] == 1
+        assert not any("count(" in s for s in stmts)
+
+    def test_escrita_pelo_servico_invalida_total(self, session, flight_factory):
+        flight = flight_factory()
+        flight_factory(airtask="00A0002", tailnumber=16702)
+        assert FlightService().get_all_flights_paginated(session, page=1, per_page=10)["pagination"]["total"] == 2
+        FlightService().delete_flight(flight.fid, session)
+        assert FlightService().get_all_flights_paginated(session, page=1, per_page=10)["pagination"]["total"] == 1
+
+    def test_filtros_normalizados_partilham_entrada(self, session, flight_factory, query_counter):
+        flight_factory(airtask="00A1111")
+        FlightService().get_all_flights_paginated(session, page=1, per_page=10, airtask=" 00a ")
+        with query_counter() as stmts:
+            result = FlightService().get_all_flights_paginated(session, page=1, per_page=10, airtask="00A")
+        assert result["pagination"]["total"] == 1
+        assert not any("count(" in s for s in stmts)
+
+    def test_estimativa_sem_filtros_nao_conta(self, session, flight_factory, query_counter):
+        flight_factory()
+        with query_counter() as stmts:
+            result = FlightService().get_all_flights_paginated(session, page=1, per_page=10, count="estimate")
+        assert "estimated" in result["pagination"]
+        if result["pagination"]["estimated"]:
+            assert not any("count(" in s for s in stmts)
+        else:  # tabela ainda sem estatísticas: recorre à contagem exata
+            assert result["pagination"]["total"] == 1
+
+    def test_estimativa_com_filtros_usa_contagem_exata(self, session, flight_factory):
+        flight_factory(airtask="00A1111")
+        result = FlightService().get_all_flights_paginated(
+            session, page=1, per_page=10, airtask="00A", count="estimate"
+        )
+        assert result["pagination"]["total"] == 1
+        assert result["pagination"]["estimated"] is False
+
+    def test_modo_de_contagem_invalido_levanta_erro(self, session):
+        with pytest.raises(ValueError, match="count must be"):
+            FlightService().get_all_flights_paginated(session, page=1, per_page=10, count="aprox")
+
+
+class TestExportFlights:
+    def test_exporta_por_ordem_de_data_em_lotes(self, session, flight_factory, tripulante_factory):
+        tripulante = tripulante_factory()
+        datas = [date(2025, 3, 1), date(2025, 1, 1), date(2025, 2, 1)]
+        flights = [flight_factory(airtask=f"00A{i:04d}", tailnumber=16700 + i, date=d) for i, d in enumerate(datas)]
+        session.add(FlightPilots(flight_id=flights[0].fid, pilot_id=tripulante.nip, position="PC"))
+        session.flush()
+
+        batches = list(FlightService().export_flights(session, batch_size=2))
+
+        assert [len(b) for b in batches] == [2, 1]
+        voos = [v for b in batches for v in b]
+        assert [v["date"] for v in voos] == ["2025-01-01", "2025-02-01", "2025-03-01"]
+        assert [fp["nip"] for fp in voos[-1]["flight_pilots"]] == [tripulante.nip]
+
+    def test_le_a_base_de_dados_a_medida_que_e_consumido(self, session, flight_factory):
+        for i in range(3):
+            flight_factory(airtask=f"00A{i:04d}", tailnumber=16700 + i, date=date(2025, 1, 1 + i))
+        batches = FlightService().export_flights(session, batch_size=1)
+        assert len(next(batches)) == 1
+        assert len(list(batches)) == 2
+
+    def test_aplica_filtros_de_data_e_cauda(self, session, flight_factory):
+        flight_factory(airtask="00A0001", tailnumber=16701, date=date(2025, 1, 1))
+        flight_factory(airtask="00A0002", tailnumber=16702, date=date(2025, 6, 1))
+        flight_factory(airtask="00A0003", tailnumber=16701, date=date(2025, 12, 1))
+        batches = FlightService().export_flights(session, tail_number="16701", date_from="2025-02-01")
+        assert [v["airtask"] for b in batches for v in b] == ["00A0003"]
+
+    def test_filtro_invalido_levanta_erro_antes_de_iterar(self, session):
+        with pytest.raises(ValueError, match="date_to"):
+            FlightService().export_flights(session, date_to="31/12/2025")
+
+
+class TestFlightListSerializer:
+    """As listagens rápidas devolvem exatamente o mesmo JSON que Flight.to_json."""
+
+    def _seed(self, session, flight_factory, tripulante_factory, qualificacao_factory):
+        qual = qualificacao_factory(nome="QA1")
+        crew = [tripulante_factory(nip=99910 + i, name=f"Tripulante {i}") for i in range(2)]
+        flights = [
+            flight_factory(airtask=f"00A{i:04d}", tailnumber=16700 + i, date=date(2025, 2, 1 + i)) for i in range(3)
+        ]
+        session.add(
+            FlightPilots(
+                flight_id=flights[0].fid,
+                pilot_id=crew[0].nip,
+                position="PC",
+                day_landings=2,
+                vir="01:00",
+                qual1=str(qual.id),
+                qual2="999999",
+                qual3="nao-numerico",
+                qual4="",
+            )
+        )
+        session.add(FlightPilots(flight_id=flights[0].fid, pilot_id=crew[1].nip, position="CP", night_landings=1))
+        session.add(FlightPilots(flight_id=flights[1].fid, pilot_id=crew[1].nip, position="PC", qual1=str(qual.id)))
+        session.add(FlightAnomaly(flight_id=flights[0].fid, description="Avaria B"))
+        session.add(FlightAnomaly(flight_id=flights[0].fid, description="Avaria A"))
+        session.flush()
+        session.expire_all()
+        return qual, flights
+
+    @staticmethod
+    def _orm_json(session, fid):
+        from app.features.qualifications.catalog import get_qualification_catalog
+
+        flight = session.get(Flight, fid)
+        expected = flight.to_json(get_qualification_catalog(session).names_by_id)
+        expected["flight_pilots"].sort(key=lambda fp: fp["nip"])
+        return expected
+
+    def test_pagina_igual_a_to_json(self, session, flight_factory, tripulante_factory, qualificacao_factory):
+        qual, flights = self._seed(session, flight_factory, tripulante_factory, qualificacao_factory)
+        result = FlightService().get_all_flights_paginated(session, page=1, per_page=10)
+
+        assert [v["id"] for v in result["data"]] == [f.fid for f in reversed(flights)]
+        for voo in result["data"]:
+            voo["flight_pilots"].sort(key=lambda fp: fp["nip"])
+            assert voo == self._orm_json(session, voo["id"])
+        primeiro = result["data"][-1]
+        assert primeiro["anomalies"] == ["Avaria B", "Avaria A"]
+        assert primeiro["flight_pilots"][0]["QUAL1"] == "QA1"
+        assert primeiro["flight_pilots"][0]["QUAL2"] == "999999"
+        assert primeiro["flight_pilots"][0]["QUAL3"] == "nao-numerico"
+
+    def test_pesquisa_por_tripulante_igual_a_to_json(
+        self, session, flight_factory, tripulante_factory, qualificacao_factory
+    ):
+        _, flights = self._seed(session, flight_factory, tripulante_factory, qualificacao_factory)
+        rows = FlightService().get_flights_by_crew_search(session, "99911")
+
+        assert [r["flightId"] for r in rows] == [flights[1].fid, flights[0].fid]
+        for row in rows:
+            expected = next(
+                fp for fp in self._orm_json(session, row["flightId"])["flight_pilots"] if fp["nip"] == 99911
+            )
+            flight = session.get(Flight, row["flightId"])
+            expected.update(flightId=flight.fid, airtask=flight.airtask, date=flight.date.strftime("%Y-%m-%d"))
+            assert row == expected
+
+
+class TestGetFlightsPageAfter:
+    def test_sem_dados_devolve_pagina_vazia(self, session):
+        result = FlightService().get_flights_page_after(session, per_page=10)
+        assert result["data"] == []
+        assert result["pagination"]["next_cursor"] is None
+
+    def test_percorre_todas_as_paginas_sem_repetir(self, session, flight_factory):
+        for i in range(5):
+            flight_factory(airtask=f"00A{i:04d}", tailnumber=16700 + i, date=date(2025, 1, 1 + i % 2))
+        svc = FlightService()
+        seen: list[int] = []
+        after = None
+        while True:
+            page = svc.get_flights_page_after(session, per_page=2, after=after)
+            seen.extend(f["id"] for f in page["data"])
+            after = page["pagination"]["next_cursor"]
+            if after is None:
+                break
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+
+    def test_ordenado_por_data_e_id_desc(self, session, flight_factory):
+        f1 = flight_factory(airtask="00A0001", date=date(2025, 1, 1))
+        f2 = flight_factory(airtask="00A0002", tailnumber=16702, date=date(2025, 1, 1))
+        f3 = flight_factory(airtask="00A0003", tailnumber=16703, date=date(2025, 6, 1))
+        result = FlightService().get_flights_page_after(session, per_page=10)
+        assert [f["id"] for f in result["data"]] == [f3.fid, f2.fid, f1.fid]
+
+    def test_voo_novo_nao_desloca_pagina_seguinte(self, session, flight_factory):
+        for i in range(4):
+            flight_factory(airtask=f"00A{i:04d}", tailnumber=16700 + i, date=date(2025, 1, 1 + i))
+        svc = FlightService()
+        first = svc.get_flights_page_after(session, per_page=2)
+        flight_factory(airtask="00A9999", tailnumber=16799, date=date(2025, 12, 31))
+        second = svc.get_flights_page_after(session, per_page=2, after=first["pagination"]["next_cursor"])
+        assert [f["date"] for f in second["data"]] == ["2025-01-02", "2025-01-01"]
+
+    def test_aplica_filtros(self, session, flight_factory):
+        flight_factory(airtask="00A1111")
+        flight_factory(airtask="00B2222", tailnumber=16702)
+        result = FlightService().get_flights_page_after(session, per_page=10, airtask="00B")
+        assert [f["airtask"] for f in result["data"]] == ["00B2222"]
+
+    def test_cursor_invalido_levanta_erro(self, session):
+        with pytest.raises(ValueError, match="after cursor"):
+            FlightService().get_flights_page_after(session, per_page=10, after="???")
+
 
 class TestGetAnomalyDescriptions:
     def test_sem_anomalias_devolve_lista_vazia(self, session, flight_factory):
@@ -299,6 +594,54 @@ class TestGetFlightsByCrewSearch:
         assert len(result) == 1
         assert result[0]["nip"] == 99901
 
+    def test_pesquisa_por_nome_trata_curingas_literalmente(self, session, flight_factory, tripulante_factory):
+        tripulante = tripulante_factory(nip=99901, name="João Silva")
+        flight = flight_factory()
+        session.add(FlightPilots(flight_id=flight.fid, pilot_id=tripulante.nip, position="PC"))
+        session.flush()
+        assert FlightService().get_flights_by_crew_search(session, "jo_o") == []
+        assert len(FlightService().get_flights_by_crew_search(session, "silva")) == 1
+
+    def test_devolve_so_o_tripulante_correspondente_por_data_desc(self, session, flight_factory, tripulante_factory):
+        procurado = tripulante_factory(nip=99901, name="João Silva", email="a@esq502.pt")
+        outro = tripulante_factory(nip=99902, name="Rui Costa", email="b@esq502.pt")
+        antigo = flight_factory(airtask="00A0001", date=date(2025, 1, 10))
+        recente = flight_factory(airtask="00A0002", date=date(2025, 2, 10))
+        sem_procurado = flight_factory(airtask="00A0003", date=date(2025, 3, 10))
+        for flight in (antigo, recente):
+            session.add(FlightPilots(flight_id=flight.fid, pilot_id=procurado.nip, position="PC"))
+            session.add(FlightPilots(flight_id=flight.fid, pilot_id=outro.nip, position="CP"))
+        session.add(FlightPilots(flight_id=sem_procurado.fid, pilot_id=outro.nip, position="PC"))
+        session.flush()
+
+        result = FlightService().get_flights_by_crew_search(session, "99901")
+
+        assert [(r["airtask"], r["nip"]) for r in result] == [("00A0002", 99901), ("00A0001", 99901)]
+
+    def test_paginacao_por_cursor_percorre_todas_as_linhas(self, session, flight_factory, tripulante_factory):
+        tripulante = tripulante_factory(nip=99901)
+        for i in range(5):
+            flight = flight_factory(airtask=f"00A000{i}", date=date(2025, 1, 10 + i))
+            session.add(FlightPilots(flight_id=flight.fid, pilot_id=tripulante.nip, position="PC"))
+        session.flush()
+        service = FlightService()
+
+        primeira = service.get_flights_by_crew_search_page_after(session, "99901", per_page=2)
+        segunda = service.get_flights_by_crew_search_page_after(
+            session, "99901", per_page=2, after=primeira["pagination"]["next_cursor"]
+        )
+        terceira = service.get_flights_by_crew_search_page_after(
+            session, "99901", per_page=2, after=segunda["pagination"]["next_cursor"]
+        )
+
+        airtasks = [r["airtask"] for page in (primeira, segunda, terceira) for r in page["data"]]
+        assert airtasks == ["00A0004", "00A0003", "00A0002", "00A0001", "00A0000"]
+        assert terceira["pagination"]["next_cursor"] is None
+
+    def test_cursor_invalido_levanta_erro(self, session):
+        with pytest.raises(ValueError, match="Invalid after cursor"):
+            FlightService().get_flights_by_crew_search_page_after(session, "99901", per_page=10, after="???")
+
 
 class TestCreateFlight:
     def test_sem_chave_pilotos_retorna_mensagem(self, session):
@@ -322,6 +665,25 @@ class TestCreateFlight:
         result = FlightService().create_flight({**FLIGHT_DATA_BASE}, session)
         assert "already exists" in result["message"]
 
+    def test_duplicado_detetado_pela_restricao_sem_consulta_previa(self, session, flight_factory, query_counter):
+        flight_factory(airtask="00A0001", date=date(2025, 1, 15))
+        with query_counter() as stmts:
+            result = FlightService().create_flight({**FLIGHT_DATA_BASE, "flight_pilots": []}, session)
+        assert result == {"message": DUPLICATE_FLIGHT_MESSAGE}
+        assert not any(s.lstrip().startswith("SELECT") and "FROM flights_table" in s for s in stmts)
+
+    def test_duplicado_em_sqlite_retorna_mensagem_de_conflito(self, sqlite_session):
+        service = FlightService()
+        service.create_flight({**FLIGHT_DATA_BASE, "flight_pilots": []}, sqlite_session)
+        outro = service.create_flight({**UPDATE_DATA_BASE}, sqlite_session)["message"]
+
+        assert service.create_flight({**FLIGHT_DATA_BASE, "flight_pilots": []}, sqlite_session) == {
+            "message": DUPLICATE_FLIGHT_MESSAGE
+        }
+        assert service.update_flight(outro, {**FLIGHT_DATA_BASE, "flight_pilots": []}, sqlite_session) == {
+            "message": DUPLICATE_FLIGHT_UPDATE_MESSAGE
+        }
+
     def test_com_tripulante_valido_cria_flight_pilots(self, session, tripulante_factory):
         tripulante_factory(nip=99901)
         result = FlightService().create_flight(
@@ -390,6 +752,184 @@ class TestDeleteFlight:
         anomalias = session.execute(select(FlightAnomaly).where(FlightAnomaly.flight_id == flight.fid)).scalars().all()
         assert anomalias == []
 
+    def test_repoe_qualificacoes_da_tripulacao_numa_consulta_e_numa_escrita(
+        self, session, tripulante_factory, qualificacao_factory, query_counter
+    ):
+        from app.features.users.models import TripulanteQualificacao
+
+        tripulante_factory(nip=99901, email="a@esq502.pt")
+        tripulante_factory(nip=99902, email="b@esq502.pt")
+        qa = qualificacao_factory(nome="QA1")
+        qb = qualificacao_factory(nome="QB1")
+        atr = qualificacao_factory(nome="ATR", payload_key="ATR")
+        tripulacao = [
+            {"nip": nip, "position": "PC", "QUAL1": str(qa.id), "QUAL2": str(qb.id), "ATR": 1} for nip in (99901, 99902)
+        ]
+        service = FlightService()
+        service.create_flight({**FLIGHT_DATA_BASE, "flight_pilots": [{**tripulacao[0], "QUAL2": None}]}, session)
+        fid = service.create_flight({**UPDATE_DATA_BASE, "flight_pilots": tripulacao}, session)["message"]
+        session.expire_all()
+
+        with query_counter() as stmts:
+            service.delete_flight(fid, session)
+
+        assert sum("FROM flight_qualification_events" in s for s in stmts) == 1
+        assert sum(s.lstrip().startswith("UPDATE tripulante_qualificacoes") for s in stmts) == 1
+        rows = session.execute(
+            select(
+                TripulanteQualificacao.tripulante_id,
+                TripulanteQualificacao.qualificacao_id,
+                TripulanteQualificacao.data_ultima_validacao,
+            )
+        ).all()
+        inicio = date(year_init, 1, 1)
+        assert {tuple(r) for r in rows} == {
+            (99901, qa.id, date(2025, 1, 15)),
+            (99901, qb.id, inicio),
+            (99901, atr.id, date(2025, 1, 15)),
+            (99902, qa.id, inicio),
+            (99902, qb.id, inicio),
+            (99902, atr.id, inicio),
+        }
+
+    def test_repoe_qualificacoes_em_sqlite(self, sqlite_session):
+        from app.features.qualifications.models import Qualificacao
+        from app.features.users.models import Tripulante, TripulanteQualificacao
+        from app.shared.enums import GrupoQualificacoes, TipoTripulante
+
+        qa = Qualificacao(
+            nome="QA1", grupo=GrupoQualificacoes.CURRENCY, validade=180, tipo_aplicavel=TipoTripulante.PILOTO
+        )
+        sqlite_session.add_all(
+            [
+                Tripulante(
+                    nip=99901,
+                    name="Piloto Teste",
+                    rank="CAP",
+                    position="PC",
+                    tipo=TipoTripulante.PILOTO,
+                    email="piloto@esq502.pt",
+                    password="hashed_password_test",
+                ),
+                qa,
+            ]
+        )
+        sqlite_session.flush()
+        tripulacao = [{"nip": 99901, "position": "PC", "QUAL1": str(qa.id)}]
+        service = FlightService()
+        service.create_flight({**FLIGHT_DATA_BASE, "flight_pilots": tripulacao}, sqlite_session)
+        fid = service.create_flight({**UPDATE_DATA_BASE, "flight_pilots": tripulacao}, sqlite_session)["message"]
+
+        assert service.delete_flight(fid, sqlite_session) == {"deleted_id": f"Flight {fid}"}
+        pq = sqlite_session.execute(select(TripulanteQualificacao)).scalar_one()
+        sqlite_session.refresh(pq)
+        assert pq.data_ultima_validacao == date(2025, 1, 15)
+
+
+class TestCreateFlightsBatch:
+    def _lote(self, n, **extra):
+        return [
+            {
+                **FLIGHT_DATA_BASE,
+                "airtask": f"00B{i:04d}",
+                "date": f"2025-02-{i + 1:02d}",
+                "flight_pilots": [],
+                **extra,
+            }
+            for i in range(n)
+        ]
+
+    def test_cria_voos_tripulacao_e_anomalias_por_ordem(self, session, tripulante_factory, qualificacao_factory):
+        from app.features.users.models import TripulanteQualificacao
+
+        tripulante_factory(nip=99901)
+        qa = qualificacao_factory(nome="QA1")
+        lote = self._lote(
+            3, flight_pilots=[{"nip": 99901, "position": "PC", "QUAL1": str(qa.id)}], anomalies=["Radar off"]
+        )
+
+        results = FlightService().create_flights_batch(lote, session)
+
+        fids = [r["id"] for r in results]
+        voos = {f.fid: f for f in session.execute(select(Flight).where(Flight.fid.in_(fids))).scalars()}
+        assert [voos[fid].airtask for fid in fids] == ["00B0000", "00B0001", "00B0002"]
+        assert all(len(voos[fid].flight_pilots) == 1 and len(voos[fid].flight_anomalies) == 1 for fid in fids)
+        pq = session.execute(select(TripulanteQualificacao)).scalar_one()
+        assert pq.data_ultima_validacao == date(2025, 2, 3)
+
+    def test_duplicados_na_db_e_no_lote_sao_rejeitados_individualmente(self, session, flight_factory):
+        flight_factory(airtask="00B0000", date=date(2025, 2, 1))
+        lote = self._lote(2)
+        lote.append(dict(lote[1]))
+
+        results = FlightService().create_flights_batch(lote, session)
+
+        assert results[0] == {"message": DUPLICATE_FLIGHT_MESSAGE}
+        assert "id" in results[1]
+        assert results[2] == {"message": DUPLICATE_FLIGHT_MESSAGE}
+
+    def test_data_invalida_rejeita_so_esse_voo(self, session):
+        lote = self._lote(2)
+        lote[0]["date"] = "2025-13-45"
+
+        results = FlightService().create_flights_batch(lote, session)
+
+        assert "Invalid date" in results[0]["message"]
+        assert "id" in results[1]
+
+    def test_conflito_concorrente_so_marca_o_voo_duplicado(self, session, flight_factory, monkeypatch):
+        flight_factory(airtask="00B0000", date=date(2025, 2, 1))
+        session.commit()  # o voo concorrente sobrevive ao rollback do lote
+        find_existing = FlightRepository.find_existing_natural_keys
+        chamadas = []
+
+        def sem_ver_o_voo_concorrente(session, keys):
+            # A primeira verificação corre antes do INSERT concorrente
+            chamadas.append(1)
+            return set() if len(chamadas) == 1 else find_existing(session, keys)
+
+        monkeypatch.setattr(FlightRepository, "find_existing_natural_keys", staticmethod(sem_ver_o_voo_concorrente))
+
+        results = FlightService().create_flights_batch(self._lote(3), session)
+
+        assert results[0] == {"message": DUPLICATE_FLIGHT_MESSAGE}
+        assert "id" in results[1] and "id" in results[2]
+
+    def test_segundo_conflito_pede_para_repetir_o_lote(self, session, flight_factory, monkeypatch):
+        flight_factory(airtask="00B0000", date=date(2025, 2, 1))
+        session.commit()
+        monkeypatch.setattr(FlightRepository, "find_existing_natural_keys", staticmethod(lambda session, keys: set()))
+
+        results = FlightService().create_flights_batch(self._lote(3), session)
+
+        assert results == [{"message": BATCH_RETRY_MESSAGE}] * 3
+
+    def test_tripulante_repetido_rejeita_o_voo(self, session, tripulante_factory):
+        tripulante_factory(nip=99901)
+        tripulacao = [{"nip": 99901, "position": "PC"}, {"nip": 99901, "position": "CP"}]
+
+        (result,) = FlightService().create_flights_batch(self._lote(1, flight_pilots=tripulacao), session)
+
+        assert "more than once" in result["message"]
+
+    def test_numero_de_consultas_nao_cresce_com_o_lote(
+        self, session, tripulante_factory, qualificacao_factory, query_counter
+    ):
+        from app.features.qualifications.catalog import get_qualification_catalog
+
+        tripulante_factory(nip=99901)
+        qa = qualificacao_factory(nome="QA1")
+        get_qualification_catalog(session)
+        tripulacao = [{"nip": 99901, "position": "PC", "QUAL1": str(qa.id), "ATR": 1}]
+        contagens = []
+        for n, prefixo in ((2, "00C"), (8, "00D")):
+            lote = [{**voo, "airtask": prefixo + voo["airtask"][3:]} for voo in self._lote(n, flight_pilots=tripulacao)]
+            with query_counter() as stmts:
+                results = FlightService().create_flights_batch(lote, session)
+            assert all("id" in r for r in results)
+            contagens.append(len(stmts))
+        assert contagens[0] == contagens[1]
+
 
 class TestUpdateFlight:
     def test_voo_nao_encontrado_retorna_msg(self, session):
@@ -441,6 +981,181 @@ class TestUpdateFlight:
         assert len(anomalias) == 1
         assert anomalias[0].description == "Avaria nova"
 
+    def _dois_voos(self, session, tripulante_factory, qualificacao_factory):
+        tripulante_factory(nip=99901)
+        qa = qualificacao_factory(nome="QA1")
+        qb = qualificacao_factory(nome="QB1")
+        service = FlightService()
+        service.create_flight(
+            {**FLIGHT_DATA_BASE, "flight_pilots": [{"nip": 99901, "position": "PC", "QUAL1": str(qa.id)}]},
+            session,
+        )
+        tripulacao = [{"nip": 99901, "position": "PC", "QUAL1": str(qa.id), "QUAL2": str(qb.id)}]
+        fid = service.create_flight(
+            {**UPDATE_DATA_BASE, "flight_pilots": tripulacao},
+            session,
+        )["message"]
+        return qa, qb, fid, tripulacao
+
+    @staticmethod
+    def _datas(session):
+        from app.features.users.models import TripulanteQualificacao
+
+        session.expire_all()
+        rows = session.execute(
+            select(TripulanteQualificacao.qualificacao_id, TripulanteQualificacao.data_ultima_validacao)
+        ).all()
+        return dict(rows)
+
+    def test_edicao_sem_mudancas_de_qualificacao_nao_toca_qualificacoes(
+        self, session, tripulante_factory, qualificacao_factory, query_counter
+    ):
+        _, _, fid, tripulacao = self._dois_voos(session, tripulante_factory, qualificacao_factory)
+        session.expire_all()
+
+        with query_counter() as stmts:
+            FlightService().update_flight(
+                fid, {**UPDATE_DATA_BASE, "fuel": 1200, "destination": "LPPR", "flight_pilots": tripulacao}, session
+            )
+
+        assert not any("tripulante_qualificacoes" in s or "flight_qualification_events" in s for s in stmts)
+
+    def test_remover_qualificacao_so_recalcula_esse_par(self, session, tripulante_factory, qualificacao_factory):
+        qa, qb, fid, tripulacao = self._dois_voos(session, tripulante_factory, qualificacao_factory)
+
+        FlightService().update_flight(
+            fid, {**UPDATE_DATA_BASE, "flight_pilots": [{**tripulacao[0], "QUAL1": None}]}, session
+        )
+
+        # QA1 volta ao voo anterior; QB1 continua validada por este voo
+        assert self._datas(session) == {qa.id: date(2025, 1, 15), qb.id: date(2025, 6, 1)}
+
+    def test_mudar_data_recalcula_os_pares_do_voo(self, session, tripulante_factory, qualificacao_factory):
+        qa, qb, fid, tripulacao = self._dois_voos(session, tripulante_factory, qualificacao_factory)
+
+        FlightService().update_flight(
+            fid, {**UPDATE_DATA_BASE, "date": "2025-01-10", "flight_pilots": tripulacao}, session
+        )
+
+        assert self._datas(session) == {qa.id: date(2025, 1, 15), qb.id: date(2025, 1, 10)}
+
+    def test_remover_tripulante_recalcula_as_suas_qualificacoes(
+        self, session, tripulante_factory, qualificacao_factory
+    ):
+        qa, qb, fid, _ = self._dois_voos(session, tripulante_factory, qualificacao_factory)
+
+        FlightService().update_flight(fid, {**UPDATE_DATA_BASE, "flight_pilots": []}, session)
+
+        assert self._datas(session) == {qa.id: date(2025, 1, 15), qb.id: date(year_init, 1, 1)}
+
+
+class TestFlightQualificationEvents:
+    def _eventos(self, session):
+        rows = session.execute(
+            select(
+                FlightQualificationEvent.pilot_id,
+                FlightQualificationEvent.qualificacao_id,
+                FlightQualificationEvent.date,
+            )
+        ).all()
+        return {tuple(r) for r in rows}
+
+    def test_criacao_regista_quals_e_aterragens(self, session, tripulante_factory, qualificacao_factory):
+        tripulante_factory(nip=99901)
+        qa = qualificacao_factory(nome="QA1")
+        atr = qualificacao_factory(nome="ATR", payload_key="ATR")
+        FlightService().create_flight(
+            {**FLIGHT_DATA_BASE, "flight_pilots": [{"nip": 99901, "position": "PC", "QUAL1": str(qa.id), "ATR": 2}]},
+            session,
+        )
+        assert self._eventos(session) == {(99901, qa.id, date(2025, 1, 15)), (99901, atr.id, date(2025, 1, 15))}
+
+    def test_edicao_substitui_eventos_do_voo(self, session, tripulante_factory, qualificacao_factory):
+        tripulante_factory(nip=99901)
+        qa = qualificacao_factory(nome="QA1")
+        qb = qualificacao_factory(nome="QB1")
+        fid = FlightService().create_flight(
+            {**FLIGHT_DATA_BASE, "flight_pilots": [{"nip": 99901, "position": "PC", "QUAL1": str(qa.id)}]},
+            session,
+        )["message"]
+        FlightService().update_flight(
+            fid,
+            {**UPDATE_DATA_BASE, "flight_pilots": [{"nip": 99901, "position": "PC", "QUAL1": str(qb.id)}]},
+            session,
+        )
+        assert self._eventos(session) == {(99901, qb.id, date(2025, 6, 1))}
+
+    def test_apagar_voo_repoe_validacao_anterior(self, session, tripulante_factory, qualificacao_factory):
+        from app.features.users.models import TripulanteQualificacao
+
+        tripulante_factory(nip=99901)
+        qa = qualificacao_factory(nome="QA1")
+        service = FlightService()
+        pilotos = [{"nip": 99901, "position": "PC", "QUAL1": str(qa.id)}]
+        service.create_flight({**FLIGHT_DATA_BASE, "flight_pilots": pilotos}, session)
+        recente = service.create_flight(
+            {**FLIGHT_DATA_BASE, "airtask": "00A0002", "date": "2025-03-01", "flight_pilots": pilotos}, session
+        )["message"]
+
+        service.delete_flight(recente, session)
+
+        pq = session.execute(
+            select(TripulanteQualificacao).where(
+                TripulanteQualificacao.tripulante_id == 99901, TripulanteQualificacao.qualificacao_id == qa.id
+            )
+        ).scalar_one()
+        assert pq.data_ultima_validacao == date(2025, 1, 15)
+        assert self._eventos(session) == {(99901, qa.id, date(2025, 1, 15))}
+
+    def test_backfill_deriva_eventos_de_flight_pilots(
+        self, session, flight_factory, tripulante_factory, qualificacao_factory
+    ):
+        tripulante_factory(nip=99901)
+        qa = qualificacao_factory(nome="QA1")
+        flight = flight_factory()
+        session.add(
+            FlightPilots(flight_id=flight.fid, pilot_id=99901, position="PC", qual1=str(qa.id), qual2=str(qa.id))
+        )
+        session.flush()
+
+        inseridos = FlightRepository.replace_qualification_events(session)
+
+        assert inseridos == 1
+        assert self._eventos(session) == {(99901, qa.id, date(2025, 1, 15))}
+
+    def test_aterragens_so_validam_quals_de_pilotos(
+        self, session, flight_factory, tripulante_factory, qualificacao_factory
+    ):
+        from app.features.users.models import TripulanteQualificacao
+        from app.shared.enums import TipoTripulante
+
+        tripulante_factory(nip=99902, tipo=TipoTripulante.OPERADOR_CABINE, email="oc@esq502.pt")
+        qualificacao_factory(nome="ATR OC", payload_key="ATR", tipo_aplicavel=TipoTripulante.OPERADOR_CABINE)
+        flight = flight_factory()
+        session.add(FlightPilots(flight_id=flight.fid, pilot_id=99902, position="OC", day_landings=2))
+        session.flush()
+
+        # Como FlightService._validated_qualification_ids, que só aplica aterragens a pilotos
+        assert FlightRepository.replace_qualification_events(session) == 0
+        assert FlightRepository.upsert_last_validation_dates(session) == 0
+        assert session.scalars(select(TripulanteQualificacao)).all() == []
+
+    def test_ultima_validacao_excluindo_voo_usa_eventos(
+        self, session, flight_factory, tripulante_factory, qualificacao_factory
+    ):
+        tripulante_factory(nip=99901)
+        qa = qualificacao_factory(nome="QA1")
+        antigo = flight_factory(airtask="00A0001", date=date(2025, 1, 10))
+        recente = flight_factory(airtask="00A0002", date=date(2025, 2, 10))
+        for flight in (antigo, recente):
+            session.add(FlightPilots(flight_id=flight.fid, pilot_id=99901, position="PC", qual1=str(qa.id)))
+        session.flush()
+        FlightRepository.replace_qualification_events(session)
+
+        datas = FlightRepository.find_max_flight_dates_batch(session, 99901, {qa.id}, recente.fid)
+
+        assert datas == {qa.id: date(2025, 1, 10)}
+
 
 class TestReprocessAllQualifications:
     def test_com_voo_sem_pilotos_nao_tem_erros(self, session, flight_factory):
@@ -451,7 +1166,250 @@ class TestReprocessAllQualifications:
         assert result["errors"] == 0
 
     def test_sem_voos_devolve_zero(self, session):
-        # Nota: reprocess com 0 voos provoca ZeroDivisionError na linha de tempo médio.
-        # Este teste documenta o comportamento actual até ser corrigido.
-        with pytest.raises(ZeroDivisionError):
-            FlightService().reprocess_all_qualifications(session)
+        result = FlightService().reprocess_all_qualifications(session)
+        assert result["total_flights"] == 0
+        assert result["processed"] == 0
+        assert result["errors"] == 0
+
+    def test_resultado_igual_ao_ciclo_voo_a_voo(
+        self, session, flight_factory, tripulante_factory, qualificacao_factory
+    ):
+        from app.features.users.models import TripulanteQualificacao
+        from app.shared.enums import TipoTripulante
+
+        piloto = tripulante_factory(nip=99901, email="p@esq502.pt")
+        operador = tripulante_factory(
+            nip=99902, email="o@esq502.pt", tipo=TipoTripulante.OPERADOR_VIGILANCIA, position="OPV"
+        )
+        qa = qualificacao_factory(nome="QA1")
+        qb = qualificacao_factory(nome="QB1")
+        atr = qualificacao_factory(nome="ATR", payload_key="ATR")
+        atn = qualificacao_factory(nome="ATN", payload_key="ATN")
+        for i, dia in enumerate([date(2025, 1, 10), date(2025, 3, 5), date(2025, 2, 1)]):
+            flight = flight_factory(airtask=f"00A000{i}", date=dia)
+            session.add(
+                FlightPilots(
+                    flight_id=flight.fid,
+                    pilot_id=piloto.nip,
+                    position="PC",
+                    qual1=str(qa.id),
+                    qual2=str(qb.id) if i == 0 else None,
+                    day_landings=i,
+                    night_landings=1 if i == 2 else 0,
+                )
+            )
+            session.add(FlightPilots(flight_id=flight.fid, pilot_id=operador.nip, position="OPV", qual1=str(qb.id)))
+        # Data manual posterior ao último voo: o reprocessamento não a recua
+        session.add(
+            TripulanteQualificacao(
+                tripulante_id=operador.nip, qualificacao_id=qb.id, data_ultima_validacao=date(2026, 1, 1)
+            )
+        )
+        # Data anterior: avança
+        session.add(
+            TripulanteQualificacao(
+                tripulante_id=piloto.nip, qualificacao_id=qa.id, data_ultima_validacao=date(2024, 1, 1)
+            )
+        )
+        session.flush()
+
+        def estado():
+            session.expire_all()
+            rows = session.execute(
+                select(
+                    TripulanteQualificacao.tripulante_id,
+                    TripulanteQualificacao.qualificacao_id,
+                    TripulanteQualificacao.data_ultima_validacao,
+                )
+            ).all()
+            return {tuple(r) for r in rows}
+
+        inicial = estado()
+        _reprocessar_voo_a_voo(session)
+        esperado = estado()
+
+        session.execute(TripulanteQualificacao.__table__.delete())
+        session.execute(
+            TripulanteQualificacao.__table__.insert(),
+            [{"tripulante_id": t, "qualificacao_id": q, "data_ultima_validacao": d} for t, q, d in inicial],
+        )
+        resultado = FlightService().reprocess_all_qualifications(session)
+
+        assert estado() == esperado
+        assert esperado >= {
+            (99901, qa.id, date(2025, 3, 5)),
+            (99901, qb.id, date(2025, 1, 10)),
+            (99901, atr.id, date(2025, 3, 5)),
+            (99901, atn.id, date(2025, 2, 1)),
+            (99902, qb.id, date(2026, 1, 1)),
+        }
+        assert (resultado["total_flights"], resultado["processed"], resultado["errors"]) == (3, 3, 0)
+
+    def _voos_de_dois_pilotos(self, session, flight_factory, tripulante_factory, qualificacao_factory):
+        piloto_a = tripulante_factory(nip=99901, email="a@esq502.pt")
+        piloto_b = tripulante_factory(nip=99902, email="b@esq502.pt")
+        qa = qualificacao_factory(nome="QA1")
+        qb = qualificacao_factory(nome="QB1")
+        for i, dia in enumerate([date(2025, 1, 10), date(2025, 3, 5)]):
+            flight = flight_factory(airtask=f"00A000{i}", date=dia)
+            for piloto in (piloto_a, piloto_b):
+                session.add(
+                    FlightPilots(
+                        flight_id=flight.fid,
+                        pilot_id=piloto.nip,
+                        position="PC",
+                        qual1=str(qa.id),
+                        qual2=str(qb.id) if i == 0 else None,
+                    )
+                )
+        session.flush()
+        return qa, qb
+
+    @staticmethod
+    def _estado(session):
+        from app.features.users.models import TripulanteQualificacao
+
+        session.expire_all()
+        rows = session.execute(
+            select(
+                TripulanteQualificacao.tripulante_id,
+                TripulanteQualificacao.qualificacao_id,
+                TripulanteQualificacao.data_ultima_validacao,
+            )
+        ).all()
+        return {tuple(r) for r in rows}
+
+    def test_por_nip_so_atualiza_esse_tripulante(
+        self, session, flight_factory, tripulante_factory, qualificacao_factory
+    ):
+        qa, qb = self._voos_de_dois_pilotos(session, flight_factory, tripulante_factory, qualificacao_factory)
+
+        result = FlightService().reprocess_all_qualifications(session, nips=[99901])
+
+        assert result["total_flights"] == 2
+        assert self._estado(session) == {(99901, qa.id, date(2025, 3, 5)), (99901, qb.id, date(2025, 1, 10))}
+        eventos = session.execute(select(FlightQualificationEvent.pilot_id).distinct()).scalars().all()
+        assert eventos == [99901]
+
+    def test_por_qualificacao_e_data_so_atualiza_a_janela(
+        self, session, flight_factory, tripulante_factory, qualificacao_factory
+    ):
+        qa, qb = self._voos_de_dois_pilotos(session, flight_factory, tripulante_factory, qualificacao_factory)
+
+        result = FlightService().reprocess_all_qualifications(
+            session, qualificacao_ids=[qa.id, qb.id], since="2025-02-01"
+        )
+
+        # Só o voo de março está na janela e nele apenas QA1 foi validada
+        assert result["total_flights"] == 1
+        assert self._estado(session) == {(99901, qa.id, date(2025, 3, 5)), (99902, qa.id, date(2025, 3, 5))}
+
+    def test_ambito_igual_ao_reprocessamento_completo_para_os_pares_afetados(
+        self, session, flight_factory, tripulante_factory, qualificacao_factory
+    ):
+        from app.features.users.models import TripulanteQualificacao
+
+        self._voos_de_dois_pilotos(session, flight_factory, tripulante_factory, qualificacao_factory)
+        service = FlightService()
+        service.reprocess_all_qualifications(session)
+        completo = self._estado(session)
+        session.execute(FlightQualificationEvent.__table__.delete())
+        session.execute(TripulanteQualificacao.__table__.delete())
+
+        service.reprocess_all_qualifications(session, nips=[99901, 99902], since="2025-01-01")
+
+        assert self._estado(session) == completo
+
+    @pytest.mark.parametrize(
+        "scope",
+        [
+            {"nips": []},
+            {"nips": "99901"},
+            {"qualificacao_ids": ["x"]},
+            {"since": "01/02/2025"},
+        ],
+    )
+    def test_ambito_invalido_levanta_value_error(self, session, scope):
+        with pytest.raises(ValueError):
+            FlightService().reprocess_all_qualifications(session, **scope)
+
+
+class TestAddCrewBatch:
+    def _tripulacao(self, session, tripulante_factory, qualificacao_factory):
+        from app.features.qualifications.catalog import get_qualification_catalog
+
+        quals = [qualificacao_factory(nome=f"Q{i}") for i in range(6)]
+        qualificacao_factory(nome="ATR", payload_key="ATR")
+        pilots = []
+        for i in range(6):
+            tripulante_factory(nip=99901 + i, email=f"t{i}@esq502.pt")
+            pilots.append(
+                {
+                    "nip": 99901 + i,
+                    "position": "PC",
+                    "ATR": 2,
+                    **{f"QUAL{n + 1}": str(q.id) for n, q in enumerate(quals)},
+                }
+            )
+        get_qualification_catalog(session)  # aquece o catálogo
+        session.expire_all()
+        return quals, pilots
+
+    def test_criacao_usa_consultas_por_conjunto(
+        self, session, flight_factory, tripulante_factory, qualificacao_factory, query_counter
+    ):
+        from app.features.users.models import TripulanteQualificacao
+
+        quals, pilots = self._tripulacao(session, tripulante_factory, qualificacao_factory)
+        flight = flight_factory()
+
+        with query_counter() as stmts:
+            FlightService()._add_crew(session, flight, pilots)
+
+        selects = [s for s in stmts if s.lstrip().upper().startswith("SELECT")]
+        # tripulação do voo + tripulantes + qualificações existentes; inserções num único flush
+        assert len(selects) == 3
+        assert len(stmts) == 5
+        total = session.execute(select(func.count()).select_from(TripulanteQualificacao)).scalar_one()
+        assert total == 6 * 7
+
+    def test_edicao_usa_consultas_por_conjunto_e_avanca_datas(
+        self, session, flight_factory, tripulante_factory, qualificacao_factory, query_counter
+    ):
+        from app.features.users.models import TripulanteQualificacao
+
+        quals, pilots = self._tripulacao(session, tripulante_factory, qualificacao_factory)
+        antigo = flight_factory(airtask="00A0001", date=date(2025, 1, 1))
+        FlightService()._add_crew(session, antigo, pilots)
+        flight = flight_factory(airtask="00A0002", date=date(2025, 2, 1))
+        FlightService()._add_crew(session, flight, pilots)
+        session.expire_all()
+        flight = session.get(Flight, flight.fid)
+        flight.date = date(2025, 3, 1)
+        editados = [{**p, "position": "CP"} for p in pilots]
+
+        with query_counter() as stmts:
+            FlightService()._add_crew(session, flight, editados, edit=True)
+
+        selects = [s for s in stmts if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 3  # tripulação do voo + tripulantes + qualificações existentes
+        assert {fp.position for fp in flight.flight_pilots} == {"CP"}
+        datas = session.execute(select(TripulanteQualificacao.data_ultima_validacao).distinct()).scalars().all()
+        assert datas == [date(2025, 3, 1)]
+
+    def test_mesma_qualificacao_em_dois_slots_cria_um_registo(
+        self, session, flight_factory, tripulante_factory, qualificacao_factory
+    ):
+        from app.features.users.models import TripulanteQualificacao
+
+        tripulante_factory(nip=99901)
+        qa = qualificacao_factory(nome="QA1")
+        flight = flight_factory()
+
+        (fp,) = FlightService()._add_crew(
+            session, flight, [{"nip": 99901, "position": "PC", "QUAL1": str(qa.id), "QUAL2": str(qa.id)}]
+        )
+
+        assert fp.pilot_id == 99901
+        rows = session.execute(select(TripulanteQualificacao)).scalars().all()
+        assert [(r.tripulante_id, r.qualificacao_id) for r in rows] == [(99901, qa.id)]
@@ -0,0 +1,73 @@
+"""Tests for the process-wide qualification catalog."""
+
+import pytest
+
+from app.core import data_version
+from app.features.qualifications.catalog import (
+    DOMAIN,
+    get_qualification_catalog,
+    refresh_qualification_catalog,
+)
+from app.features.qualifications.service import QualificationService
+from app.shared.enums import TipoTripulante
+
+
+class TestQualificationCatalog:
+    def test_indexa_por_id_payload_key_e_tipo(self, session, qualificacao_factory):
+        qa1 = qualificacao_factory(nome="QA1")
+        atr = qualificacao_factory(nome="ATR", payload_key="ATR")
+        catalog = get_qualification_catalog(session)
+        assert catalog.by_id[qa1.id].nome == "QA1"
+        assert catalog.names_by_id[atr.id] == "ATR"
+        assert catalog.by_payload_key[("ATR", TipoTripulante.PILOTO)].id == atr.id
+        assert {e.id for e in catalog.by_tipo[TipoTripulante.PILOTO]} == {qa1.id, atr.id}
+
+    def test_e_imutavel(self, session, qualificacao_factory):
+        qa1 = qualificacao_factory()
+        catalog = get_qualification_catalog(session)
+        with pytest.raises(TypeError):
+            catalog.by_id[999] = catalog.by_id[qa1.id]  # type: ignore[index]
+        with pytest.raises(AttributeError):
+            catalog.by_id[qa1.id].nome = "outro"  # type: ignore[misc]
+
+    def test_reutiliza_snapshot_enquanto_versao_nao_muda(self, session, qualificacao_factory):
+        first = get_qualification_catalog(session)
+        qualificacao_factory(nome="NOVA")
+        assert get_qualification_catalog(session) is first
+
+    def test_bump_externo_invalida_snapshot(self, session, qualificacao_factory):
+        first = get_qualification_catalog(session)
+        q = qualificacao_factory(nome="NOVA")
+        # Simula outro worker a alterar qualificações
+        data_version.bump(DOMAIN)
+        second = get_qualification_catalog(session)
+        assert second is not first
+        assert q.id in second.by_id
+
+    def test_refresh_troca_snapshot_e_avanca_versao(self, session, qualificacao_factory):
+        first = get_qualification_catalog(session)
+        qualificacao_factory(nome="NOVA")
+        second = refresh_qualification_catalog(session)
+        assert second.version > first.version
+        assert get_qualification_catalog(session) is second
+
+
+class TestQualificationServiceRefreshesCatalog:
+    DATA = {"nome": "NVG", "validade": 90, "tipo_aplicavel": "PILOTO", "grupo": "CURRENCY"}
+
+    def test_criar_actualiza_catalogo(self, session):
+        get_qualification_catalog(session)
+        new_id = QualificationService().create_qualification(dict(self.DATA), session)["id"]
+        assert get_qualification_catalog(session).names_by_id[new_id] == "NVG"
+
+    def test_editar_actualiza_catalogo(self, session, qualificacao_factory):
+        q = qualificacao_factory(nome="ANTIGA")
+        get_qualification_catalog(session)
+        QualificationService().update_qualification(q.id, {"nome": "NOVA"}, session)
+        assert get_qualification_catalog(session).names_by_id[q.id] == "NOVA"
+
+    def test_apagar_actualiza_catalogo(self, session, qualificacao_factory):
+        q = qualificacao_factory()
+        get_qualification_catalog(session)
+        QualificationService().delete_qualification(q.id, session)
+        assert q.id not in get_qualification_catalog(session).by_id
@@ -1,5 +1,7 @@
 """Tests for users feature service layer."""
 
+import json
+
 import pytest
 from sqlalchemy import select
 
@@ -127,6 +129,26 @@ class TestGetAllUsersPaginated:
         nips_p2 = {u["nip"] for u in r2["data"]}
         assert nips_p1.isdisjoint(nips_p2)
 
+    def test_criar_utilizador_invalida_total_em_cache(self, session, tripulante_factory):
+        tripulante_factory(nip=11400, email="c0@esq502.pt")
+        assert UserService().get_all_users_paginated(session, page=1, per_page=10)["pagination"]["total"] == 1
+        novo = {
+            "nip": 11401,
+            "name": "Novo",
+            "tipo": "PILOTO",
+            "rank": "CAP",
+            "position": "PC",
+            "email": "c1@esq502.pt",
+        }
+        assert UserService().create_user(novo, session) == {"id": 11401}
+        assert UserService().get_all_users_paginated(session, page=1, per_page=10)["pagination"]["total"] == 2
+
+    def test_estimativa_indica_se_foi_usada(self, session, tripulante_factory):
+        tripulante_factory()
+        result = UserService().get_all_users_paginated(session, page=1, per_page=10, count="estimate")
+        assert isinstance(result["pagination"]["estimated"], bool)
+        assert isinstance(result["pagination"]["total"], int)
+
 
 # ---------------------------------------------------------------------------
 # create_user
@@ -343,3 +365,18 @@ class TestBackupUsers:
         monkeypatch.setattr(users_service_module, "FLASK_ENV", "development")
         result = UserService().backup_users(session)
         assert "flask_env" in result
+
+    def test_armazenamento_local_funciona_fora_de_producao(self, session, tripulante_factory, monkeypatch, tmp_path):
+        monkeypatch.setattr(users_service_module, "FLASK_ENV", "development")
+        monkeypatch.setenv("BACKUP_LOCAL_DIR", str(tmp_path))
+        tripulante = tripulante_factory()
+
+        result = UserService().backup_users(session, storage="local")
+
+        assert (result["storage"], result["file_id"]) == ("local", "1m/user_base.json")
+        dados = json.loads((tmp_path / "1m" / "user_base.json").read_text())
+        assert tripulante.nip in [user["nip"] for user in dados]
+
+    def test_armazenamento_desconhecido(self, session):
+        with pytest.raises(ValueError):
+            UserService().backup_users(session, storage="ftp")
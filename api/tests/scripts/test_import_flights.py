@@ -0,0 +1,65 @@
+"""Testes da importação de voos a partir de ficheiros .1m (scripts/import_flights.py)."""
+
+import base64
+import json
+from datetime import date
+
+from sqlalchemy import select
+
+from app.features.flights.models import FlightQualificationEvent
+from app.features.flights.service import FlightService
+from app.features.users.models import TripulanteQualificacao
+from scripts import import_flights
+
+NOME = "1M 00A0002 01Feb2025 1000 16701.1m"
+
+
+def _ficheiro_1m(tmp_path, dados: dict, nome: str = NOME) -> str:
+    caminho = tmp_path / nome
+    caminho.write_text(base64.b64encode(json.dumps(dados).encode()).decode())
+    return str(caminho)
+
+
+def _voo(airtask: str, data: str, qual_id: int) -> dict:
+    return {
+        "date": data,
+        "airtask": airtask,
+        "ATD": "10:00",
+        "tailNumber": 16701,
+        "flight_pilots": [{"nip": 99901, "position": "PC", "QUAL1": str(qual_id)}],
+    }
+
+
+class TestProcessOneFile:
+    def test_voo_importado_regista_eventos_de_qualificacao(
+        self, session, tmp_path, tripulante_factory, qualificacao_factory
+    ):
+        tripulante_factory()
+        qa = qualificacao_factory()
+        caminho = _ficheiro_1m(tmp_path, _voo("00A0002", "2025-02-01", qa.id))
+
+        n, erro, _ = import_flights.process_one_file(session, FlightService(), caminho, NOME, False, "T", False)
+
+        assert (n, erro) == (1, None)
+        eventos = session.execute(select(FlightQualificationEvent.pilot_id, FlightQualificationEvent.date)).all()
+        assert eventos == [(99901, date(2025, 2, 1))]
+
+    def test_apagar_outro_voo_repoe_a_data_do_voo_importado(
+        self, session, tmp_path, tripulante_factory, qualificacao_factory
+    ):
+        tripulante_factory()
+        qa = qualificacao_factory()
+        service = FlightService()
+        fid = service.create_flight(_voo("00A0001", "2025-03-01", qa.id), session)["message"]
+        caminho = _ficheiro_1m(tmp_path, _voo("00A0002", "2025-02-01", qa.id))
+        import_flights.process_one_file(session, service, caminho, NOME, False, "T", False)
+        session.flush()
+
+        service.delete_flight(fid, session)
+
+        data = session.execute(
+            select(TripulanteQualificacao.data_ultima_validacao).where(
+                TripulanteQualificacao.tripulante_id == 99901, TripulanteQualificacao.qualificacao_id == qa.id
+            )
+        ).scalar_one()
+        assert data == date(2025, 2, 1)
@@ -0,0 +1,85 @@
+"""Testes do ETag por versão de dados (app/shared/http_cache.py)."""
+
+from flask import jsonify
+
+from app.core import data_version
+from app.shared.http_cache import conditional_get
+
+
+def _view_contadora():
+    chamadas = []
+
+    @conditional_get(data_version.FLIGHTS)
+    def view():
+        chamadas.append(1)
+        return jsonify({"ok": True}), 200
+
+    return view, chamadas
+
+
+class TestConditionalGet:
+    def test_devolve_etag_fraco_e_cache_control(self, flask_app):
+        view, _ = _view_contadora()
+        with flask_app.test_request_context("/api/flights?page=1"):
+            response = view()
+        assert response.status_code == 200
+        assert response.headers["ETag"].startswith('W/"')
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+    def test_if_none_match_igual_devolve_304_sem_chamar_a_view(self, flask_app):
+        view, chamadas = _view_contadora()
+        with flask_app.test_request_context("/api/flights?page=1"):
+            etag = view().headers["ETag"]
+        with flask_app.test_request_context("/api/flights?page=1", headers={"If-None-Match": etag}):
+            response = view()
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert len(chamadas) == 1
+
+    def test_escrita_no_dominio_muda_o_etag(self, flask_app):
+        view, chamadas = _view_contadora()
+        with flask_app.test_request_context("/api/flights"):
+            etag = view().headers["ETag"]
+        data_version.bump(data_version.FLIGHTS)
+        with flask_app.test_request_context("/api/flights", headers={"If-None-Match": etag}):
+            response = view()
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert len(chamadas) == 2
+
+    def test_etag_depende_dos_parametros_do_pedido(self, flask_app):
+        view, _ = _view_contadora()
+        with flask_app.test_request_context("/api/flights?page=1"):
+            primeira = view().headers["ETag"]
+        with flask_app.test_request_context("/api/flights?page=2"):
+            segunda = view().headers["ETag"]
+        assert primeira != segunda
+
+    def test_resposta_de_erro_nao_leva_etag(self, flask_app):
+        @conditional_get(data_version.FLIGHTS)
+        def view():
+            return jsonify({"message": "erro"}), 400
+
+        with flask_app.test_request_context("/api/flights"):
+            response = view()
+        assert response.status_code == 400
+        assert "ETag" not in response.headers
+
+    def test_sem_dominios_usa_hash_do_conteudo(self, flask_app):
+        @conditional_get()
+        def view():
+            return jsonify({"tipos": ["PILOTO"]}), 200
+
+        with flask_app.test_request_context("/api/listas"):
+            etag = view().headers["ETag"]
+        with flask_app.test_request_context("/api/listas", headers={"If-None-Match": etag}):
+            response = view()
+        assert response.status_code == 304
+
+
+class TestDataVersionInicial:
+    def test_dominio_sem_carimbo_comeca_no_relogio_e_mantem_se(self):
+        primeira = data_version.current(data_version.QUALIFICACOES)
+        assert primeira > 0
+        assert data_version.current(data_version.QUALIFICACOES) == primeira
+        assert data_version.bump(data_version.QUALIFICACOES) > primeira
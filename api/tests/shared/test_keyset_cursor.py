@@ -0,0 +1,28 @@
+"""Testes dos cursores de paginação por keyset (app/shared/keyset_cursor.py)."""
+
+from datetime import date
+
+import pytest
+
+from app.shared.keyset_cursor import decode_keyset_cursor, encode_keyset_cursor
+
+
+class TestKeysetCursor:
+    def test_ida_e_volta(self):
+        token = encode_keyset_cursor(date(2025, 3, 9), 1234)
+        assert decode_keyset_cursor(token, 1) == (date(2025, 3, 9), 1234)
+
+    def test_ida_e_volta_com_varios_ids(self):
+        token = encode_keyset_cursor(date(2025, 3, 9), 1234, 99901)
+        assert decode_keyset_cursor(token, 2) == (date(2025, 3, 9), 1234, 99901)
+
+    def test_token_e_opaco(self):
+        assert "2025" not in encode_keyset_cursor(date(2025, 3, 9), 1234)
+
+    def test_token_invalido_levanta_erro(self):
+        with pytest.raises(ValueError, match="Invalid after cursor"):
+            decode_keyset_cursor("nao-e-um-cursor", 1)
+
+    def test_numero_de_ids_diferente_levanta_erro(self):
+        with pytest.raises(ValueError, match="Invalid after cursor"):
+            decode_keyset_cursor(encode_keyset_cursor(date(2025, 3, 9), 1234), 2)
@@ -0,0 +1,107 @@
+"""Testes da cache de clientes e pastas do Google Drive (app/utils/gdrive.py)."""
+
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils import gdrive
+
+
+class _Request:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        return self.result
+
+
+class FakeFiles:
+    """files() of a Drive client holding folders in memory; counts list/create calls."""
+
+    def __init__(self):
+        self.folders: dict[tuple[str, str], str] = {}
+        self.lists = 0
+        self.creates = 0
+        self._lock = threading.Lock()
+
+    def list(self, q, fields, **kwargs):
+        with self._lock:
+            self.lists += 1
+            name, parent = re.match(r"name = '(.*?)' .* and '(.*?)' in parents", q).groups()
+            folder_id = self.folders.get((parent, name))
+        return _Request({"files": [{"id": folder_id, "name": name}] if folder_id else []})
+
+    def create(self, body, fields):
+        with self._lock:
+            self.creates += 1
+            key = (body["parents"][0], body["name"])
+            folder_id = self.folders.setdefault(key, f"id-{len(self.folders)}")
+        return _Request({"id": folder_id})
+
+
+class FakeService:
+    def __init__(self):
+        self.files_api = FakeFiles()
+
+    def files(self):
+        return self.files_api
+
+
+@pytest.fixture(autouse=True)
+def _cache_limpa():
+    gdrive.clear_folder_cache()
+    yield
+    gdrive.clear_folder_cache()
+
+
+class TestGetDayFolder:
+    def test_ficheiros_do_mesmo_dia_resolvem_pastas_uma_vez(self):
+        service = FakeService()
+        ids = {gdrive.get_day_folder(service, "root", f"1M 00A{i:04d} 07Apr2025 1000 16701.1m") for i in range(20)}
+        assert len(ids) == 1
+        # ano, mês e dia: uma procura e uma criação cada
+        assert (service.files_api.lists, service.files_api.creates) == (3, 3)
+
+    def test_um_ano_faz_uma_procura_por_dia(self):
+        service = FakeService()
+        dias = [(f"{d:02d}", m) for m in ("Jan", "Feb", "Mar") for d in range(1, 29)]
+        for dia, mes in dias:
+            for atd in ("1000", "1400"):
+                gdrive.get_day_folder(service, "root", f"1M 00A0001 {dia}{mes}2025 {atd} 16701.1m")
+        assert service.files_api.lists == len(dias) + 3 + 1
+
+    def test_pasta_existente_no_drive_nao_e_criada(self):
+        service = FakeService()
+        service.files_api.folders[("root", "2025")] = "ano-existente"
+        assert gdrive.get_or_create_folder(service, "root", "2025") == "ano-existente"
+        assert service.files_api.creates == 0
+
+    def test_threads_concorrentes_criam_a_pasta_uma_vez(self):
+        service = FakeService()
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            ids = set(pool.map(lambda _: gdrive.get_day_folder(service, "root", "1M X 07Apr2025 1000 1.1m"), range(64)))
+        assert len(ids) == 1
+        assert service.files_api.creates == 3
+
+
+class TestDriveService:
+    def test_cliente_reutilizado_por_thread_e_credenciais_lidas_uma_vez(self, monkeypatch):
+        leituras = []
+        monkeypatch.setattr(gdrive, "_credentials", None)
+        monkeypatch.setattr(gdrive, "_thread_local", threading.local())
+        monkeypatch.setattr(
+            gdrive.service_account.Credentials,
+            "from_service_account_file",
+            lambda *args, **kwargs: leituras.append(args) or "creds",
+        )
+        monkeypatch.setattr(gdrive, "build", lambda *args, **kwargs: object())
+
+        principal = {gdrive.get_drive_service() for _ in range(3)}
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            outra_thread = pool.submit(gdrive.get_drive_service).result()
+
+        assert len(principal) == 1
+        assert outra_thread not in principal
+        assert len(leituras) == 1
@@ -0,0 +1,299 @@
+"""Testes dos pedidos em lote ao Google Drive contra um servidor HTTP local que imita a API."""
+
+import base64
+import email.parser
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httplib2
+import pytest
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+from app.features.db_management.backup_pipeline import (
+    FlightBackupItem,
+    RenderedFlight,
+    reserve_drive_files,
+    upload_flight_to_drive,
+)
+from app.utils import gdrive
+
+FOLDER = "application/vnd.google-apps.folder"
+
+
+class FakeDrive:
+    """Drive files held in memory; counts HTTP requests and the calls inside batches."""
+
+    def __init__(self):
+        self.files: dict[str, dict] = {}
+        self.http_requests: list[tuple[str, str]] = []
+        self.batch_sizes: list[int] = []
+        self.failing_uploads = False
+        self._lock = threading.Lock()
+
+    def count(self, method: str, path: str) -> int:
+        return sum(1 for m, p in self.http_requests if m == method and p.startswith(path))
+
+    def children(self, parent: str, mimetype: str | None = None) -> list[dict]:
+        return [
+            f for f in self.files.values() if parent in f["parents"] and (mimetype is None or f["mimeType"] == mimetype)
+        ]
+
+    def call(self, method: str, url: str, content_type: str, body: bytes) -> tuple[int, dict]:
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        with self._lock:
+            if method == "GET" and parsed.path == "/drive/v3/files":
+                return 200, {"files": self._list(query["q"][0])}
+            if method == "POST" and parsed.path in ("/drive/v3/files", "/upload/drive/v3/files"):
+                metadata, content = self._body(content_type, body)
+                file_id = f"id-{len(self.files)}"
+                self.files[file_id] = {
+                    "id": file_id,
+                    "name": metadata["name"],
+                    "parents": metadata.get("parents", []),
+                    "mimeType": metadata.get("mimeType", "application/octet-stream"),
+                    "content": content,
+                }
+                return 200, {"id": file_id}
+            match = re.fullmatch(r"/upload/drive/v3/files/([^/]+)", parsed.path)
+            if method == "PATCH" and match:
+                if self.failing_uploads:
+                    return 500, {"error": {"code": 500, "message": "Backend Error"}}
+                if match.group(1) not in self.files:
+                    return 404, {"error": {"code": 404, "message": "File not found"}}
+                media_only = query.get("uploadType") == ["media"]
+                content = body if media_only else self._body(content_type, body)[1]
+                self.files[match.group(1)]["content"] = content
+                return 200, {"id": match.group(1)}
+        return 400, {"error": {"code": 400, "message": f"unexpected {method} {url}"}}
+
+    def _list(self, q: str) -> list[dict]:
+        if "name = " not in q:
+            # Listagem de list_app_file_ids: todos os ficheiros, com o tamanho
+            return [
+                {"id": f["id"], "size": str(len(f["content"] or b""))}
+                for f in self.files.values()
+                if f["mimeType"] != FOLDER
+            ]
+        name, parent = re.match(r"name = '(.*?)' .*'(.*?)' in parents", q).groups()
+        folders_only = f"mimeType = '{FOLDER}'" in q
+        return [
+            {"id": f["id"], "name": f["name"]}
+            for f in self.children(parent, FOLDER if folders_only else None)
+            if f["name"] == name
+        ]
+
+    @staticmethod
+    def _body(content_type: str, body: bytes) -> tuple[dict, bytes | None]:
+        if content_type.startswith("multipart/related"):
+            message = email.parser.BytesParser().parsebytes(
+                b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+            )
+            metadata, media = message.get_payload()
+            content = media.get_payload(decode=True)
+            return json.loads(metadata.get_payload()), content
+        if content_type.startswith("application/json"):
+            return json.loads(body or b"{}"), None
+        return {}, body
+
+    def batch(self, content_type: str, body: bytes) -> tuple[str, bytes]:
+        message = email.parser.BytesParser().parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+        parts = message.get_payload()
+        self.batch_sizes.append(len(parts))
+        if len(parts) > gdrive.BATCH_LIMIT:
+            raise ValueError("too many calls in one batch")
+        boundary = "fake_batch_boundary"
+        out = []
+        for part in parts:
+            request_line, rest = part.get_payload().split("\n", 1)
+            method, url, _ = request_line.split(" ")
+            headers, _, inner_body = rest.partition("\n\n")
+            inner_type = re.search(r"(?im)^content-type: (.*)$", headers).group(1).strip()
+            status, result = self.call(method, url, inner_type, inner_body.encode())
+            content_id = part["Content-ID"][1:-1]
+            out.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n\r\n{json.dumps(result)}\r\n"
+            )
+        out.append(f"--{boundary}--\r\n")
+        return f"multipart/mixed; boundary={boundary}", "".join(out).encode()
+
+
+def _handler(drive: FakeDrive):
+    class Handler(BaseHTTPRequestHandler):
+        def _handle(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            drive.http_requests.append((self.command, self.path))
+            content_type = self.headers.get("Content-Type", "")
+            if self.path == "/batch/drive/v3":
+                content_type, payload = drive.batch(content_type, body)
+                status = 200
+            else:
+                status, result = drive.call(self.command, self.path, content_type, body)
+                content_type, payload = "application/json", json.dumps(result).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PATCH = _handle  # noqa: N815
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def drive(monkeypatch):
+    fake = FakeDrive()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(fake))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    document = json.loads(get_static_doc("drive", "v3"))
+    document["rootUrl"] = f"http://127.0.0.1:{server.server_port}/"
+    local = threading.local()
+
+    def service():
+        # Um cliente por thread, como gdrive.get_drive_service
+        if not hasattr(local, "service"):
+            local.service = build_from_document(document, http=httplib2.Http())
+        return local.service
+
+    monkeypatch.setattr(gdrive, "get_drive_service", service)
+    monkeypatch.setattr(gdrive, "ID_PASTA_VOO", "root-1m")
+    monkeypatch.setattr(gdrive, "ID_PASTA_PDF", "root-pdf")
+    gdrive.clear_folder_cache()
+    yield fake
+    gdrive.clear_folder_cache()
+    server.shutdown()
+    server.server_close()
+
+
+def _nome(n: int, dia: int = 7) -> str:
+    return f"1M 00A{n:04d} {dia:02d}Apr2025 1000 16701.1m"
+
+
+class TestExecuteBatch:
+    def test_agrupa_ate_100_chamadas_por_pedido_http(self, drive):
+        service = gdrive.get_drive_service()
+        for n in range(5):
+            drive.files[f"f{n}"] = {"id": f"f{n}", "name": f"n{n}", "parents": ["p"], "mimeType": "x"}
+
+        pedidos = [service.files().list(q=f"name = 'n{n % 10}' and 'p' in parents") for n in range(250)]
+        respostas = gdrive.execute_batch(service, pedidos)
+
+        assert drive.batch_sizes == [100, 100, 50]
+        assert len(drive.http_requests) == 3
+        assert respostas[3] == {"files": [{"id": "f3", "name": "n3"}]}
+        assert respostas[7] == {"files": []}
+
+    def test_erro_de_uma_chamada_e_devolvido_na_sua_posicao(self, drive):
+        service = gdrive.get_drive_service()
+        respostas = gdrive.execute_batch(
+            service, [service.files().list(q="name = 'a' and 'p' in parents"), service.files().get(fileId="x")]
+        )
+        assert respostas[0] == {"files": []}
+        assert isinstance(respostas[1], gdrive.HttpError)
+
+
+class TestReserveFlightFiles:
+    def test_150_voos_em_pedidos_agrupados(self, drive):
+        nomes = [_nome(n, dia=1 + n % 3) for n in range(150)]
+
+        ids = gdrive.reserve_flight_files([(nome, "root-1m", gdrive.MIMETYPE_1M) for nome in nomes])
+
+        # Pastas: procura + criação por nível (ano, mês, dia); ficheiros: 2 lotes de procura + 2 de criação
+        assert len(drive.http_requests) == 3 * 2 + 2 + 2
+        assert drive.count("POST", "/batch/") == len(drive.http_requests)
+        assert len(set(ids)) == 150
+        dias = drive.children(drive.children(drive.children("root-1m")[0]["id"])[0]["id"])
+        assert sorted(d["name"] for d in dias) == ["01", "02", "03"]
+        assert {drive.files[file_id]["parents"][0] for file_id in ids} == {d["id"] for d in dias}
+
+        # Segunda vez: pastas em cache e ficheiros encontrados pelo nome
+        drive.http_requests.clear()
+        assert gdrive.reserve_flight_files([(nome, "root-1m", gdrive.MIMETYPE_1M) for nome in nomes]) == ids
+        assert drive.batch_sizes[-2:] == [100, 50]
+        assert len(drive.http_requests) == 2
+
+    def test_ficheiro_existente_nao_e_duplicado(self, drive):
+        (primeiro,) = gdrive.reserve_flight_files([(_nome(1), "root-1m", gdrive.MIMETYPE_1M)])
+        gdrive.clear_folder_cache()
+        (segundo,) = gdrive.reserve_flight_files([(_nome(1), "root-1m", gdrive.MIMETYPE_1M)])
+        assert primeiro == segundo
+        assert sum(1 for f in drive.files.values() if f["name"] == _nome(1)) == 1
+
+
+class TestBackupComLotes:
+    def test_rebackup_envia_so_conteudos_depois_de_reservar(self, drive):
+        items = [FlightBackupItem(_nome(n), {"airtask": f"00A{n:04d}"}, {"airtask": "x"}) for n in range(10)]
+
+        reservados = reserve_drive_files(items)
+        assert all(item.drive_file_id and item.pdf_drive_file_id for item in reservados)
+        drive.http_requests.clear()
+
+        for item in reservados:
+            upload_flight_to_drive(RenderedFlight(item, b"%PDF-fake"))
+
+        # Um pedido por ficheiro, só com o conteúdo
+        assert len(drive.http_requests) == 20
+        assert drive.count("PATCH", "/upload/drive/v3/files/") == 20
+        item = reservados[0]
+        assert json.loads(base64.b64decode(drive.files[item.drive_file_id]["content"])) == {"airtask": "00A0000"}
+        assert drive.files[item.pdf_drive_file_id]["content"] == b"%PDF-fake"
+        assert drive.files[item.pdf_drive_file_id]["name"] == _nome(0).replace(".1m", ".pdf")
+
+    def test_envio_falhado_nao_conta_como_copia(self, drive):
+        (item,) = reserve_drive_files([FlightBackupItem(_nome(1), {"airtask": "00A0001"}, {"airtask": "x"})])
+        drive.failing_uploads = True
+
+        with pytest.raises(gdrive.HttpError):
+            upload_flight_to_drive(RenderedFlight(item, b"%PDF-fake"))
+
+        # Os ficheiros reservados ficaram vazios e não contam como copiados
+        assert drive.files[item.drive_file_id]["content"] is None
+        assert gdrive.list_app_file_ids() == set()
+
+        drive.failing_uploads = False
+        upload_flight_to_drive(RenderedFlight(item, b"%PDF-fake"))
+        assert gdrive.list_app_file_ids() == {item.drive_file_id, item.pdf_drive_file_id}
+
+    def test_backup_users_atualiza_o_mesmo_ficheiro(self, drive):
+        primeiro = gdrive.enviar_json_para_pasta([{"nip": 1}], "user_base.json", "root-1m")
+        # Criado já com o conteúdo: procura + um único envio
+        assert [m for m, _ in drive.http_requests] == ["GET", "POST"]
+        assert json.loads(drive.files[primeiro]["content"]) == [{"nip": 1}]
+        drive.http_requests.clear()
+
+        segundo = gdrive.enviar_json_para_pasta([{"nip": 2}], "user_base.json", "root-1m")
+
+        assert primeiro == segundo
+        assert json.loads(drive.files[segundo]["content"]) == [{"nip": 2}]
+        assert [m for m, _ in drive.http_requests] == ["GET", "PATCH"]
+
+
+class TestPastasConcorrentes:
+    def test_lotes_e_envios_individuais_nao_duplicam_pastas(self, drive):
+        nomes = [_nome(n, dia=1 + n % 2) for n in range(20)]
+
+        def lote(_):
+            gdrive.reserve_flight_files([(nome, "root-1m", gdrive.MIMETYPE_1M) for nome in nomes])
+
+        def individual(nome):
+            gdrive.get_day_folder(gdrive.get_drive_service(), "root-1m", nome)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futuros = [pool.submit(lote, n) for n in range(4)] + [pool.submit(individual, nome) for nome in nomes]
+            for futuro in futuros:
+                futuro.result()
+
+        pastas = [f for f in drive.files.values() if f["mimeType"] == FOLDER]
+        assert sorted(f["name"] for f in pastas) == ["01", "02", "2025", "Apr"]
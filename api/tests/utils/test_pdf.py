@@ -0,0 +1,97 @@
+"""Testes do renderizador de PDFs de voo (app/utils/pdf.py)."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+
+from app.utils import pdf
+
+VOO = {
+    "airtask": "00A1731",
+    "date": "2025-04-07",
+    "origin": "LPPT",
+    "destination": "LPFR",
+    "ATD": "12:05",
+    "ATA": "13:05",
+    "ATE": "01:00",
+    "flightType": "SAR",
+    "flightAction": "OPER",
+    "tailNumber": 16701,
+    "numberOfCrew": 2,
+    "flight_pilots": [
+        {"name": "Tiago Branco", "nip": 135885, "rank": "CAP", "position": "PC", "QUAL1": "QA1", "BSKIT": True},
+        {"name": "Pedro Andrade", "nip": 135886, "rank": "TEN", "position": "CP", "ATR": 2},
+    ],
+}
+
+
+@pytest.fixture(scope="module")
+def renderer():
+    return pdf.FlightPdfRenderer()
+
+
+def _texto(buffer, page=0) -> list[str]:
+    return sorted(PdfReader(buffer).pages[page].extract_text().split())
+
+
+class _CanvasEspiao:
+    def __init__(self):
+        self.strings: list[tuple[float, float, str]] = []
+
+    def setFont(self, *args):  # noqa: N802
+        pass
+
+    def drawString(self, x, y, text):  # noqa: N802
+        self.strings.append((x, y, text))
+
+
+class TestFlightPdfRenderer:
+    def test_mesmo_conteudo_que_o_pipeline_antigo(self, renderer):
+        antigo = pdf.combinar_template_e_conteudo(pdf.TEMPLATE_PDF_PATH, pdf.gerar_pdf_conteudo_em_memoria(VOO))
+        novo = renderer.render(VOO)
+        assert len(PdfReader(novo).pages) == 1
+        assert _texto(novo) == _texto(antigo)
+        assert "135886" in _texto(novo)
+
+    def test_renderizacoes_seguidas_nao_acumulam_conteudo(self, renderer):
+        renderer.render({**VOO, "airtask": "00A9999"})
+        texto = _texto(renderer.render(VOO))
+        assert "00A9999" not in texto
+        assert "00A1731" in texto
+
+    def test_render_many_e_documento_com_varias_paginas(self, renderer):
+        voos = [{**VOO, "airtask": f"00A{i:04d}"} for i in range(3)]
+        assert len(renderer.render_many(voos)) == 3
+        documento = renderer.render_document(voos)
+        assert len(PdfReader(documento).pages) == 3
+        for i in range(3):
+            assert f"00A{i:04d}" in _texto(documento, i)
+
+    def test_threads_concorrentes(self, renderer):
+        voos = [{**VOO, "airtask": f"00B{i:04d}"} for i in range(8)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            buffers = list(pool.map(renderer.render, voos))
+        for voo, buffer in zip(voos, buffers, strict=True):
+            assert voo["airtask"] in _texto(buffer)
+
+
+class TestAddObject:
+    def test_devolve_referencia_ao_objeto(self):
+        writer = PdfWriter()
+        stream = pdf._stream(b"q Q")
+        assert pdf._add_object(writer, stream).get_object() is stream
+
+    def test_versao_nao_suportada_sem_api_publica(self, monkeypatch):
+        monkeypatch.setattr(pdf.PyPDF2, "__version__", "4.0.0")
+        with pytest.raises(RuntimeError, match="4.0.0"):
+            pdf._add_object(PdfWriter(), pdf._stream(b""))
+
+
+class TestDesenharVoo:
+    def test_tripulantes_iguais_ficam_em_linhas_diferentes(self):
+        tripulante = {"nip": 135885, "name": "Tiago Branco"}
+        canvas = _CanvasEspiao()
+        pdf._desenhar_voo(canvas, {"flight_pilots": [tripulante, dict(tripulante)]})
+        linhas = sorted({y for x, y, text in canvas.strings if text == "135885"}, reverse=True)
+        assert linhas == [356, 342]